@@ -7,6 +7,7 @@ from datetime import datetime
 import io
 
 from backend.core.ocr.ocr_service import OCRService, OCRRequest, OCRResponse
+from backend.core.ocr.ocr_service import get_ocr_service as get_shared_ocr_service
 from backend.core.ocr.quality_assurance import get_quality_assurance, QualityAssessmentConfig
 from backend.utils.logger import get_logger
 from backend.utils.auth import get_current_user
@@ -22,7 +23,8 @@ router = APIRouter(prefix="/api/ocr", tags=["OCR"])
 
 # 依赖注入
 def get_ocr_service() -> OCRService:
-    return OCRService()
+    # 共享实例，页面缓存及其命中统计在请求间保留
+    return get_shared_ocr_service()
 
 def get_document_service() -> DocumentService:
     return DocumentService()
@@ -71,6 +71,10 @@ class Settings(BaseSettings):
         default="pdf,png,jpg,jpeg,tiff,bmp",
         env="OCR_SUPPORTED_FORMATS"
     )
+    ocr_model_version: str = Field(default="1.0.0", env="OCR_MODEL_VERSION")
+    ocr_cache_ttl: int = Field(default=2592000, env="OCR_CACHE_TTL")  # 30天
+    ocr_max_connections: int = Field(default=20, env="OCR_MAX_CONNECTIONS")
+    ocr_batch_concurrency: int = Field(default=4, env="OCR_BATCH_CONCURRENCY")
     
     # Flink 配置
     flink_jobmanager_url: str = Field(
@@ -43,7 +43,8 @@ class MinIOClient:
             "vectors": "knowledge-vectors",
             "models": "knowledge-models",
             "temp": "knowledge-temp",
-            "backups": "knowledge-backups"
+            "backups": "knowledge-backups",
+            "ocr_cache": "knowledge-ocr-cache"
         }
     
     async def connect(self) -> None:
@@ -5,11 +5,11 @@
 
 import asyncio
 import time
-from typing import Dict, List, Any, Optional, Union
+from typing import Dict, List, Any, Optional, Union, AsyncIterator, Iterable, Tuple
 from contextlib import asynccontextmanager
 from datetime import datetime
 
-from neo4j import GraphDatabase, AsyncSession
+from neo4j import AsyncGraphDatabase, AsyncSession
 from neo4j.exceptions import (
     ServiceUnavailable, SessionError, TransientError,
     ClientError, DatabaseError
@@ -49,7 +49,8 @@ class Neo4jClient:
         max_connection_lifetime: int = 3600,
         max_connection_pool_size: int = 50,
         connection_acquisition_timeout: int = 60,
-        encrypted: bool = False
+        encrypted: bool = False,
+        fetch_size: int = 1000
     ):
         """初始化Neo4j客户端
         
@@ -62,6 +63,7 @@ class Neo4jClient:
             max_connection_pool_size: 连接池最大大小
             connection_acquisition_timeout: 连接获取超时时间（秒）
             encrypted: 是否使用加密连接
+            fetch_size: 每批从服务端拉取的记录数
         """
         self.uri = uri
         self.user = user
@@ -77,6 +79,7 @@ class Neo4jClient:
         self._max_connection_pool_size = max_connection_pool_size
         self._connection_acquisition_timeout = connection_acquisition_timeout
         self._encrypted = encrypted
+        self._fetch_size = fetch_size
         
         # 状态跟踪
         self._connected = False
@@ -90,13 +93,15 @@ class Neo4jClient:
         try:
             self.logger.info(f"正在连接到Neo4j数据库: {self.uri}")
             
-            self._driver = GraphDatabase.driver(
+            # 使用原生异步驱动，并发请求共享同一个连接池而不阻塞事件循环
+            self._driver = AsyncGraphDatabase.driver(
                 self.uri,
                 auth=(self.user, self.password),
                 max_connection_lifetime=self._max_connection_lifetime,
                 max_connection_pool_size=self._max_connection_pool_size,
                 connection_acquisition_timeout=self._connection_acquisition_timeout,
-                encrypted=self._encrypted
+                encrypted=self._encrypted,
+                fetch_size=self._fetch_size
             )
             
             # 验证连接
@@ -254,6 +259,95 @@ class Neo4jClient:
         # 如果所有重试都失败了
         raise Neo4jQueryError("查询重试次数已用完")
     
+    async def stream(
+        self,
+        cypher: str,
+        parameters: Optional[Dict[str, Any]] = None,
+        fetch_size: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """流式执行Cypher查询
+        
+        逐条产出记录，驱动按 fetch_size 分批从服务端拉取，
+        适用于大规模导出等不宜一次性加载全部结果的场景。
+        
+        Args:
+            cypher: Cypher查询语句
+            parameters: 查询参数
+            fetch_size: 每批拉取的记录数，默认使用客户端配置
+            
+        Yields:
+            单条查询记录
+            
+        Raises:
+            Neo4jQueryError: 查询错误
+        """
+        if not cypher.strip():
+            raise ValueError("Cypher查询不能为空")
+        
+        parameters = parameters or {}
+        fetch_size = fetch_size or self._fetch_size
+        start_time = time.time()
+        record_count = 0
+        
+        try:
+            async with self.session(fetch_size=fetch_size) as session:
+                result = await session.run(cypher, parameters)
+                async for record in result:
+                    record_count += 1
+                    yield dict(record)
+            
+            self._query_count += 1
+            self.logger.debug("Cypher流式查询执行完成", extra={
+                "cypher": cypher[:200] + "..." if len(cypher) > 200 else cypher,
+                "result_count": record_count,
+                "fetch_size": fetch_size,
+                "execution_time": time.time() - start_time
+            })
+            
+        except (ServiceUnavailable, SessionError, TransientError, ClientError, DatabaseError) as e:
+            # 流式结果已部分产出，无法安全重试
+            self._error_count += 1
+            self.logger.error(f"Neo4j流式查询失败: {str(e)}", extra={
+                "cypher": cypher,
+                "records_yielded": record_count
+            })
+            raise Neo4jQueryError(f"流式查询失败: {str(e)}")
+    
+    async def run_many(
+        self,
+        statements: Iterable[Tuple[str, Optional[Dict[str, Any]]]],
+        retry_count: int = 3
+    ) -> Dict[str, int]:
+        """在单个写事务中批量执行参数化语句
+        
+        所有语句先依次提交，再统一消费结果，由驱动在同一连接上
+        流水线发送，避免逐条往返。任一语句失败则整个事务回滚。
+        
+        Args:
+            statements: (cypher, parameters) 元组序列
+            retry_count: 重试次数
+            
+        Returns:
+            执行语句数及汇总的更新计数
+        """
+        statements = [(cypher, params or {}) for cypher, params in statements]
+        if not statements:
+            return {"statements": 0}
+        
+        async def _work(tx):
+            results = [await tx.run(cypher, params) for cypher, params in statements]
+            totals: Dict[str, int] = {"statements": len(results)}
+            for result in results:
+                summary = await result.consume()
+                for key, value in vars(summary.counters).items():
+                    if isinstance(value, int) and not isinstance(value, bool):
+                        totals[key] = totals.get(key, 0) + value
+            return totals
+        
+        totals = await self.run_transaction(_work, retry_count=retry_count)
+        self._query_count += len(statements)
+        return totals
+    
     async def run_transaction(
         self,
         transaction_func,
@@ -1,3 +1,4 @@
+import re
 import asyncio
 from typing import Dict, List, Any, Optional, Union, Tuple
 from datetime import datetime, date
@@ -8,7 +9,7 @@ from sqlalchemy import create_engine, MetaData, Table, Column, String, Text, Int
 from sqlalchemy.dialects.mysql import VARCHAR, LONGTEXT, BIGINT, DECIMAL
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
-from sqlalchemy import select, insert, update, delete, func, text
+from sqlalchemy import select, insert, update, delete, func, text, bindparam
 from sqlalchemy.engine.url import URL
 from sqlalchemy.exc import SQLAlchemyError
 
@@ -19,6 +20,15 @@ from backend.models.database import (
     TaskModel, QueryLogModel, MetricModel
 )
 
+_IDENTIFIER_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def _validate_identifier(identifier: str) -> None:
+    """校验表名、列名，防止拼接SQL时注入"""
+    if not _IDENTIFIER_PATTERN.match(identifier):
+        raise ValueError(f"非法的标识符: {identifier}")
+
+
 # StarRocks专用的Base类
 StarRocksBase = declarative_base()
 
@@ -1019,6 +1029,54 @@ class StarRocksClient:
             self.logger.error(f"批量插入关系失败: {str(e)}")
             return False
     
+    async def upsert_rows(self, table_name: str, rows: List[Dict[str, Any]]) -> bool:
+        """批量写入行，主键模型表中已存在的行被覆盖
+        
+        Args:
+            table_name: 表名
+            rows: 行数据，列取所有行的并集，缺失列写入NULL
+        """
+        if not rows:
+            return True
+        
+        columns = list(dict.fromkeys(column for row in rows for column in row))
+        for identifier in [table_name, *columns]:
+            _validate_identifier(identifier)
+        
+        column_list = ", ".join(f"`{column}`" for column in columns)
+        value_list = ", ".join(f":{column}" for column in columns)
+        stmt = text(f"INSERT INTO `{table_name}` ({column_list}) VALUES ({value_list})")
+        params = [{column: row.get(column) for column in columns} for row in rows]
+        
+        try:
+            async with self.async_session() as session:
+                await session.execute(stmt, params)
+                await session.commit()
+                return True
+        except Exception as e:
+            self.logger.error(f"批量写入 {table_name} 失败: {str(e)}")
+            return False
+    
+    async def delete_rows(self, table_name: str, key_column: str, keys: List[Any]) -> bool:
+        """按主键批量删除行"""
+        if not keys:
+            return True
+        
+        _validate_identifier(table_name)
+        _validate_identifier(key_column)
+        stmt = text(
+            f"DELETE FROM `{table_name}` WHERE `{key_column}` IN :keys"
+        ).bindparams(bindparam("keys", expanding=True))
+        
+        try:
+            async with self.async_session() as session:
+                await session.execute(stmt, {"keys": list(keys)})
+                await session.commit()
+                return True
+        except Exception as e:
+            self.logger.error(f"批量删除 {table_name} 失败: {str(e)}")
+            return False
+    
     async def truncate_table(self, table_name: str) -> bool:
         """清空表数据"""
         try:
@@ -0,0 +1,294 @@
+"""MySQL binlog 流式读取器
+
+以复制从库身份订阅MySQL行事件(ROW binlog)，将行变更实时转换为CDC事件，
+取代按固定间隔轮询的捕获方式。
+"""
+
+import asyncio
+import threading
+import concurrent.futures
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Callable, Iterable, AsyncIterator
+
+from backend.utils.logger import get_logger
+from backend.core.etl.cdc_manager import CDCEvent, CDCEventType, CDCPosition
+
+try:
+    from pymysqlreplication import BinLogStreamReader
+    from pymysqlreplication.row_event import WriteRowsEvent, UpdateRowsEvent, DeleteRowsEvent
+    from pymysqlreplication.event import RotateEvent, GtidEvent, XidEvent
+    from pymysqlreplication.gtid import GtidSet, Gtid
+    BINLOG_AVAILABLE = True
+except ImportError:
+    BINLOG_AVAILABLE = False
+
+logger = get_logger(__name__)
+
+# 按类名识别binlog事件，录制的事件流回放时无需真实的复制连接
+_ROW_EVENT_TYPES = {
+    "WriteRowsEvent": CDCEventType.INSERT,
+    "UpdateRowsEvent": CDCEventType.UPDATE,
+    "DeleteRowsEvent": CDCEventType.DELETE,
+}
+
+# 事件流结束标记
+_END_OF_STREAM = object()
+
+
+class MySQLBinlogReader:
+    """MySQL binlog 行事件读取器
+
+    在后台线程中阻塞读取binlog，通过有界队列交给事件循环。队列满时读取线程
+    阻塞等待，背压一直传递到复制连接，不会丢弃事件。
+
+    文件位置和 GTID 集合只在事务提交（XidEvent）时推进，始终指向最后一个已提交
+    事务的末尾。行事件携带该位置和行在当前事务中的序号 row_index；从事务中间
+    保存的位置恢复时，重新读取整个事务并跳过已产出的行。
+    """
+
+    def __init__(
+        self,
+        source_id: str,
+        connection_config: Dict[str, Any],
+        position: Optional[CDCPosition] = None,
+        tables: Optional[List[str]] = None,
+        databases: Optional[List[str]] = None,
+        buffer_size: int = 1000,
+        stream_factory: Optional[Callable[..., Iterable[Any]]] = None
+    ):
+        """初始化binlog读取器
+
+        Args:
+            source_id: 数据源ID
+            connection_config: MySQL连接配置（host/port/user/password/server_id）
+            position: 恢复位置，支持 binlog_file/binlog_position 或 gtid_set
+            tables: 监控的表
+            databases: 监控的数据库
+            buffer_size: 读取线程与事件循环之间的缓冲事件数
+            stream_factory: binlog事件流工厂，默认使用 BinLogStreamReader
+        """
+        self.source_id = source_id
+        self.connection_config = connection_config
+        self.tables = tables or []
+        self.databases = databases or []
+        self.buffer_size = buffer_size
+        self.stream_factory = stream_factory or self._create_stream
+
+        position_data = dict(position.position_data) if position else {}
+        self.log_file: Optional[str] = position_data.get("binlog_file")
+        self.log_pos: Optional[int] = position_data.get("binlog_position")
+        self.gtid_set: Optional[str] = position_data.get("gtid_set")
+        self.start_mode: str = position_data.get("type", "latest")
+        self.start_timestamp = position_data.get("timestamp")
+
+        # 当前事务的 GTID 和已读取的行数
+        self._pending_gtid: Optional[str] = None
+        self._transaction_rows = 0
+        # 恢复后第一个事务中需要跳过的行数（保存位置时已产出）
+        saved_row_index = position_data.get("row_index")
+        has_position = bool(self.gtid_set or self.log_file)
+        self._skip_rows = saved_row_index + 1 if has_position and saved_row_index is not None else 0
+
+        self._stop_event = threading.Event()
+        self._stream = None
+
+    def _stream_kwargs(self) -> Dict[str, Any]:
+        """构建binlog流参数，按 GTID > 文件位置 > 初始模式 的顺序决定起点"""
+        kwargs = {
+            "blocking": True,
+            "only_tables": [table.split(".")[-1] for table in self.tables] or None,
+            "only_schemas": self.databases or None,
+            "slave_heartbeat": self.connection_config.get("heartbeat_seconds", 30),
+        }
+
+        if self.gtid_set:
+            kwargs["auto_position"] = self.gtid_set
+        elif self.log_file:
+            kwargs["resume_stream"] = True
+            kwargs["log_file"] = self.log_file
+            kwargs["log_pos"] = self.log_pos
+        elif self.start_mode == "timestamp" and self.start_timestamp:
+            # 从最早的binlog读起，跳过指定时间之前的事件
+            kwargs["resume_stream"] = False
+            kwargs["skip_to_timestamp"] = self._parse_timestamp(self.start_timestamp)
+        else:
+            # latest 从当前binlog末尾开始，earliest 从最早的binlog开始
+            kwargs["resume_stream"] = self.start_mode != "earliest"
+
+        return kwargs
+
+    @staticmethod
+    def _parse_timestamp(value: Any) -> float:
+        """将配置的起始时间（Unix时间戳或ISO格式）转换为Unix时间戳"""
+        if isinstance(value, datetime):
+            return value.timestamp()
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return datetime.fromisoformat(str(value)).timestamp()
+
+    def _create_stream(self, **kwargs) -> Iterable[Any]:
+        """创建真实的binlog复制流"""
+        if not BINLOG_AVAILABLE:
+            raise RuntimeError("未安装 mysql-replication，无法读取MySQL binlog")
+
+        return BinLogStreamReader(
+            connection_settings={
+                "host": self.connection_config.get("host", "localhost"),
+                "port": int(self.connection_config.get("port", 3306)),
+                "user": self.connection_config.get("user", "root"),
+                "passwd": self.connection_config.get("password", ""),
+            },
+            server_id=int(self.connection_config.get("server_id", 5400)),
+            only_events=[WriteRowsEvent, UpdateRowsEvent, DeleteRowsEvent, RotateEvent, GtidEvent, XidEvent],
+            **kwargs
+        )
+
+    def position(self) -> Dict[str, Any]:
+        """最后一个已提交事务的位置"""
+        position = {}
+        if self.log_file:
+            position["binlog_file"] = self.log_file
+            position["binlog_position"] = self.log_pos
+        if self.gtid_set:
+            position["gtid_set"] = self.gtid_set
+        return position
+
+    def convert_event(self, binlog_event: Any) -> List[CDCEvent]:
+        """将一个binlog事件转换为CDC事件，非行事件只更新位置"""
+        event_name = type(binlog_event).__name__
+
+        if event_name == "RotateEvent":
+            self.log_file = binlog_event.next_binlog
+            self.log_pos = binlog_event.position
+            return []
+
+        if event_name == "GtidEvent":
+            # 新事务开始说明上一个事务已结束（DDL 事务没有 XidEvent）
+            self._commit_gtid()
+            self._pending_gtid = binlog_event.gtid
+            self._transaction_rows = 0
+            return []
+
+        if event_name == "XidEvent":
+            self._commit_gtid()
+            self.log_pos = binlog_event.packet.log_pos
+            self._transaction_rows = 0
+            self._skip_rows = 0
+            return []
+
+        event_type = _ROW_EVENT_TYPES.get(event_name)
+        if event_type is None:
+            return []
+
+        timestamp = datetime.fromtimestamp(binlog_event.timestamp)
+
+        events = []
+        for row in binlog_event.rows:
+            row_index = self._transaction_rows
+            self._transaction_rows += 1
+            if row_index < self._skip_rows:
+                continue
+
+            if event_type == CDCEventType.INSERT:
+                before_data, after_data = None, row["values"]
+            elif event_type == CDCEventType.UPDATE:
+                before_data, after_data = row["before_values"], row["after_values"]
+            else:
+                before_data, after_data = row["values"], None
+
+            position = self.position()
+            position["row_index"] = row_index
+
+            events.append(CDCEvent(
+                source_id=self.source_id,
+                event_type=event_type,
+                timestamp=timestamp,
+                database=binlog_event.schema,
+                table=binlog_event.table,
+                before_data=before_data,
+                after_data=after_data,
+                position=position,
+                metadata={"binlog_event": event_name}
+            ))
+
+        return events
+
+    def _commit_gtid(self) -> None:
+        """把当前事务的 GTID 并入已提交集合"""
+        gtid, self._pending_gtid = self._pending_gtid, None
+        if gtid is None or self.gtid_set is None:
+            return
+        if BINLOG_AVAILABLE:
+            self.gtid_set = str(GtidSet(self.gtid_set) + Gtid(gtid))
+        else:
+            self.gtid_set = gtid
+
+    def _read_loop(self, loop: asyncio.AbstractEventLoop, buffer: asyncio.Queue) -> None:
+        """读取线程：阻塞读取binlog并交给事件循环"""
+        item = _END_OF_STREAM
+        try:
+            self._stream = self.stream_factory(**self._stream_kwargs())
+            for binlog_event in self._stream:
+                if self._stop_event.is_set():
+                    break
+                for event in self.convert_event(binlog_event):
+                    if not self._handoff(loop, buffer, event):
+                        return
+        except Exception as e:
+            if not self._stop_event.is_set():
+                logger.error(f"binlog读取失败 {self.source_id}: {str(e)}")
+                item = e
+        finally:
+            self._close_stream()
+            self._handoff(loop, buffer, item)
+
+    def _handoff(self, loop: asyncio.AbstractEventLoop, buffer: asyncio.Queue, item: Any) -> bool:
+        """将事件放入缓冲队列，队列满时阻塞；停止后返回False"""
+        future = asyncio.run_coroutine_threadsafe(buffer.put(item), loop)
+        while not self._stop_event.is_set():
+            try:
+                future.result(timeout=0.5)
+                return True
+            except concurrent.futures.TimeoutError:
+                continue
+        future.cancel()
+        return False
+
+    def _close_stream(self) -> None:
+        stream, self._stream = self._stream, None
+        close = getattr(stream, "close", None)
+        if close:
+            try:
+                close()
+            except Exception as e:
+                logger.debug(f"关闭binlog流出错 {self.source_id}: {str(e)}")
+
+    async def events(self) -> AsyncIterator[CDCEvent]:
+        """按到达顺序产出CDC事件，直到流结束或被停止"""
+        loop = asyncio.get_running_loop()
+        buffer: asyncio.Queue = asyncio.Queue(maxsize=self.buffer_size)
+        self._stop_event.clear()
+        reader = threading.Thread(
+            target=self._read_loop,
+            args=(loop, buffer),
+            name=f"binlog-reader-{self.source_id}",
+            daemon=True
+        )
+        reader.start()
+
+        try:
+            while True:
+                item = await buffer.get()
+                if item is _END_OF_STREAM:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            self.stop()
+
+    def stop(self) -> None:
+        """停止读取，关闭复制连接以唤醒阻塞中的读取线程"""
+        self._stop_event.set()
+        self._close_stream()
@@ -0,0 +1,277 @@
+"""CDC事件去重窗口
+
+近期事件指纹保存在按到达顺序淘汰的有界窗口中，窗口之外的历史由可扩展
+布隆过滤器覆盖，内存占用与事件总量无关。
+"""
+
+import sys
+import math
+import time
+import hashlib
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional
+
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
+
+def hash128(data: bytes) -> int:
+    """128位非加密哈希，优先使用xxhash"""
+    if XXHASH_AVAILABLE:
+        return xxhash.xxh3_128_intdigest(data)
+    return int.from_bytes(hashlib.blake2b(data, digest_size=16).digest(), "little")
+
+
+def hash_hex(data: bytes) -> str:
+    """128位哈希的十六进制表示"""
+    if XXHASH_AVAILABLE:
+        return xxhash.xxh3_128_hexdigest(data)
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class BloomFilter:
+    """固定容量的布隆过滤器，k个位置由双重哈希生成"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(math.ceil(
+            -self.capacity * math.log(error_rate) / (math.log(2) ** 2)
+        )))
+        self.num_hashes = max(1, int(round(self.num_bits / self.capacity * math.log(2))))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _indexes(self, key_hash: int):
+        h1 = key_hash & 0xFFFFFFFFFFFFFFFF
+        h2 = (key_hash >> 64) | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def contains(self, key_hash: int) -> bool:
+        bits = self.bits
+        return all(bits[index >> 3] & (1 << (index & 7)) for index in self._indexes(key_hash))
+
+    def add(self, key_hash: int) -> None:
+        bits = self.bits
+        for index in self._indexes(key_hash):
+            bits[index >> 3] |= 1 << (index & 7)
+        self.count += 1
+
+    def is_full(self) -> bool:
+        return self.count >= self.capacity
+
+    def estimated_false_positive_rate(self) -> float:
+        """按当前元素数估算的误判率"""
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+
+    def memory_bytes(self) -> int:
+        return sys.getsizeof(self.bits)
+
+
+class ScalableBloomFilter:
+    """可扩展布隆过滤器
+
+    当前过滤器写满后追加一个容量翻倍、误判率收紧的过滤器，整体误判率
+    不超过 error_rate。
+    """
+
+    def __init__(self, initial_capacity: int = 100000, error_rate: float = 0.0001,
+                 growth: int = 2, tightening: float = 0.5):
+        self.initial_capacity = initial_capacity
+        self.error_rate = error_rate
+        self.growth = growth
+        self.tightening = tightening
+        self.filters: List[BloomFilter] = []
+        self._add_filter()
+
+    def _add_filter(self) -> None:
+        level = len(self.filters)
+        self.filters.append(BloomFilter(
+            capacity=self.initial_capacity * (self.growth ** level),
+            error_rate=self.error_rate * (1 - self.tightening) * (self.tightening ** level)
+        ))
+
+    def contains(self, key_hash: int) -> bool:
+        return any(bloom.contains(key_hash) for bloom in reversed(self.filters))
+
+    def add(self, key_hash: int) -> None:
+        if self.filters[-1].is_full():
+            self._add_filter()
+        self.filters[-1].add(key_hash)
+
+    def __len__(self) -> int:
+        return sum(bloom.count for bloom in self.filters)
+
+    def estimated_false_positive_rate(self) -> float:
+        no_false_positive = 1.0
+        for bloom in self.filters:
+            no_false_positive *= 1 - bloom.estimated_false_positive_rate()
+        return 1 - no_false_positive
+
+    def memory_bytes(self) -> int:
+        return sum(bloom.memory_bytes() for bloom in self.filters)
+
+
+class DedupWindow:
+    """有界、有序的事件去重窗口
+
+    近期指纹按到达顺序保存在 OrderedDict 中，超过 max_size 或 ttl_seconds 的
+    最旧条目被淘汰；指纹同时写入布隆过滤器，用于识别窗口之外的重放事件。
+    布隆过滤器按 bloom_horizon_seconds 分代轮换，保留当前和上一代。
+    """
+
+    def __init__(
+        self,
+        max_size: int = 10000,
+        ttl_seconds: float = 3600.0,
+        bloom_capacity: int = 100000,
+        bloom_error_rate: float = 0.0001,
+        bloom_horizon_seconds: Optional[float] = 86400.0,
+        clock=time.monotonic
+    ):
+        """初始化去重窗口
+
+        Args:
+            max_size: 窗口最多保存的指纹数
+            ttl_seconds: 窗口内指纹的保留时间
+            bloom_capacity: 布隆过滤器初始容量，0表示不启用
+            bloom_error_rate: 布隆过滤器目标误判率
+            bloom_horizon_seconds: 布隆过滤器每一代的时长，None表示不轮换
+            clock: 时钟函数
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.bloom_capacity = bloom_capacity
+        self.bloom_error_rate = bloom_error_rate
+        self.bloom_horizon_seconds = bloom_horizon_seconds
+        self._clock = clock
+
+        self._recent: "OrderedDict[str, float]" = OrderedDict()
+        self._bloom: Optional[ScalableBloomFilter] = None
+        self._previous_bloom: Optional[ScalableBloomFilter] = None
+        self._bloom_started = self._clock()
+        if bloom_capacity > 0:
+            self._bloom = self._new_bloom()
+
+        self.checked = 0
+        self.window_hits = 0
+        self.bloom_hits = 0
+        self.evicted = 0
+
+    def _new_bloom(self) -> ScalableBloomFilter:
+        return ScalableBloomFilter(self.bloom_capacity, self.bloom_error_rate)
+
+    def _rotate_bloom(self, now: float) -> None:
+        if self._bloom is None or self.bloom_horizon_seconds is None:
+            return
+        if now - self._bloom_started >= self.bloom_horizon_seconds:
+            self._previous_bloom = self._bloom
+            self._bloom = self._new_bloom()
+            self._bloom_started = now
+
+    def _evict(self, now: float) -> int:
+        recent = self._recent
+        cutoff = now - self.ttl_seconds
+        evicted = 0
+        while recent:
+            seen_at = next(iter(recent.values()))
+            if len(recent) <= self.max_size and seen_at >= cutoff:
+                break
+            recent.popitem(last=False)
+            evicted += 1
+        self.evicted += evicted
+        return evicted
+
+    def _in_bloom(self, key_hash: int) -> bool:
+        if self._bloom is None:
+            return False
+        if self._bloom.contains(key_hash):
+            return True
+        return self._previous_bloom is not None and self._previous_bloom.contains(key_hash)
+
+    def check_and_add(self, fingerprint: str, use_bloom: bool = True) -> bool:
+        """检查指纹是否已出现过，未出现则记录
+
+        Args:
+            fingerprint: 事件指纹
+            use_bloom: 是否查询并写入布隆过滤器，False 时只在窗口内去重
+
+        Returns:
+            是否为重复事件
+        """
+        now = self._clock()
+        self.checked += 1
+        # 先淘汰过期条目，避免超过 ttl_seconds 的指纹仍被视为重复
+        self._evict(now)
+
+        if fingerprint in self._recent:
+            self.window_hits += 1
+            return True
+
+        use_bloom = use_bloom and self._bloom is not None
+        key_hash = hash128(fingerprint.encode("utf-8")) if use_bloom else 0
+        if use_bloom and self._in_bloom(key_hash):
+            self.bloom_hits += 1
+            return True
+
+        self._recent[fingerprint] = now
+        if use_bloom:
+            self._rotate_bloom(now)
+            self._bloom.add(key_hash)
+        self._evict(now)
+        return False
+
+    def expire(self, max_age_seconds: float) -> int:
+        """淘汰早于 max_age_seconds 的窗口条目，返回淘汰数"""
+        now = self._clock()
+        cutoff = now - max_age_seconds
+        recent = self._recent
+        evicted = 0
+        while recent and next(iter(recent.values())) < cutoff:
+            recent.popitem(last=False)
+            evicted += 1
+        self.evicted += evicted
+
+        if self._previous_bloom is not None and now - self._bloom_started >= max_age_seconds:
+            self._previous_bloom = None
+        return evicted
+
+    def __len__(self) -> int:
+        return len(self._recent)
+
+    def memory_bytes(self) -> int:
+        """估算去重占用的内存"""
+        recent_bytes = sys.getsizeof(self._recent) + sum(
+            sys.getsizeof(fingerprint) + sys.getsizeof(seen_at)
+            for fingerprint, seen_at in self._recent.items()
+        )
+        bloom_bytes = sum(
+            bloom.memory_bytes() for bloom in (self._bloom, self._previous_bloom) if bloom is not None
+        )
+        return recent_bytes + bloom_bytes
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """获取去重统计"""
+        blooms = [bloom for bloom in (self._bloom, self._previous_bloom) if bloom is not None]
+        no_false_positive = 1.0
+        for bloom in blooms:
+            no_false_positive *= 1 - bloom.estimated_false_positive_rate()
+
+        return {
+            "window_size": len(self._recent),
+            "window_max_size": self.max_size,
+            "window_ttl_seconds": self.ttl_seconds,
+            "bloom_entries": sum(len(bloom) for bloom in blooms),
+            "bloom_filters": sum(len(bloom.filters) for bloom in blooms),
+            "checked": self.checked,
+            "duplicates": self.window_hits + self.bloom_hits,
+            "window_hits": self.window_hits,
+            "bloom_hits": self.bloom_hits,
+            "evicted": self.evicted,
+            "estimated_false_positive_rate": 1 - no_false_positive,
+            "memory_bytes": self.memory_bytes()
+        }
@@ -0,0 +1,218 @@
+"""CDC过滤计划
+
+在过滤器增删时将其编译为按优先级排列的判定闭包，并按 (库, 表, 事件类型)
+缓存只依赖这些字段的过滤结果，事件过滤时不再排序和解析过滤条件。
+"""
+
+from typing import Dict, List, Any, Optional, Callable, Tuple, Iterable
+
+from backend.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 路由缓存上限，超过后清空重建
+_MAX_ROUTES = 10000
+
+
+def _always(event) -> bool:
+    return True
+
+
+def _compile_value_check(condition: Any) -> Callable[[Any], bool]:
+    """编译单个字段条件，语义与 CDCFilter._match_condition_filter 一致"""
+    if not isinstance(condition, dict):
+        return lambda value: value == condition
+
+    checks = []
+    if "eq" in condition:
+        expected = condition["eq"]
+        checks.append(lambda value: value == expected)
+    if "ne" in condition:
+        unexpected = condition["ne"]
+        checks.append(lambda value: value != unexpected)
+    if "gt" in condition:
+        lower = condition["gt"]
+        checks.append(lambda value: value > lower)
+    if "lt" in condition:
+        upper = condition["lt"]
+        checks.append(lambda value: value < upper)
+    if "in" in condition:
+        allowed = condition["in"]
+        checks.append(lambda value: value in allowed)
+    if "not_in" in condition:
+        excluded = condition["not_in"]
+        checks.append(lambda value: value not in excluded)
+
+    if len(checks) == 1:
+        return checks[0]
+    return lambda value: all(check(value) for check in checks)
+
+
+class _CompiledFilter:
+    """单个过滤器编译结果
+
+    static 表示判定只依赖库、表和事件类型，可以按路由缓存。
+    """
+
+    __slots__ = ("filter_id", "name", "include", "static", "match")
+
+    def __init__(self, filter_id: str, name: str, include: bool, static: bool,
+                 match: Callable[[Any], bool]):
+        self.filter_id = filter_id
+        self.name = name
+        self.include = include
+        self.static = static
+        self.match = match
+
+    def rejects(self, event) -> bool:
+        """包含过滤器不匹配、排除过滤器匹配时拒绝事件"""
+        return self.match(event) != self.include
+
+
+def _guarded(filter_id: str, match: Callable[[Any], bool]) -> Callable[[Any], bool]:
+    """出错时视为匹配，与 CDCFilter.matches 一致"""
+    def guarded_match(event) -> bool:
+        try:
+            return match(event)
+        except Exception as e:
+            logger.error(f"过滤器匹配失败 {filter_id}: {str(e)}")
+            return True
+    return guarded_match
+
+
+def compile_filter(filter_config) -> _CompiledFilter:
+    """将 CDCFilter 编译为判定闭包"""
+    filter_type = filter_config.filter_type.value
+    conditions = filter_config.conditions
+    static = True
+    match: Callable[[Any], bool] = _always
+
+    if filter_type == "table_filter":
+        tables = frozenset(conditions.get("tables", []))
+        if tables:
+            def match(event, tables=tables) -> bool:
+                table_name = f"{event.database}.{event.table}" if event.database else event.table
+                return table_name in tables
+
+    elif filter_type == "event_type_filter":
+        event_types = frozenset(conditions.get("event_types", []))
+        if event_types:
+            def match(event, event_types=event_types) -> bool:
+                return event.event_type.value in event_types
+
+    elif filter_type == "column_filter":
+        columns = tuple(conditions.get("columns", []))
+        if columns:
+            static = False
+
+            def match(event, columns=columns) -> bool:
+                data = event.after_data or event.before_data or {}
+                return any(column in data for column in columns)
+
+    elif filter_type == "condition_filter":
+        field_checks = tuple(
+            (field_name, _compile_value_check(condition))
+            for field_name, condition in conditions.get("conditions", {}).items()
+        )
+        if field_checks:
+            static = False
+
+            def match(event, field_checks=field_checks) -> bool:
+                data = event.after_data or event.before_data or {}
+                for field_name, check in field_checks:
+                    if field_name in data and not check(data[field_name]):
+                        return False
+                return True
+
+    # custom_filter 尚未实现自定义逻辑，始终匹配
+
+    return _CompiledFilter(
+        filter_id=filter_config.filter_id,
+        name=filter_config.name,
+        include=filter_config.include,
+        static=static,
+        match=_guarded(filter_config.filter_id, match) if match is not _always else match
+    )
+
+
+class CompiledFilterPlan:
+    """编译后的过滤计划
+
+    过滤器按优先级从高到低排列，第一个拒绝事件的过滤器计入命中数。对每个
+    (库, 表, 事件类型) 路由，预先求出静态过滤器的结果，只保留需要逐条判定
+    的动态过滤器。
+    """
+
+    def __init__(self, filters: Iterable[Any], hits: Optional[Dict[str, int]] = None):
+        """编译过滤计划
+
+        Args:
+            filters: CDCFilter 列表，未启用的过滤器被忽略
+            hits: 过滤器命中计数，按 filter_id 累加
+        """
+        enabled = [f for f in filters if f.enabled]
+        # sorted 是稳定排序，同优先级保持添加顺序
+        enabled.sort(key=lambda f: f.priority, reverse=True)
+
+        self.steps: List[_CompiledFilter] = [compile_filter(f) for f in enabled]
+        self.hits: Dict[str, int] = hits if hits is not None else {}
+        for step in self.steps:
+            self.hits.setdefault(step.filter_id, 0)
+
+        self._routes: Dict[Tuple[Any, Any, Any], Tuple[Tuple[_CompiledFilter, ...], Optional[_CompiledFilter]]] = {}
+
+    def __len__(self) -> int:
+        return len(self.steps)
+
+    def _route(self, event) -> Tuple[Tuple[_CompiledFilter, ...], Optional[_CompiledFilter]]:
+        """获取路由：需逐条判定的动态过滤器，以及最先拒绝该路由的静态过滤器"""
+        key = (event.database, event.table, event.event_type)
+        route = self._routes.get(key)
+        if route is not None:
+            return route
+
+        dynamic_steps = []
+        static_reject = None
+        for step in self.steps:
+            if step.static:
+                if step.rejects(event):
+                    static_reject = step
+                    break
+            else:
+                dynamic_steps.append(step)
+
+        if len(self._routes) >= _MAX_ROUTES:
+            self._routes.clear()
+        route = (tuple(dynamic_steps), static_reject)
+        self._routes[key] = route
+        return route
+
+    def rejects(self, event) -> bool:
+        """判断事件是否应被过滤"""
+        if not self.steps:
+            return False
+
+        dynamic_steps, static_reject = self._route(event)
+        for step in dynamic_steps:
+            if step.match(event) != step.include:
+                self.hits[step.filter_id] += 1
+                return True
+
+        if static_reject is not None:
+            self.hits[static_reject.filter_id] += 1
+            return True
+
+        return False
+
+    def apply(self, events: List[Any]) -> Tuple[List[Any], int]:
+        """对一批事件应用过滤计划
+
+        Returns:
+            (保留的事件, 被过滤的事件数)
+        """
+        if not self.steps:
+            return events, 0
+
+        rejects = self.rejects
+        kept = [event for event in events if not rejects(event)]
+        return kept, len(events) - len(kept)
@@ -7,7 +7,7 @@ import json
 import uuid
 import asyncio
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional, Union, Tuple, Callable, Set
+from typing import Dict, List, Any, Optional, Union, Tuple, Callable
 from enum import Enum
 from dataclasses import dataclass, field
 from pathlib import Path
@@ -17,6 +17,8 @@ from pydantic import BaseModel, Field
 
 from backend.utils.logger import get_logger
 from backend.services.etl_service import ETLJobStatus
+from backend.core.etl.cdc_dedup import DedupWindow, hash_hex
+from backend.core.etl.cdc_filter_plan import CompiledFilterPlan
 
 logger = get_logger(__name__)
 
@@ -31,6 +33,10 @@ class CDCEventType(str, Enum):
     HEARTBEAT = "heartbeat"  # 心跳
 
 
+# 可以按行合并的事件类型
+_ROW_CHANGE_TYPES = frozenset({CDCEventType.INSERT, CDCEventType.UPDATE, CDCEventType.DELETE})
+
+
 class CDCSourceType(str, Enum):
     """CDC数据源类型枚举"""
     MYSQL = "mysql"
@@ -91,6 +97,15 @@ class CDCSourceConfig:
     retry_delay_ms: int = 5000
     error_tolerance: str = "none"  # none, all, data
     
+    # 去重配置
+    dedup_window_size: int = 10000  # 去重窗口保存的最近事件数
+    dedup_window_seconds: int = 3600  # 去重窗口保留时间
+    dedup_bloom_capacity: int = 100000  # 布隆过滤器初始容量，0表示只用窗口
+    dedup_bloom_error_rate: float = 0.0001
+    
+    # 合并配置
+    coalesce_events: bool = False  # 批次内按行键合并为净变更后再交给处理器
+    
     # 位置跟踪
     initial_position: str = "latest"  # latest, earliest, timestamp
     checkpoint_interval_ms: int = 30000
@@ -136,6 +151,15 @@ class CDCEvent(BaseModel):
         
         return "|".join(key_parts)
     
+    def has_row_key(self) -> bool:
+        """事件是否带有行主键，只有带主键的行事件才能按 get_key() 合并"""
+        if self.event_type not in _ROW_CHANGE_TYPES:
+            return False
+        return bool(
+            (self.after_data and "id" in self.after_data)
+            or (self.before_data and "id" in self.before_data)
+        )
+    
     def get_hash(self) -> str:
         """获取事件哈希值"""
         content = {
@@ -149,6 +173,35 @@ class CDCEvent(BaseModel):
         
         content_str = json.dumps(content, sort_keys=True, default=str)
         return hashlib.md5(content_str.encode()).hexdigest()
+    
+    def has_log_position(self) -> bool:
+        """是否带有binlog位置"""
+        position = self.position
+        return bool(position and position.get("binlog_file") and position.get("binlog_position") is not None)
+    
+    def get_fingerprint(self) -> str:
+        """获取去重指纹
+        
+        有binlog位置时由位置直接构成，无需序列化变更数据；否则对变更内容和其他位置
+        信息（如偏移量、LSN）做xxhash。
+        """
+        position = self.position
+        if self.has_log_position():
+            return "|".join((
+                self.source_id,
+                str(position["binlog_file"]),
+                str(position["binlog_position"]),
+                str(position.get("row_index", 0)),
+                self.table or "",
+                self.event_type.value
+            ))
+        
+        content_str = json.dumps(
+            [self.source_id, self.event_type.value, self.database, self.table,
+             self.before_data, self.after_data, position],
+            sort_keys=True, separators=(",", ":"), default=str
+        )
+        return hash_hex(content_str.encode())
 
 
 class CDCFilter(BaseModel):
@@ -344,13 +397,19 @@ class CDCManager:
     负责管理CDC数据源、监控数据变更、过滤事件和触发处理。
     """
 
-    def __init__(self):
-        """初始化CDC管理器"""
+    def __init__(self, binlog_stream_factory: Optional[Callable[..., Any]] = None):
+        """初始化CDC管理器
+        
+        Args:
+            binlog_stream_factory: MySQL binlog事件流工厂，默认连接真实MySQL
+        """
         # 数据源配置
         self.sources: Dict[str, CDCSourceConfig] = {}
         
         # 过滤器
         self.filters: Dict[str, CDCFilter] = {}
+        self.filter_hits: Dict[str, int] = {}
+        self._filter_plan = CompiledFilterPlan([], self.filter_hits)
         
         # 处理器
         self.processors: Dict[str, CDCProcessor] = {}
@@ -374,8 +433,11 @@ class CDCManager:
         self.statistics: Dict[str, Dict[str, Any]] = {}
         
         # 去重缓存
-        self.dedup_cache: Dict[str, Set[str]] = {}
-        self.dedup_cache_size = 10000
+        self.dedup_cache: Dict[str, DedupWindow] = {}
+        
+        # binlog读取器
+        self.binlog_stream_factory = binlog_stream_factory
+        self.binlog_readers: Dict[str, Any] = {}
         
         logger.info("CDC管理器初始化完成")
 
@@ -394,10 +456,19 @@ class CDCManager:
             "events_processed": 0,
             "events_filtered": 0,
             "errors": 0,
+            "backpressure_waits": 0,
+            "events_before_coalescing": 0,
+            "events_after_coalescing": 0,
+            "coalescing_ratio": 1.0,
             "last_event_time": None,
             "start_time": None
         }
-        self.dedup_cache[config.source_id] = set()
+        self.dedup_cache[config.source_id] = DedupWindow(
+            max_size=config.dedup_window_size,
+            ttl_seconds=config.dedup_window_seconds,
+            bloom_capacity=config.dedup_bloom_capacity,
+            bloom_error_rate=config.dedup_bloom_error_rate
+        )
         
         logger.info(f"添加CDC数据源: {config.name}")
 
@@ -430,6 +501,7 @@ class CDCManager:
             filter_config: 过滤器配置
         """
         self.filters[filter_config.filter_id] = filter_config
+        self.compile_filters()
         logger.debug(f"添加CDC过滤器: {filter_config.name}")
 
     def remove_filter(self, filter_id: str) -> None:
@@ -440,8 +512,17 @@ class CDCManager:
         """
         if filter_id in self.filters:
             del self.filters[filter_id]
+            self.filter_hits.pop(filter_id, None)
+            self.compile_filters()
             logger.debug(f"移除CDC过滤器: {filter_id}")
 
+    def compile_filters(self) -> None:
+        """重新编译过滤计划
+        
+        增删过滤器时自动调用；直接修改已添加过滤器的条件或启用状态后需手动调用。
+        """
+        self._filter_plan = CompiledFilterPlan(self.filters.values(), self.filter_hits)
+
     def add_processor(self, processor: CDCProcessor) -> None:
         """添加处理器
         
@@ -533,6 +614,10 @@ class CDCManager:
         try:
             self.source_status[source_id] = CDCStatus.STOPPING
             
+            # 停止binlog读取
+            if source_id in self.binlog_readers:
+                self.binlog_readers.pop(source_id).stop()
+            
             # 停止监控任务
             if source_id in self.monitoring_tasks:
                 self.monitoring_tasks[source_id].cancel()
@@ -608,28 +693,40 @@ class CDCManager:
             # TODO: 实现数据库保存
             logger.debug(f"保存位置: {source_id}, {position.to_string()}")
 
+    def _uses_binlog_stream(self, config: CDCSourceConfig) -> bool:
+        """MySQL数据源默认使用binlog推送，capture_mode=poll 时退回轮询"""
+        return (
+            config.source_type == CDCSourceType.MYSQL
+            and config.connection_config.get("capture_mode", "binlog") == "binlog"
+        )
+    
     async def _monitor_source(self, source_id: str) -> None:
         """监控数据源变更"""
         config = self.sources[source_id]
         
         logger.debug(f"开始监控数据源: {config.name}")
         
+        if self._uses_binlog_stream(config):
+            await self._stream_mysql_events(source_id)
+            return
+        
         try:
             while self.source_status[source_id] == CDCStatus.RUNNING:
                 try:
                     # 根据数据源类型获取变更事件
                     events = await self._capture_events(source_id)
                     
-                    for event in events:
-                        # 去重检查
-                        if self._is_duplicate_event(source_id, event):
-                            continue
-                        
-                        # 应用过滤器
-                        if self._should_filter_event(event):
-                            self.statistics[source_id]["events_filtered"] += 1
-                            continue
-                        
+                    # 去重检查
+                    new_events = [
+                        event for event in events
+                        if not self._is_duplicate_event(source_id, event)
+                    ]
+                    
+                    # 对整批事件应用过滤计划
+                    new_events, filtered_count = self._filter_plan.apply(new_events)
+                    self.statistics[source_id]["events_filtered"] += filtered_count
+                    
+                    for event in new_events:
                         # 添加到事件队列
                         try:
                             await self.event_queues[source_id].put(event)
@@ -666,6 +763,77 @@ class CDCManager:
             self.source_status[source_id] = CDCStatus.ERROR
             logger.error(f"监控任务失败 {source_id}: {str(e)}")
 
+    async def _stream_mysql_events(self, source_id: str) -> None:
+        """以推送方式读取MySQL binlog
+        
+        事件到达即入队，不再按 poll_interval_ms 轮询；从当前 CDCPosition 恢复，
+        事件队列满时暂停读取，背压传递到binlog连接。
+        """
+        from backend.core.etl.binlog_reader import MySQLBinlogReader
+        
+        config = self.sources[source_id]
+        
+        try:
+            while self.source_status[source_id] in (CDCStatus.RUNNING, CDCStatus.STARTING):
+                reader = MySQLBinlogReader(
+                    source_id=source_id,
+                    connection_config=config.connection_config,
+                    position=self.positions.get(source_id),
+                    tables=config.tables,
+                    databases=config.databases,
+                    buffer_size=config.batch_size,
+                    stream_factory=self.binlog_stream_factory
+                )
+                self.binlog_readers[source_id] = reader
+                
+                try:
+                    async for event in reader.events():
+                        # 暂停期间不再消费，读取线程随之阻塞
+                        while self.source_status[source_id] == CDCStatus.PAUSED:
+                            await asyncio.sleep(0.1)
+                        
+                        await self._ingest_event(source_id, event)
+                    
+                    # 事件流正常结束（如回放完成）
+                    break
+                    
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.statistics[source_id]["errors"] += 1
+                    logger.error(f"读取binlog出错 {source_id}: {str(e)}")
+                    
+                    if config.error_tolerance == "none":
+                        raise
+                    
+                    # 从最后确认的位置重新连接
+                    await asyncio.sleep(config.retry_delay_ms / 1000.0)
+                finally:
+                    reader.stop()
+                    self.binlog_readers.pop(source_id, None)
+                    
+        except asyncio.CancelledError:
+            logger.debug(f"binlog读取任务被取消: {source_id}")
+            raise
+        except Exception as e:
+            self.source_status[source_id] = CDCStatus.ERROR
+            logger.error(f"binlog读取任务失败 {source_id}: {str(e)}")
+    
+    async def _ingest_event(self, source_id: str, event: CDCEvent) -> None:
+        """去重、过滤后放入事件队列，队列满时等待"""
+        if not self._is_duplicate_event(source_id, event):
+            if self._should_filter_event(event):
+                self.statistics[source_id]["events_filtered"] += 1
+            else:
+                event_queue = self.event_queues[source_id]
+                if event_queue.full():
+                    self.statistics[source_id]["backpressure_waits"] += 1
+                await event_queue.put(event)
+                self.statistics[source_id]["events_captured"] += 1
+                self.statistics[source_id]["last_event_time"] = datetime.now()
+        
+        await self._update_position(source_id, event)
+    
     async def _capture_events(self, source_id: str) -> List[CDCEvent]:
         """捕获变更事件"""
         config = self.sources[source_id]
@@ -683,10 +851,8 @@ class CDCManager:
             return await self._generate_mock_events(source_id)
 
     async def _capture_mysql_events(self, source_id: str) -> List[CDCEvent]:
-        """捕获MySQL变更事件"""
-        # 实际实现需要连接MySQL并读取binlog
-        # 这里返回模拟事件
-        # TODO: 实现MySQL事件捕获
+        """捕获MySQL变更事件（轮询模式）"""
+        # binlog推送模式见 _stream_mysql_events，轮询模式仅用于测试
         return await self._generate_mock_events(source_id)
 
 
@@ -779,43 +945,18 @@ class CDCManager:
         return events
 
     def _is_duplicate_event(self, source_id: str, event: CDCEvent) -> bool:
-        """检查是否为重复事件"""
-        event_hash = event.get_hash()
+        """检查是否为重复事件
         
-        if event_hash in self.dedup_cache[source_id]:
-            return True
-        
-        # 添加到去重缓存
-        self.dedup_cache[source_id].add(event_hash)
-        
-        # 限制缓存大小
-        if len(self.dedup_cache[source_id]) > self.dedup_cache_size:
-            # 移除最旧的一半
-            cache_list = list(self.dedup_cache[source_id])
-            self.dedup_cache[source_id] = set(cache_list[len(cache_list)//2:])
-        
-        return False
+        只有binlog位置指纹才查布隆过滤器；内容指纹在长时间跨度内可能合法重复，
+        只在近期窗口内去重。
+        """
+        return self.dedup_cache[source_id].check_and_add(
+            event.get_fingerprint(), use_bloom=event.has_log_position()
+        )
 
     def _should_filter_event(self, event: CDCEvent) -> bool:
         """检查事件是否应该被过滤"""
-        # 按优先级排序过滤器
-        sorted_filters = sorted(
-            self.filters.values(),
-            key=lambda f: f.priority,
-            reverse=True
-        )
-        
-        for filter_config in sorted_filters:
-            if filter_config.matches(event):
-                # 如果是排除过滤器且匹配，则过滤掉
-                if not filter_config.include:
-                    return True
-            else:
-                # 如果是包含过滤器且不匹配，则过滤掉
-                if filter_config.include:
-                    return True
-        
-        return False
+        return self._filter_plan.rejects(event)
 
     async def _update_position(self, source_id: str, event: CDCEvent) -> None:
         """更新位置信息"""
@@ -904,6 +1045,18 @@ class CDCManager:
         
         logger.debug(f"处理事件批次: {source_id}, 事件数: {len(events)}")
         
+        config = self.sources.get(source_id)
+        if config is not None and config.coalesce_events:
+            stats = self.statistics[source_id]
+            stats["events_before_coalescing"] += len(events)
+            events = self._coalesce_events(events)
+            stats["events_after_coalescing"] += len(events)
+            stats["coalescing_ratio"] = (
+                stats["events_before_coalescing"] / max(1, stats["events_after_coalescing"])
+            )
+            if not events:
+                return
+        
         # 调用所有启用的处理器
         for processor in self.processors.values():
             if processor.enabled:
@@ -913,6 +1066,77 @@ class CDCManager:
                     logger.error(f"处理器 {processor.processor_id} 处理失败: {str(e)}")
                     # 继续处理其他处理器
 
+    def _coalesce_events(self, events: List[CDCEvent]) -> List[CDCEvent]:
+        """将批次内同一行的插入/更新/删除链合并为净变更
+        
+        - 不存在 → 存在：INSERT，取最后的 after_data
+        - 存在 → 存在：UPDATE，取最早的 before_data 和最后的 after_data
+        - 存在 → 不存在：DELETE，取最早的 before_data
+        - 不存在 → 不存在：丢弃
+        
+        无主键的行事件以及截断、模式变更等事件原样保留，并作为合并边界，
+        保证它们与前后行变更的先后顺序不变。净变更按该行最后一次变更的顺序输出。
+        """
+        result: List[CDCEvent] = []
+        # dict 保持插入顺序，重新插入即移到末尾，顺序即各行最后一次变更的顺序
+        chains: Dict[str, List[CDCEvent]] = {}
+        
+        def flush() -> None:
+            for chain in chains.values():
+                net_event = self._net_change(chain)
+                if net_event is not None:
+                    result.append(net_event)
+            chains.clear()
+        
+        for event in events:
+            if not event.has_row_key():
+                flush()
+                result.append(event)
+                continue
+            
+            key = event.get_key()
+            chain = chains.pop(key, [])
+            chain.append(event)
+            chains[key] = chain
+        
+        flush()
+        return result
+    
+    def _net_change(self, chain: List[CDCEvent]) -> Optional[CDCEvent]:
+        """计算同一行变更链的净变更"""
+        first, last = chain[0], chain[-1]
+        if len(chain) == 1:
+            return last
+        
+        existed_before = first.event_type != CDCEventType.INSERT
+        exists_after = last.event_type != CDCEventType.DELETE
+        
+        if existed_before and exists_after:
+            event_type = CDCEventType.UPDATE
+        elif exists_after:
+            event_type = CDCEventType.INSERT
+        elif existed_before:
+            event_type = CDCEventType.DELETE
+        else:
+            return None
+        
+        metadata = dict(last.metadata)
+        metadata["coalesced_events"] = len(chain)
+        
+        return CDCEvent(
+            event_id=last.event_id,
+            source_id=last.source_id,
+            event_type=event_type,
+            timestamp=last.timestamp,
+            database=last.database,
+            table=last.table,
+            before_data=first.before_data if existed_before else None,
+            after_data=last.after_data if exists_after else None,
+            position=last.position,
+            schema=last.schema,
+            metadata=metadata
+        )
+
     def get_source_status(self, source_id: str) -> Dict[str, Any]:
         """获取数据源状态
         
@@ -946,6 +1170,10 @@ class CDCManager:
             result["queue_size"] = self.event_queues[source_id].qsize()
             result["queue_max_size"] = config.max_queue_size
         
+        # 添加去重信息
+        if source_id in self.dedup_cache:
+            result["dedup"] = self.dedup_cache[source_id].get_statistics()
+        
         return result
 
     def get_all_sources_status(self) -> List[Dict[str, Any]]:
@@ -971,6 +1199,7 @@ class CDCManager:
             "total_errors": sum(stats["errors"] for stats in self.statistics.values()),
             "total_filters": len(self.filters),
             "active_filters": sum(1 for f in self.filters.values() if f.enabled),
+            "filter_hits": dict(self.filter_hits),
             "total_processors": len(self.processors),
             "active_processors": sum(1 for p in self.processors.values() if p.enabled)
         }
@@ -985,6 +1214,18 @@ class CDCManager:
         
         total_stats["source_type_distribution"] = source_type_stats
         
+        # 去重统计
+        dedup_stats = {
+            source_id: window.get_statistics()
+            for source_id, window in self.dedup_cache.items()
+        }
+        total_stats["dedup"] = dedup_stats
+        total_stats["dedup_memory_bytes"] = sum(stats["memory_bytes"] for stats in dedup_stats.values())
+        total_stats["dedup_false_positive_rate"] = max(
+            (stats["estimated_false_positive_rate"] for stats in dedup_stats.values()),
+            default=0.0
+        )
+        
         return total_stats
 
     async def pause_source(self, source_id: str) -> bool:
@@ -1070,13 +1311,9 @@ class CDCManager:
         cutoff_time = datetime.now() - timedelta(hours=hours)
         cleaned_count = 0
         
-        # 清理去重缓存
-        for source_id in self.dedup_cache:
-            cache_size_before = len(self.dedup_cache[source_id])
-            # 简单清理：清空一半缓存
-            cache_list = list(self.dedup_cache[source_id])
-            self.dedup_cache[source_id] = set(cache_list[len(cache_list)//2:])
-            cleaned_count += cache_size_before - len(self.dedup_cache[source_id])
+        # 清理去重窗口中早于保留时间的条目
+        for window in self.dedup_cache.values():
+            cleaned_count += window.expire(hours * 3600)
         
         logger.info(f"清理了 {cleaned_count} 个旧事件记录")
         return cleaned_count
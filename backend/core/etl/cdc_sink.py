@@ -0,0 +1,204 @@
+"""CDC批量写入
+
+将(合并后的)CDC事件按表分组，批量写入StarRocks和向量存储，每张表每批
+只执行一次写入和一次删除。
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Optional, Tuple
+
+from backend.utils.logger import get_logger
+from backend.core.etl.cdc_manager import CDCEvent, CDCEventType, CDCProcessor
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class CDCSinkTableConfig:
+    """单张源表的写入配置"""
+    # StarRocks目标表，为空时不写StarRocks
+    target_table: Optional[str] = None
+    key_column: str = "id"
+    # 参与向量化的文本字段，为空时不写向量存储
+    text_fields: List[str] = field(default_factory=list)
+    # 写入向量文档元数据的字段
+    metadata_fields: List[str] = field(default_factory=list)
+
+
+class CDCUpsertSink:
+    """CDC批量upsert写入器
+
+    INSERT/UPDATE 作为upsert写入，DELETE 按主键批量删除。建议与
+    CDCSourceConfig.coalesce_events 一起使用，热点行在一个批次内只写一次。
+    """
+
+    def __init__(
+        self,
+        tables: Dict[str, CDCSinkTableConfig],
+        starrocks_client: Optional[Any] = None,
+        vector_store: Optional[Any] = None,
+        embedder: Optional[Any] = None
+    ):
+        """初始化写入器
+
+        Args:
+            tables: 源表("库.表"或"表")到写入配置的映射，未配置的表被忽略
+            starrocks_client: StarRocksClient 实例
+            vector_store: VectorStore 实例
+            embedder: 提供 embed_texts 的嵌入器，写向量存储时必需
+        """
+        self.tables = tables
+        self.starrocks_client = starrocks_client
+        self.vector_store = vector_store
+        self.embedder = embedder
+
+        self.stats = {
+            "batches": 0,
+            "events": 0,
+            "rows_upserted": 0,
+            "rows_deleted": 0,
+            "vectors_upserted": 0,
+            "vectors_deleted": 0,
+            "write_calls": 0,
+            "failed_writes": 0,
+            "total_write_time": 0.0
+        }
+
+    def _table_config(self, event: CDCEvent) -> Optional[CDCSinkTableConfig]:
+        if event.database:
+            config = self.tables.get(f"{event.database}.{event.table}")
+            if config is not None:
+                return config
+        return self.tables.get(event.table)
+
+    def _group_events(
+        self, events: List[CDCEvent]
+    ) -> Dict[Tuple[Optional[str], Optional[str]], Tuple[CDCSinkTableConfig, Dict[Any, Dict[str, Any]], Dict[Any, None]]]:
+        """按表分组，同一主键只保留最后一次变更"""
+        groups = {}
+        for event in events:
+            config = self._table_config(event)
+            if config is None:
+                continue
+
+            group_key = (event.database, event.table)
+            if group_key not in groups:
+                groups[group_key] = (config, {}, {})
+            _, upserts, deletes = groups[group_key]
+
+            if event.event_type in (CDCEventType.INSERT, CDCEventType.UPDATE) and event.after_data:
+                key = event.after_data.get(config.key_column)
+                if key is None:
+                    continue
+                deletes.pop(key, None)
+                upserts[key] = event.after_data
+            elif event.event_type == CDCEventType.DELETE and event.before_data:
+                key = event.before_data.get(config.key_column)
+                if key is None:
+                    continue
+                upserts.pop(key, None)
+                deletes[key] = None
+
+        return groups
+
+    async def write_events(self, events: List[CDCEvent]) -> None:
+        """批量写入一批CDC事件"""
+        start_time = time.time()
+        self.stats["batches"] += 1
+        self.stats["events"] += len(events)
+
+        for (database, table), (config, upserts, deletes) in self._group_events(events).items():
+            if self.starrocks_client is not None and config.target_table:
+                await self._write_starrocks(config, upserts, deletes)
+
+            if self.vector_store is not None and config.text_fields:
+                await self._write_vectors(f"{database}.{table}" if database else table, config, upserts, deletes)
+
+        self.stats["total_write_time"] += time.time() - start_time
+
+    async def _write_starrocks(
+        self,
+        config: CDCSinkTableConfig,
+        upserts: Dict[Any, Dict[str, Any]],
+        deletes: Dict[Any, None]
+    ) -> None:
+        if upserts:
+            self.stats["write_calls"] += 1
+            if await self.starrocks_client.upsert_rows(config.target_table, list(upserts.values())):
+                self.stats["rows_upserted"] += len(upserts)
+            else:
+                self.stats["failed_writes"] += 1
+
+        if deletes:
+            self.stats["write_calls"] += 1
+            if await self.starrocks_client.delete_rows(config.target_table, config.key_column, list(deletes)):
+                self.stats["rows_deleted"] += len(deletes)
+            else:
+                self.stats["failed_writes"] += 1
+
+    async def _write_vectors(
+        self,
+        source_table: str,
+        config: CDCSinkTableConfig,
+        upserts: Dict[Any, Dict[str, Any]],
+        deletes: Dict[Any, None]
+    ) -> None:
+        from backend.core.vector.vector_store import VectorDocument
+
+        rows = [
+            (key, row, " ".join(str(row[name]) for name in config.text_fields if row.get(name)))
+            for key, row in upserts.items()
+        ]
+        # 文本字段被清空的行只删除旧向量
+        stale_keys = list(deletes) + [key for key, _, text in rows if not text]
+        rows = [(key, row, text) for key, row, text in rows if text]
+
+        documents = []
+        if rows and self.embedder is None:
+            logger.warning(f"未配置嵌入器，跳过向量写入: {source_table}")
+        elif rows:
+            batch_result = await self.embedder.embed_texts([text for _, _, text in rows])
+            if batch_result.failed_embeddings or len(batch_result.results) != len(rows):
+                # 失败的嵌入不在结果中，无法与行对齐；保留旧向量，整批跳过
+                logger.error(
+                    f"向量嵌入失败 {batch_result.failed_embeddings}/{len(rows)} 行，跳过向量更新: {source_table}"
+                )
+                self.stats["failed_writes"] += 1
+            else:
+                documents = [
+                    VectorDocument(
+                        id=f"{source_table}:{key}",
+                        vector=embedding.embedding,
+                        text=text,
+                        metadata={
+                            "source_table": source_table,
+                            "row_key": key,
+                            **{name: row.get(name) for name in config.metadata_fields}
+                        }
+                    )
+                    for (key, row, text), embedding in zip(rows, batch_result.results)
+                ]
+                stale_keys.extend(key for key, _, _ in rows)
+
+        # 只删除已删除的行和即将写入新向量的行，删除与更新合并为一次删除调用
+        stale_ids = [f"{source_table}:{key}" for key in stale_keys]
+        if stale_ids:
+            self.stats["write_calls"] += 1
+            deleted = await self.vector_store.delete(stale_ids)
+            self.stats["vectors_deleted"] += deleted if isinstance(deleted, int) else 0
+
+        if documents:
+            self.stats["write_calls"] += 1
+            await self.vector_store.insert(documents)
+            self.stats["vectors_upserted"] += len(documents)
+
+    def as_processor(self, name: str = "cdc_upsert_sink", batch_size: int = 1000) -> CDCProcessor:
+        """包装为 CDCProcessor，可直接注册到 CDCManager"""
+        return CDCProcessor(name=name, batch_size=batch_size, processor_function=self.write_events)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """获取写入统计"""
+        stats = self.stats.copy()
+        stats["events_per_write"] = stats["events"] / max(1, stats["write_calls"])
+        return stats
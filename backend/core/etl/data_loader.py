@@ -16,7 +16,7 @@ import aiofiles
 from pydantic import BaseModel, Field
 
 from backend.utils.logger import get_logger
-from backend.core.knowledge_graph.graph_manager import GraphManager
+from backend.core.knowledge_graph.graph_manager import GraphManager, GraphOperationType
 from backend.models.knowledge import Entity, Relation
 from .data_structurer import StructuredData, DataType
 
@@ -46,6 +46,15 @@ class LoadStrategy(str, Enum):
     SKIP_EXISTING = "skip_existing"  # 跳过已存在的数据
 
 
+# 知识图谱目标支持的加载策略
+_GRAPH_OPERATIONS = {
+    LoadStrategy.INSERT: GraphOperationType.CREATE,
+    LoadStrategy.UPDATE: GraphOperationType.UPDATE,
+    LoadStrategy.UPSERT: GraphOperationType.MERGE,
+    LoadStrategy.MERGE: GraphOperationType.MERGE,
+}
+
+
 class LoadStatus(str, Enum):
     """加载状态枚举"""
     SUCCESS = "success"
@@ -195,17 +204,26 @@ class DataLoader:
         Returns:
             加载报告
         """
+        return await self._load(data, self._resolve_targets(target_ids))
+
+    def _resolve_targets(self, target_ids: Optional[List[str]] = None) -> List[LoadTarget]:
+        """确定要加载的目标，未指定时为所有启用的目标"""
+        if target_ids:
+            return [self.targets[tid] for tid in target_ids if tid in self.targets]
+        return [target for target in self.targets.values() if target.enabled]
+
+    async def _load(
+        self,
+        data: StructuredData,
+        targets_to_load: List[LoadTarget],
+        extra_results: Optional[List[LoadResult]] = None
+    ) -> LoadReport:
+        """加载数据到给定目标，extra_results 为已在外部完成的加载结果"""
         start_time = datetime.now()
         
         try:
             logger.info(f"开始加载数据: {data.id}")
             
-            # 确定要加载的目标
-            if target_ids:
-                targets_to_load = [self.targets[tid] for tid in target_ids if tid in self.targets]
-            else:
-                targets_to_load = [target for target in self.targets.values() if target.enabled]
-            
             # 并行加载到各个目标
             tasks = []
             for target in targets_to_load:
@@ -231,6 +249,7 @@ class DataLoader:
                     load_results.append(error_result)
                 else:
                     load_results.append(result)
+            load_results.extend(extra_results or [])
             
             # 统计结果
             successful = sum(1 for r in load_results if r.status == LoadStatus.SUCCESS)
@@ -340,71 +359,92 @@ class DataLoader:
         target: LoadTarget
     ) -> LoadResult:
         """加载数据到知识图谱"""
+        return (await self._load_batch_to_knowledge_graph([data], target))[0]
+
+    async def _load_batch_to_knowledge_graph(
+        self,
+        data_list: List[StructuredData],
+        target: LoadTarget
+    ) -> List[LoadResult]:
+        """批量加载到知识图谱
+        
+        所有数据的实体和关系按加载策略分组、按ID合并，以 target.batch_size 为分块
+        通过 GraphManager 的批量接口写入（先实体后关系），再把分块失败分摊回
+        各条数据的加载结果。
+        
+        Returns:
+            与 data_list 一一对应的加载结果
+        """
         if not self.graph_manager:
-            return LoadResult(
-                data_id=data.id,
-                target_id=target.id,
-                target_name=target.name,
-                status=LoadStatus.FAILED,
-                message="知识图谱管理器未初始化"
-            )
+            return [
+                LoadResult(
+                    data_id=data.id,
+                    target_id=target.id,
+                    target_name=target.name,
+                    status=LoadStatus.FAILED,
+                    message="知识图谱管理器未初始化"
+                )
+                for data in data_list
+            ]
         
-        try:
-            records_processed = 0
-            records_successful = 0
-            records_failed = 0
-            
-            # 加载实体
-            if data.entities:
-                for entity_data in data.entities:
-                    try:
-                        entity = Entity(
-                            id=entity_data.get("id", str(uuid.uuid4())),
-                            type=entity_data.get("type", "unknown"),
-                            properties=entity_data.get("properties", {})
-                        )
-                        
-                        if target.load_strategy == LoadStrategy.UPSERT:
-                            await self.graph_manager.upsert_entity(entity)
-                        elif target.load_strategy == LoadStrategy.INSERT:
-                            await self.graph_manager.create_entity(entity)
-                        elif target.load_strategy == LoadStrategy.UPDATE:
-                            await self.graph_manager.update_entity(entity)
-                        
-                        records_successful += 1
-                    except Exception as e:
-                        logger.error(f"加载实体失败: {entity_data}, 错误: {str(e)}")
-                        records_failed += 1
+        processed = [0] * len(data_list)
+        invalid = [0] * len(data_list)
+        skipped = [0] * len(data_list)
+        # 每条数据写入的记录键：(类型, 操作, 记录ID)
+        record_keys: List[List[Tuple[str, GraphOperationType, str]]] = [[] for _ in data_list]
+        groups: Dict[Tuple[str, GraphOperationType], Dict[str, Union[Entity, Relation]]] = {}
+        
+        for index, data in enumerate(data_list):
+            for kind, items in (("entity", data.entities), ("relation", data.relations)):
+                for item in items or []:
+                    processed[index] += 1
+                    operation = _GRAPH_OPERATIONS.get(item.get("load_strategy", target.load_strategy))
+                    if operation is None:
+                        skipped[index] += 1
+                        continue
                     
-                    records_processed += 1
-            
-            # 加载关系
-            if data.relationships:
-                for rel_data in data.relationships:
                     try:
-                        relationship = Relation(
-                            id=rel_data.get("id", str(uuid.uuid4())),
-                            source_id=rel_data.get("source_id"),
-                            target_id=rel_data.get("target_id"),
-                            type=rel_data.get("type"),
-                            properties=rel_data.get("properties", {})
-                        )
-                        
-                        if target.load_strategy == LoadStrategy.UPSERT:
-                            await self.graph_manager.upsert_relationship(relationship)
-                        elif target.load_strategy == LoadStrategy.INSERT:
-                            await self.graph_manager.create_relationship(relationship)
-                        elif target.load_strategy == LoadStrategy.UPDATE:
-                            await self.graph_manager.update_relationship(relationship)
-                        
-                        records_successful += 1
+                        record = self._build_entity(item) if kind == "entity" else self._build_relation(item)
                     except Exception as e:
-                        logger.error(f"加载关系失败: {rel_data}, 错误: {str(e)}")
-                        records_failed += 1
+                        logger.error(f"构建{kind}失败: {item}, 错误: {str(e)}")
+                        invalid[index] += 1
+                        continue
                     
-                    records_processed += 1
+                    # 同一ID在批次内只写一次，后出现的记录覆盖先出现的
+                    groups.setdefault((kind, operation), {})[record.id] = record
+                    record_keys[index].append((kind, operation, record.id))
+        
+        failed_keys = set()
+        failed_chunks = []
+        # 先写实体，保证关系两端存在
+        for kind in ("entity", "relation"):
+            for (group_kind, operation), records in groups.items():
+                if group_kind != kind:
+                    continue
+                
+                write = (
+                    self.graph_manager.bulk_upsert_entities if kind == "entity"
+                    else self.graph_manager.bulk_upsert_relations
+                )
+                try:
+                    result = await write(list(records.values()), operation, chunk_size=target.batch_size)
+                    chunks = result.chunks
+                except Exception as e:
+                    logger.error(f"知识图谱批量写入失败: {kind}/{operation.value}, 错误: {str(e)}")
+                    chunks = [{"index": 0, "size": len(records), "failed": len(records),
+                               "failed_ids": list(records), "error": str(e)}]
+                
+                for chunk in chunks:
+                    if chunk["failed"]:
+                        failed_chunks.append((kind, operation, set(chunk["failed_ids"]), chunk))
+                        failed_keys.update((kind, operation, record_id) for record_id in chunk["failed_ids"])
+        
+        results = []
+        for index, data in enumerate(data_list):
+            keys = record_keys[index]
+            records_failed = invalid[index] + sum(1 for key in keys if key in failed_keys)
+            records_successful = processed[index] - skipped[index] - records_failed
             
-            # 确定状态
             if records_failed == 0:
                 status = LoadStatus.SUCCESS
                 message = f"成功加载 {records_successful} 条记录到知识图谱"
@@ -415,26 +455,63 @@ class DataLoader:
                 status = LoadStatus.FAILED
                 message = f"加载失败，失败记录数: {records_failed}"
             
-            return LoadResult(
+            error_details = None
+            if records_failed:
+                key_set = set(keys)
+                error_details = {
+                    "invalid_records": invalid[index],
+                    "failed_chunks": [
+                        {
+                            "kind": kind,
+                            "operation": operation.value,
+                            "index": chunk["index"],
+                            "size": chunk["size"],
+                            "failed": chunk["failed"],
+                            "error": chunk["error"]
+                        }
+                        for kind, operation, chunk_failed_ids, chunk in failed_chunks
+                        if any((kind, operation, record_id) in key_set for record_id in chunk_failed_ids)
+                    ]
+                }
+            
+            results.append(LoadResult(
                 data_id=data.id,
                 target_id=target.id,
                 target_name=target.name,
                 status=status,
                 message=message,
-                records_processed=records_processed,
+                records_processed=processed[index],
                 records_successful=records_successful,
-                records_failed=records_failed
-            )
-            
-        except Exception as e:
-            return LoadResult(
-                data_id=data.id,
-                target_id=target.id,
-                target_name=target.name,
-                status=LoadStatus.FAILED,
-                message=f"知识图谱加载失败: {str(e)}",
-                error_details={"error": str(e)}
-            )
+                records_failed=records_failed,
+                records_skipped=skipped[index],
+                error_details=error_details
+            ))
+        
+        return results
+
+    @staticmethod
+    def _build_entity(entity_data: Dict[str, Any]) -> Entity:
+        """从结构化数据中的实体字典构建实体"""
+        entity_id = entity_data.get("id") or str(uuid.uuid4())
+        return Entity(
+            id=entity_id,
+            name=entity_data.get("name") or entity_data.get("value") or entity_id,
+            entity_type=entity_data.get("type", "unknown"),
+            description=entity_data.get("description"),
+            properties=entity_data.get("properties", {})
+        )
+
+    @staticmethod
+    def _build_relation(rel_data: Dict[str, Any]) -> Relation:
+        """从结构化数据中的关系字典构建关系"""
+        return Relation(
+            id=rel_data.get("id") or str(uuid.uuid4()),
+            source_id=rel_data.get("source_id"),
+            target_id=rel_data.get("target_id"),
+            relation_type=rel_data.get("type"),
+            confidence=rel_data.get("confidence"),
+            properties=rel_data.get("properties", {})
+        )
 
     async def _load_to_file_system(
         self,
@@ -644,7 +721,8 @@ class DataLoader:
         self,
         data_list: List[StructuredData],
         target_ids: Optional[List[str]] = None,
-        max_concurrent: int = 5
+        max_concurrent: int = 5,
+        merge_graph_writes: bool = False
     ) -> List[LoadReport]:
         """批量加载数据
         
@@ -652,17 +730,44 @@ class DataLoader:
             data_list: 结构化数据列表
             target_ids: 目标ID列表
             max_concurrent: 最大并发数
+            merge_graph_writes: 是否合并所有数据的实体和关系，对每个知识图谱目标只做一次批量写入
             
         Returns:
             加载报告列表
         """
         semaphore = asyncio.Semaphore(max_concurrent)
+        targets = self._resolve_targets(target_ids)
+        graph_results: List[List[LoadResult]] = [[] for _ in data_list]
+        
+        if merge_graph_writes:
+            graph_targets = [t for t in targets if t.target_type == LoadTargetType.KNOWLEDGE_GRAPH]
+            targets = [t for t in targets if t.target_type != LoadTargetType.KNOWLEDGE_GRAPH]
+            for target in graph_targets:
+                start_time = datetime.now()
+                try:
+                    results = await self._load_batch_to_knowledge_graph(data_list, target)
+                except Exception as e:
+                    results = [
+                        LoadResult(
+                            data_id=data.id,
+                            target_id=target.id,
+                            target_name=target.name,
+                            status=LoadStatus.FAILED,
+                            message=f"加载过程中发生异常: {str(e)}",
+                            error_details={"exception": str(e)}
+                        )
+                        for data in data_list
+                    ]
+                execution_time = int((datetime.now() - start_time).total_seconds() * 1000)
+                for index, result in enumerate(results):
+                    result.execution_time_ms = execution_time
+                    graph_results[index].append(result)
         
-        async def load_with_semaphore(data: StructuredData) -> LoadReport:
+        async def load_with_semaphore(index: int, data: StructuredData) -> LoadReport:
             async with semaphore:
-                return await self.load(data, target_ids)
+                return await self._load(data, targets, graph_results[index])
         
-        tasks = [load_with_semaphore(data) for data in data_list]
+        tasks = [load_with_semaphore(index, data) for index, data in enumerate(data_list)]
         reports = await asyncio.gather(*tasks, return_exceptions=True)
         
         # 处理异常
@@ -6,8 +6,10 @@
 import json
 import re
 import uuid
+import asyncio
+import shutil
 from datetime import datetime
-from typing import Dict, List, Any, Optional, Union, Tuple
+from typing import Dict, List, Any, Optional, Union, Tuple, AsyncIterator
 from pathlib import Path
 from dataclasses import dataclass
 from enum import Enum
@@ -17,6 +19,9 @@ from pydantic import BaseModel, Field
 
 from backend.utils.logger import get_logger
 from backend.models.base import BaseModel as BaseModelClass
+from .stream_readers import (
+    ColumnarSheetWriter, RSSTracker, iter_docx_blocks, iter_xlsx_batches
+)
 
 logger = get_logger(__name__)
 
@@ -60,6 +65,11 @@ class StructureConfig:
     language: str = "zh"
     encoding: str = "utf-8"
     custom_rules: Dict[str, Any] = None
+    # 流式处理：XLSX/DOCX 超过阈值（或数据为文件路径）时逐行读取，工作表以列式文件保存
+    streaming_threshold_bytes: int = 20 * 1024 * 1024
+    stream_batch_rows: int = 1000
+    columnar_prefix: str = "structured"  # 对象存储中的路径前缀
+    columnar_local_dir: str = "./data/columnar"  # 未配置对象存储时的本地目录
 
     def __post_init__(self):
         if self.custom_rules is None:
@@ -89,13 +99,15 @@ class DataStructurer:
     负责将各种格式的非结构化数据转换为统一的结构化格式。
     """
 
-    def __init__(self, config: Optional[StructureConfig] = None):
+    def __init__(self, config: Optional[StructureConfig] = None, object_store: Optional[Any] = None):
         """初始化数据结构化器
         
         Args:
             config: 结构化配置
+            object_store: MinIOClient 实例，用于保存流式处理产生的列式工作表
         """
         self.config = config or StructureConfig()
+        self.object_store = object_store
         self.processors = self._initialize_processors()
         
     def _initialize_processors(self) -> Dict[DataType, callable]:
@@ -134,6 +146,9 @@ class DataStructurer:
         try:
             logger.info(f"开始结构化数据: {source_id}, 类型: {data_type}")
             
+            if self._should_stream(data, data_type):
+                return await self._structure_streaming(data, data_type, source_id, structure_type, metadata)
+            
             # 获取处理器
             processor = self.processors.get(data_type)
             if not processor:
@@ -345,6 +360,272 @@ class DataStructurer:
         except Exception as e:
             raise ValueError(f"XLSX处理失败: {str(e)}")
 
+    def _should_stream(self, data: Any, data_type: DataType) -> bool:
+        """大文件或以文件路径给出的 XLSX/DOCX 使用流式处理"""
+        if data_type not in (DataType.XLSX, DataType.DOCX):
+            return False
+        if isinstance(data, Path):
+            return True
+        if isinstance(data, (bytes, bytearray)):
+            return len(data) >= self.config.streaming_threshold_bytes
+        return isinstance(data, str) and Path(data).is_file()
+
+    async def _iterate(self, iterator) -> AsyncIterator[Any]:
+        """在线程中推进阻塞的解析迭代器"""
+        end = object()
+        while True:
+            item = await asyncio.to_thread(next, iterator, end)
+            if item is end:
+                return
+            yield item
+
+    async def _structure_streaming(
+        self,
+        data: Union[bytes, str, Path],
+        data_type: DataType,
+        source_id: str,
+        structure_type: StructureType,
+        metadata: Optional[Dict[str, Any]]
+    ) -> StructuredData:
+        """流式结构化
+        
+        XLSX 逐批读取行并写入列式文件，内容中只保留工作表摘要和存储位置；
+        DOCX 增量解析正文，不构建完整文档对象。元数据中记录处理期间的峰值内存。
+        """
+        tracker = RSSTracker()
+        entities: List[Dict[str, Any]] = []
+        
+        if data_type == DataType.XLSX:
+            content = {
+                "sheets": {},
+                "sheet_names": [],
+                "total_rows": 0,
+                "total_columns": 0,
+                "streamed": True
+            }
+            writer: Optional[ColumnarSheetWriter] = None
+            current_sheet = None
+            
+            async for batch in self._iterate(iter_xlsx_batches(data, self.config.stream_batch_rows)):
+                if batch.sheet_name != current_sheet:
+                    if writer is not None:
+                        await self._finish_sheet(content, current_sheet, sheet_index, writer, source_id)
+                    current_sheet, sheet_index = batch.sheet_name, batch.sheet_index
+                    writer = ColumnarSheetWriter(batch.columns)
+                
+                await asyncio.to_thread(writer.write, batch.rows)
+                if self.config.extract_entities and batch.rows:
+                    entities.extend(await self._extract_entities({"text": self._rows_to_text(batch.rows)}))
+                tracker.sample()
+            
+            if writer is not None:
+                await self._finish_sheet(content, current_sheet, sheet_index, writer, source_id)
+            text = None
+        else:
+            paragraphs: List[str] = []
+            tables: List[List[List[str]]] = []
+            async for block in self._iterate(iter_docx_blocks(data)):
+                if block.kind == "paragraph":
+                    if block.text.strip():
+                        paragraphs.append(block.text)
+                else:
+                    tables.append(block.rows)
+                tracker.sample()
+            
+            text = "\n".join(paragraphs)
+            content = {
+                "text": text,
+                "paragraphs": paragraphs,
+                "tables": tables,
+                "paragraphs_count": len(paragraphs),
+                "tables_count": len(tables),
+                "streamed": True
+            }
+            if self.config.extract_entities:
+                entities = await self._extract_entities(content)
+        
+        structured_data = StructuredData(
+            source_id=source_id,
+            source_type=data_type,
+            structure_type=structure_type,
+            content=content,
+            metadata={**(metadata or {}), "memory": tracker.to_dict()},
+            entities=entities
+        )
+        
+        if self.config.extract_relations:
+            structured_data.relations = await self._extract_relations(content)
+        
+        # 工作表行保存在列式文件中，按需通过 stream_structure 分块
+        if structure_type == StructureType.DOCUMENT and text is not None:
+            structured_data.chunks = await self._create_chunks(content)
+        
+        structured_data.quality_score = self._calculate_quality_score(structured_data)
+        structured_data.confidence = self._calculate_confidence(structured_data)
+        tracker.sample()
+        structured_data.metadata["memory"] = tracker.to_dict()
+        
+        logger.info(
+            f"流式结构化完成: {source_id}, 峰值内存: {tracker.peak_rss / 1024 / 1024:.1f}MB"
+        )
+        return structured_data
+
+    async def _finish_sheet(
+        self,
+        content: Dict[str, Any],
+        sheet_name: str,
+        sheet_index: int,
+        writer: ColumnarSheetWriter,
+        source_id: str
+    ) -> None:
+        """结束一张工作表的写入并保存列式文件"""
+        parts = await asyncio.to_thread(writer.close)
+        locations = []
+        for part_index, part in enumerate(parts):
+            suffix = "parquet" if writer.format == "parquet" else "csv.gz"
+            object_name = (
+                f"{self.config.columnar_prefix}/{source_id}/sheet-{sheet_index:03d}-part-{part_index:05d}.{suffix}"
+            )
+            location = await self._store_columnar(object_name, part["file"])
+            location.update({"rows": part["rows"], "size_bytes": part["size_bytes"]})
+            locations.append(location)
+        
+        content["sheets"][sheet_name] = {
+            "columns": writer.columns,
+            "rows": writer.rows,
+            "shape": (writer.rows, len(writer.columns)),
+            "format": writer.format,
+            "storage": locations
+        }
+        content["sheet_names"].append(sheet_name)
+        content["total_rows"] += writer.rows
+        content["total_columns"] += len(writer.columns)
+
+    async def _store_columnar(self, object_name: str, file_obj: Any) -> Dict[str, Any]:
+        """保存列式文件到对象存储，未配置时保存到本地目录"""
+        try:
+            if self.object_store is not None:
+                bucket = self.object_store.get_bucket_name("documents")
+                content_type = (
+                    "application/vnd.apache.parquet" if object_name.endswith(".parquet") else "application/gzip"
+                )
+                if not await self.object_store.upload_data(bucket, object_name, file_obj, content_type=content_type):
+                    raise ValueError(f"列式文件上传失败: {bucket}/{object_name}")
+                return {"storage": "minio", "bucket": bucket, "object_name": object_name}
+            
+            path = Path(self.config.columnar_local_dir) / object_name
+            
+            def write_file() -> None:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                with open(path, "wb") as output:
+                    shutil.copyfileobj(file_obj, output)
+            
+            await asyncio.to_thread(write_file)
+            return {"storage": "file", "path": str(path)}
+        finally:
+            file_obj.close()
+
+    @staticmethod
+    def _rows_to_text(rows: List[Tuple[Any, ...]]) -> str:
+        return "\n".join("\t".join("" if value is None else str(value) for value in row) for row in rows)
+
+    async def stream_structure(
+        self,
+        data: Union[bytes, str, Path],
+        data_type: DataType,
+        source_id: str,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[StructuredData]:
+        """逐批结构化 XLSX/DOCX
+        
+        XLSX 每批行、DOCX 每批段落（及表格）产出一个 StructuredData，可直接送入
+        验证、转换等后续阶段，整个文档不会同时驻留内存。最后一批的元数据中
+        is_last 为 True，并带有处理期间的峰值内存。
+        
+        Args:
+            data: 文件内容或文件路径
+            data_type: DataType.XLSX 或 DataType.DOCX
+            source_id: 数据源ID
+            metadata: 附加到每批数据的元数据
+        """
+        if data_type not in (DataType.XLSX, DataType.DOCX):
+            raise ValueError(f"不支持流式处理的数据类型: {data_type}")
+        
+        tracker = RSSTracker()
+        batch_index = 0
+        pending: Optional[Tuple[Dict[str, Any], StructureType]] = None
+        
+        async def build(content: Dict[str, Any], structure_type: StructureType, is_last: bool) -> StructuredData:
+            batch_metadata = {
+                **(metadata or {}),
+                "batch_index": batch_index,
+                "is_last": is_last,
+                "memory": tracker.to_dict()
+            }
+            structured_data = StructuredData(
+                source_id=source_id,
+                source_type=data_type,
+                structure_type=structure_type,
+                content=content,
+                metadata=batch_metadata
+            )
+            if self.config.extract_entities:
+                structured_data.entities = await self._extract_entities(content)
+            structured_data.chunks = await self._create_chunks(content)
+            structured_data.quality_score = self._calculate_quality_score(structured_data)
+            structured_data.confidence = self._calculate_confidence(structured_data)
+            return structured_data
+        
+        if data_type == DataType.XLSX:
+            batches = (
+                ({
+                    "sheet": batch.sheet_name,
+                    "columns": batch.columns,
+                    "rows": [list(row) for row in batch.rows],
+                    "start_row": batch.start_row,
+                    "text": self._rows_to_text(batch.rows)
+                }, StructureType.TABLE)
+                async for batch in self._iterate(iter_xlsx_batches(data, self.config.stream_batch_rows))
+                if batch.rows
+            )
+        else:
+            batches = self._docx_batches(data)
+        
+        # 先取下一批再产出上一批，以便标记最后一批
+        async for content, structure_type in batches:
+            tracker.sample()
+            if pending is not None:
+                yield await build(*pending, is_last=False)
+                batch_index += 1
+            pending = (content, structure_type)
+        
+        if pending is not None:
+            tracker.sample()
+            yield await build(*pending, is_last=True)
+
+    async def _docx_batches(self, data: Union[bytes, str, Path]) -> AsyncIterator[Tuple[Dict[str, Any], StructureType]]:
+        """把DOCX段落按字符数聚合为批，每批约为10个分块的长度"""
+        paragraphs: List[str] = []
+        tables: List[List[List[str]]] = []
+        size = 0
+        limit = self.config.chunk_size * 10
+        
+        async for block in self._iterate(iter_docx_blocks(data)):
+            if block.kind == "paragraph":
+                if not block.text.strip():
+                    continue
+                paragraphs.append(block.text)
+                size += len(block.text)
+            else:
+                tables.append(block.rows)
+            
+            if size >= limit:
+                yield {"text": "\n".join(paragraphs), "paragraphs": paragraphs, "tables": tables}, StructureType.DOCUMENT
+                paragraphs, tables, size = [], [], 0
+        
+        if paragraphs or tables:
+            yield {"text": "\n".join(paragraphs), "paragraphs": paragraphs, "tables": tables}, StructureType.DOCUMENT
+
     async def _extract_entities(self, content: Dict[str, Any]) -> List[Dict[str, Any]]:
         """提取实体"""
         entities = []
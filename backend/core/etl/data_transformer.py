@@ -4,6 +4,7 @@
 """
 
 import re
+import copy
 import json
 import uuid
 import hashlib
@@ -18,6 +19,8 @@ from pydantic import BaseModel, Field
 
 from backend.utils.logger import get_logger
 from .data_structurer import StructuredData, DataType, StructureType
+from .field_access import get_field_getter, CopyOnWriteSetter
+from .expression import ExpressionError, get_expression
 
 logger = get_logger(__name__)
 
@@ -214,6 +217,14 @@ class DataTransformer:
             rule: 转换规则
         """
         self.rules[rule.id] = rule
+        # 预编译字段路径和条件表达式
+        get_field_getter(rule.source_field)
+        for condition in (rule.condition, rule.parameters.get("condition")):
+            if condition:
+                try:
+                    get_expression(condition)
+                except ExpressionError as e:
+                    logger.warning(f"转换规则条件无效: {rule.id}, {str(e)}")
         logger.debug(f"添加转换规则: {rule.name}")
 
     def remove_rule(self, rule_id: str) -> None:
@@ -257,8 +268,9 @@ class DataTransformer:
         try:
             logger.info(f"开始转换数据: {data.id}")
             
-            # 创建数据副本
-            transformed_data = data.copy(deep=True)
+            # 浅拷贝数据，规则写入字段时再复制路径上的容器
+            transformed_data = data.model_copy()
+            setter = CopyOnWriteSetter(transformed_data)
             
             # 确定要使用的规则
             if rule_ids:
@@ -279,7 +291,7 @@ class DataTransformer:
             results = []
             for rule_id, rule in sorted_rules:
                 if rule.enabled:
-                    result = await self._apply_rule(transformed_data, rule)
+                    result = await self._apply_rule(transformed_data, rule, setter)
                     results.append(result)
             
             # 更新时间戳
@@ -320,13 +332,15 @@ class DataTransformer:
     async def _apply_rule(
         self,
         data: StructuredData,
-        rule: TransformationRule
+        rule: TransformationRule,
+        setter: Optional[CopyOnWriteSetter] = None
     ) -> TransformationResult:
         """应用转换规则
         
         Args:
             data: 结构化数据
             rule: 转换规则
+            setter: 写时复制写入器，未提供时直接修改 data
             
         Returns:
             转换结果
@@ -362,7 +376,10 @@ class DataTransformer:
             elif rule.transformation_type == TransformationType.EXTRACT:
                 transformed_value, status, message = await self._transform_extract(source_value, rule)
             elif rule.transformation_type == TransformationType.CUSTOM:
-                transformed_value, status, message = await self._transform_custom(source_value, rule)
+                # 源值与原始数据共享，自定义函数可能原地修改，传入副本
+                transformed_value, status, message = await self._transform_custom(
+                    copy.deepcopy(source_value), rule
+                )
             else:
                 return TransformationResult(
                     rule_id=rule.id,
@@ -376,7 +393,10 @@ class DataTransformer:
             
             # 设置目标字段值
             if status == TransformationStatus.SUCCESS:
-                self._set_field_value(data, rule.target_field, transformed_value)
+                if setter is not None:
+                    setter.set(rule.target_field, transformed_value)
+                else:
+                    self._set_field_value(data, rule.target_field, transformed_value)
             
             execution_time = int((datetime.now() - start_time).total_seconds() * 1000)
             
@@ -407,19 +427,9 @@ class DataTransformer:
             )
 
     def _get_field_value(self, data: StructuredData, field_path: str) -> Any:
-        """获取字段值"""
+        """获取字段值（直接取自数据对象，不做拷贝）"""
         try:
-            data_dict = data.dict()
-            keys = field_path.split(".")
-            value = data_dict
-            
-            for key in keys:
-                if isinstance(value, dict) and key in value:
-                    value = value[key]
-                else:
-                    return None
-                    
-            return value
+            return get_field_getter(field_path)(data)
         except Exception:
             return None
 
@@ -449,22 +459,18 @@ class DataTransformer:
             logger.error(f"设置字段值失败: {field_path}, 错误: {str(e)}")
 
     def _evaluate_condition(self, data: StructuredData, condition: str) -> bool:
-        """评估执行条件"""
+        """评估执行条件
+        
+        条件为 expression 模块支持的表达式，例如 "source_type == 'text'" 或
+        "quality_score > 0.5"。无效的条件不执行规则，求值出错时默认执行。
+        """
         try:
-            # 简单的条件评估，实际应用中可以使用更复杂的表达式解析器
-            # 例如："source_type == 'text'" 或 "quality_score > 0.5"
-            
-            # 替换字段引用
-            condition = condition.replace("source_type", f"'{data.source_type}'")
-            condition = condition.replace("quality_score", str(data.quality_score))
-            condition = condition.replace("confidence", str(data.confidence))
-            
-            # 安全评估（仅支持基本比较操作）
-            allowed_operators = ['==', '!=', '>', '<', '>=', '<=', 'and', 'or', 'not']
-            if any(op in condition for op in ['import', 'exec', 'eval', '__']):
-                return False
-                
-            return eval(condition)
+            evaluator = get_expression(condition)
+        except ExpressionError:
+            return False
+        
+        try:
+            return bool(evaluator(data))
         except Exception:
             return True  # 条件评估失败时默认执行
 
@@ -571,13 +577,16 @@ class DataTransformer:
             if not filter_condition:
                 return value, TransformationStatus.SKIPPED, "未指定过滤条件"
             
-            # 简单的过滤逻辑
+            try:
+                get_expression(filter_condition)
+            except ExpressionError as e:
+                return value, TransformationStatus.FAILED, f"过滤条件无效: {str(e)}"
+            
             if isinstance(value, list):
-                filtered_items = []
-                for item in value:
-                    # 这里应该实现更复杂的过滤逻辑
-                    if self._evaluate_filter_condition(item, filter_condition):
-                        filtered_items.append(item)
+                filtered_items = [
+                    item for item in value
+                    if self._evaluate_filter_condition(item, filter_condition)
+                ]
                 
                 return filtered_items, TransformationStatus.SUCCESS, f"过滤完成，保留 {len(filtered_items)} 项"
             
@@ -637,11 +646,9 @@ class DataTransformer:
             return value, TransformationStatus.FAILED, f"自定义转换失败: {str(e)}"
 
     def _evaluate_filter_condition(self, item: Any, condition: str) -> bool:
-        """评估过滤条件"""
+        """评估过滤条件，名称按列表元素的键或属性读取，求值出错的元素被过滤"""
         try:
-            # 简单的过滤条件评估
-            # 实际应用中应该使用更安全的表达式解析器
-            return True  # 暂时返回True
+            return bool(get_expression(condition)(item))
         except Exception:
             return False
 
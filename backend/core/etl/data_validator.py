@@ -11,10 +11,13 @@ from typing import Dict, List, Any, Optional, Union, Callable, Tuple
 from enum import Enum
 from dataclasses import dataclass
 
+import numpy as np
+import pandas as pd
 from pydantic import BaseModel, Field, validator
 
 from backend.utils.logger import get_logger
 from .data_structurer import StructuredData, DataType
+from .field_access import get_field_getter
 
 logger = get_logger(__name__)
 
@@ -92,6 +95,26 @@ class DataValidationReport(BaseModel):
     duration_ms: Optional[int] = None
 
 
+# 列式验证的状态编码，与 _STATUS_BY_CODE 下标对应；_FALLBACK 表示该行逐条验证
+_PASSED, _FAILED, _WARNING, _SKIPPED, _FALLBACK = range(5)
+_STATUS_BY_CODE = [
+    ValidationStatus.PASSED, ValidationStatus.FAILED, ValidationStatus.WARNING, ValidationStatus.SKIPPED
+]
+
+
+class _ColumnResult:
+    """单条规则在一批数据上的验证结果"""
+
+    __slots__ = ("codes", "messages", "overrides")
+
+    def __init__(self, size: int, messages: Dict[int, str]):
+        self.codes = np.full(size, _PASSED, dtype=np.int8)
+        # 状态编码 -> 消息
+        self.messages = messages
+        # 行号 -> (状态, 消息)，用于消息因行而异的结果
+        self.overrides: Dict[int, Tuple[ValidationStatus, str]] = {}
+
+
 class DataValidator:
     """数据验证器
     
@@ -226,6 +249,8 @@ class DataValidator:
             rule: 验证规则
         """
         self.rules[rule.id] = rule
+        # 预编译字段路径
+        get_field_getter(rule.field_path)
         logger.debug(f"添加验证规则: {rule.name}")
 
     def remove_rule(self, rule_id: str) -> None:
@@ -269,22 +294,11 @@ class DataValidator:
         try:
             logger.info(f"开始验证数据: {data.id}")
             
-            # 确定要使用的规则
-            if rule_ids:
-                rules_to_apply = rule_ids
-            elif rule_set and rule_set in self.rule_sets:
-                rules_to_apply = self.rule_sets[rule_set]
-            else:
-                rules_to_apply = self.rule_sets.get("basic", list(self.rules.keys()))
-            
             # 执行验证
             results = []
-            for rule_id in rules_to_apply:
-                if rule_id in self.rules:
-                    rule = self.rules[rule_id]
-                    if rule.enabled:
-                        result = await self._apply_rule(data, rule)
-                        results.append(result)
+            for rule in self._resolve_rules(rule_set, rule_ids):
+                result = await self._apply_rule(data, rule)
+                results.append(result)
             
             # 统计结果
             passed = sum(1 for r in results if r.status == ValidationStatus.PASSED)
@@ -328,6 +342,24 @@ class DataValidator:
             logger.error(f"数据验证失败: {data.id}, 错误: {str(e)}")
             raise
 
+    def _resolve_rules(
+        self,
+        rule_set: Optional[str] = None,
+        rule_ids: Optional[List[str]] = None
+    ) -> List[ValidationRule]:
+        """确定要执行的已启用规则"""
+        if rule_ids:
+            rules_to_apply = rule_ids
+        elif rule_set and rule_set in self.rule_sets:
+            rules_to_apply = self.rule_sets[rule_set]
+        else:
+            rules_to_apply = self.rule_sets.get("basic", list(self.rules.keys()))
+        
+        return [
+            self.rules[rule_id] for rule_id in rules_to_apply
+            if rule_id in self.rules and self.rules[rule_id].enabled
+        ]
+
     async def _apply_rule(
         self,
         data: StructuredData,
@@ -389,33 +421,13 @@ class DataValidator:
         
         Args:
             data: 结构化数据
-            field_path: 字段路径
+            field_path: 字段路径，支持数组通配，如 "entities[*].value"
             
         Returns:
-            字段值
+            字段值（直接取自数据对象，不做拷贝）
         """
         try:
-            # 将数据转换为字典
-            data_dict = data.model_dump()
-            
-            # 处理数组索引，如 "entities[*].value"
-            if "[*]" in field_path:
-                parts = field_path.split("[*]")
-                base_path = parts[0]
-                sub_path = parts[1].lstrip(".")
-                
-                # 获取数组
-                array_value = self._get_nested_value(data_dict, base_path)
-                if isinstance(array_value, list):
-                    if sub_path:
-                        return [self._get_nested_value(item, sub_path) for item in array_value]
-                    else:
-                        return array_value
-                else:
-                    return None
-            else:
-                return self._get_nested_value(data_dict, field_path)
-                
+            return get_field_getter(field_path)(data)
         except Exception as e:
             logger.debug(f"获取字段值失败: {field_path}, 错误: {str(e)}")
             return None
@@ -594,17 +606,22 @@ class DataValidator:
     async def batch_validate(
         self,
         data_list: List[StructuredData],
-        rule_set: Optional[str] = None
+        rule_set: Optional[str] = None,
+        columnar: bool = False
     ) -> List[DataValidationReport]:
         """批量验证数据
         
         Args:
             data_list: 结构化数据列表
             rule_set: 规则集名称
+            columnar: 是否按列验证，适合表格行等大批量同构数据
             
         Returns:
             验证报告列表
         """
+        if columnar and data_list:
+            return self._batch_validate_columnar(data_list, self._resolve_rules(rule_set))
+        
         reports = []
         
         for data in data_list:
@@ -638,6 +655,314 @@ class DataValidator:
         
         return reports
 
+    def _batch_validate_columnar(
+        self,
+        data_list: List[StructuredData],
+        rules: List[ValidationRule]
+    ) -> List[DataValidationReport]:
+        """列式批量验证
+        
+        把每条规则的字段值收集为一列，用 pandas/NumPy 向量化执行必填、长度、范围和
+        正则验证，再把结果分发回每条数据的验证报告。状态和消息与逐条验证一致，
+        无法向量化的规则和个别特殊值回退到逐条验证。
+        """
+        start_time = datetime.now()
+        size = len(data_list)
+        
+        columns: List[List[Any]] = []
+        column_results: List[_ColumnResult] = []
+        for rule in rules:
+            getter = get_field_getter(rule.field_path)
+            values = []
+            for data in data_list:
+                try:
+                    values.append(getter(data))
+                except Exception:
+                    values.append(None)
+            columns.append(values)
+            column_results.append(self._evaluate_column(rule, values, data_list))
+        
+        # 状态矩阵：行为规则，列为数据
+        codes = np.vstack([result.codes for result in column_results]) if rules else np.empty((0, size), dtype=np.int8)
+        for rule_index, result in enumerate(column_results):
+            for row in np.flatnonzero(result.codes == _FALLBACK):
+                status, message = self._scalar_result(rules[rule_index], columns[rule_index][row], data_list[row])
+                result.overrides[int(row)] = (status, message)
+                codes[rule_index, row] = _STATUS_BY_CODE.index(status)
+        
+        passed = (codes == _PASSED).sum(axis=0).tolist()
+        failed = (codes == _FAILED).sum(axis=0).tolist()
+        warning = (codes == _WARNING).sum(axis=0).tolist()
+        skipped = (codes == _SKIPPED).sum(axis=0).tolist()
+        code_rows = codes.tolist()
+        
+        validation_time = datetime.now().isoformat()
+        rules_by_severity = {severity.value: 0 for severity in ValidationLevel}
+        for rule in rules:
+            rules_by_severity[rule.severity.value] += 1
+        
+        # 每条规则一个结果原型，逐行只替换状态、消息和实际值
+        prototypes = [
+            ValidationResult.model_construct(
+                rule_id=rule.id,
+                rule_name=rule.name,
+                field_path=rule.field_path,
+                status=ValidationStatus.PASSED,
+                message="",
+                actual_value=None,
+                expected_value=None,
+                severity=rule.severity,
+                timestamp=start_time
+            )
+            for rule in rules
+        ]
+        duration = int((datetime.now() - start_time).total_seconds() * 1000)
+        
+        reports = []
+        for row, data in enumerate(data_list):
+            results = []
+            failed_rules = []
+            warning_rules = []
+            for rule_index, rule in enumerate(rules):
+                column_result = column_results[rule_index]
+                override = column_result.overrides.get(row) if column_result.overrides else None
+                if override is not None:
+                    status, message = override
+                else:
+                    code = code_rows[rule_index][row]
+                    status, message = _STATUS_BY_CODE[code], column_result.messages[code]
+                
+                results.append(prototypes[rule_index].model_copy(update={
+                    "status": status,
+                    "message": message,
+                    "actual_value": columns[rule_index][row]
+                }))
+                if status == ValidationStatus.FAILED:
+                    failed_rules.append({"rule_id": rule.id, "rule_name": rule.name, "message": message})
+                elif status == ValidationStatus.WARNING:
+                    warning_rules.append({"rule_id": rule.id, "rule_name": rule.name, "message": message})
+            
+            if failed[row] > 0:
+                overall_status = ValidationStatus.FAILED
+            elif warning[row] > 0:
+                overall_status = ValidationStatus.WARNING
+            else:
+                overall_status = ValidationStatus.PASSED
+            
+            reports.append(DataValidationReport.model_construct(
+                id=str(uuid.uuid4()),
+                data_id=data.id,
+                validation_level=self.validation_level,
+                overall_status=overall_status,
+                total_rules=len(rules),
+                passed_rules=passed[row],
+                failed_rules=failed[row],
+                warning_rules=warning[row],
+                skipped_rules=skipped[row],
+                results=results,
+                summary={
+                    "validation_time": validation_time,
+                    "rules_by_status": {
+                        ValidationStatus.PASSED.value: passed[row],
+                        ValidationStatus.FAILED.value: failed[row],
+                        ValidationStatus.WARNING.value: warning[row],
+                        ValidationStatus.SKIPPED.value: skipped[row]
+                    },
+                    "rules_by_severity": dict(rules_by_severity),
+                    "failed_rules": failed_rules,
+                    "warning_rules": warning_rules
+                },
+                created_at=start_time,
+                duration_ms=duration
+            ))
+        
+        logger.info(
+            f"列式批量验证完成: {size} 条数据, {len(rules)} 条规则, "
+            f"失败 {sum(1 for count in failed if count)} 条, 耗时 {duration}ms"
+        )
+        return reports
+
+    def _scalar_result(
+        self,
+        rule: ValidationRule,
+        value: Any,
+        data: StructuredData
+    ) -> Tuple[ValidationStatus, str]:
+        """逐条验证单个值，异常处理与 _apply_rule 一致"""
+        try:
+            if rule.rule_type == ValidationRuleType.REQUIRED:
+                return self._validate_required(value, rule)
+            if rule.rule_type == ValidationRuleType.LENGTH:
+                return self._validate_length(value, rule)
+            if rule.rule_type == ValidationRuleType.RANGE:
+                return self._validate_range(value, rule)
+            if rule.rule_type == ValidationRuleType.PATTERN:
+                return self._validate_pattern(value, rule, data)
+            if rule.rule_type == ValidationRuleType.FORMAT:
+                return self._validate_format(value, rule)
+            if rule.rule_type == ValidationRuleType.CUSTOM:
+                return self._validate_custom(value, rule)
+            return ValidationStatus.SKIPPED, f"不支持的验证规则类型: {rule.rule_type}"
+        except Exception as e:
+            logger.error(f"规则应用失败: {rule.id}, 错误: {str(e)}")
+            return ValidationStatus.FAILED, f"规则执行错误: {str(e)}"
+
+    def _evaluate_column(
+        self,
+        rule: ValidationRule,
+        values: List[Any],
+        data_list: List[StructuredData]
+    ) -> _ColumnResult:
+        """向量化执行一条规则，不支持的规则整列回退到逐条验证"""
+        try:
+            if rule.rule_type == ValidationRuleType.REQUIRED:
+                return self._required_column(rule, values)
+            if rule.rule_type == ValidationRuleType.LENGTH:
+                return self._length_column(rule, values)
+            if rule.rule_type == ValidationRuleType.RANGE:
+                return self._range_column(rule, values)
+            if rule.rule_type == ValidationRuleType.PATTERN and rule.parameters.get("pattern"):
+                if rule.parameters.get("entity_type"):
+                    return self._entity_pattern_column(rule, values, data_list)
+                return self._pattern_column(rule, values)
+        except Exception as e:
+            logger.debug(f"规则无法列式执行，回退逐条验证: {rule.id}, 错误: {str(e)}")
+        
+        result = _ColumnResult(len(values), {})
+        result.codes[:] = _FALLBACK
+        return result
+
+    @staticmethod
+    def _none_mask(values: List[Any]) -> np.ndarray:
+        return np.fromiter((value is None for value in values), dtype=bool, count=len(values))
+
+    @staticmethod
+    def _str_mask(values: List[Any]) -> np.ndarray:
+        return np.fromiter((type(value) is str for value in values), dtype=bool, count=len(values))
+
+    def _required_column(self, rule: ValidationRule, values: List[Any]) -> _ColumnResult:
+        result = _ColumnResult(len(values), {_PASSED: "字段验证通过", _FAILED: rule.error_message})
+        series = pd.Series(values, dtype=object)
+        is_str = self._str_mask(values)
+        blank = np.zeros(len(values), dtype=bool)
+        if is_str.any():
+            blank[is_str] = series[is_str].str.strip().eq("").to_numpy(dtype=bool)
+        result.codes[self._none_mask(values) | blank] = _FAILED
+        return result
+
+    def _length_column(self, rule: ValidationRule, values: List[Any]) -> _ColumnResult:
+        min_length = rule.parameters.get("min_length")
+        max_length = rule.parameters.get("max_length")
+        short_code = _WARNING if rule.warning_message and rule.severity == ValidationLevel.LENIENT else _FAILED
+        result = _ColumnResult(len(values), {
+            _PASSED: "长度验证通过",
+            _FAILED: rule.error_message,
+            _WARNING: rule.warning_message,
+            _SKIPPED: "字段为空，跳过长度验证"
+        })
+        
+        is_none = self._none_mask(values)
+        is_str = self._str_mask(values)
+        lengths = np.zeros(len(values), dtype=np.int64)
+        if is_str.any():
+            lengths[is_str] = pd.Series(values, dtype=object)[is_str].str.len().to_numpy(dtype=np.int64)
+        others = np.flatnonzero(~is_str & ~is_none)
+        for row in others:
+            lengths[row] = len(str(values[row]))
+        
+        if max_length is not None:
+            result.codes[lengths > max_length] = _FAILED
+        if min_length is not None:
+            result.codes[lengths < min_length] = short_code
+        result.codes[is_none] = _SKIPPED
+        return result
+
+    def _range_column(self, rule: ValidationRule, values: List[Any]) -> _ColumnResult:
+        min_value = rule.parameters.get("min_value")
+        max_value = rule.parameters.get("max_value")
+        result = _ColumnResult(len(values), {
+            _PASSED: "范围验证通过",
+            _FAILED: rule.error_message,
+            _SKIPPED: "字段为空，跳过范围验证"
+        })
+        
+        is_none = self._none_mask(values)
+        is_number = np.fromiter(
+            (type(value) in (int, float) for value in values), dtype=bool, count=len(values)
+        )
+        numbers = np.zeros(len(values), dtype=np.float64)
+        if is_number.any():
+            numbers[is_number] = np.array([values[row] for row in np.flatnonzero(is_number)], dtype=np.float64)
+        
+        out_of_range = np.zeros(len(values), dtype=bool)
+        if min_value is not None:
+            out_of_range |= numbers < min_value
+        if max_value is not None:
+            out_of_range |= numbers > max_value
+        result.codes[out_of_range] = _FAILED
+        # 字符串、布尔等需要 float() 转换的值逐条验证
+        result.codes[~is_number] = _FALLBACK
+        result.codes[is_none] = _SKIPPED
+        return result
+
+    def _pattern_column(self, rule: ValidationRule, values: List[Any]) -> _ColumnResult:
+        result = _ColumnResult(len(values), {
+            _PASSED: "模式验证通过",
+            _FAILED: rule.error_message,
+            _SKIPPED: "字段为空，跳过模式验证"
+        })
+        
+        is_none = self._none_mask(values)
+        present = np.flatnonzero(~is_none)
+        if len(present):
+            texts = pd.Series([str(values[row]) for row in present], dtype=object)
+            matched = texts.str.match(rule.parameters["pattern"]).to_numpy(dtype=bool)
+            result.codes[present[~matched]] = _FAILED
+        result.codes[is_none] = _SKIPPED
+        return result
+
+    def _entity_pattern_column(
+        self,
+        rule: ValidationRule,
+        values: List[Any],
+        data_list: List[StructuredData]
+    ) -> _ColumnResult:
+        entity_type = rule.parameters["entity_type"]
+        result = _ColumnResult(len(values), {
+            _PASSED: f"{entity_type} 格式验证通过",
+            _SKIPPED: f"未找到类型为 {entity_type} 的实体"
+        })
+        
+        # 字段值不是列表的行按普通字符串模式验证
+        is_list = np.fromiter((isinstance(value, list) for value in values), dtype=bool, count=len(values))
+        
+        # 展开所有数据中该类型的实体
+        rows, entity_values = [], []
+        entity_counts = np.zeros(len(values), dtype=np.int64)
+        for row in np.flatnonzero(is_list):
+            for entity in data_list[row].entities:
+                if entity.get("type") == entity_type:
+                    entity_counts[row] += 1
+                    entity_value = entity.get("value")
+                    if entity_value:
+                        rows.append(row)
+                        entity_values.append(entity_value)
+        
+        result.codes[entity_counts == 0] = _SKIPPED
+        result.codes[~is_list] = _FALLBACK
+        
+        if entity_values:
+            texts = pd.Series([str(value) for value in entity_values], dtype=object)
+            mismatched = ~texts.str.match(rule.parameters["pattern"]).to_numpy(dtype=bool)
+            failed_by_row: Dict[int, List[Any]] = {}
+            for index in np.flatnonzero(mismatched):
+                failed_by_row.setdefault(rows[index], []).append(entity_values[index])
+            for row, failed_entities in failed_by_row.items():
+                result.codes[row] = _FAILED
+                result.overrides[int(row)] = (ValidationStatus.FAILED, f"{rule.error_message}: {failed_entities}")
+        
+        return result
+
     def get_rule_sets(self) -> Dict[str, List[str]]:
         """获取所有规则集"""
         return self.rule_sets.copy()
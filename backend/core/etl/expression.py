@@ -0,0 +1,200 @@
+"""条件表达式
+
+转换规则的执行条件和过滤条件使用的小型表达式语言，语法为Python表达式的子集：
+
+    source_type == 'text' and quality_score > 0.5
+    metadata.language in ['zh', 'en']
+    type != 'PERSON' and len(value) > 1
+
+名称和属性访问按字段路径读取目标对象（StructuredData、字典或模型），
+item['key'] 按键读取。表达式经AST白名单检查后编译为闭包并按文本缓存，
+求值时不再调用 eval。
+"""
+
+import ast
+import operator
+from typing import Any, Callable, Dict
+
+from .field_access import get_field_getter
+
+Evaluator = Callable[[Any], Any]
+
+
+class ExpressionError(ValueError):
+    """表达式语法错误或包含不允许的结构"""
+
+
+_COMPARE_OPERATORS = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.In: lambda left, right: left in right,
+    ast.NotIn: lambda left, right: left not in right,
+    ast.Is: operator.is_,
+    ast.IsNot: operator.is_not,
+}
+
+_BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.Mod: operator.mod,
+}
+
+_UNARY_OPERATORS = {
+    ast.Not: operator.not_,
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+}
+
+# 表达式中可调用的函数
+_FUNCTIONS = {
+    "len": len,
+    "str": str,
+    "int": int,
+    "float": float,
+    "abs": abs,
+    "min": min,
+    "max": max,
+    "lower": lambda value: str(value).lower(),
+}
+
+# 条件文本 -> 编译结果
+_expression_cache: Dict[str, Evaluator] = {}
+
+
+def _field_path(node: ast.AST) -> str:
+    """把 a.b.c 形式的名称/属性访问还原为字段路径"""
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return f"{_field_path(node.value)}.{node.attr}"
+    raise ExpressionError(f"不支持的字段引用: {ast.dump(node)}")
+
+
+def _compile_node(node: ast.AST) -> Evaluator:
+    if isinstance(node, ast.Constant):
+        value = node.value
+        return lambda target: value
+
+    if isinstance(node, (ast.Name, ast.Attribute)):
+        path = _field_path(node)
+        if "__" in path:
+            raise ExpressionError(f"不允许访问的字段: {path}")
+        return get_field_getter(path)
+
+    if isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+        items = [_compile_node(item) for item in node.elts]
+        if all(isinstance(item, ast.Constant) for item in node.elts):
+            constant = frozenset(item.value for item in node.elts) if isinstance(node, ast.Set) else tuple(
+                item.value for item in node.elts
+            )
+            return lambda target: constant
+        return lambda target: [item(target) for item in items]
+
+    if isinstance(node, ast.BoolOp):
+        operands = [_compile_node(value) for value in node.values]
+        if isinstance(node.op, ast.And):
+            def evaluate_and(target: Any) -> Any:
+                result = True
+                for operand in operands:
+                    result = operand(target)
+                    if not result:
+                        return result
+                return result
+            return evaluate_and
+
+        def evaluate_or(target: Any) -> Any:
+            result = False
+            for operand in operands:
+                result = operand(target)
+                if result:
+                    return result
+            return result
+        return evaluate_or
+
+    if isinstance(node, ast.Compare):
+        left = _compile_node(node.left)
+        comparators = []
+        for op, comparator in zip(node.ops, node.comparators):
+            function = _COMPARE_OPERATORS.get(type(op))
+            if function is None:
+                raise ExpressionError(f"不支持的比较运算: {type(op).__name__}")
+            comparators.append((function, _compile_node(comparator)))
+
+        if len(comparators) == 1:
+            function, right = comparators[0]
+            return lambda target: function(left(target), right(target))
+
+        def evaluate_chain(target: Any) -> bool:
+            left_value = left(target)
+            for function, right in comparators:
+                right_value = right(target)
+                if not function(left_value, right_value):
+                    return False
+                left_value = right_value
+            return True
+        return evaluate_chain
+
+    if isinstance(node, ast.BinOp):
+        function = _BINARY_OPERATORS.get(type(node.op))
+        if function is None:
+            raise ExpressionError(f"不支持的运算: {type(node.op).__name__}")
+        left, right = _compile_node(node.left), _compile_node(node.right)
+        return lambda target: function(left(target), right(target))
+
+    if isinstance(node, ast.UnaryOp):
+        function = _UNARY_OPERATORS.get(type(node.op))
+        if function is None:
+            raise ExpressionError(f"不支持的运算: {type(node.op).__name__}")
+        operand = _compile_node(node.operand)
+        return lambda target: function(operand(target))
+
+    if isinstance(node, ast.Subscript):
+        if not isinstance(node.slice, ast.Constant):
+            raise ExpressionError("下标只支持常量")
+        value, key = _compile_node(node.value), node.slice.value
+
+        def evaluate_subscript(target: Any) -> Any:
+            container = value(target)
+            if isinstance(container, dict):
+                return container.get(key)
+            return container[key]
+        return evaluate_subscript
+
+    if isinstance(node, ast.Call):
+        if not isinstance(node.func, ast.Name) or node.func.id not in _FUNCTIONS or node.keywords:
+            raise ExpressionError(f"不允许的函数调用: {ast.dump(node.func)}")
+        function = _FUNCTIONS[node.func.id]
+        arguments = [_compile_node(argument) for argument in node.args]
+        return lambda target: function(*[argument(target) for argument in arguments])
+
+    raise ExpressionError(f"不支持的表达式结构: {type(node).__name__}")
+
+
+def compile_expression(expression: str) -> Evaluator:
+    """编译条件表达式
+
+    Returns:
+        接收目标对象并返回表达式值的函数
+
+    Raises:
+        ExpressionError: 表达式语法错误或包含不允许的结构
+    """
+    try:
+        tree = ast.parse(expression.strip(), mode="eval")
+    except SyntaxError as e:
+        raise ExpressionError(f"表达式语法错误: {expression}") from e
+    return _compile_node(tree.body)
+
+
+def get_expression(expression: str) -> Evaluator:
+    """获取（必要时编译并缓存）条件表达式"""
+    evaluator = _expression_cache.get(expression)
+    if evaluator is None:
+        evaluator = _expression_cache[expression] = compile_expression(expression)
+    return evaluator
@@ -0,0 +1,146 @@
+"""字段路径访问
+
+将验证、转换规则中的字段路径（如 "content.text"、"entities[*].value"）编译为
+直接读取模型属性和字典键的访问函数，无需先把整个 StructuredData 导出为字典。
+写入采用写时复制，只复制路径上被修改的容器。
+"""
+
+import copy
+from typing import Any, Callable, Dict, Tuple
+
+from pydantic import BaseModel
+
+FieldGetter = Callable[[Any], Any]
+
+_WILDCARD = "[*]"
+
+# 字段路径 -> 访问函数
+_getter_cache: Dict[str, FieldGetter] = {}
+
+
+# 类型 -> 是否为 pydantic 模型；模型元类的 isinstance 检查较慢，按类型缓存
+_model_types: Dict[type, bool] = {}
+
+
+def _get_key(value: Any, key: str) -> Any:
+    """读取一级字段，缺失时返回None，与 model_dump 后按字典读取的结果一致"""
+    if isinstance(value, dict):
+        return value.get(key)
+    value_type = type(value)
+    is_model = _model_types.get(value_type)
+    if is_model is None:
+        is_model = _model_types[value_type] = issubclass(value_type, BaseModel)
+    if is_model:
+        return getattr(value, key, None)
+    return None
+
+
+def _compile_keys(keys: Tuple[str, ...]) -> FieldGetter:
+    if len(keys) == 1:
+        key = keys[0]
+        return lambda value: _get_key(value, key)
+
+    def get(value: Any) -> Any:
+        for key in keys:
+            value = _get_key(value, key)
+            if value is None:
+                return None
+        return value
+    return get
+
+
+def _split_keys(path: str) -> Tuple[str, ...]:
+    return tuple(key for key in path.strip(".").split(".") if key)
+
+
+def compile_field_getter(field_path: str) -> FieldGetter:
+    """编译字段路径
+
+    "a.b" 依次读取属性或字典键；"a[*].b" 要求 a 为列表，返回每个元素的 b，
+    a 不是列表时返回None。
+    """
+    if _WILDCARD not in field_path:
+        keys = _split_keys(field_path)
+        if not keys:
+            return lambda value: value
+        return _compile_keys(keys)
+
+    base_path, sub_path = field_path.split(_WILDCARD, 1)
+    get_base = compile_field_getter(base_path)
+    get_item = compile_field_getter(sub_path) if sub_path.strip(".") else None
+
+    def get(value: Any) -> Any:
+        array_value = get_base(value)
+        if not isinstance(array_value, list):
+            return None
+        if get_item is None:
+            return array_value
+        return [get_item(item) for item in array_value]
+    return get
+
+
+def get_field_getter(field_path: str) -> FieldGetter:
+    """获取（必要时编译并缓存）字段路径的访问函数"""
+    getter = _getter_cache.get(field_path)
+    if getter is None:
+        getter = _getter_cache[field_path] = compile_field_getter(field_path)
+    return getter
+
+
+class CopyOnWriteSetter:
+    """写时复制的字段写入器
+
+    配合浅拷贝的模型使用：首次写入某条路径时复制路径上的 dict/list，之后在
+    同一写入器内对这些容器直接修改，原始数据不受影响。
+    """
+
+    def __init__(self, target: Any):
+        self.target = target
+        self._owned: set = set()
+
+    def _own(self, container: Any) -> Any:
+        if id(container) in self._owned:
+            return container
+        owned = copy.copy(container)
+        self._owned.add(id(owned))
+        return owned
+
+    def _child(self, parent: Any, key: str) -> Any:
+        """取出可写的子容器，必要时复制后写回父容器"""
+        if isinstance(parent, dict):
+            child = parent.get(key)
+            if isinstance(child, (dict, list)):
+                owned = self._own(child)
+                if owned is not child:
+                    parent[key] = owned
+                return owned
+            return child
+
+        child = getattr(parent, key)
+        if isinstance(child, (dict, list)):
+            owned = self._own(child)
+            if owned is not child:
+                setattr(parent, key, owned)
+            return owned
+        return child
+
+    def set(self, field_path: str, value: Any) -> None:
+        """设置字段值，中间路径不存在时不做修改"""
+        keys = _split_keys(field_path)
+        if not keys:
+            return
+
+        if len(keys) == 1:
+            setattr(self.target, keys[0], value)
+            return
+
+        parent = self._child(self.target, keys[0])
+        for key in keys[1:-1]:
+            if isinstance(parent, dict) and key not in parent:
+                return
+            parent = self._child(parent, key)
+
+        if isinstance(parent, dict):
+            parent[keys[-1]] = value
+        else:
+            setattr(parent, keys[-1], value)
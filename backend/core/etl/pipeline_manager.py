@@ -4,10 +4,11 @@
 """
 
 import json
+import time
 import uuid
 import asyncio
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional, Union, Tuple, Callable
+from typing import Dict, List, Any, Optional, Union, Tuple, Callable, Awaitable
 from enum import Enum
 from dataclasses import dataclass, field
 from pathlib import Path
@@ -49,6 +50,7 @@ class PipelineMode(str, Enum):
     PARALLEL = "parallel"  # 并行执行
     CONDITIONAL = "conditional"  # 条件执行
     BATCH = "batch"  # 批处理
+    STREAMING = "streaming"  # 流式执行，各阶段通过有界队列重叠执行
 
 
 @dataclass
@@ -72,6 +74,12 @@ class PipelineConfig:
     retry_attempts: int = 3
     retry_delay: int = 5  # 秒
     
+    # 流式执行配置
+    stage_workers: Dict[PipelineStage, int] = field(default_factory=dict)  # 各阶段worker数，默认1
+    stream_queue_size: int = 100  # 阶段间队列容量
+    stream_batch_size: int = 10  # worker每次从队列取出的最大数据量
+    stream_documents: bool = False  # 结构化阶段把XLSX/DOCX按行批次直接送入下游
+    
     # 错误处理
     stop_on_error: bool = False
     error_threshold: float = 0.1  # 10%错误率阈值
@@ -124,6 +132,9 @@ class PipelineExecution(BaseModel):
     # 阶段结果
     stage_results: List[StageResult] = Field(default_factory=list)
     
+    # 流式执行各阶段指标（吞吐量、队列深度）
+    stage_metrics: Dict[str, Dict[str, Any]] = Field(default_factory=dict)
+    
     # 详细报告
     validation_reports: List[DataValidationReport] = Field(default_factory=list)
     transformation_reports: List[TransformationReport] = Field(default_factory=list)
@@ -298,6 +309,8 @@ class PipelineManager:
                 await self._execute_parallel(execution, config, input_data)
             elif config.mode == PipelineMode.BATCH:
                 await self._execute_batch(execution, config, input_data)
+            elif config.mode == PipelineMode.STREAMING:
+                await self._execute_streaming(execution, config, input_data)
             else:
                 raise ValueError(f"不支持的管道模式: {config.mode}")
             
@@ -351,22 +364,9 @@ class PipelineManager:
             try:
                 logger.debug(f"执行阶段: {stage}, 数据量: {len(current_data)}")
                 
-                if stage == PipelineStage.STRUCTURE:
-                    current_data, stage_result = await self._execute_structure_stage(
-                        current_data, config.structure_config
-                    )
-                elif stage == PipelineStage.VALIDATE:
-                    current_data, stage_result = await self._execute_validation_stage(
-                        current_data, config.validation_config, execution
-                    )
-                elif stage == PipelineStage.TRANSFORM:
-                    current_data, stage_result = await self._execute_transformation_stage(
-                        current_data, config.transformation_config, execution
-                    )
-                elif stage == PipelineStage.LOAD:
-                    stage_result = await self._execute_load_stage(
-                        current_data, config.load_config, execution
-                    )
+                current_data, stage_result = await self._run_stage(
+                    stage, current_data, config, execution
+                )
                 
                 # 记录阶段结果
                 stage_end = datetime.now()
@@ -483,6 +483,247 @@ class PipelineManager:
             # 更新进度
             execution.processed_data_count = end_idx
 
+    async def _run_stage(
+        self,
+        stage: PipelineStage,
+        data: List[Any],
+        config: PipelineConfig,
+        execution: PipelineExecution
+    ) -> Tuple[List[Any], StageResult]:
+        """执行单个阶段，加载阶段没有输出数据"""
+        if stage == PipelineStage.STRUCTURE:
+            return await self._execute_structure_stage(data, config.structure_config)
+        if stage == PipelineStage.VALIDATE:
+            return await self._execute_validation_stage(data, config.validation_config, execution)
+        if stage == PipelineStage.TRANSFORM:
+            return await self._execute_transformation_stage(data, config.transformation_config, execution)
+        if stage == PipelineStage.LOAD:
+            return [], await self._execute_load_stage(data, config.load_config, execution)
+        raise ValueError(f"不支持的管道阶段: {stage}")
+
+    async def _execute_streaming(
+        self,
+        execution: PipelineExecution,
+        config: PipelineConfig,
+        input_data: List[Dict[str, Any]]
+    ) -> None:
+        """流式执行管道
+        
+        相邻阶段之间用有界队列连接，每个阶段由若干worker从输入队列取出小批量
+        数据处理后放入下一阶段的队列。下游处理较慢时上游在队列上等待，同时在途
+        的数据量受队列容量限制，各阶段可以重叠执行。
+        """
+        stages = list(config.enabled_stages)
+        if not stages:
+            return
+        
+        end_of_stream = object()
+        queue_size = max(1, config.stream_queue_size)
+        batch_size = max(1, config.stream_batch_size)
+        workers = {stage: max(1, config.stage_workers.get(stage, 1)) for stage in stages}
+        queues = [asyncio.Queue(maxsize=queue_size) for _ in stages]
+        
+        stream_start = time.perf_counter()
+        metrics = {
+            stage: {
+                "workers": workers[stage],
+                "batches": 0,
+                "items_in": 0,
+                "items_out": 0,
+                "success_count": 0,
+                "error_count": 0,
+                "busy_seconds": 0.0,
+                "queue_capacity": queue_size,
+                "max_queue_depth": 0,
+                "queue_depth_sum": 0,
+                "start_time": None,
+                "end_time": None,
+                "messages": []
+            }
+            for stage in stages
+        }
+        
+        async def put_item(index: int, item: Any) -> None:
+            await queues[index].put(item)
+            stage_metrics = metrics[stages[index]]
+            depth = queues[index].qsize()
+            stage_metrics["queue_depth_sum"] += depth
+            stage_metrics["max_queue_depth"] = max(stage_metrics["max_queue_depth"], depth)
+        
+        async def feed() -> None:
+            for item in input_data:
+                await put_item(0, item)
+            for _ in range(workers[stages[0]]):
+                await queues[0].put(end_of_stream)
+        
+        async def next_batch(index: int) -> Tuple[List[Any], bool]:
+            """取出一个小批量，返回 (数据, 上游是否已结束)"""
+            item = await queues[index].get()
+            if item is end_of_stream:
+                return [], True
+            batch = [item]
+            while len(batch) < batch_size:
+                try:
+                    item = queues[index].get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                if item is end_of_stream:
+                    return batch, True
+                batch.append(item)
+            return batch, False
+        
+        async def stage_worker(index: int) -> None:
+            stage = stages[index]
+            stage_metrics = metrics[stage]
+            finished = False
+            while not finished:
+                batch, finished = await next_batch(index)
+                if not batch:
+                    continue
+                
+                if stage_metrics["start_time"] is None:
+                    stage_metrics["start_time"] = datetime.now()
+                
+                if stage == PipelineStage.STRUCTURE and config.stream_documents and index + 1 < len(stages):
+                    batch = await self._stream_documents(batch, stage_metrics, lambda item: put_item(index + 1, item))
+                    if not batch:
+                        continue
+                
+                busy_start = time.perf_counter()
+                output, stage_result = await self._run_stage(stage, batch, config, execution)
+                stage_metrics["busy_seconds"] += time.perf_counter() - busy_start
+                stage_metrics["end_time"] = datetime.now()
+                
+                stage_metrics["batches"] += 1
+                stage_metrics["items_in"] += len(batch)
+                stage_metrics["items_out"] += len(output)
+                stage_metrics["success_count"] += stage_result.success_count
+                # 阶段整体失败时返回的 data_count 为0，整批计为失败
+                stage_metrics["error_count"] += (
+                    stage_result.error_count if stage_result.data_count else len(batch)
+                )
+                if stage_result.status == PipelineStatus.FAILED:
+                    stage_metrics["messages"].append(stage_result.message)
+                    if config.stop_on_error:
+                        raise Exception(f"阶段 {stage} 执行失败: {stage_result.message}")
+                
+                if index + 1 < len(stages):
+                    for item in output:
+                        await put_item(index + 1, item)
+        
+        async def run_stage_workers(index: int) -> None:
+            await asyncio.gather(*(stage_worker(index) for _ in range(workers[stages[index]])))
+            # 本阶段全部结束后通知下游的每个worker
+            if index + 1 < len(stages):
+                for _ in range(workers[stages[index + 1]]):
+                    await queues[index + 1].put(end_of_stream)
+        
+        tasks = [asyncio.create_task(feed())]
+        tasks.extend(asyncio.create_task(run_stage_workers(index)) for index in range(len(stages)))
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self._record_stream_metrics(execution, stages, metrics, time.perf_counter() - stream_start)
+        
+        for stage in stages:
+            stage_metrics = metrics[stage]
+            error_rate = stage_metrics["error_count"] / max(stage_metrics["items_in"], 1)
+            if error_rate > config.error_threshold:
+                raise Exception(
+                    f"阶段 {stage} 错误率过高: {error_rate:.2%} > {config.error_threshold:.2%}"
+                )
+
+    async def _stream_documents(
+        self,
+        batch: List[Dict[str, Any]],
+        stage_metrics: Dict[str, Any],
+        emit: Callable[[StructuredData], Awaitable[None]]
+    ) -> List[Dict[str, Any]]:
+        """把批中的XLSX/DOCX逐批结构化并立即送入下游，返回其余数据
+        
+        下游队列有界，文档读取速度受下游消费速度约束。
+        """
+        remaining = []
+        for item in batch:
+            if item.get("type") not in (DataType.XLSX.value, DataType.DOCX.value):
+                remaining.append(item)
+                continue
+            
+            busy_start = time.perf_counter()
+            stage_metrics["items_in"] += 1
+            try:
+                async for structured_data in self.structurer.stream_structure(
+                    item.get("content", b""),
+                    DataType(item["type"]),
+                    source_id=item.get("source_id"),
+                    metadata=item.get("metadata", {})
+                ):
+                    stage_metrics["busy_seconds"] += time.perf_counter() - busy_start
+                    await emit(structured_data)
+                    busy_start = time.perf_counter()
+                    stage_metrics["items_out"] += 1
+                    if structured_data.metadata.get("is_last"):
+                        memory = structured_data.metadata.get("memory", {})
+                        stage_metrics["peak_rss_bytes"] = max(
+                            stage_metrics.get("peak_rss_bytes", 0), memory.get("peak_rss_bytes", 0)
+                        )
+                stage_metrics["success_count"] += 1
+            except Exception as e:
+                logger.error(f"流式结构化失败: {item.get('source_id')}, 错误: {str(e)}")
+                stage_metrics["error_count"] += 1
+                stage_metrics["messages"].append(str(e))
+            stage_metrics["busy_seconds"] += time.perf_counter() - busy_start
+            stage_metrics["batches"] += 1
+            stage_metrics["end_time"] = datetime.now()
+        
+        return remaining
+
+    def _record_stream_metrics(
+        self,
+        execution: PipelineExecution,
+        stages: List[PipelineStage],
+        metrics: Dict[PipelineStage, Dict[str, Any]],
+        elapsed_seconds: float
+    ) -> None:
+        """汇总流式执行的阶段结果和指标"""
+        for stage in stages:
+            stage_metrics = dict(metrics[stage])
+            messages = stage_metrics.pop("messages")
+            start_time = stage_metrics.pop("start_time") or execution.start_time
+            end_time = stage_metrics.pop("end_time") or datetime.now()
+            queue_depth_sum = stage_metrics.pop("queue_depth_sum")
+            
+            items_in = stage_metrics["items_in"]
+            stage_metrics["avg_queue_depth"] = queue_depth_sum / max(items_in, 1)
+            stage_metrics["throughput_per_second"] = items_in / elapsed_seconds if elapsed_seconds > 0 else 0.0
+            stage_metrics["busy_throughput_per_second"] = (
+                items_in / stage_metrics["busy_seconds"] if stage_metrics["busy_seconds"] > 0 else 0.0
+            )
+            execution.stage_metrics[stage.value] = stage_metrics
+            
+            success_count = stage_metrics["success_count"]
+            error_count = stage_metrics["error_count"]
+            status = PipelineStatus.SUCCESS if error_count == 0 else (
+                PipelineStatus.PARTIAL if success_count > 0 else PipelineStatus.FAILED
+            )
+            execution.stage_results.append(StageResult(
+                stage=stage,
+                status=status,
+                message=f"流式执行完成，成功: {success_count}, 失败: {error_count}",
+                start_time=start_time,
+                end_time=end_time,
+                duration_ms=int((end_time - start_time).total_seconds() * 1000),
+                data_count=items_in,
+                success_count=success_count,
+                error_count=error_count,
+                details=dict(stage_metrics),
+                error_details={"messages": messages[:10]} if messages else None
+            ))
+
     async def _execute_structure_stage(
         self,
         input_data: List[Dict[str, Any]],
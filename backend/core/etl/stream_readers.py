@@ -0,0 +1,331 @@
+"""表格与DOCX流式读取
+
+XLSX 使用 openpyxl 只读模式逐行读取，按批产出行数据；DOCX 直接对
+word/document.xml 做增量解析，逐个产出段落和表格。工作表数据按批写入
+Parquet（未安装 pyarrow 时为 gzip CSV），不在内存中保留整张表。
+"""
+
+import io
+import csv
+import gzip
+import os
+import tempfile
+import zipfile
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+Source = Union[bytes, str, Path, BinaryIO]
+
+_WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_PARAGRAPH = f"{_WORD_NS}p"
+_TABLE = f"{_WORD_NS}tbl"
+_ROW = f"{_WORD_NS}tr"
+_CELL = f"{_WORD_NS}tc"
+_TEXT = f"{_WORD_NS}t"
+_TAB = f"{_WORD_NS}tab"
+_BREAKS = (f"{_WORD_NS}br", f"{_WORD_NS}cr")
+
+
+def _open_source(source: Source) -> Union[BinaryIO, str]:
+    if isinstance(source, (bytes, bytearray)):
+        return io.BytesIO(source)
+    if isinstance(source, Path):
+        return str(source)
+    return source
+
+
+def current_rss() -> int:
+    """当前进程常驻内存（字节），无法获取时返回0"""
+    if PSUTIL_AVAILABLE:
+        return psutil.Process(os.getpid()).memory_info().rss
+    try:
+        import resource
+        # Linux 下 ru_maxrss 单位为KB，只能得到进程生命周期内的峰值
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except Exception:
+        return 0
+
+
+class RSSTracker:
+    """按采样记录单个文档处理期间的峰值内存"""
+
+    def __init__(self):
+        self.start_rss = current_rss()
+        self.peak_rss = self.start_rss
+
+    def sample(self) -> int:
+        rss = current_rss()
+        if rss > self.peak_rss:
+            self.peak_rss = rss
+        return rss
+
+    def to_dict(self) -> Dict[str, int]:
+        return {
+            "start_rss_bytes": self.start_rss,
+            "peak_rss_bytes": self.peak_rss,
+            "peak_rss_delta_bytes": max(0, self.peak_rss - self.start_rss)
+        }
+
+
+@dataclass
+class SheetBatch:
+    """工作表的一批行"""
+    sheet_name: str
+    sheet_index: int
+    columns: List[str]
+    rows: List[Tuple[Any, ...]]
+    start_row: int  # 第一行在数据区中的序号，从0开始
+
+
+def _column_names(header: Tuple[Any, ...]) -> List[str]:
+    """表头转列名，空表头与重复列名的处理与 pandas.read_excel 一致"""
+    names = []
+    seen: Dict[str, int] = {}
+    for index, value in enumerate(header):
+        name = f"Unnamed: {index}" if value is None or str(value).strip() == "" else str(value)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def iter_xlsx_batches(source: Source, batch_size: int = 1000) -> Iterator[SheetBatch]:
+    """逐批读取工作簿中所有工作表的行
+
+    第一行非空行作为表头；与 pandas.read_excel 一致，数据区中间的全空行
+    保留，末尾的全空行丢弃。
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(_open_source(source), read_only=True, data_only=True)
+    try:
+        for sheet_index, worksheet in enumerate(workbook.worksheets):
+            columns: Optional[List[str]] = None
+            rows: List[Tuple[Any, ...]] = []
+            row_count = 0
+            pending_blank = 0
+
+            for values in worksheet.iter_rows(values_only=True):
+                if all(value is None for value in values):
+                    if columns is not None:
+                        pending_blank += 1
+                    continue
+                if columns is None:
+                    # 去掉表头右侧的空列
+                    width = len(values)
+                    while width and values[width - 1] is None:
+                        width -= 1
+                    columns = _column_names(values[:width])
+                    continue
+
+                width = len(columns)
+                if pending_blank:
+                    rows.extend([(None,) * width] * pending_blank)
+                    pending_blank = 0
+                if len(values) < width:
+                    values = tuple(values) + (None,) * (width - len(values))
+                rows.append(tuple(values[:width]))
+
+                if len(rows) >= batch_size:
+                    yield SheetBatch(worksheet.title, sheet_index, columns, rows, row_count)
+                    row_count += len(rows)
+                    rows = []
+
+            if rows or (columns is not None and row_count == 0):
+                yield SheetBatch(worksheet.title, sheet_index, columns or [], rows, row_count)
+            elif columns is None:
+                yield SheetBatch(worksheet.title, sheet_index, [], [], 0)
+    finally:
+        workbook.close()
+
+
+@dataclass
+class DocxBlock:
+    """DOCX正文中的一个段落或表格"""
+    kind: str  # "paragraph" 或 "table"
+    text: str = ""
+    rows: List[List[str]] = field(default_factory=list)
+
+
+def _paragraph_text(paragraph: ET.Element) -> str:
+    parts = []
+    for element in paragraph.iter():
+        if element.tag == _TEXT:
+            parts.append(element.text or "")
+        elif element.tag == _TAB:
+            parts.append("\t")
+        elif element.tag in _BREAKS:
+            parts.append("\n")
+    return "".join(parts)
+
+
+def iter_docx_blocks(source: Source) -> Iterator[DocxBlock]:
+    """按文档顺序增量产出正文段落和表格
+
+    单元格文本为其直接段落文本以换行连接，与 python-docx 的 cell.text 一致；
+    嵌套表格只计入外层单元格的结构，不单独产出。
+    """
+    with zipfile.ZipFile(_open_source(source)) as archive:
+        with archive.open("word/document.xml") as document:
+            table_depth = 0
+            table_rows: List[List[str]] = []
+            row_cells: List[str] = []
+            cell_paragraphs: List[str] = []
+
+            for event, element in ET.iterparse(document, events=("start", "end")):
+                tag = element.tag
+                if event == "start":
+                    if tag == _TABLE:
+                        table_depth += 1
+                        if table_depth == 1:
+                            table_rows = []
+                    elif tag == _ROW and table_depth == 1:
+                        row_cells = []
+                    elif tag == _CELL and table_depth == 1:
+                        cell_paragraphs = []
+                    continue
+
+                if tag == _PARAGRAPH:
+                    if table_depth == 0:
+                        yield DocxBlock(kind="paragraph", text=_paragraph_text(element))
+                        element.clear()
+                    elif table_depth == 1:
+                        cell_paragraphs.append(_paragraph_text(element))
+                elif tag == _CELL and table_depth == 1:
+                    row_cells.append("\n".join(cell_paragraphs))
+                elif tag == _ROW and table_depth == 1:
+                    table_rows.append(row_cells)
+                elif tag == _TABLE:
+                    table_depth -= 1
+                    if table_depth == 0:
+                        yield DocxBlock(kind="table", rows=table_rows)
+                        element.clear()
+
+
+class ColumnarSheetWriter:
+    """把一张工作表的行批量写为列式文件
+
+    类型由第一批数据推断；后续批次与已有类型不兼容时，结束当前分段并以
+    字符串类型开始新分段，数据不丢失。分段先写入溢出到磁盘的临时文件。
+    """
+
+    def __init__(self, columns: List[str], spool_max_bytes: int = 64 * 1024 * 1024):
+        self.columns = columns
+        self.spool_max_bytes = spool_max_bytes
+        self.rows = 0
+        self.parts: List[Dict[str, Any]] = []
+        self._sink: Optional[BinaryIO] = None
+        self._writer = None
+        self._schema = None
+        self._part_rows = 0
+
+    @property
+    def format(self) -> str:
+        return "parquet" if PYARROW_AVAILABLE else "csv.gz"
+
+    def write(self, rows: List[Tuple[Any, ...]]) -> None:
+        if not rows:
+            return
+        if PYARROW_AVAILABLE:
+            self._write_arrow(rows)
+        else:
+            self._write_csv(rows)
+        self.rows += len(rows)
+        self._part_rows += len(rows)
+
+    def _start_part(self) -> None:
+        self._sink = tempfile.SpooledTemporaryFile(max_size=self.spool_max_bytes)
+        self._part_rows = 0
+
+    def _infer_array(self, values: List[Any]) -> "pa.Array":
+        try:
+            array = pa.array(values)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError, OverflowError):
+            return pa.array([None if value is None else str(value) for value in values], type=pa.string())
+        if pa.types.is_null(array.type):
+            return array.cast(pa.string())
+        return array
+
+    def _write_arrow(self, rows: List[Tuple[Any, ...]]) -> None:
+        column_values = [list(values) for values in zip(*rows)]
+
+        if self._schema is not None:
+            try:
+                arrays = [
+                    pa.array(values, type=schema_field.type)
+                    for values, schema_field in zip(column_values, self._schema)
+                ]
+            except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError, OverflowError):
+                # 类型不兼容，结束当前分段
+                self._finish_part()
+                arrays = None
+        else:
+            arrays = None
+
+        if arrays is None:
+            if self._schema is not None:
+                # 新分段中类型不兼容的列放宽为字符串
+                arrays = []
+                for values, schema_field in zip(column_values, self._schema):
+                    try:
+                        arrays.append(pa.array(values, type=schema_field.type))
+                    except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError, OverflowError):
+                        arrays.append(pa.array(
+                            [None if value is None else str(value) for value in values], type=pa.string()
+                        ))
+            else:
+                arrays = [self._infer_array(values) for values in column_values]
+            self._schema = pa.schema([
+                pa.field(name, array.type) for name, array in zip(self.columns, arrays)
+            ])
+            self._start_part()
+            self._writer = pq.ParquetWriter(self._sink, self._schema, compression="zstd")
+
+        self._writer.write_table(pa.Table.from_arrays(arrays, schema=self._schema))
+
+    def _write_csv(self, rows: List[Tuple[Any, ...]]) -> None:
+        if self._writer is None:
+            self._start_part()
+            self._gzip = gzip.GzipFile(fileobj=self._sink, mode="wb")
+            self._text = io.TextIOWrapper(self._gzip, encoding="utf-8", newline="")
+            self._writer = csv.writer(self._text)
+            self._writer.writerow(self.columns)
+        self._writer.writerows(rows)
+
+    def _finish_part(self) -> None:
+        if self._writer is None:
+            return
+        if PYARROW_AVAILABLE:
+            self._writer.close()
+        else:
+            self._text.flush()
+            self._text.detach()
+            self._gzip.close()
+        size = self._sink.tell()
+        self._sink.seek(0)
+        self.parts.append({"file": self._sink, "rows": self._part_rows, "size_bytes": size})
+        self._writer = None
+        self._sink = None
+
+    def close(self) -> List[Dict[str, Any]]:
+        """结束写入，返回各分段的临时文件、行数和大小"""
+        self._finish_part()
+        return self.parts
@@ -6,6 +6,8 @@ import spacy
 import logging
 from collections import defaultdict, Counter
 import asyncio
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
 from backend.models.knowledge import Document
@@ -15,6 +17,37 @@ from backend.core.llm.llm_orchestrator import LLMOrchestrator
 
 logger = logging.getLogger(__name__)
 
+# NER 运行必需的流水线组件，其余组件（tagger、parser、lemmatizer等）在提取时禁用
+NER_REQUIRED_PIPES = ("ner",)
+
+# 进程池工作进程内的spaCy模型，由 _init_ner_worker 在进程启动时加载
+_worker_nlp = None
+
+
+def _ner_disabled_pipes(nlp) -> List[str]:
+    """计算NER不需要的流水线组件，保留NER所监听的共享tok2vec/transformer"""
+    required = set(NER_REQUIRED_PIPES)
+    for name, pipe in nlp.pipeline:
+        listeners = getattr(pipe, "listening_components", None) or []
+        if required & set(listeners):
+            required.add(name)
+    return [name for name in nlp.pipe_names if name not in required]
+
+
+def _init_ner_worker(model_name: str):
+    """NER工作进程初始化：每个进程只加载一次模型"""
+    global _worker_nlp
+    _worker_nlp = spacy.load(model_name)
+    _worker_nlp.select_pipes(disable=_ner_disabled_pipes(_worker_nlp))
+
+
+def _run_ner_in_worker(texts: List[str], batch_size: int) -> List[List[Tuple[str, str, int, int]]]:
+    """在工作进程中批量执行NER，返回可序列化的实体跨度"""
+    return [
+        [(ent.text, ent.label_, ent.start_char, ent.end_char) for ent in doc.ents]
+        for doc in _worker_nlp.pipe(texts, batch_size=batch_size)
+    ]
+
 class ExtractionMethod(Enum):
     """实体提取方法"""
     NER = "ner"  # 命名实体识别
@@ -35,6 +68,87 @@ class EntityCategory(Enum):
     QUANTITY = "quantity"
     MISC = "misc"
 
+# 内置实体模式
+BUILT_IN_PATTERNS = {
+    EntityCategory.DATE: [
+        r'\b\d{4}-\d{2}-\d{2}\b',  # YYYY-MM-DD
+        r'\b\d{1,2}/\d{1,2}/\d{4}\b',  # MM/DD/YYYY
+        r'\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{1,2},?\s+\d{4}\b'
+    ],
+    EntityCategory.MONEY: [
+        r'\$[\d,]+(?:\.\d{2})?\b',  # $1,000.00
+        r'\b\d+(?:,\d{3})*(?:\.\d{2})?\s*(?:dollars?|USD|yuan|RMB)\b'
+    ],
+    EntityCategory.QUANTITY: [
+        r'\b\d+(?:\.\d+)?\s*(?:kg|km|m|cm|mm|g|lb|oz|ft|in)\b',
+        r'\b\d+(?:,\d{3})*\s*(?:percent|%|pieces?|units?)\b'
+    ]
+}
+
+# 含反向引用（组编号会偏移）、自定义命名分组（组名可能冲突）或全局内联标志的模式
+# 无法安全并入组合正则
+_NOT_COMBINABLE = re.compile(r'\\\d|\(\?P[<=]|^\(\?[aiLmsux]+\)')
+
+
+class PatternMatcher:
+    """多模式匹配器
+    
+    可合并的模式编译为一个组合正则，每个文档只扫描一遍：外层前瞻 (?=p0|p1|...)
+    定位候选起点，每个模式再包在各自命名分组的前瞻中，在同一起点上分别尝试。
+    匹配结果与逐个模式 finditer 相同：同一模式的匹配互不重叠，不同模式的匹配
+    可以重叠（如“北京”和“北京大学”）。无法合并的模式单独编译并逐个扫描。
+    """
+    
+    def __init__(self, patterns: List[Tuple[EntityCategory, str]], flags: int = re.IGNORECASE):
+        self._groups: Dict[str, Tuple[EntityCategory, str]] = {}
+        self._standalone: List[Tuple[EntityCategory, re.Pattern]] = []
+        alternatives = []
+        
+        for category, pattern in patterns:
+            try:
+                compiled = re.compile(pattern, flags)
+            except re.error as e:
+                logger.warning(f"模式编译失败: {pattern}, 错误: {e}")
+                continue
+            
+            if _NOT_COMBINABLE.search(pattern):
+                self._standalone.append((category, compiled))
+                continue
+            
+            group_name = f"p{len(self._groups)}"
+            self._groups[group_name] = (category, pattern)
+            alternatives.append(pattern)
+        
+        self._combined = None
+        if alternatives:
+            candidates = "|".join(f"(?:{pattern})" for pattern in alternatives)
+            lookaheads = "".join(
+                f"(?:(?=(?P<{group_name}>{pattern}))|)"
+                for group_name, pattern in zip(self._groups, alternatives)
+            )
+            self._combined = re.compile(f"(?=(?:{candidates})){lookaheads}", flags)
+    
+    def __len__(self) -> int:
+        return len(self._groups) + len(self._standalone)
+    
+    def finditer(self, text: str):
+        """产出 (类别, 模式, 起始位置, 结束位置)，跳过空匹配"""
+        if self._combined is not None:
+            # 每个模式下一个匹配的最小起点，保证同一模式的匹配互不重叠
+            next_start = dict.fromkeys(self._groups, 0)
+            for match in self._combined.finditer(text):
+                for group_name, (category, pattern) in self._groups.items():
+                    start, end = match.span(group_name)
+                    if start < next_start[group_name] or start == end:
+                        continue
+                    next_start[group_name] = end
+                    yield category, pattern, start, end
+        
+        for category, compiled in self._standalone:
+            for match in compiled.finditer(text):
+                if match.start() != match.end():
+                    yield category, compiled.pattern, match.start(), match.end()
+
 @dataclass
 class ExtractionConfig:
     """实体提取配置"""
@@ -46,6 +160,10 @@ class ExtractionConfig:
     custom_patterns: Dict[str, List[str]] = None
     llm_model: str = "gpt-3.5-turbo"
     batch_size: int = 10
+    spacy_model: str = "en_core_web_sm"
+    ner_batch_size: int = 64  # nlp.pipe 每批文档数
+    ner_n_process: int = 1  # 线程内执行 nlp.pipe 时的进程数
+    ner_process_workers: int = 0  # NER进程池大小，0表示不使用进程池
     
     def __post_init__(self):
         if self.methods is None:
@@ -98,15 +216,17 @@ class EntityExtractor:
         self.nlp = None
         self.llm_orchestrator = None
         self._entity_cache = {}
-        self._pattern_cache = {}
+        self._pattern_matcher = None
+        self._ner_pool = None
         self._initialize_components()
     
     def _initialize_components(self):
         """初始化组件"""
         try:
-            # 加载spaCy模型
-            self.nlp = spacy.load("en_core_web_sm")
-            logger.info("spaCy模型加载成功")
+            # 加载spaCy模型，只保留NER所需组件
+            self.nlp = spacy.load(self.config.spacy_model)
+            self.nlp.select_pipes(disable=_ner_disabled_pipes(self.nlp))
+            logger.info(f"spaCy模型加载成功，启用组件: {self.nlp.pipe_names}")
         except OSError:
             logger.warning("spaCy模型未找到，将使用基础功能")
             self.nlp = None
@@ -119,26 +239,42 @@ class EntityExtractor:
         self._compile_patterns()
     
     def _compile_patterns(self):
-        """编译自定义模式"""
-        for category, patterns in self.config.custom_patterns.items():
-            compiled_patterns = []
-            for pattern in patterns:
-                try:
-                    compiled_patterns.append(re.compile(pattern, re.IGNORECASE))
-                except re.error as e:
-                    logger.warning(f"模式编译失败: {pattern}, 错误: {e}")
-            self._pattern_cache[category] = compiled_patterns
+        """将内置模式和自定义模式编译为组合匹配器"""
+        patterns = [
+            (category, pattern)
+            for category, category_patterns in BUILT_IN_PATTERNS.items()
+            for pattern in category_patterns
+        ]
+        
+        for category_name, category_patterns in self.config.custom_patterns.items():
+            try:
+                category = EntityCategory(category_name.lower())
+            except ValueError:
+                logger.warning(f"未知的实体类别: {category_name}")
+                continue
+            patterns.extend((category, pattern) for pattern in category_patterns)
+        
+        self._pattern_matcher = PatternMatcher(patterns)
     
     async def extract_entities(
         self, 
         text: str, 
         document_id: str = None,
-        context: Dict[str, Any] = None
+        context: Dict[str, Any] = None,
+        ner_entities: Optional[List[ExtractedEntity]] = None
     ) -> ExtractionResult:
-        """提取实体"""
+        """提取实体
+        
+        Args:
+            text: 文本内容
+            document_id: 文档ID
+            context: 上下文信息
+            ner_entities: 批量NER预先计算的实体，提供时不再单独执行NER
+        """
         start_time = datetime.now()
         entities = []
         method_stats = defaultdict(int)
+        method_times = defaultdict(float)
         errors = []
         
         try:
@@ -146,22 +282,33 @@ class EntityExtractor:
             for method in self.config.methods:
                 try:
                     if method == ExtractionMethod.NER:
-                        ner_entities = await self._extract_with_ner(text)
-                        entities.extend(ner_entities)
-                        method_stats[method] += len(ner_entities)
+                        if ner_entities is None:
+                            method_entities = await self._timed(
+                                ExtractionMethod.NER, self._extract_with_ner(text), method_times
+                            )
+                        else:
+                            method_entities = list(ner_entities)
+                        entities.extend(method_entities)
+                        method_stats[method] += len(method_entities)
                     
                     elif method == ExtractionMethod.PATTERN:
-                        pattern_entities = await self._extract_with_patterns(text)
+                        pattern_entities = await self._timed(
+                            ExtractionMethod.PATTERN, self._extract_with_patterns(text), method_times
+                        )
                         entities.extend(pattern_entities)
                         method_stats[method] += len(pattern_entities)
                     
                     elif method == ExtractionMethod.LLM:
-                        llm_entities = await self._extract_with_llm(text, context)
+                        llm_entities = await self._timed(
+                            ExtractionMethod.LLM, self._extract_with_llm(text, context), method_times
+                        )
                         entities.extend(llm_entities)
                         method_stats[method] += len(llm_entities)
                     
                     elif method == ExtractionMethod.HYBRID:
-                        hybrid_entities = await self._extract_with_hybrid(text, context)
+                        hybrid_entities = await self._extract_with_hybrid(
+                            text, context, ner_entities=ner_entities, method_times=method_times
+                        )
                         entities.extend(hybrid_entities)
                         method_stats[method] += len(hybrid_entities)
                 
@@ -204,7 +351,8 @@ class EntityExtractor:
                 metadata={
                     "total_entities": len(entities),
                     "text_length": len(text),
-                    "methods_used": [m.value for m in self.config.methods]
+                    "methods_used": [m.value for m in self.config.methods],
+                    "method_times": {m.value: t for m, t in method_times.items()}
                 }
             )
         
@@ -221,36 +369,97 @@ class EntityExtractor:
                 metadata={}
             )
     
+    async def _timed(self, method: ExtractionMethod, coro, method_times: Dict[ExtractionMethod, float]):
+        """执行提取协程并累计该方法耗时"""
+        started = time.perf_counter()
+        try:
+            return await coro
+        finally:
+            method_times[method] += time.perf_counter() - started
+    
     async def _extract_with_ner(self, text: str) -> List[ExtractedEntity]:
         """使用命名实体识别提取实体"""
-        entities = []
-        
         if not self.nlp:
-            return entities
+            return []
         
         try:
-            doc = self.nlp(text)
-            
-            for ent in doc.ents:
-                category = self._map_spacy_label_to_category(ent.label_)
-                if category:
-                    entity = ExtractedEntity(
-                        text=ent.text,
-                        category=category,
-                        start_pos=ent.start_char,
-                        end_pos=ent.end_char,
-                        confidence=0.8,  # spaCy默认置信度
-                        context=self._extract_context(text, ent.start_char, ent.end_char),
-                        attributes={
-                            "label": ent.label_,
-                            "lemma": ent.lemma_ if hasattr(ent, 'lemma_') else ent.text
-                        },
-                        source_method=ExtractionMethod.NER
-                    )
-                    entities.append(entity)
-        
+            return (await self._extract_with_ner_batch([text]))[0]
         except Exception as e:
             logger.error(f"NER提取失败: {str(e)}")
+            return []
+    
+    async def _extract_with_ner_batch(self, texts: List[str]) -> List[List[ExtractedEntity]]:
+        """批量命名实体识别
+        
+        使用 nlp.pipe 分批处理，配置了进程池时按 ner_batch_size 分片提交到工作进程，
+        否则在线程中执行，均不阻塞事件循环。
+        """
+        if not self.nlp or not texts:
+            return [[] for _ in texts]
+        
+        loop = asyncio.get_running_loop()
+        batch_size = self.config.ner_batch_size
+        
+        if self.config.ner_process_workers > 0:
+            pool = self._get_ner_pool()
+            futures = [
+                loop.run_in_executor(pool, _run_ner_in_worker, texts[i:i + batch_size], batch_size)
+                for i in range(0, len(texts), batch_size)
+            ]
+            spans = [doc_spans for chunk in await asyncio.gather(*futures) for doc_spans in chunk]
+        else:
+            spans = await loop.run_in_executor(None, self._pipe_ner, texts)
+        
+        return [self._build_ner_entities(text, doc_spans) for text, doc_spans in zip(texts, spans)]
+    
+    def _pipe_ner(self, texts: List[str]) -> List[List[Tuple[str, str, int, int]]]:
+        """在当前进程中批量执行NER"""
+        return [
+            [(ent.text, ent.label_, ent.start_char, ent.end_char) for ent in doc.ents]
+            for doc in self.nlp.pipe(
+                texts,
+                batch_size=self.config.ner_batch_size,
+                n_process=self.config.ner_n_process
+            )
+        ]
+    
+    def _get_ner_pool(self) -> ProcessPoolExecutor:
+        """获取NER进程池，首次使用时创建"""
+        if self._ner_pool is None:
+            self._ner_pool = ProcessPoolExecutor(
+                max_workers=self.config.ner_process_workers,
+                initializer=_init_ner_worker,
+                initargs=(self.config.spacy_model,)
+            )
+        return self._ner_pool
+    
+    def shutdown(self):
+        """关闭NER进程池"""
+        if self._ner_pool is not None:
+            self._ner_pool.shutdown(wait=False, cancel_futures=True)
+            self._ner_pool = None
+    
+    def _build_ner_entities(self, text: str, spans: List[Tuple[str, str, int, int]]) -> List[ExtractedEntity]:
+        """将NER实体跨度转换为提取实体"""
+        entities = []
+        
+        for ent_text, label, start_char, end_char in spans:
+            category = self._map_spacy_label_to_category(label)
+            if category:
+                entity = ExtractedEntity(
+                    text=ent_text,
+                    category=category,
+                    start_pos=start_char,
+                    end_pos=end_char,
+                    confidence=0.8,  # spaCy默认置信度
+                    context=self._extract_context(text, start_char, end_char),
+                    attributes={
+                        "label": label,
+                        "lemma": ent_text  # lemmatizer已禁用
+                    },
+                    source_method=ExtractionMethod.NER
+                )
+                entities.append(entity)
         
         return entities
     
@@ -258,53 +467,18 @@ class EntityExtractor:
         """使用模式匹配提取实体"""
         entities = []
         
-        # 内置模式
-        built_in_patterns = {
-            EntityCategory.DATE: [
-                r'\b\d{4}-\d{2}-\d{2}\b',  # YYYY-MM-DD
-                r'\b\d{1,2}/\d{1,2}/\d{4}\b',  # MM/DD/YYYY
-                r'\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{1,2},?\s+\d{4}\b'
-            ],
-            EntityCategory.MONEY: [
-                r'\$[\d,]+(?:\.\d{2})?\b',  # $1,000.00
-                r'\b\d+(?:,\d{3})*(?:\.\d{2})?\s*(?:dollars?|USD|yuan|RMB)\b'
-            ],
-            EntityCategory.QUANTITY: [
-                r'\b\d+(?:\.\d+)?\s*(?:kg|km|m|cm|mm|g|lb|oz|ft|in)\b',
-                r'\b\d+(?:,\d{3})*\s*(?:percent|%|pieces?|units?)\b'
-            ]
-        }
-        
-        # 合并内置模式和自定义模式
-        all_patterns = {**built_in_patterns}
-        for category_name, patterns in self._pattern_cache.items():
-            try:
-                category = EntityCategory(category_name.lower())
-                if category in all_patterns:
-                    all_patterns[category].extend(patterns)
-                else:
-                    all_patterns[category] = patterns
-            except ValueError:
-                logger.warning(f"未知的实体类别: {category_name}")
-        
-        # 应用模式
-        for category, patterns in all_patterns.items():
-            for pattern in patterns:
-                if isinstance(pattern, str):
-                    pattern = re.compile(pattern, re.IGNORECASE)
-                
-                for match in pattern.finditer(text):
-                    entity = ExtractedEntity(
-                        text=match.group(),
-                        category=category,
-                        start_pos=match.start(),
-                        end_pos=match.end(),
-                        confidence=0.9,  # 模式匹配高置信度
-                        context=self._extract_context(text, match.start(), match.end()),
-                        attributes={"pattern": pattern.pattern},
-                        source_method=ExtractionMethod.PATTERN
-                    )
-                    entities.append(entity)
+        for category, pattern, start, end in self._pattern_matcher.finditer(text):
+            entity = ExtractedEntity(
+                text=text[start:end],
+                category=category,
+                start_pos=start,
+                end_pos=end,
+                confidence=0.9,  # 模式匹配高置信度
+                context=self._extract_context(text, start, end),
+                attributes={"pattern": pattern},
+                source_method=ExtractionMethod.PATTERN
+            )
+            entities.append(entity)
         
         return entities
     
@@ -333,23 +507,32 @@ class EntityExtractor:
         
         return entities
     
-    async def _extract_with_hybrid(self, text: str, context: Dict[str, Any] = None) -> List[ExtractedEntity]:
+    async def _extract_with_hybrid(
+        self,
+        text: str,
+        context: Dict[str, Any] = None,
+        ner_entities: Optional[List[ExtractedEntity]] = None,
+        method_times: Optional[Dict[ExtractionMethod, float]] = None
+    ) -> List[ExtractedEntity]:
         """使用混合方法提取实体"""
+        if method_times is None:
+            method_times = defaultdict(float)
+        
         # 并行执行多种方法
         tasks = []
+        all_entities = list(ner_entities) if ner_entities is not None else []
         
-        if self.nlp:
-            tasks.append(self._extract_with_ner(text))
+        if self.nlp and ner_entities is None:
+            tasks.append(self._timed(ExtractionMethod.NER, self._extract_with_ner(text), method_times))
         
-        tasks.append(self._extract_with_patterns(text))
+        tasks.append(self._timed(ExtractionMethod.PATTERN, self._extract_with_patterns(text), method_times))
         
         if self.llm_orchestrator:
-            tasks.append(self._extract_with_llm(text, context))
+            tasks.append(self._timed(ExtractionMethod.LLM, self._extract_with_llm(text, context), method_times))
         
         results = await asyncio.gather(*tasks, return_exceptions=True)
         
         # 合并结果
-        all_entities = []
         for result in results:
             if isinstance(result, list):
                 all_entities.extend(result)
@@ -580,27 +763,47 @@ class EntityExtractor:
         """从多个文档中提取实体"""
         batch_size = batch_size or self.config.batch_size
         results = {}
+        use_batched_ner = self.nlp is not None and any(
+            method in (ExtractionMethod.NER, ExtractionMethod.HYBRID) for method in self.config.methods
+        )
         
         # 分批处理
         for i in range(0, len(documents), batch_size):
             batch = documents[i:i + batch_size]
             
+            # 整批文档一次性执行NER，耗时按文档平摊
+            batch_ner = [None] * len(batch)
+            ner_time_per_doc = 0.0
+            if use_batched_ner:
+                ner_started = time.perf_counter()
+                try:
+                    batch_ner = await self._extract_with_ner_batch([doc.content for doc in batch])
+                except Exception as e:
+                    logger.error(f"批量NER提取失败，回退到逐文档提取: {str(e)}")
+                ner_time_per_doc = (time.perf_counter() - ner_started) / len(batch)
+            
             tasks = []
-            for doc in batch:
+            for doc, ner_entities in zip(batch, batch_ner):
                 task = self.extract_entities(
                     text=doc.content,
                     document_id=doc.id,
                     context={
                         "title": doc.title,
                         "metadata": doc.metadata
-                    }
+                    },
+                    ner_entities=ner_entities
                 )
                 tasks.append(task)
             
             batch_results = await asyncio.gather(*tasks, return_exceptions=True)
             
-            for doc, result in zip(batch, batch_results):
+            for doc, ner_entities, result in zip(batch, batch_ner, batch_results):
                 if isinstance(result, ExtractionResult):
+                    if ner_entities is not None:
+                        method_times = result.metadata.setdefault("method_times", {})
+                        method_times[ExtractionMethod.NER.value] = (
+                            method_times.get(ExtractionMethod.NER.value, 0.0) + ner_time_per_doc
+                        )
                     results[doc.id] = result
                 else:
                     logger.error(f"文档 {doc.id} 实体提取失败: {result}")
@@ -636,6 +839,26 @@ class EntityExtractor:
             for entity in result.entities:
                 category_counts[entity.category.value] += 1
         
+        # 各方法吞吐量（文档/秒）
+        method_documents = defaultdict(int)
+        method_seconds = defaultdict(float)
+        for result in results:
+            for method, seconds in result.metadata.get("method_times", {}).items():
+                method_documents[method] += 1
+                method_seconds[method] += seconds
+        
+        method_throughput = {
+            method: {
+                "documents": method_documents[method],
+                "total_time": method_seconds[method],
+                "docs_per_second": (
+                    method_documents[method] / method_seconds[method]
+                    if method_seconds[method] > 0 else 0.0
+                )
+            }
+            for method in method_documents
+        }
+        
         # 置信度统计
         confidence_stats = {
             "high": sum(r.confidence_distribution.get("high", 0) for r in results),
@@ -650,6 +873,7 @@ class EntityExtractor:
             "total_processing_time": total_time,
             "average_processing_time": total_time / len(results) if results else 0,
             "method_distribution": dict(method_counts),
+            "method_throughput": method_throughput,
             "category_distribution": dict(category_counts),
             "confidence_distribution": confidence_stats,
             "error_rate": sum(1 for r in results if r.errors) / len(results) if results else 0
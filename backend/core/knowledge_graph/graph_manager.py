@@ -15,6 +15,7 @@ from backend.models.knowledge import Entity, Relation, KnowledgeGraph
 from backend.core.knowledge_graph.entity_extractor import EntityExtractor, ExtractedEntity, ExtractionResult
 from backend.core.knowledge_graph.relation_extractor import RelationExtractor, ExtractedRelation, RelationExtractionResult
 from backend.core.knowledge_graph.graph_database import GraphDatabase
+from backend.core.knowledge_graph.graph_query import GraphQuery, get_graph_query
 from backend.api.deps import CacheManager
 
 logger = logging.getLogger(__name__)
@@ -97,11 +98,70 @@ class GraphOperationResult:
     execution_time: float = 0.0
     timestamp: datetime = field(default_factory=datetime.now)
 
+@dataclass
+class BulkWriteResult:
+    """批量写入结果"""
+    operation_type: GraphOperationType
+    total: int = 0
+    successful: int = 0
+    failed: int = 0
+    # 每个分块的写入情况：index、size、successful、failed、failed_ids、error
+    chunks: List[Dict[str, Any]] = field(default_factory=list)
+    execution_time: float = 0.0
+    
+    @property
+    def failed_ids(self) -> List[str]:
+        """写入失败的记录ID"""
+        return [record_id for chunk in self.chunks for record_id in chunk["failed_ids"]]
+
+_ENTITY_SET_CLAUSE = (
+    "SET e.name = row.name, e.type = row.type, e.confidence = row.confidence, "
+    "e.description = row.description, e.properties = row.properties, e.updated_at = datetime()"
+)
+_RELATION_MATCH_CLAUSE = (
+    "UNWIND $rows AS row MATCH (s:Entity {id: row.source_id}) MATCH (t:Entity {id: row.target_id}) "
+)
+_RELATION_SET_CLAUSE = (
+    "SET r.relation_type = row.relation_type, r.confidence = row.confidence, "
+    "r.properties = row.properties, r.updated_at = datetime()"
+)
+
+_RETURN_WRITTEN_CLAUSE = " RETURN row.id AS id"
+
+# 批量写入语句，每个分块以 $rows 参数一次提交；MATCH 不到的行被跳过，
+# 语句返回实际写入的记录ID
+_BULK_CYPHER = {
+    "entity": {
+        GraphOperationType.CREATE: "UNWIND $rows AS row CREATE (e:Entity {id: row.id}) " + _ENTITY_SET_CLAUSE + _RETURN_WRITTEN_CLAUSE,
+        GraphOperationType.UPDATE: "UNWIND $rows AS row MATCH (e:Entity {id: row.id}) " + _ENTITY_SET_CLAUSE + _RETURN_WRITTEN_CLAUSE,
+        GraphOperationType.MERGE: "UNWIND $rows AS row MERGE (e:Entity {id: row.id}) " + _ENTITY_SET_CLAUSE + _RETURN_WRITTEN_CLAUSE,
+    },
+    "relation": {
+        GraphOperationType.CREATE: _RELATION_MATCH_CLAUSE + "CREATE (s)-[r:RELATION {id: row.id}]->(t) " + _RELATION_SET_CLAUSE + _RETURN_WRITTEN_CLAUSE,
+        GraphOperationType.UPDATE: "UNWIND $rows AS row MATCH ()-[r:RELATION {id: row.id}]->() " + _RELATION_SET_CLAUSE + _RETURN_WRITTEN_CLAUSE,
+        GraphOperationType.MERGE: _RELATION_MATCH_CLAUSE + "MERGE (s)-[r:RELATION {id: row.id}]->(t) " + _RELATION_SET_CLAUSE + _RETURN_WRITTEN_CLAUSE,
+    },
+}
+
 class GraphManager:
     """知识图谱管理器"""
     
-    def __init__(self, config: GraphConfig = None):
+    def __init__(
+        self,
+        config: GraphConfig = None,
+        neo4j_client: Optional[Any] = None,
+        graph_query: Optional[GraphQuery] = None
+    ):
+        """初始化图管理器
+        
+        Args:
+            config: 图配置
+            neo4j_client: Neo4jClient 实例，提供时批量写入以每个分块一条 UNWIND 语句执行
+            graph_query: 维护实体名称索引的查询器，默认使用启动时创建的全局查询器
+        """
         self.config = config or GraphConfig()
+        self.neo4j_client = neo4j_client
+        self._graph_query = graph_query
         self.entity_extractor = EntityExtractor()
         self.relation_extractor = RelationExtractor()
         self.graph_db = None
@@ -113,6 +173,24 @@ class GraphManager:
         self._executor = ThreadPoolExecutor(max_workers=4)
         self._initialize_components()
     
+    @property
+    def graph_query(self) -> Optional[GraphQuery]:
+        return self._graph_query or get_graph_query()
+    
+    def _index_entities(self, entities: List[Entity]) -> None:
+        """实体写入后同步进程内名称索引"""
+        graph_query = self.graph_query
+        if graph_query is None:
+            return
+        for entity in entities:
+            graph_query.index_entity({
+                "id": entity.id,
+                "name": entity.name,
+                "type": entity.entity_type,
+                "confidence": entity.confidence_score,
+                "description": entity.description
+            })
+    
     def _initialize_components(self):
         """初始化组件"""
         try:
@@ -214,6 +292,7 @@ class GraphManager:
                     entity_type=entity.entity_type,
                     properties=entity.properties
                 )
+                self._index_entities([entity])
                 
                 # 清除相关缓存
                 if self.cache_manager:
@@ -640,6 +719,7 @@ class GraphManager:
                         "entity_type": entity.entity_type,
                         "properties": entity.properties
                     })
+                self._index_entities([entity])
                 
                 # 清除相关缓存
                 if self.cache_manager:
@@ -673,6 +753,8 @@ class GraphManager:
                 # 从NetworkX图中删除
                 if self.nx_graph.has_node(entity_id):
                     self.nx_graph.remove_node(entity_id)
+                if self.graph_query is not None:
+                    self.graph_query.unindex_entity(entity_id)
                 
                 # 清除相关缓存
                 if self.cache_manager:
@@ -754,6 +836,187 @@ class GraphManager:
             logger.error(f"更新关系失败: {str(e)}")
             return False
     
+    async def bulk_upsert_entities(
+        self,
+        entities: List[Entity],
+        operation_type: GraphOperationType = GraphOperationType.MERGE,
+        chunk_size: Optional[int] = None,
+        user_id: str = None
+    ) -> BulkWriteResult:
+        """分块批量写入实体
+        
+        Args:
+            entities: 实体列表
+            operation_type: CREATE、UPDATE 或 MERGE
+            chunk_size: 分块大小，默认使用配置的 batch_size
+            user_id: 用户ID
+            
+        Returns:
+            批量写入结果，失败按分块报告
+        """
+        return await self._bulk_write("entity", entities, operation_type, chunk_size, user_id)
+    
+    async def bulk_upsert_relations(
+        self,
+        relations: List[Relation],
+        operation_type: GraphOperationType = GraphOperationType.MERGE,
+        chunk_size: Optional[int] = None,
+        user_id: str = None
+    ) -> BulkWriteResult:
+        """分块批量写入关系，关系两端的实体需已存在"""
+        return await self._bulk_write("relation", relations, operation_type, chunk_size, user_id)
+    
+    async def _bulk_write(
+        self,
+        kind: str,
+        records: List[Union[Entity, Relation]],
+        operation_type: GraphOperationType,
+        chunk_size: Optional[int],
+        user_id: Optional[str]
+    ) -> BulkWriteResult:
+        """按分块写入实体或关系"""
+        if operation_type not in _BULK_CYPHER[kind]:
+            raise ValueError(f"不支持的批量操作类型: {operation_type}")
+        
+        start_time = datetime.now()
+        chunk_size = max(1, chunk_size or self.config.batch_size)
+        result = BulkWriteResult(operation_type=operation_type, total=len(records))
+        
+        for index, offset in enumerate(range(0, len(records), chunk_size)):
+            chunk = records[offset:offset + chunk_size]
+            failed_ids, error = await self._write_chunk(kind, chunk, operation_type, user_id)
+            failed = set(failed_ids)
+            
+            if self.neo4j_client is not None:
+                written = [record for record in chunk if record.id not in failed]
+                self._apply_chunk_to_nx(kind, written, operation_type)
+                if kind == "entity":
+                    self._index_entities(written)
+            
+            result.chunks.append({
+                "index": index,
+                "size": len(chunk),
+                "successful": len(chunk) - len(failed_ids),
+                "failed": len(failed_ids),
+                "failed_ids": failed_ids,
+                "error": error
+            })
+            result.successful += len(chunk) - len(failed_ids)
+            result.failed += len(failed_ids)
+            
+            if failed_ids:
+                logger.warning(
+                    f"批量写入{kind}分块失败: 分块 {index}, 失败 {len(failed_ids)}/{len(chunk)}, 错误: {error}"
+                )
+        
+        if result.successful and self.neo4j_client is not None:
+            if self.cache_manager:
+                await self.cache_manager.invalidate_pattern(f"{kind}:*")
+            await self._record_operation(
+                operation_type=operation_type,
+                user_id=user_id,
+                data={"kind": kind, "total": result.total, "successful": result.successful, "failed": result.failed}
+            )
+        
+        result.execution_time = (datetime.now() - start_time).total_seconds()
+        return result
+    
+    async def _write_chunk(
+        self,
+        kind: str,
+        chunk: List[Union[Entity, Relation]],
+        operation_type: GraphOperationType,
+        user_id: Optional[str]
+    ) -> Tuple[List[str], Optional[str]]:
+        """写入一个分块，返回失败的记录ID和错误信息"""
+        if self.neo4j_client is not None:
+            row_builder = self._entity_row if kind == "entity" else self._relation_row
+            try:
+                records = await self.neo4j_client.run(
+                    _BULK_CYPHER[kind][operation_type], {"rows": [row_builder(record) for record in chunk]}
+                )
+            except Exception as e:
+                # 分块在同一事务中写入，失败时整块回滚
+                return [record.id for record in chunk], str(e)
+            
+            # 待更新的记录或关系端点不存在时该行未写入
+            written_ids = {record["id"] for record in records}
+            failed_ids = [record.id for record in chunk if record.id not in written_ids]
+            if not failed_ids:
+                return [], None
+            missing = "关系端点或关系不存在" if kind == "relation" else "实体不存在"
+            return failed_ids, f"{missing}，未写入 {len(failed_ids)} 条记录"
+        
+        # 未配置Neo4j时逐条写入，分块内并发
+        if kind == "entity":
+            write = self.update_entity if operation_type == GraphOperationType.UPDATE else self.add_entity
+        else:
+            write = self.update_relation if operation_type == GraphOperationType.UPDATE else self.add_relation
+        
+        outcomes = await asyncio.gather(
+            *[write(record, user_id) for record in chunk], return_exceptions=True
+        )
+        failed_ids = [record.id for record, outcome in zip(chunk, outcomes) if outcome is not True]
+        errors = [str(outcome) for outcome in outcomes if isinstance(outcome, Exception)]
+        error = errors[0] if errors else ("部分记录写入失败" if failed_ids else None)
+        return failed_ids, error
+    
+    @staticmethod
+    def _entity_row(entity: Entity) -> Dict[str, Any]:
+        return {
+            "id": entity.id,
+            "name": entity.name,
+            "type": entity.entity_type,
+            "confidence": entity.confidence_score,
+            "description": entity.description,
+            "properties": json.dumps(entity.properties or {}, ensure_ascii=False, default=str)
+        }
+    
+    @staticmethod
+    def _relation_row(relation: Relation) -> Dict[str, Any]:
+        return {
+            "id": relation.id,
+            "source_id": relation.source_entity_id,
+            "target_id": relation.target_entity_id,
+            "relation_type": relation.relation_type,
+            "confidence": relation.confidence_score,
+            "properties": json.dumps(relation.properties or {}, ensure_ascii=False, default=str)
+        }
+    
+    def _apply_chunk_to_nx(
+        self,
+        kind: str,
+        records: List[Union[Entity, Relation]],
+        operation_type: GraphOperationType
+    ) -> None:
+        """把写入成功的分块同步到NetworkX图"""
+        update_only = operation_type == GraphOperationType.UPDATE
+        if kind == "entity":
+            for entity in records:
+                if update_only and not self.nx_graph.has_node(entity.id):
+                    continue
+                self.nx_graph.add_node(
+                    entity.id,
+                    name=entity.name,
+                    entity_type=entity.entity_type,
+                    properties=entity.properties
+                )
+            return
+        
+        for relation in records:
+            if update_only and not self.nx_graph.has_edge(
+                relation.source_entity_id, relation.target_entity_id, key=relation.id
+            ):
+                continue
+            self.nx_graph.add_edge(
+                relation.source_entity_id,
+                relation.target_entity_id,
+                key=relation.id,
+                relation_type=relation.relation_type,
+                confidence=relation.confidence_score,
+                properties=relation.properties
+            )
+    
     async def get_metrics(self) -> GraphMetrics:
         """获取图指标"""
         if self.config.enable_metrics:
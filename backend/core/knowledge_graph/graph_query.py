@@ -12,6 +12,9 @@
 
 import asyncio
 import logging
+import re
+import threading
+from collections import defaultdict
 from typing import List, Dict, Any, Optional, Tuple, Set, Union
 from datetime import datetime
 import json
@@ -22,6 +25,15 @@ from backend.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# 实体全文索引配置
+ENTITY_FULLTEXT_INDEX = "entity_name_description_fulltext"
+ENTITY_FULLTEXT_PROPERTIES = ["name", "description"]
+ENTITY_FULLTEXT_ANALYZER = "cjk"
+
+# Lucene查询语法中的特殊字符
+# && 和 || 逐字符转义
+_LUCENE_SPECIAL_CHARS = re.compile(r'([+\-!(){}\[\]^"~*?:\\/&|])')
+
 class QueryResult:
     """
     查询结果封装
@@ -44,6 +56,148 @@ class QueryResult:
             "timestamp": self.timestamp.isoformat()
         }
 
+class EntityNameIndex:
+    """
+    进程内实体名称索引
+    
+    基于字符n-gram倒排表的轻量索引，用于输入联想等低延迟场景。
+    按字符切分，不依赖分词，中英文均可匹配子串；前缀命中的实体排序靠前。
+    支持按实体增量写入和删除。
+    """
+    
+    def __init__(self, ngram_size: int = 2):
+        self.ngram_size = ngram_size
+        self._entities: Dict[str, Dict[str, Any]] = {}
+        self._postings: Dict[str, Set[str]] = defaultdict(set)
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self._entities)
+    
+    @staticmethod
+    def _normalize(text: str) -> str:
+        return (text or "").strip().lower()
+    
+    def _grams(self, text: str) -> Set[str]:
+        """生成文本的n-gram集合，短于n的文本直接作为单个gram"""
+        if len(text) <= self.ngram_size:
+            return {text} if text else set()
+        return {text[i:i + self.ngram_size] for i in range(len(text) - self.ngram_size + 1)}
+    
+    def add(self, entity_id: str, name: str, entity_type: str = None,
+            confidence: float = None, description: str = None):
+        """
+        写入或更新实体
+        
+        参数:
+            entity_id: 实体ID
+            name: 实体名称
+            entity_type: 实体类型
+            confidence: 置信度
+            description: 实体描述
+        """
+        normalized = self._normalize(name)
+        with self._lock:
+            self._remove_locked(entity_id)
+            if not normalized:
+                return
+            
+            self._entities[entity_id] = {
+                "id": entity_id,
+                "name": name,
+                "type": entity_type,
+                "description": description,
+                "confidence": confidence,
+                "_normalized": normalized
+            }
+            # 单字符gram用于一个字的查询
+            for gram in self._grams(normalized) | set(normalized):
+                self._postings[gram].add(entity_id)
+    
+    def remove(self, entity_id: str):
+        """删除实体"""
+        with self._lock:
+            self._remove_locked(entity_id)
+    
+    def _remove_locked(self, entity_id: str):
+        entry = self._entities.pop(entity_id, None)
+        if not entry:
+            return
+        normalized = entry["_normalized"]
+        for gram in self._grams(normalized) | set(normalized):
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.discard(entity_id)
+                if not posting:
+                    del self._postings[gram]
+    
+    def clear(self):
+        """清空索引"""
+        with self._lock:
+            self._entities.clear()
+            self._postings.clear()
+    
+    def search(self, text: str, entity_types: List[str] = None,
+               limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        搜索名称中包含查询文本的实体
+        
+        参数:
+            text: 查询文本
+            entity_types: 实体类型过滤
+            limit: 返回数量限制
+        
+        返回:
+            List[Dict[str, Any]]: 按相关度排序的实体
+        """
+        query = self._normalize(text)
+        if not query:
+            return []
+        
+        grams = self._grams(query) if len(query) > 1 else {query}
+        with self._lock:
+            postings = sorted(
+                (self._postings.get(gram, set()) for gram in grams), key=len
+            )
+            if not postings or not postings[0]:
+                return []
+            
+            # 从最短倒排表开始求交集，再用子串校验排除gram误命中
+            candidate_ids = set(postings[0])
+            for posting in postings[1:]:
+                candidate_ids &= posting
+                if not candidate_ids:
+                    return []
+            
+            matches = []
+            for entity_id in candidate_ids:
+                entry = self._entities[entity_id]
+                if entity_types and entry["type"] not in entity_types:
+                    continue
+                position = entry["_normalized"].find(query)
+                if position < 0:
+                    continue
+                if entry["_normalized"] == query:
+                    score = 3.0
+                elif position == 0:
+                    score = 2.0
+                else:
+                    score = 1.0
+                matches.append((score, entry["confidence"] or 0.0, entry))
+        
+        matches.sort(key=lambda item: (-item[0], -item[1], len(item[2]["name"])))
+        return [
+            {
+                "id": entry["id"],
+                "name": entry["name"],
+                "type": entry["type"],
+                "description": entry["description"],
+                "confidence": entry["confidence"],
+                "relevance_score": score
+            }
+            for score, _, entry in matches[:limit]
+        ]
+
 class GraphQuery:
     """
     知识图谱查询器
@@ -51,9 +205,152 @@ class GraphQuery:
     提供各种图谱查询功能，包括实体查询、关系查询、路径查询等。
     """
     
-    def __init__(self, neo4j_client: Neo4jClient, starrocks_client: StarRocksClient):
+    def __init__(self, neo4j_client: Neo4jClient, starrocks_client: StarRocksClient,
+                 name_index: EntityNameIndex = None):
         self.neo4j_client = neo4j_client
         self.starrocks_client = starrocks_client
+        self.name_index = name_index or EntityNameIndex()
+        self._fulltext_index_ready = False
+        self._name_index_loaded = False
+    
+    async def initialize(self, load_name_index: bool = True):
+        """
+        启动时初始化查询器：确保全文索引存在并加载进程内名称索引
+        
+        参数:
+            load_name_index: 是否加载进程内实体名称索引
+        """
+        try:
+            await self.ensure_fulltext_index()
+        except Exception as e:
+            # 全文索引不可用时退化为进程内索引或CONTAINS扫描
+            logger.warning(f"实体全文索引初始化失败，将使用备用搜索: {e}")
+            self._fulltext_index_ready = False
+        
+        if load_name_index:
+            try:
+                await self.load_name_index()
+            except Exception as e:
+                logger.warning(f"实体名称索引加载失败: {e}")
+    
+    async def ensure_fulltext_index(self) -> bool:
+        """
+        创建或迁移实体全文索引
+        
+        已存在的同名索引若覆盖属性或分析器与当前配置不一致，则删除后重建。
+        
+        返回:
+            bool: 索引是否可用
+        """
+        rows = await self.neo4j_client.run(
+            """
+            SHOW FULLTEXT INDEXES
+            YIELD name, labelsOrTypes, properties, options, state
+            WHERE name = $index_name
+            RETURN labelsOrTypes, properties, options, state
+            """,
+            {"index_name": ENTITY_FULLTEXT_INDEX}
+        )
+        
+        if rows:
+            index = rows[0]
+            labels, properties, options, state = (
+                index["labelsOrTypes"], index["properties"], index["options"], index["state"]
+            )
+            analyzer = ((options or {}).get("indexConfig") or {}).get("fulltext.analyzer")
+            up_to_date = (
+                list(labels or []) == ["Entity"]
+                and list(properties or []) == ENTITY_FULLTEXT_PROPERTIES
+                and analyzer == ENTITY_FULLTEXT_ANALYZER
+            )
+            if up_to_date:
+                self._fulltext_index_ready = state in (None, "ONLINE")
+                return self._fulltext_index_ready
+            
+            logger.info(f"实体全文索引配置已变更，重建索引: {ENTITY_FULLTEXT_INDEX}")
+            await self.neo4j_client.run(f"DROP INDEX {ENTITY_FULLTEXT_INDEX} IF EXISTS")
+        
+        properties_clause = ", ".join(f"n.{prop}" for prop in ENTITY_FULLTEXT_PROPERTIES)
+        await self.neo4j_client.run(
+            f"""
+            CREATE FULLTEXT INDEX {ENTITY_FULLTEXT_INDEX} IF NOT EXISTS
+            FOR (n:Entity) ON EACH [{properties_clause}]
+            OPTIONS {{indexConfig: {{`fulltext.analyzer`: '{ENTITY_FULLTEXT_ANALYZER}'}}}}
+            """
+        )
+        await self.neo4j_client.run("CALL db.awaitIndexes(300)")
+        
+        self._fulltext_index_ready = True
+        logger.info(f"实体全文索引已就绪: {ENTITY_FULLTEXT_INDEX}")
+        return True
+    
+    async def load_name_index(self, batch_size: int = 5000) -> int:
+        """
+        从图数据库全量加载进程内实体名称索引
+        
+        参数:
+            batch_size: 每批读取的实体数量
+        
+        返回:
+            int: 加载的实体数量
+        """
+        self.name_index.clear()
+        offset = 0
+        
+        while True:
+            rows = await self.neo4j_client.run(
+                """
+                MATCH (n:Entity)
+                RETURN n.id as id, n.name as name, n.type as type,
+                       n.confidence as confidence, n.description as description
+                ORDER BY n.id
+                SKIP $offset LIMIT $limit
+                """,
+                {"offset": offset, "limit": batch_size}
+            )
+            if not rows:
+                break
+            
+            for row in rows:
+                self.name_index.add(row["id"], row["name"], row["type"], row["confidence"], row["description"])
+            
+            offset += len(rows)
+            if len(rows) < batch_size:
+                break
+        
+        self._name_index_loaded = True
+        logger.info(f"实体名称索引加载完成: {len(self.name_index)} 个实体")
+        return len(self.name_index)
+    
+    def index_entity(self, entity: Dict[str, Any]):
+        """
+        实体写入后增量更新进程内名称索引
+        
+        参数:
+            entity: 包含 id、name、type 等字段的实体
+        """
+        self.name_index.add(
+            entity["id"],
+            entity.get("name"),
+            entity.get("type") or entity.get("entity_type"),
+            entity.get("confidence"),
+            entity.get("description")
+        )
+    
+    def unindex_entity(self, entity_id: str):
+        """实体删除后从进程内名称索引移除"""
+        self.name_index.remove(entity_id)
+    
+    @staticmethod
+    def _build_fulltext_query(search_text: str) -> str:
+        """将用户输入转换为Lucene查询，转义特殊字符并对末尾词做前缀匹配"""
+        terms = [_LUCENE_SPECIAL_CHARS.sub(r"\\\1", term) for term in search_text.split()]
+        if not terms:
+            return ""
+        # CJK分析器按二元组切分，前缀通配只对拉丁字母数字词有意义
+        if terms[-1].isascii() and terms[-1].isalnum():
+            terms[-1] = f"{terms[-1]}*"
+        return " AND ".join(terms)
     
     async def find_entities(self, name: str = None, entity_type: str = None, 
                           properties: Dict[str, Any] = None, 
@@ -423,6 +720,9 @@ class GraphQuery:
         """
         基于文本搜索实体
         
+        优先使用Neo4j全文索引并按评分排序；全文索引不可用时使用进程内名称索引，
+        两者都不可用时退化为属性扫描。
+        
         参数:
             search_text: 搜索文本
             entity_types: 实体类型过滤
@@ -433,6 +733,103 @@ class GraphQuery:
         """
         start_time = datetime.now()
         
+        try:
+            if self._fulltext_index_ready:
+                entities = await self._search_entities_fulltext(search_text, entity_types, limit)
+                query_type = "text_search"
+            elif self._name_index_loaded:
+                entities = self.name_index.search(search_text, entity_types, limit)
+                query_type = "text_search_local"
+            else:
+                entities = await self._search_entities_scan(search_text, entity_types, limit)
+                query_type = "text_search_scan"
+            
+            execution_time = (datetime.now() - start_time).total_seconds()
+            
+            return QueryResult(
+                data=entities,
+                query_type=query_type,
+                execution_time=execution_time
+            )
+        
+        except Exception as e:
+            logger.error(f"文本搜索失败: {e}")
+            raise
+    
+    async def suggest_entities(self, prefix: str, entity_types: List[str] = None,
+                             limit: int = 10) -> QueryResult:
+        """
+        实体名称输入联想，仅查询进程内名称索引
+        
+        参数:
+            prefix: 已输入的文本
+            entity_types: 实体类型过滤
+            limit: 返回数量限制
+        
+        返回:
+            QueryResult: 查询结果
+        """
+        start_time = datetime.now()
+        
+        if not self._name_index_loaded:
+            await self.load_name_index()
+        
+        entities = self.name_index.search(prefix, entity_types, limit)
+        execution_time = (datetime.now() - start_time).total_seconds()
+        
+        return QueryResult(
+            data=entities,
+            query_type="entity_suggest",
+            execution_time=execution_time
+        )
+    
+    async def _search_entities_fulltext(self, search_text: str,
+                                      entity_types: List[str] = None,
+                                      limit: int = 50) -> List[Dict[str, Any]]:
+        """通过全文索引搜索实体"""
+        lucene_query = self._build_fulltext_query(search_text)
+        if not lucene_query:
+            return []
+        
+        type_filter = ""
+        params = {
+            "index_name": ENTITY_FULLTEXT_INDEX,
+            "query": lucene_query,
+            "limit": limit
+        }
+        
+        if entity_types:
+            type_filter = "WHERE node.type IN $entity_types"
+            params["entity_types"] = entity_types
+        
+        query = f"""
+        CALL db.index.fulltext.queryNodes($index_name, $query) YIELD node, score
+        {type_filter}
+        RETURN node.id as id, node.name as name, node.type as type,
+               node.description as description, node.confidence as confidence,
+               score as relevance_score
+        ORDER BY relevance_score DESC, node.confidence DESC
+        LIMIT $limit
+        """
+        
+        result = await self.neo4j_client.run(query, params)
+        
+        return [
+            {
+                "id": row["id"],
+                "name": row["name"],
+                "type": row["type"],
+                "description": row["description"],
+                "confidence": row["confidence"],
+                "relevance_score": row["relevance_score"]
+            }
+            for row in result
+        ]
+    
+    async def _search_entities_scan(self, search_text: str,
+                                  entity_types: List[str] = None,
+                                  limit: int = 50) -> List[Dict[str, Any]]:
+        """通过属性扫描搜索实体"""
         # 构建类型过滤
         type_filter = ""
         params = {"search_text": search_text, "limit": limit}
@@ -456,32 +853,19 @@ class GraphQuery:
         LIMIT $limit
         """
         
-        try:
-            result = await self.neo4j_client.execute_query(query, params)
-            
-            entities = [
-                {
-                    "id": row[0],
-                    "name": row[1],
-                    "type": row[2],
-                    "description": row[3],
-                    "confidence": row[4],
-                    "relevance_score": row[5]
-                }
-                for row in result
-            ] if result else []
-            
-            execution_time = (datetime.now() - start_time).total_seconds()
-            
-            return QueryResult(
-                data=entities,
-                query_type="text_search",
-                execution_time=execution_time
-            )
+        result = await self.neo4j_client.run(query, params)
         
-        except Exception as e:
-            logger.error(f"文本搜索失败: {e}")
-            raise
+        return [
+            {
+                "id": row["id"],
+                "name": row["name"],
+                "type": row["type"],
+                "description": row["description"],
+                "confidence": row["confidence"],
+                "relevance_score": row["relevance_score"]
+            }
+            for row in result
+        ]
     
     async def get_entity_statistics(self, entity_id: str) -> QueryResult:
         """
@@ -731,4 +1115,32 @@ class GraphQuery:
         
         except Exception as e:
             logger.error(f"相似实体查询失败: {e}")
-            raise
\ No newline at end of file
+            raise
+
+
+# 全局查询器实例，应用启动时由 init_graph_query 创建
+_graph_query: Optional[GraphQuery] = None
+
+def get_graph_query() -> Optional[GraphQuery]:
+    """获取全局查询器，未初始化时返回 None"""
+    return _graph_query
+
+async def init_graph_query(neo4j_client: Neo4jClient,
+                           starrocks_client: StarRocksClient = None,
+                           load_name_index: bool = True) -> GraphQuery:
+    """
+    创建全局查询器，确保全文索引存在并加载进程内名称索引
+    
+    参数:
+        neo4j_client: Neo4j客户端
+        starrocks_client: StarRocks客户端
+        load_name_index: 是否加载进程内实体名称索引
+    
+    返回:
+        GraphQuery: 初始化后的查询器
+    """
+    global _graph_query
+    graph_query = GraphQuery(neo4j_client, starrocks_client)
+    await graph_query.initialize(load_name_index=load_name_index)
+    _graph_query = graph_query
+    return graph_query
@@ -6,6 +6,8 @@ import spacy
 import logging
 from collections import defaultdict, Counter
 import asyncio
+import time
+from bisect import bisect_right
 from datetime import datetime
 import numpy as np
 from itertools import combinations
@@ -17,6 +19,10 @@ from backend.core.llm.llm_orchestrator import LLMOrchestrator
 
 logger = logging.getLogger(__name__)
 
+# 实体对范围边界：句子按句末标点切分，段落按空行切分
+_SENTENCE_BOUNDARY = re.compile(r'[.!?。！？；;]+|\n\s*\n')
+_PARAGRAPH_BOUNDARY = re.compile(r'\n\s*\n')
+
 class RelationExtractionMethod(Enum):
     """关系提取方法"""
     PATTERN = "pattern"  # 模式匹配
@@ -67,6 +73,7 @@ class RelationExtractionConfig:
     min_confidence: float = 0.6
     max_relations_per_document: int = 200
     max_entity_distance: int = 100  # 实体间最大距离（字符数）
+    pair_scope: Optional[str] = None  # 实体对范围限制: None/"sentence"/"paragraph"
     enable_bidirectional: bool = True
     enable_transitive: bool = False
     custom_patterns: Dict[str, List[str]] = None
@@ -117,6 +124,7 @@ class RelationExtractor:
         self.llm_orchestrator = None
         self._pattern_cache = {}
         self._relation_templates = {}
+        self._compiled_templates = {}
         self._initialize_components()
     
     def _initialize_components(self):
@@ -191,6 +199,44 @@ class RelationExtractor:
                 r"{subject} vs {object}"
             ]
         }
+        self._compile_relation_templates()
+    
+    def _compile_relation_templates(self):
+        """预编译关系模板
+        
+        实体位置已知，模板只需校验两个实体之间（以及前后）的连接文本。
+        按实体先后顺序分组，每个关系类别编译为一个组合正则。
+        """
+        grouped = defaultdict(lambda: defaultdict(list))
+        
+        for relation_category, templates in self._relation_templates.items():
+            for template in templates:
+                subject_at = template.index("{subject}")
+                object_at = template.index("{object}")
+                subject_first = subject_at < object_at
+                first, second = ("{subject}", "{object}") if subject_first else ("{object}", "{subject}")
+                
+                prefix, rest = template.split(first, 1)
+                middle, suffix = rest.split(second, 1)
+                grouped[subject_first][relation_category].append((prefix, middle, suffix, template))
+        
+        self._compiled_templates = {}
+        for subject_first, categories in grouped.items():
+            compiled = []
+            for relation_category, parts in categories.items():
+                # 组合正则的分支顺序与模板顺序一致，命中首个模板即停止
+                alternatives = []
+                group_templates = {}
+                for index, (prefix, middle, suffix, template) in enumerate(parts):
+                    group_name = f"t{index}"
+                    group_templates[group_name] = (prefix, suffix, template)
+                    alternatives.append(f"(?P<{group_name}>{middle})")
+                compiled.append((
+                    relation_category,
+                    re.compile("|".join(alternatives), re.IGNORECASE),
+                    group_templates
+                ))
+            self._compiled_templates[subject_first] = compiled
     
     def _compile_patterns(self):
         """编译自定义模式"""
@@ -222,7 +268,9 @@ class RelationExtractor:
         
         try:
             # 生成实体对
+            pair_start = time.perf_counter()
             entity_pairs = self._generate_entity_pairs(entities, text)
+            pair_generation_time = time.perf_counter() - pair_start
             
             # 根据配置的方法提取关系
             for method in self.config.methods:
@@ -292,6 +340,7 @@ class RelationExtractor:
                     "total_relations": len(relations),
                     "total_entities": len(entities),
                     "entity_pairs_considered": len(entity_pairs),
+                    "pair_generation_time": pair_generation_time,
                     "methods_used": [m.value for m in self.config.methods]
                 }
             )
@@ -310,51 +359,90 @@ class RelationExtractor:
             )
     
     def _generate_entity_pairs(self, entities: List[ExtractedEntity], text: str) -> List[Tuple[ExtractedEntity, ExtractedEntity]]:
-        """生成实体对"""
-        pairs = []
+        """生成实体对
+        
+        按起始位置排序后滑动窗口，只比较距离在 max_entity_distance 以内的实体；
+        配置了 pair_scope 时，窗口同时截断在句子/段落边界处。
+        """
+        if len(entities) < 2:
+            return []
+        
+        ordered = sorted(entities, key=lambda e: e.start_pos)
+        starts = [entity.start_pos for entity in ordered]
+        max_distance = self.config.max_entity_distance
+        
+        segments = None
+        if self.config.pair_scope:
+            boundaries = self._segment_boundaries(text, self.config.pair_scope)
+            segments = [bisect_right(boundaries, start) for start in starts]
         
-        for i, entity1 in enumerate(entities):
-            for j, entity2 in enumerate(entities):
-                if i != j:
-                    # 检查实体间距离
-                    distance = abs(entity1.start_pos - entity2.start_pos)
-                    if distance <= self.config.max_entity_distance:
-                        pairs.append((entity1, entity2))
+        pairs = []
+        for i, entity1 in enumerate(ordered):
+            window_end = bisect_right(starts, starts[i] + max_distance, lo=i + 1)
+            if segments is not None:
+                # 同一分段的实体在排序后连续
+                window_end = min(window_end, bisect_right(segments, segments[i], lo=i + 1))
+            
+            for j in range(i + 1, window_end):
+                entity2 = ordered[j]
+                pairs.append((entity1, entity2))
+                pairs.append((entity2, entity1))
         
         return pairs
     
+    def _segment_boundaries(self, text: str, scope: str) -> List[int]:
+        """计算句子或段落的结束位置"""
+        if scope == "sentence":
+            pattern = _SENTENCE_BOUNDARY
+        elif scope == "paragraph":
+            pattern = _PARAGRAPH_BOUNDARY
+        else:
+            raise ValueError(f"不支持的实体对范围: {scope}")
+        
+        return [match.end() for match in pattern.finditer(text)]
+    
     async def _extract_with_patterns(self, entity_pairs: List[Tuple[ExtractedEntity, ExtractedEntity]], text: str) -> List[ExtractedRelation]:
-        """使用模式匹配提取关系"""
+        """使用模式匹配提取关系
+        
+        对全部候选对先批量截取实体间的连接文本，再逐个关系类别用预编译的组合正则
+        完整匹配，不再为每个实体对拼接和编译模板。
+        """
         relations = []
         
-        for subject, obj in entity_pairs:
-            # 获取实体间的文本
-            start_pos = min(subject.start_pos, obj.start_pos)
-            end_pos = max(subject.end_pos, obj.end_pos)
-            context_text = text[start_pos:end_pos]
+        for subject_first, compiled in self._compiled_templates.items():
+            # 收集该方向下实体不重叠的候选对及其连接文本
+            candidates = []
+            for subject, obj in entity_pairs:
+                first, second = (subject, obj) if subject_first else (obj, subject)
+                if first.end_pos <= second.start_pos:
+                    candidates.append((subject, obj, first, second, text[first.end_pos:second.start_pos]))
             
-            # 应用关系模板
-            for relation_category, templates in self._relation_templates.items():
-                for template in templates:
-                    # 替换模板中的占位符
-                    pattern = template.format(
-                        subject=re.escape(subject.text),
-                        object=re.escape(obj.text)
-                    )
+            if not candidates:
+                continue
+            
+            for relation_category, regex, group_templates in compiled:
+                for subject, obj, first, second, gap in candidates:
+                    match = regex.fullmatch(gap)
+                    if not match:
+                        continue
                     
-                    if re.search(pattern, context_text, re.IGNORECASE):
-                        relation = ExtractedRelation(
-                            subject=subject,
-                            predicate=relation_category,
-                            object=obj,
-                            confidence=0.8,
-                            context=context_text,
-                            evidence=context_text,
-                            attributes={"pattern": template},
-                            source_method=RelationExtractionMethod.PATTERN
-                        )
-                        relations.append(relation)
-                        break
+                    prefix, suffix, template = group_templates[match.lastgroup]
+                    if prefix and not re.search(f"(?:{prefix})$", text[:first.start_pos], re.IGNORECASE):
+                        continue
+                    if suffix and not re.match(suffix, text[second.end_pos:], re.IGNORECASE):
+                        continue
+                    
+                    context_text = text[first.start_pos:second.end_pos]
+                    relations.append(ExtractedRelation(
+                        subject=subject,
+                        predicate=relation_category,
+                        object=obj,
+                        confidence=0.8,
+                        context=context_text,
+                        evidence=context_text,
+                        attributes={"pattern": template},
+                        source_method=RelationExtractionMethod.PATTERN
+                    ))
         
         return relations
     
@@ -435,32 +523,38 @@ class RelationExtractor:
         """使用统计方法提取关系"""
         relations = []
         
-        # 基于共现频率的统计方法
-        for subject, obj in entity_pairs:
-            # 计算实体间的统计特征
-            distance = abs(subject.start_pos - obj.start_pos)
-            
-            # 基于距离的置信度
-            distance_confidence = max(0, 1 - distance / self.config.max_entity_distance)
+        if not entity_pairs:
+            return relations
+        
+        # 基于共现距离的置信度，对全部候选对向量化计算
+        subject_starts = np.fromiter((subject.start_pos for subject, _ in entity_pairs), dtype=np.int64, count=len(entity_pairs))
+        object_starts = np.fromiter((obj.start_pos for _, obj in entity_pairs), dtype=np.int64, count=len(entity_pairs))
+        distances = np.abs(subject_starts - object_starts)
+        distance_confidences = np.maximum(0.0, 1.0 - distances / self.config.max_entity_distance)
+        
+        for index in np.flatnonzero(distance_confidences > 0.5):
+            subject, obj = entity_pairs[index]
             
             # 基于实体类型的关系推断
             type_based_relation = self._infer_relation_from_types(subject.category, obj.category)
+            if not type_based_relation:
+                continue
             
-            if type_based_relation and distance_confidence > 0.5:
-                relation = ExtractedRelation(
-                    subject=subject,
-                    predicate=type_based_relation,
-                    object=obj,
-                    confidence=distance_confidence * 0.6,  # 统计方法置信度较低
-                    context=text[min(subject.start_pos, obj.start_pos):max(subject.end_pos, obj.end_pos)],
-                    evidence=f"Statistical inference based on entity types and distance",
-                    attributes={
-                        "distance": distance,
-                        "type_inference": True
-                    },
-                    source_method=RelationExtractionMethod.STATISTICAL
-                )
-                relations.append(relation)
+            distance_confidence = float(distance_confidences[index])
+            relation = ExtractedRelation(
+                subject=subject,
+                predicate=type_based_relation,
+                object=obj,
+                confidence=distance_confidence * 0.6,  # 统计方法置信度较低
+                context=text[min(subject.start_pos, obj.start_pos):max(subject.end_pos, obj.end_pos)],
+                evidence=f"Statistical inference based on entity types and distance",
+                attributes={
+                    "distance": int(distances[index]),
+                    "type_inference": True
+                },
+                source_method=RelationExtractionMethod.STATISTICAL
+            )
+            relations.append(relation)
         
         return relations
     
@@ -797,6 +891,8 @@ class RelationExtractor:
         
         total_relations = sum(len(r.relations) for r in results)
         total_time = sum(r.processing_time for r in results)
+        total_pairs = sum(r.metadata.get("entity_pairs_considered", 0) for r in results)
+        pair_time = sum(r.metadata.get("pair_generation_time", 0.0) for r in results)
         
         # 方法统计
         method_counts = defaultdict(int)
@@ -827,6 +923,9 @@ class RelationExtractor:
             "average_relations_per_document": total_relations / len(results) if results else 0,
             "total_processing_time": total_time,
             "average_processing_time": total_time / len(results) if results else 0,
+            "entity_pairs_considered": total_pairs,
+            "pair_generation_time": pair_time,
+            "pairs_per_second": total_pairs / total_time if total_time > 0 else 0,
             "method_distribution": dict(method_counts),
             "relation_type_distribution": dict(relation_counts),
             "confidence_distribution": confidence_stats,
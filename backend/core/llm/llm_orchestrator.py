@@ -7,12 +7,15 @@ import logging
 import json
 import time
 from abc import ABC, abstractmethod
+from collections import deque
 
 import openai
 import anthropic
 from transformers import AutoTokenizer, AutoModelForCausalLM
 import torch
 
+from backend.utils.performance import LatencyHistogram
+
 logger = logging.getLogger(__name__)
 
 
@@ -499,22 +502,70 @@ class HuggingFaceProvider(BaseLLMProvider):
         return "\n\n".join(prompt_parts)
 
 
+class LLMMetrics:
+    """请求指标的流式聚合
+    
+    计数器、指数衰减的平均响应时间和固定分桶的延迟直方图，每次更新为 O(1)，
+    占用内存与请求数量无关。
+    """
+    
+    def __init__(self, alpha: float = 0.1):
+        self.alpha = alpha  # 平滑因子
+        self.total_requests = 0
+        self.successful_requests = 0
+        self.failed_requests = 0
+        self.total_tokens = 0
+        self.total_cost = 0.0
+        self.average_response_time = 0.0
+        self.latency = LatencyHistogram()
+    
+    def record_request(self) -> None:
+        self.total_requests += 1
+    
+    def record_response(self, response_time: float, success: bool, tokens: int = 0) -> None:
+        """记录一次响应，响应时间单位为秒"""
+        if success:
+            self.successful_requests += 1
+            self.total_tokens += tokens
+        else:
+            self.failed_requests += 1
+        
+        # 指数衰减平均
+        if self.latency.count == 0:
+            self.average_response_time = response_time
+        else:
+            self.average_response_time = (
+                self.alpha * response_time + (1 - self.alpha) * self.average_response_time
+            )
+        self.latency.observe(response_time)
+    
+    def record_failure(self) -> None:
+        """记录没有得到响应的失败请求"""
+        self.failed_requests += 1
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "total_requests": self.total_requests,
+            "successful_requests": self.successful_requests,
+            "failed_requests": self.failed_requests,
+            "total_tokens": self.total_tokens,
+            "total_cost": self.total_cost,
+            "average_response_time": self.average_response_time,
+            "latency": self.latency.to_dict()
+        }
+
+
 class LLMOrchestrator:
     """LLM编排器"""
     
-    def __init__(self):
+    def __init__(self, history_size: int = 100):
         self.providers: Dict[str, BaseLLMProvider] = {}
         self.default_provider: Optional[str] = None
-        self.request_history: List[LLMRequest] = []
-        self.response_history: List[LLMResponse] = []
-        self.metrics = {
-            "total_requests": 0,
-            "successful_requests": 0,
-            "failed_requests": 0,
-            "total_tokens": 0,
-            "total_cost": 0.0,
-            "average_response_time": 0.0
-        }
+        # 只保留最近的请求和响应，指标由 LLMMetrics 流式聚合
+        self.request_history: deque = deque(maxlen=history_size)
+        self.response_history: deque = deque(maxlen=history_size)
+        self.metrics = LLMMetrics()
+        self.model_metrics: Dict[str, LLMMetrics] = {}
     
     def register_provider(self, name: str, config: LLMConfig, set_as_default: bool = False):
         """注册LLM提供商"""
@@ -548,12 +599,21 @@ class LLMOrchestrator:
         
         return self.providers[provider_name]
     
+    def _get_model_metrics(self, provider_name: Optional[str], provider: BaseLLMProvider) -> LLMMetrics:
+        """按 提供商/模型 分组的指标"""
+        key = f"{provider_name or self.default_provider}/{provider.config.model_name}"
+        metrics = self.model_metrics.get(key)
+        if metrics is None:
+            metrics = self.model_metrics[key] = LLMMetrics(self.metrics.alpha)
+        return metrics
+    
     async def generate(self, 
                       messages: List[Message],
                       task_type: LLMTaskType = LLMTaskType.CHAT_COMPLETION,
                       provider_name: Optional[str] = None,
                       **kwargs) -> LLMResponse:
         """生成响应"""
+        model_metrics = None
         try:
             provider = self.get_provider(provider_name)
             
@@ -570,38 +630,34 @@ class LLMOrchestrator:
                 raise ValueError("无效的请求")
             
             # 记录请求
+            model_metrics = self._get_model_metrics(provider_name, provider)
             self.request_history.append(request)
-            self.metrics["total_requests"] += 1
+            self.metrics.record_request()
+            model_metrics.record_request()
             
             # 生成响应
+            start_time = time.time()
             response = await provider.generate(request)
             
             # 记录响应
             self.response_history.append(response)
             
             # 更新指标
-            if response.error:
-                self.metrics["failed_requests"] += 1
-            else:
-                self.metrics["successful_requests"] += 1
-                
-                if response.usage:
-                    self.metrics["total_tokens"] += response.usage.get("total_tokens", 0)
-            
-            # 更新平均响应时间
-            total_time = sum(r.response_time for r in self.response_history)
-            self.metrics["average_response_time"] = total_time / len(self.response_history)
+            response_time = response.response_time or time.time() - start_time
+            tokens = response.usage.get("total_tokens", 0) if response.usage else 0
+            for metrics in (self.metrics, model_metrics):
+                metrics.record_response(response_time, success=not response.error, tokens=tokens)
             
             return response
             
         except ValueError as e:
             # 重新抛出 ValueError（如提供商未找到等）
             logger.error(f"生成响应失败: {str(e)}")
-            self.metrics["failed_requests"] += 1
+            self._record_failure(model_metrics)
             raise
         except Exception as e:
             logger.error(f"生成响应失败: {str(e)}")
-            self.metrics["failed_requests"] += 1
+            self._record_failure(model_metrics)
             
             return LLMResponse(
                 content="",
@@ -616,6 +672,7 @@ class LLMOrchestrator:
                              provider_name: Optional[str] = None,
                              **kwargs) -> AsyncGenerator[str, None]:
         """流式生成响应"""
+        model_metrics = None
         try:
             provider = self.get_provider(provider_name)
             
@@ -630,17 +687,29 @@ class LLMOrchestrator:
                 yield "错误: 无效的请求"
                 return
             
+            model_metrics = self._get_model_metrics(provider_name, provider)
             self.request_history.append(request)
-            self.metrics["total_requests"] += 1
+            self.metrics.record_request()
+            model_metrics.record_request()
             
+            start_time = time.time()
             async for chunk in provider.stream_generate(request):
                 yield chunk
+            
+            response_time = time.time() - start_time
+            for metrics in (self.metrics, model_metrics):
+                metrics.record_response(response_time, success=True)
                 
         except Exception as e:
             logger.error(f"流式生成失败: {str(e)}")
-            self.metrics["failed_requests"] += 1
+            self._record_failure(model_metrics)
             yield f"错误: {str(e)}"
     
+    def _record_failure(self, model_metrics: Optional[LLMMetrics]) -> None:
+        self.metrics.record_failure()
+        if model_metrics is not None:
+            model_metrics.record_failure()
+    
     async def batch_generate(self, 
                             requests: List[Dict[str, Any]],
                             provider_name: Optional[str] = None,
@@ -658,8 +727,10 @@ class LLMOrchestrator:
         return await asyncio.gather(*tasks, return_exceptions=True)
     
     def get_metrics(self) -> Dict[str, Any]:
-        """获取指标"""
-        return self.metrics.copy()
+        """获取指标，by_model 为按 提供商/模型 分组的指标"""
+        metrics = self.metrics.to_dict()
+        metrics["by_model"] = {key: value.to_dict() for key, value in self.model_metrics.items()}
+        return metrics
     
     def get_provider_info(self) -> Dict[str, Dict[str, Any]]:
         """获取提供商信息"""
@@ -682,14 +753,8 @@ class LLMOrchestrator:
         self.response_history.clear()
         
         # 重置指标
-        self.metrics = {
-            "total_requests": 0,
-            "successful_requests": 0,
-            "failed_requests": 0,
-            "total_tokens": 0,
-            "total_cost": 0.0,
-            "average_response_time": 0.0
-        }
+        self.metrics = LLMMetrics(self.metrics.alpha)
+        self.model_metrics.clear()
     
     async def health_check(self, provider_name: Optional[str] = None) -> Dict[str, bool]:
         """健康检查"""
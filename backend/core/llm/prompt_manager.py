@@ -5,6 +5,7 @@ from datetime import datetime
 import json
 import re
 import logging
+from collections import OrderedDict
 from pathlib import Path
 from jinja2 import Template, Environment, FileSystemLoader, meta
 import yaml
@@ -250,7 +251,7 @@ class PromptValidator:
 class PromptRenderer:
     """提示渲染器"""
     
-    def __init__(self):
+    def __init__(self, cache_size: int = 256):
         self.jinja_env = Environment(
             trim_blocks=True,
             lstrip_blocks=True,
@@ -261,6 +262,12 @@ class PromptRenderer:
         self.jinja_env.filters['truncate_words'] = self._truncate_words
         self.jinja_env.filters['format_list'] = self._format_list
         self.jinja_env.filters['json_pretty'] = self._json_pretty
+        
+        # 编译后的模板缓存（LRU）：(模板ID, 版本) -> (模板内容, 编译结果)
+        self.cache_size = cache_size
+        self._compiled: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
     
     def render(self, template: PromptTemplate, variables: Dict[str, Any]) -> str:
         """渲染模板"""
@@ -281,7 +288,7 @@ class PromptRenderer:
                 return template.content
             
             elif template.format == PromptFormat.JINJA2:
-                jinja_template = self.jinja_env.from_string(template.content)
+                jinja_template = self._get_compiled(template)
                 return jinja_template.render(**variables)
             
             elif template.format == PromptFormat.F_STRING:
@@ -303,7 +310,7 @@ class PromptRenderer:
             
             elif template.format == PromptFormat.MARKDOWN:
                 # 使用Jinja2渲染Markdown
-                jinja_template = self.jinja_env.from_string(template.content)
+                jinja_template = self._get_compiled(template)
                 return jinja_template.render(**variables)
             
             else:
@@ -313,6 +320,45 @@ class PromptRenderer:
             logger.error(f"渲染模板失败: {str(e)}")
             raise
     
+    def _get_compiled(self, template: PromptTemplate) -> Template:
+        """获取编译后的 Jinja2 模板，按模板ID和版本缓存
+        
+        内容与缓存时不一致（未修改版本号直接改了内容）时重新编译。
+        """
+        key = (template.id, template.version)
+        cached = self._compiled.get(key)
+        if cached is not None and cached[0] == template.content:
+            self._compiled.move_to_end(key)
+            self.cache_hits += 1
+            return cached[1]
+        
+        self.cache_misses += 1
+        compiled = self.jinja_env.from_string(template.content)
+        self._compiled[key] = (template.content, compiled)
+        self._compiled.move_to_end(key)
+        while len(self._compiled) > self.cache_size:
+            self._compiled.popitem(last=False)
+        return compiled
+    
+    def invalidate(self, template_id: Optional[str] = None):
+        """清除模板各版本的编译缓存，不指定模板ID时全部清除"""
+        if template_id is None:
+            self._compiled.clear()
+            return
+        for key in [key for key in self._compiled if key[0] == template_id]:
+            del self._compiled[key]
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """编译缓存统计"""
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "size": len(self._compiled),
+            "max_size": self.cache_size,
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "hit_rate": round(self.cache_hits / lookups, 4) if lookups else 0.0
+        }
+    
     def _truncate_words(self, text: str, count: int) -> str:
         """截断单词"""
         words = text.split()
@@ -526,6 +572,7 @@ class PromptManager:
             # 检查ID冲突
             if template.id in self.templates:
                 logger.warning(f"模板ID已存在，将覆盖: {template.id}")
+                self.renderer.invalidate(template.id)
             
             self.templates[template.id] = template
             logger.info(f"已添加模板: {template.id}")
@@ -584,6 +631,7 @@ class PromptManager:
                     setattr(template, key, value)
             
             template.updated_at = datetime.now()
+            self.renderer.invalidate(template_id)
             
             # 重新验证
             is_valid, errors = PromptValidator.validate_template(template)
@@ -606,6 +654,7 @@ class PromptManager:
                 return False
             
             del self.templates[template_id]
+            self.renderer.invalidate(template_id)
             logger.info(f"已删除模板: {template_id}")
             return True
             
@@ -764,6 +813,7 @@ class PromptManager:
             "successful_executions": successful_executions,
             "success_rate": successful_executions / total_executions if total_executions > 0 else 0,
             "category_distribution": category_stats,
+            "render_cache": self.renderer.get_cache_stats(),
             "popular_templates": [
                 {"id": t.id, "name": t.name, "usage_count": t.usage_count}
                 for t in popular_templates
@@ -1,7 +1,12 @@
-from typing import Dict, List, Optional, Any, Union, Tuple
+from typing import Dict, List, Optional, Any, Union, Tuple, AsyncIterator
 from pathlib import Path
+from collections import OrderedDict, deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 import asyncio
 import io
+import os
+import tempfile
+import threading
 from datetime import datetime
 import hashlib
 import json
@@ -14,6 +19,8 @@ import fitz  # PyMuPDF
 
 from backend.utils.logger import get_logger
 from backend.config.settings import get_settings
+from backend.core.ocr.page_analysis import PageAnalysis
+from backend.core.ocr.page_cache import OCRPageCache, hash_pdf_page
 from pydantic import BaseModel, Field
 
 logger = get_logger(__name__)
@@ -56,11 +63,83 @@ class ProcessingOptions(BaseModel):
     extract_table_regions: bool = True
     language: str = "zh-cn"
     output_format: str = "json"
+    image_format: str = "png"  # "png" 返回编码后的字节，"array" 返回 RGB ndarray 及其 PageAnalysis
+    use_text_layer: bool = True  # 原生数字页面直接读取文本层，不渲染、不做OCR
+    min_text_glyphs: int = 50
+    max_image_area_ratio: float = 0.3
+
+class PageType:
+    """PDF 页面类型"""
+    DIGITAL = "digital"  # 文本层完整，无大面积图像
+    SCANNED = "scanned"  # 无可用文本层
+    MIXED = "mixed"  # 有文本层，同时有大面积图像（如扫描件附带的OCR文本层）
+
+class ProcessingPath:
+    """页面处理路径"""
+    TEXT_LAYER = "text_layer"
+    RASTER = "raster"
+    CACHE = "cache"  # 命中 OCR 页面缓存，未渲染
+
+# 工作进程内按文件路径缓存已打开的 PDF，避免每页重新解析
+_WORKER_DOCUMENT_CACHE_SIZE = 2
+_worker_state = threading.local()
+
+
+def _open_worker_document(path: str) -> "fitz.Document":
+    documents = getattr(_worker_state, "documents", None)
+    if documents is None:
+        documents = _worker_state.documents = OrderedDict()
+    document = documents.get(path)
+    if document is None:
+        document = documents[path] = fitz.open(path)
+        while len(documents) > _WORKER_DOCUMENT_CACHE_SIZE:
+            _, evicted = documents.popitem(last=False)
+            evicted.close()
+    else:
+        documents.move_to_end(path)
+    return document
+
+
+def _get_worker_processor() -> "DocumentProcessor":
+    processor = getattr(_worker_state, "processor", None)
+    if processor is None:
+        processor = _worker_state.processor = DocumentProcessor(max_workers=1, use_processes=False)
+    return processor
+
+
+def _process_pdf_page_worker(path: str, page_index: int, options_data: Dict[str, Any]) -> Dict[str, Any]:
+    """在工作进程中渲染并预处理单个 PDF 页面"""
+    options = ProcessingOptions(**options_data)
+    page = _open_worker_document(path)[page_index]
+    return _get_worker_processor()._process_pdf_page(page, page_index, options)
+
+
+def _pdf_page_count_worker(path: str) -> int:
+    return len(_open_worker_document(path))
+
+
+def _pdf_page_hashes_worker(path: str, dpi: int) -> List[Tuple[str, int, int]]:
+    """计算各页内容哈希及页面尺寸"""
+    document = _open_worker_document(path)
+    return [
+        (hash_pdf_page(document, page, dpi), int(page.rect.width), int(page.rect.height))
+        for page in document
+    ]
+
 
 class DocumentProcessor:
-    """文档处理器"""
+    """文档处理器
     
-    def __init__(self):
+    PDF 页面的渲染和预处理分发到进程池并行执行，按页序以异步迭代器产出，
+    下游可以在后续页面仍在渲染时开始处理已完成的页面。
+    """
+    
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        use_processes: bool = True,
+        page_cache: Optional[OCRPageCache] = None
+    ):
         self.supported_formats = {
             '.pdf': self._process_pdf,
             '.png': self._process_image,
@@ -73,6 +152,25 @@ class DocumentProcessor:
         }
         self.max_file_size = 100 * 1024 * 1024  # 100MB
         self.max_pages = 500
+        # PyMuPDF 不支持多线程并发，不使用进程池时只用单个线程渲染
+        self.max_workers = max(1, max_workers or os.cpu_count() or 1) if use_processes else 1
+        self.use_processes = use_processes
+        self.page_cache = page_cache
+        self._executor: Optional[Executor] = None
+        
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.use_processes:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pdf-render")
+        return self._executor
+    
+    def close(self) -> None:
+        """关闭页面渲染使用的进程池"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
         
     async def process_document(
         self,
@@ -114,15 +212,24 @@ class DocumentProcessor:
             # 计算处理时间
             processing_time = (datetime.now() - start_time).total_seconds()
             metadata.processing_time = processing_time
+            page_stats = self.get_page_stats(pages_data)
+            if self.page_cache is not None:
+                page_stats["cache"] = self.page_cache.get_stats()
             
             result = {
                 "metadata": metadata.model_dump(),
                 "pages": pages_data,
+                "page_stats": page_stats,
                 "processing_time": processing_time,
                 "status": "success"
             }
             
-            logger.info(f"文档 {filename} 处理完成，耗时 {processing_time:.2f}s")
+            logger.info(
+                f"文档 {filename} 处理完成，耗时 {processing_time:.2f}s，"
+                f"文本层 {page_stats['paths'][ProcessingPath.TEXT_LAYER]} 页，"
+                f"渲染 {page_stats['paths'][ProcessingPath.RASTER]} 页，"
+                f"缓存 {page_stats['paths'][ProcessingPath.CACHE]} 页"
+            )
             return result
             
         except Exception as e:
@@ -136,6 +243,68 @@ class DocumentProcessor:
                 "error": str(e)
             }
     
+    async def iter_pages(
+        self,
+        file_data: bytes,
+        filename: str,
+        options: ProcessingOptions = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        按页序逐页产出处理结果
+        
+        每页结果与 process_document 返回的 pages 中的元素相同。PDF 页面在
+        进程池中并行处理，同时在途的页面数受限，内存占用与总页数无关。
+        
+        Args:
+            file_data: 文件数据
+            filename: 文件名
+            options: 处理选项
+        """
+        if options is None:
+            options = ProcessingOptions()
+        
+        self._validate_file(file_data, filename)
+        file_extension = Path(filename).suffix.lower()
+        
+        if file_extension == '.pdf':
+            async for page in self._iter_pdf_pages(file_data, options):
+                yield page
+        else:
+            for page in await self.supported_formats[file_extension](file_data, options):
+                yield page
+    
+    @staticmethod
+    def get_page_stats(pages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """统计各处理路径和页面类型的页数"""
+        paths = {ProcessingPath.TEXT_LAYER: 0, ProcessingPath.RASTER: 0, ProcessingPath.CACHE: 0}
+        page_types: Dict[str, int] = {}
+        for page in pages:
+            paths[page.get("processing_path", ProcessingPath.RASTER)] += 1
+            page_type = page.get("page_type")
+            if page_type:
+                page_types[page_type] = page_types.get(page_type, 0) + 1
+        return {"total_pages": len(pages), "paths": paths, "page_types": page_types}
+    
+    @staticmethod
+    def get_page_analysis(page: Dict[str, Any]) -> Optional[PageAnalysis]:
+        """预处理后页面图像的分析上下文，供质量评估和表格提取复用
+        
+        首次调用时解码（PNG）或包装（ndarray）页面图像并存回页面数据；文本层
+        页面和缓存页面没有图像，返回 None。
+        """
+        processed = page.get("processed_image")
+        if not processed or processed.get("image_data") is None:
+            return None
+        analysis = processed.get("analysis")
+        if analysis is None:
+            analysis = processed["analysis"] = PageAnalysis.ensure(processed["image_data"])
+        return analysis
+    
+    async def store_page_result(self, page: Dict[str, Any], ocr_result: Dict[str, Any]) -> None:
+        """把渲染页面的 OCR 结果按页面哈希和识别语言写入页面缓存，下次处理相同页面时不再渲染"""
+        if self.page_cache is not None and page.get("page_hash"):
+            await self.page_cache.set(page["page_hash"], ocr_result, page["language"])
+    
     def _validate_file(self, file_data: bytes, filename: str) -> None:
         """验证文件"""
         # 检查文件大小
@@ -189,62 +358,13 @@ class DocumentProcessor:
         pages_data = []
         
         try:
-            # 使用 PyMuPDF 处理 PDF - 使用上下文管理器确保资源释放
-            with fitz.open(stream=file_data, filetype="pdf") as doc:
-                if len(doc) > self.max_pages:
-                    raise ValueError(f"PDF 页数超过限制 ({self.max_pages} 页)")
-                
-                for page_num in range(len(doc)):
-                    page = doc[page_num]
-                    
-                    # 获取页面信息
-                    rect = page.rect
-                    page_info = PageInfo(
-                        page_number=page_num + 1,
-                        width=int(rect.width),
-                        height=int(rect.height),
-                        dpi=options.dpi
-                    )
-                    
-                    # 转换为图像 - 确保pixmap资源释放
-                    mat = fitz.Matrix(options.dpi / 72, options.dpi / 72)
-                    pix = page.get_pixmap(matrix=mat)
-                    try:
-                        img_data = pix.tobytes("png")
-                    finally:
-                        pix = None  # 释放pixmap内存
-                    
-                    # 处理图像
-                    processed_image = await self._process_page_image(
-                        img_data, page_info, options
-                    )
-                    
-                    # 提取文本区域（如果需要）
-                    if options.extract_text_regions:
-                        text_regions = self._extract_text_regions(page)
-                        page_info.text_regions = text_regions
-                        page_info.has_text = len(text_regions) > 0
-                    
-                    # 提取图像区域（如果需要）
-                    if options.extract_image_regions:
-                        image_regions = self._extract_image_regions(page)
-                        page_info.image_regions = image_regions
-                        page_info.has_images = len(image_regions) > 0
-                    
-                    # 提取表格区域（如果需要）
-                    if options.extract_table_regions:
-                        table_regions = self._extract_table_regions(page)
-                        page_info.table_regions = table_regions
-                        page_info.has_tables = len(table_regions) > 0
-                    
-                    pages_data.append({
-                        "page_info": page_info.dict(),
-                        "processed_image": processed_image
-                    })
+            async for page in self._iter_pdf_pages(file_data, options):
+                pages_data.append(page)
             
         except Exception as e:
             logger.error(f"PDF 处理失败: {str(e)}")
             # 尝试使用 pdf2image 作为备选方案
+            pages_data = []
             try:
                 images = convert_from_bytes(
                     file_data, 
@@ -254,10 +374,6 @@ class DocumentProcessor:
                 )
                 
                 for i, image in enumerate(images):
-                    img_bytes = io.BytesIO()
-                    image.save(img_bytes, format='PNG')
-                    img_data = img_bytes.getvalue()
-                    
                     page_info = PageInfo(
                         page_number=i + 1,
                         width=image.width,
@@ -265,12 +381,12 @@ class DocumentProcessor:
                         dpi=options.dpi
                     )
                     
-                    processed_image = await self._process_page_image(
-                        img_data, page_info, options
+                    processed_image = await asyncio.to_thread(
+                        self._process_page_pixels, image, options
                     )
                     
                     pages_data.append({
-                        "page_info": page_info.dict(),
+                        "page_info": page_info.model_dump(),
                         "processed_image": processed_image
                     })
                     
@@ -280,27 +396,220 @@ class DocumentProcessor:
         
         return pages_data
     
+    async def _iter_pdf_pages(
+        self,
+        file_data: bytes,
+        options: ProcessingOptions
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """并行渲染 PDF 页面，按页序产出
+        
+        PDF 先写入临时文件，工作进程按路径打开并缓存文档，每个任务只传递
+        页码。同时提交的页面数不超过工作进程数的两倍。配置页面缓存时，先按
+        内容哈希和识别语言批量查询缓存，命中的页面直接产出缓存的 OCR 结果。
+        """
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        options_data = options.model_dump()
+        
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as temp_file:
+            temp_file.write(file_data)
+            path = temp_file.name
+        
+        pending: deque = deque()
+        try:
+            page_hashes: List[Tuple[str, int, int]] = []
+            cached: Dict[str, Dict[str, Any]] = {}
+            if self.page_cache is not None:
+                page_hashes = await loop.run_in_executor(
+                    executor, _pdf_page_hashes_worker, path, options.dpi
+                )
+                page_count = len(page_hashes)
+            else:
+                page_count = await loop.run_in_executor(executor, _pdf_page_count_worker, path)
+            if page_count > self.max_pages:
+                raise ValueError(f"PDF 页数超过限制 ({self.max_pages} 页)")
+            if page_hashes:
+                cached = await self.page_cache.get_many(
+                    [page_hash for page_hash, _, _ in page_hashes], options.language
+                )
+            
+            window = self.max_workers * 2
+            next_page = 0
+            while next_page < page_count or pending:
+                while next_page < page_count and len(pending) < window:
+                    page_hash = page_hashes[next_page][0] if page_hashes else None
+                    if page_hash in cached:
+                        pending.append(self._cached_page(
+                            page_hashes[next_page], next_page, cached[page_hash], options
+                        ))
+                    else:
+                        pending.append((page_hash, loop.run_in_executor(
+                            executor, _process_pdf_page_worker, path, next_page, options_data
+                        )))
+                    next_page += 1
+                
+                item = pending.popleft()
+                if isinstance(item, dict):
+                    yield item
+                    continue
+                page_hash, future = item
+                page = await future
+                if page_hash is not None:
+                    page["page_hash"] = page_hash
+                    page["language"] = options.language
+                yield page
+        finally:
+            for item in pending:
+                if isinstance(item, tuple):
+                    item[1].cancel()
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+    
+    @staticmethod
+    def _cached_page(
+        page_hash_info: Tuple[str, int, int],
+        page_index: int,
+        ocr_result: Dict[str, Any],
+        options: ProcessingOptions
+    ) -> Dict[str, Any]:
+        page_hash, width, height = page_hash_info
+        page_info = PageInfo(page_number=page_index + 1, width=width, height=height, dpi=options.dpi)
+        return {
+            "page_info": page_info.model_dump(),
+            "processed_image": None,
+            "processing_path": ProcessingPath.CACHE,
+            "page_hash": page_hash,
+            "language": options.language,
+            "ocr_result": ocr_result
+        }
+    
+    def _classify_page(
+        self,
+        page,
+        blocks: List[Dict[str, Any]],
+        options: ProcessingOptions
+    ) -> Tuple[str, Dict[str, Any]]:
+        """根据文本层覆盖率、字形数和图像面积占比判断页面类型"""
+        rect = page.rect
+        page_area = max(rect.width * rect.height, 1.0)
+        
+        glyph_count = 0
+        text_area = 0.0
+        for block in blocks:
+            if "lines" not in block:
+                continue
+            block_glyphs = sum(
+                len(span["text"].strip()) for line in block["lines"] for span in line["spans"]
+            )
+            if block_glyphs:
+                glyph_count += block_glyphs
+                x0, y0, x1, y1 = block["bbox"]
+                text_area += max(0.0, x1 - x0) * max(0.0, y1 - y0)
+        
+        image_area = 0.0
+        for image in page.get_image_info():
+            bbox = fitz.Rect(image["bbox"]) & rect
+            if not bbox.is_empty:
+                image_area += bbox.width * bbox.height
+        
+        stats = {
+            "glyph_count": glyph_count,
+            "text_coverage": round(min(1.0, text_area / page_area), 4),
+            "image_area_ratio": round(min(1.0, image_area / page_area), 4)
+        }
+        
+        if glyph_count < options.min_text_glyphs:
+            page_type = PageType.SCANNED
+        elif stats["image_area_ratio"] > options.max_image_area_ratio:
+            page_type = PageType.MIXED
+        else:
+            page_type = PageType.DIGITAL
+        return page_type, stats
+    
+    def _process_pdf_page(self, page, page_index: int, options: ProcessingOptions) -> Dict[str, Any]:
+        """处理单个 PDF 页面（在工作进程中执行）
+        
+        原生数字页面直接读取文本层及其坐标，扫描页和混合页渲染后预处理。
+        """
+        rect = page.rect
+        page_info = PageInfo(
+            page_number=page_index + 1,
+            width=int(rect.width),
+            height=int(rect.height),
+            dpi=options.dpi
+        )
+        
+        blocks = page.get_text("dict")["blocks"]
+        page_type, classification = self._classify_page(page, blocks, options)
+        use_text_layer = options.use_text_layer and page_type == PageType.DIGITAL
+        
+        processed_image = None
+        if not use_text_layer:
+            # 像素缓冲区直接交给 NumPy，不经过 PNG 编码再解码
+            mat = fitz.Matrix(options.dpi / 72, options.dpi / 72)
+            pix = page.get_pixmap(matrix=mat, colorspace=fitz.csRGB, alpha=False)
+            try:
+                pixels = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
+                processed_image = self._process_page_pixels(pixels, options)
+            finally:
+                pix = None  # 释放pixmap内存
+        
+        # 提取文本区域（文本层路径总是需要）
+        if options.extract_text_regions or use_text_layer:
+            text_regions = self._extract_text_regions(page, blocks)
+            page_info.text_regions = text_regions
+            page_info.has_text = len(text_regions) > 0
+        
+        # 提取图像区域（如果需要）
+        if options.extract_image_regions:
+            image_regions = self._extract_image_regions(page)
+            page_info.image_regions = image_regions
+            page_info.has_images = len(image_regions) > 0
+        
+        # 提取表格区域（如果需要）
+        if options.extract_table_regions:
+            table_regions = self._extract_table_regions(page)
+            page_info.table_regions = table_regions
+            page_info.has_tables = len(table_regions) > 0
+        
+        page_data = {
+            "page_info": page_info.model_dump(),
+            "processed_image": processed_image,
+            "page_type": page_type,
+            "processing_path": ProcessingPath.TEXT_LAYER if use_text_layer else ProcessingPath.RASTER,
+            "classification": classification
+        }
+        if use_text_layer:
+            page_data["text_layer"] = {
+                "text": "\n".join(region["text"] for region in page_info.text_regions),
+                "regions": page_info.text_regions
+            }
+        return page_data
+    
     async def _process_image(self, file_data: bytes, options: ProcessingOptions) -> List[Dict[str, Any]]:
         """处理图像文件"""
         try:
-            # 打开图像
-            image = Image.open(io.BytesIO(file_data))
+            # 解码一次，预处理复用同一份像素
+            analysis = PageAnalysis.from_bytes(file_data)
+            width, height = analysis.size
             
             # 获取页面信息
             page_info = PageInfo(
                 page_number=1,
-                width=image.width,
-                height=image.height,
-                dpi=getattr(image, 'info', {}).get('dpi', (options.dpi, options.dpi))[0]
+                width=width,
+                height=height,
+                dpi=analysis.info.get('dpi', (options.dpi, options.dpi))[0]
             )
             
             # 处理图像
             processed_image = await self._process_page_image(
-                file_data, page_info, options
+                analysis, page_info, options
             )
             
             return [{
-                "page_info": page_info.dict(),
+                "page_info": page_info.model_dump(),
                 "processed_image": processed_image
             }]
             
@@ -310,69 +619,78 @@ class DocumentProcessor:
     
     async def _process_page_image(
         self, 
-        img_data: bytes, 
+        img_data: Union[bytes, PageAnalysis], 
         page_info: PageInfo, 
         options: ProcessingOptions
     ) -> Dict[str, Any]:
         """处理页面图像"""
         try:
-            # 打开图像
-            image = Image.open(io.BytesIO(img_data))
-            
-            # 转换为 RGB（如果需要）
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
-            
-            # 自动旋转（如果需要）
-            if options.auto_rotate:
-                image = self._auto_rotate_image(image)
-            
-            # 图像增强（如果需要）
-            if options.enhance_image:
-                image = self._enhance_image(image)
-            
-            # 去噪（如果需要）
-            if options.remove_noise:
-                image = self._remove_noise(image)
-            
-            # 转换为字节
-            output_buffer = io.BytesIO()
-            image.save(output_buffer, format='PNG', optimize=True)
-            processed_data = output_buffer.getvalue()
-            
-            # 计算图像质量指标
-            quality_metrics = self._calculate_image_quality(image)
-            
-            return {
-                "image_data": processed_data,
-                "quality_metrics": quality_metrics,
-                "processing_applied": {
-                    "auto_rotate": options.auto_rotate,
-                    "enhance_image": options.enhance_image,
-                    "remove_noise": options.remove_noise
-                }
-            }
+            return self._process_page_pixels(PageAnalysis.ensure(img_data), options)
             
         except Exception as e:
             logger.error(f"页面图像处理失败: {str(e)}")
             return {
-                "image_data": img_data,
+                "image_data": img_data if isinstance(img_data, bytes) else None,
                 "quality_metrics": {},
                 "processing_applied": {},
                 "error": str(e)
             }
     
-    def _auto_rotate_image(self, image: Image.Image) -> Image.Image:
+    def _process_page_pixels(
+        self,
+        pixels: Union[np.ndarray, Image.Image, PageAnalysis],
+        options: ProcessingOptions
+    ) -> Dict[str, Any]:
+        """预处理页面像素并编码输出"""
+        analysis = PageAnalysis.ensure(pixels)
+        image = analysis.image
+        
+        # 自动旋转（如果需要）
+        if options.auto_rotate:
+            image = self._auto_rotate_image(image, analysis)
+        
+        # 图像增强（如果需要）
+        if options.enhance_image:
+            image = self._enhance_image(image)
+        
+        # 去噪（如果需要）
+        if options.remove_noise:
+            image = self._remove_noise(image)
+        
+        # 未做任何修改时沿用原图的分析上下文
+        if image is not analysis.image:
+            analysis = PageAnalysis(image, info=analysis.info)
+        
+        if options.image_format == "array":
+            processed_data = analysis.rgb
+        else:
+            # 快速压缩；optimize 会多次尝试编码，大页面耗时数倍
+            output_buffer = io.BytesIO()
+            image.save(output_buffer, format='PNG', compress_level=1)
+            processed_data = output_buffer.getvalue()
+        
+        # 计算图像质量指标
+        quality_metrics = self._calculate_image_quality(analysis)
+        
+        result = {
+            "image_data": processed_data,
+            "quality_metrics": quality_metrics,
+            "processing_applied": {
+                "auto_rotate": options.auto_rotate,
+                "enhance_image": options.enhance_image,
+                "remove_noise": options.remove_noise
+            }
+        }
+        if options.image_format == "array":
+            # 与 image_data 共用像素，跨进程传递时不重复序列化
+            result["analysis"] = analysis
+        return result
+    
+    def _auto_rotate_image(self, image: Image.Image, analysis: Optional[PageAnalysis] = None) -> Image.Image:
         """自动旋转图像"""
         try:
-            # 转换为 OpenCV 格式
-            cv_image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-            
-            # 检测文本方向
-            gray = cv2.cvtColor(cv_image, cv2.COLOR_BGR2GRAY)
-            
-            # 使用 Hough 线变换检测主要线条方向
-            edges = cv2.Canny(gray, 50, 150, apertureSize=3)
+            # 使用 Hough 线变换在原图边缘上检测主要线条方向
+            edges = (analysis or PageAnalysis(image)).edges
             lines = cv2.HoughLines(edges, 1, np.pi/180, threshold=100)
             
             if lines is not None:
@@ -444,15 +762,15 @@ class DocumentProcessor:
             logger.warning(f"去噪失败: {str(e)}")
             return image
     
-    def _calculate_image_quality(self, image: Image.Image) -> Dict[str, float]:
+    def _calculate_image_quality(self, image: Union[Image.Image, PageAnalysis]) -> Dict[str, float]:
         """计算图像质量指标"""
         try:
             # 转换为灰度图
-            gray = image.convert('L')
-            gray_array = np.array(gray)
+            analysis = PageAnalysis.ensure(image)
+            gray_array = analysis.gray
             
             # 计算清晰度（拉普拉斯方差）
-            laplacian_var = cv2.Laplacian(gray_array, cv2.CV_64F).var()
+            laplacian_var = analysis.laplacian_variance
             sharpness = min(1.0, laplacian_var / 1000)  # 归一化到 0-1
             
             # 计算对比度
@@ -476,11 +794,12 @@ class DocumentProcessor:
             logger.warning(f"质量计算失败: {str(e)}")
             return {}
     
-    def _extract_text_regions(self, page) -> List[Dict[str, Any]]:
+    def _extract_text_regions(self, page, blocks: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
         """提取文本区域"""
         try:
             text_regions = []
-            blocks = page.get_text("dict")["blocks"]
+            if blocks is None:
+                blocks = page.get_text("dict")["blocks"]
             
             for block in blocks:
                 if "lines" in block:
@@ -591,8 +910,9 @@ class DocumentProcessor:
 _document_processor = None
 
 def get_document_processor() -> DocumentProcessor:
-    """获取文档处理器实例"""
+    """获取文档处理器实例，与 OCR 服务共用页面缓存配置"""
     global _document_processor
     if _document_processor is None:
-        _document_processor = DocumentProcessor()
+        from backend.core.ocr.ocr_service import _create_page_cache
+        _document_processor = DocumentProcessor(page_cache=_create_page_cache())
     return _document_processor
\ No newline at end of file
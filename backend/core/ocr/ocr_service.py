@@ -1,8 +1,12 @@
-from typing import Dict, List, Optional, Any, Union
+from typing import BinaryIO, Callable, Dict, List, Optional, Any, Tuple, Union
+from collections import OrderedDict
 from datetime import datetime
 import asyncio
 import aiohttp
+import hashlib
 import json
+import time
+import uuid
 from pathlib import Path
 import io
 from PIL import Image
@@ -10,7 +14,12 @@ import base64
 
 from backend.utils.logger import get_logger
 from backend.config.settings import get_settings
+from backend.core.ocr.document_processor import (
+    DocumentProcessor, ProcessingOptions, get_document_processor
+)
+from backend.core.ocr.page_cache import OCRPageCache, hash_page_bytes
 from backend.models.base import BaseModel
+from backend.utils.performance import LatencyHistogram
 from pydantic import BaseModel as PydanticBaseModel, Field
 
 logger = get_logger(__name__)
@@ -55,18 +64,143 @@ class QualityMetrics(PydanticBaseModel):
     issues: List[str] = []
     recommendations: List[str] = []
 
+# 文件数据：base64 字符串、字节、本地文件路径或文件对象
+FileSource = Union[str, bytes, Path, BinaryIO]
+
+# 流式上传与哈希计算的分块大小
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# 等待完成后写入缓存的异步任务最多保留的数量和时长，超出的最旧任务不再写入缓存
+PENDING_RESULTS_MAX = 1000
+PENDING_RESULTS_TTL = 3600.0
+
+
+class _UploadStream(io.RawIOBase):
+    """multipart 请求体中的文件流
+    
+    读取时可同时计算内容哈希；aiohttp 写完请求体后会关闭文件对象，这里把关闭
+    转给 on_close，调用方传入的文件对象因此可以在重试时重新定位后再次发送。
+    """
+    
+    def __init__(self, raw, on_close: Optional[Callable[[], None]] = None, digest=None):
+        super().__init__()
+        self._raw = raw
+        self._on_close = on_close
+        self.digest = digest
+    
+    def readable(self) -> bool:
+        return True
+    
+    def read(self, size: int = -1) -> bytes:
+        chunk = self._raw.read(size if size is not None and size >= 0 else UPLOAD_CHUNK_SIZE)
+        if self.digest is not None and chunk:
+            self.digest.update(chunk)
+        return chunk
+    
+    def readinto(self, buffer) -> int:
+        chunk = self.read(len(buffer))
+        buffer[:len(chunk)] = chunk
+        return len(chunk)
+    
+    def close(self) -> None:
+        if not self.closed and self._on_close is not None:
+            self._on_close()
+        super().close()
+
+
+def _hash_stream(stream: BinaryIO) -> str:
+    """从当前位置分块计算文件对象的内容哈希，完成后回到原位置"""
+    start = stream.tell()
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: stream.read(UPLOAD_CHUNK_SIZE), b""):
+        digest.update(chunk)
+    stream.seek(start)
+    return digest.hexdigest()
+
+
+def _hash_file(path: Path) -> str:
+    with open(path, "rb") as stream:
+        return _hash_stream(stream)
+
+
 class OCRService:
-    """OCR 服务类"""
+    """OCR 服务类
+    
+    配置页面缓存时，调用 OCR 服务前先按文件内容哈希查询缓存；OCR 服务使用相同
+    的键写入结果，重复上传的文件不再识别。
     
-    def __init__(self):
+    所有请求共用一个保持连接的会话；文件路径、文件对象和 MinIO 对象以流的形式
+    写入 multipart 请求体，不在内存中拼出整个文件。
+    """
+    
+    def __init__(
+        self,
+        page_cache: Optional[OCRPageCache] = None,
+        minio_client=None,
+        max_connections: Optional[int] = None,
+        batch_concurrency: Optional[int] = None
+    ):
         self.ocr_service_url = getattr(settings, 'OCR_SERVICE_URL', 'http://localhost:8002')
         self.timeout = 300  # 5分钟超时
         self.max_retries = 3
         self.supported_formats = [".pdf", ".png", ".jpg", ".jpeg", ".tiff", ".bmp", ".webp"]
+        self.page_cache = page_cache
+        self.minio_client = minio_client
+        self.max_connections = max_connections or getattr(settings, 'ocr_max_connections', 20)
+        self.batch_concurrency = batch_concurrency or getattr(settings, 'ocr_batch_concurrency', 4)
+        # 处理中的任务 -> (目标缓存, 内容哈希, 识别语言, 登记时间)，任务完成时写入缓存
+        self._pending_results: "OrderedDict[str, Tuple[OCRPageCache, str, str, float]]" = OrderedDict()
+        self._session: Optional[aiohttp.ClientSession] = None
+        # 接口 -> 客户端侧请求耗时（含重试）
+        self.latency: Dict[str, LatencyHistogram] = {}
+        self.request_errors: Dict[str, int] = {}
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        """获取共享会话，首次使用或关闭后重新创建"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                limit_per_host=self.max_connections,
+                keepalive_timeout=60
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        return self._session
+    
+    async def close(self) -> None:
+        """关闭共享会话"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+    
+    def _record_latency(self, endpoint: str, started: float, success: bool) -> None:
+        histogram = self.latency.get(endpoint)
+        if histogram is None:
+            histogram = self.latency[endpoint] = LatencyHistogram()
+        histogram.observe(time.perf_counter() - started)
+        if not success:
+            self.request_errors[endpoint] = self.request_errors.get(endpoint, 0) + 1
+    
+    def get_client_metrics(self) -> Dict[str, Any]:
+        """客户端侧请求耗时直方图与连接池状态"""
+        connector = self._session.connector if self._session is not None and not self._session.closed else None
+        return {
+            "latency": {endpoint: histogram.to_dict() for endpoint, histogram in self.latency.items()},
+            "errors": dict(self.request_errors),
+            "pool": {
+                "max_connections": self.max_connections,
+                "batch_concurrency": self.batch_concurrency,
+                "open": connector is not None,
+                "idle_connections": sum(len(conns) for conns in connector._conns.values()) if connector else 0,
+                "acquired_connections": len(connector._acquired) if connector else 0
+            }
+        }
         
     async def process_document(
         self, 
-        file_data: Union[str, bytes], 
+        file_data: FileSource, 
         filename: str,
         language: str = "zh-cn",
         extract_tables: bool = True,
@@ -77,7 +211,7 @@ class OCRService:
         处理单个文档的 OCR
         
         Args:
-            file_data: 文件数据（base64 字符串或字节数据）
+            file_data: 文件数据（base64 字符串、字节数据、本地文件路径或可定位的文件对象）
             filename: 文件名
             language: 识别语言
             extract_tables: 是否提取表格
@@ -96,13 +230,20 @@ class OCRService:
             # 准备请求数据
             if isinstance(file_data, str):
                 # 如果是 base64 字符串，解码为字节
-                file_bytes = base64.b64decode(file_data)
-            else:
-                file_bytes = file_data
+                file_data = base64.b64decode(file_data)
+            
+            # 按内容哈希查询缓存
+            page_hash = None
+            if self.page_cache is not None:
+                page_hash = await self._hash_source(file_data)
+                cached = await self.page_cache.get(page_hash, language)
+                if cached is not None and (cached.get("tables") is not None or not extract_tables):
+                    logger.info(f"文档 {filename} 命中 OCR 缓存")
+                    return self._cached_response(page_hash, cached)
             
             # 调用 OCR 服务
             result = await self._call_ocr_service(
-                file_bytes=file_bytes,
+                file_bytes=self._source_opener(file_data),
                 filename=filename,
                 language=language,
                 extract_tables=extract_tables,
@@ -110,6 +251,8 @@ class OCRService:
                 output_format=output_format
             )
             
+            await self._remember_result(page_hash, language, result)
+            
             logger.info(f"文档 {filename} OCR 处理完成")
             return result
             
@@ -117,6 +260,225 @@ class OCRService:
             logger.error(f"OCR 处理失败: {str(e)}")
             raise
     
+    async def process_object(
+        self,
+        bucket_name: str,
+        object_name: str,
+        filename: Optional[str] = None,
+        language: str = "zh-cn",
+        extract_tables: bool = True,
+        quality_check: bool = True,
+        output_format: str = "json"
+    ) -> OCRResponse:
+        """
+        处理 MinIO 中的文档，对象内容直接转发给 OCR 服务
+        
+        对象内容只读取一次：上传时同时计算内容哈希，结果按该哈希写入缓存；
+        上传前不查询缓存（OCR 服务按相同的哈希命中自身的结果缓存）。
+        
+        Args:
+            bucket_name: 存储桶名称
+            object_name: 对象名称
+            filename: 文件名，默认取对象名称
+            
+        Returns:
+            OCR 处理结果
+        """
+        if self.minio_client is None or self.minio_client.client is None:
+            raise RuntimeError("MinIO 客户端未初始化")
+        
+        filename = filename or Path(object_name).name
+        file_extension = Path(filename).suffix.lower()
+        if file_extension not in self.supported_formats:
+            raise ValueError(f"不支持的文件格式: {file_extension}")
+        
+        streams: List[_UploadStream] = []
+        
+        async def open_object() -> _UploadStream:
+            response = await asyncio.to_thread(self.minio_client.client.get_object, bucket_name, object_name)
+            
+            def release() -> None:
+                response.close()
+                response.release_conn()
+            
+            stream = _UploadStream(response, on_close=release, digest=hashlib.sha256())
+            streams.append(stream)
+            return stream
+        
+        try:
+            result = await self._call_ocr_service(
+                file_bytes=open_object,
+                filename=filename,
+                language=language,
+                extract_tables=extract_tables,
+                quality_check=quality_check,
+                output_format=output_format
+            )
+        except Exception as e:
+            logger.error(f"OCR 处理失败: {bucket_name}/{object_name}: {str(e)}")
+            raise
+        finally:
+            for stream in streams:
+                stream.close()
+        
+        if self.page_cache is not None:
+            await self._remember_result(streams[-1].digest.hexdigest(), language, result)
+        logger.info(f"对象 {bucket_name}/{object_name} OCR 处理完成")
+        return result
+    
+    async def _hash_source(self, file_data: Union[bytes, Path, BinaryIO]) -> str:
+        if isinstance(file_data, (bytes, bytearray)):
+            return hash_page_bytes(file_data)
+        if isinstance(file_data, (str, Path)):
+            return await asyncio.to_thread(_hash_file, Path(file_data))
+        return await asyncio.to_thread(_hash_stream, file_data)
+    
+    @staticmethod
+    def _source_opener(file_data: Union[bytes, Path, BinaryIO]) -> Union[bytes, Callable]:
+        """字节数据直接发送；文件路径每次请求重新打开，文件对象每次请求回到起始位置"""
+        if isinstance(file_data, (bytes, bytearray)):
+            return file_data
+        
+        if isinstance(file_data, Path):
+            async def open_path() -> _UploadStream:
+                stream = await asyncio.to_thread(open, file_data, "rb")
+                return _UploadStream(stream, on_close=stream.close)
+            return open_path
+        
+        start = file_data.tell()
+        
+        async def rewind() -> _UploadStream:
+            file_data.seek(start)
+            return _UploadStream(file_data)
+        return rewind
+    
+    async def _remember_result(self, page_hash: Optional[str], language: str, result: OCRResponse) -> None:
+        """识别完成的结果写入缓存，处理中的任务在完成时写入"""
+        if page_hash is None or self.page_cache is None:
+            return
+        if result.status == "completed":
+            await self.page_cache.set(page_hash, self._cache_entry(result), language)
+        elif result.status == "processing":
+            self._add_pending_result(result.task_id, self.page_cache, page_hash, language)
+    
+    def _add_pending_result(self, task_id: str, cache: OCRPageCache, page_hash: str, language: str) -> None:
+        """登记处理中的任务，淘汰超过 PENDING_RESULTS_TTL 或 PENDING_RESULTS_MAX 的最旧任务"""
+        now = time.monotonic()
+        self._pending_results[task_id] = (cache, page_hash, language, now)
+        cutoff = now - PENDING_RESULTS_TTL
+        while self._pending_results:
+            registered_at = next(iter(self._pending_results.values()))[3]
+            if len(self._pending_results) <= PENDING_RESULTS_MAX and registered_at >= cutoff:
+                break
+            self._pending_results.popitem(last=False)
+    
+    async def process_pages(
+        self,
+        file_data: bytes,
+        filename: str,
+        language: str = "zh-cn",
+        extract_tables: bool = True,
+        processor: Optional[DocumentProcessor] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        逐页识别文档
+        
+        页面由文档处理器按页序产出：命中页面缓存的页面直接使用缓存结果，文本层
+        页面使用文本层，其余页面的预处理图像逐页提交给 OCR 服务。同时持有的页面
+        不超过 batch_concurrency 个，前面的页面识别完成后才拉取下一页。页面识别完成后
+        （同步返回或在 get_task_status 中完成）经 store_page_result 写回页面缓存，
+        相同页面再次出现时不再渲染。
+        
+        Args:
+            file_data: 文件数据
+            filename: 文件名
+            language: 识别语言
+            extract_tables: 是否提取表格
+            processor: 文档处理器，默认使用全局实例
+            
+        Returns:
+            按页序排列的每页结果，包含页码、处理路径和 OCR 响应或错误信息
+        """
+        processor = processor or get_document_processor()
+        options = ProcessingOptions(language=language)
+        stem = Path(filename).stem
+        window = asyncio.Semaphore(self.batch_concurrency)
+        
+        async def recognize(page: Dict[str, Any]) -> OCRResponse:
+            page_number = page["page_info"]["page_number"]
+            if page.get("ocr_result") is not None:
+                return self._cached_response(page["page_hash"], page["ocr_result"])
+            if page.get("text_layer") is not None:
+                return OCRResponse(
+                    task_id=f"text-layer-{page_number}",
+                    status="completed",
+                    text_content=page["text_layer"]["text"],
+                    processing_time=0.0,
+                    metadata={"text_layer": True}
+                )
+            
+            image_data = (page.get("processed_image") or {}).get("image_data")
+            if image_data is None:
+                raise ValueError(f"第 {page_number} 页预处理失败")
+            result = await self._call_ocr_service(
+                file_bytes=image_data,
+                filename=f"{stem}_page{page_number}.png",
+                language=language,
+                extract_tables=extract_tables,
+                quality_check=False,
+                output_format="json"
+            )
+            await self._remember_page_result(processor, page, result)
+            return result
+        
+        # 渲染后续页面的同时提交已完成的页面，先占用窗口再拉取页面
+        pages = []
+        tasks = []
+        page_iter = processor.iter_pages(file_data, filename, options)
+        try:
+            while True:
+                await window.acquire()
+                try:
+                    page = await page_iter.__anext__()
+                except StopAsyncIteration:
+                    window.release()
+                    break
+                pages.append((page["page_info"]["page_number"], page.get("processing_path")))
+                task = asyncio.create_task(recognize(page))
+                task.add_done_callback(lambda _: window.release())
+                tasks.append(task)
+                # 页面只由识别任务持有，等待窗口时不再多留一页
+                del page
+        finally:
+            await page_iter.aclose()
+        responses = await asyncio.gather(*tasks, return_exceptions=True)
+        
+        results = []
+        for (page_number, processing_path), response in zip(pages, responses):
+            entry = {"page_number": page_number, "processing_path": processing_path}
+            if isinstance(response, Exception):
+                entry["error"] = str(response)
+            else:
+                entry.update(response.model_dump())
+            results.append(entry)
+        
+        logger.info(f"文档 {filename} 逐页识别完成，共 {len(results)} 页")
+        return results
+    
+    async def _remember_page_result(
+        self,
+        processor: DocumentProcessor,
+        page: Dict[str, Any],
+        result: OCRResponse
+    ) -> None:
+        """页面识别结果写回文档处理器的页面缓存，处理中的任务在完成时写回"""
+        if not page.get("page_hash") or processor.page_cache is None:
+            return
+        if result.status == "completed":
+            await processor.store_page_result(page, self._cache_entry(result))
+        elif result.status == "processing":
+            self._add_pending_result(result.task_id, processor.page_cache, page["page_hash"], page["language"])
+    
     async def process_batch(
         self,
         files: List[Dict[str, Any]],
@@ -128,54 +490,67 @@ class OCRService:
         """
         批量处理文档
         
+        文件逐个提交给 OCR 服务，同时进行的提交不超过 batch_concurrency 个；
+        每个文件单独查询缓存和重试，base64 数据在提交时才解码。
+        
         Args:
-            files: 文件列表，每个文件包含 file_data 和 filename
+            files: 文件列表，每个文件包含 file_data（同 process_document）和 filename
             language: 识别语言
             extract_tables: 是否提取表格
             quality_check: 是否进行质量检查
             output_format: 输出格式
             
         Returns:
-            批量处理结果
+            批量处理结果，results 与提交的文件一一对应
         """
         try:
             # 验证文件数量
             if len(files) > 50:
                 raise ValueError("批量处理文件数量不能超过50个")
             
-            # 准备文件数据
-            file_data_list = []
+            # 验证文件格式
+            accepted = []
             for file_info in files:
-                file_data = file_info["file_data"]
-                filename = file_info["filename"]
-                
-                # 验证文件格式
-                file_extension = Path(filename).suffix.lower()
-                if file_extension not in self.supported_formats:
-                    logger.warning(f"跳过不支持的文件格式: {filename}")
+                if Path(file_info["filename"]).suffix.lower() not in self.supported_formats:
+                    logger.warning(f"跳过不支持的文件格式: {file_info['filename']}")
                     continue
-                
-                if isinstance(file_data, str):
-                    file_bytes = base64.b64decode(file_data)
-                else:
-                    file_bytes = file_data
-                
-                file_data_list.append({
-                    "file_bytes": file_bytes,
-                    "filename": filename
-                })
+                accepted.append(file_info)
             
-            # 调用批量 OCR 服务
-            result = await self._call_batch_ocr_service(
-                files=file_data_list,
-                language=language,
-                extract_tables=extract_tables,
-                quality_check=quality_check,
-                output_format=output_format
-            )
+            semaphore = asyncio.Semaphore(self.batch_concurrency)
             
-            logger.info(f"批量处理 {len(files)} 个文件完成")
-            return result
+            async def submit(file_info: Dict[str, Any]) -> Union[OCRResponse, Exception]:
+                async with semaphore:
+                    try:
+                        return await self.process_document(
+                            file_info["file_data"],
+                            file_info["filename"],
+                            language=language,
+                            extract_tables=extract_tables,
+                            quality_check=quality_check,
+                            output_format=output_format
+                        )
+                    except Exception as e:
+                        return e
+            
+            responses = await asyncio.gather(*(submit(file_info) for file_info in accepted))
+            
+            results = []
+            failed = []
+            for file_info, response in zip(accepted, responses):
+                if isinstance(response, Exception):
+                    failed.append({"filename": file_info["filename"], "error": str(response)})
+                else:
+                    results.append({"filename": file_info["filename"], **response.model_dump()})
+            
+            logger.info(f"批量处理 {len(files)} 个文件完成，失败 {len(failed)} 个")
+            return {
+                "batch_id": str(uuid.uuid4()),
+                "task_ids": [result["task_id"] for result in results],
+                "total_files": len(files),
+                "skipped_files": len(files) - len(accepted),
+                "results": results,
+                "failed": failed
+            }
             
         except Exception as e:
             logger.error(f"批量 OCR 处理失败: {str(e)}")
@@ -191,121 +566,122 @@ class OCRService:
         Returns:
             任务状态
         """
+        started = time.perf_counter()
+        success = False
         try:
-            async with aiohttp.ClientSession() as session:
-                url = f"{self.ocr_service_url}/ocr/status/{task_id}"
-                
-                async with session.get(url, timeout=self.timeout) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return OCRResponse(**data)
-                    elif response.status == 404:
-                        raise ValueError(f"任务 {task_id} 不存在")
-                    else:
-                        raise Exception(f"获取任务状态失败: {response.status}")
-                        
+            url = f"{self.ocr_service_url}/ocr/status/{task_id}"
+            
+            async with self._get_session().get(url) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    result = OCRResponse(**data)
+                    if result.status != "processing":
+                        pending = self._pending_results.pop(task_id, None)
+                        if pending is not None and result.status == "completed":
+                            cache, page_hash, language, _ = pending
+                            await cache.set(page_hash, self._cache_entry(result), language)
+                    success = True
+                    return result
+                elif response.status == 404:
+                    raise ValueError(f"任务 {task_id} 不存在")
+                else:
+                    raise Exception(f"获取任务状态失败: {response.status}")
+                    
         except Exception as e:
             logger.error(f"获取任务状态失败: {str(e)}")
             raise
+        finally:
+            self._record_latency("status", started, success)
+    
+    def _cached_response(self, page_hash: str, cached: Dict[str, Any]) -> OCRResponse:
+        return OCRResponse(
+            task_id=f"cache-{page_hash[:16]}",
+            status="completed",
+            text_content=cached.get("text_content"),
+            tables=cached.get("tables"),
+            confidence_score=cached.get("confidence_score"),
+            processing_time=0.0,
+            metadata={
+                "cache_hit": True,
+                "page_hash": page_hash,
+                "text_lines": cached.get("lines") or [],
+                "model_version": cached.get("model_version")
+            }
+        )
+    
+    @staticmethod
+    def _cache_entry(result: OCRResponse) -> Dict[str, Any]:
+        return {
+            "text_content": result.text_content,
+            "confidence_score": result.confidence_score,
+            "lines": (result.metadata or {}).get("text_lines", []),
+            "tables": result.tables
+        }
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """OCR 缓存命中统计"""
+        if self.page_cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.page_cache.get_stats()}
     
     async def _call_ocr_service(
         self,
-        file_bytes: bytes,
+        file_bytes: Union[bytes, Callable],
         filename: str,
         language: str,
         extract_tables: bool,
         quality_check: bool,
         output_format: str
     ) -> OCRResponse:
-        """调用 OCR 服务"""
-        for attempt in range(self.max_retries):
-            try:
-                async with aiohttp.ClientSession() as session:
-                    # 准备表单数据
-                    data = aiohttp.FormData()
-                    data.add_field('file', file_bytes, filename=filename)
-                    data.add_field('language', language)
-                    data.add_field('extract_tables', str(extract_tables).lower())
-                    data.add_field('quality_check', str(quality_check).lower())
-                    data.add_field('output_format', output_format)
-                    
-                    url = f"{self.ocr_service_url}/ocr/process"
+        """调用 OCR 服务
+        
+        file_bytes 为字节数据，或每次尝试返回一个新文件流的异步函数。
+        """
+        started = time.perf_counter()
+        success = False
+        try:
+            for attempt in range(self.max_retries):
+                try:
+                    body = file_bytes if isinstance(file_bytes, (bytes, bytearray)) else await file_bytes()
                     
-                    async with session.post(
-                        url, 
-                        data=data, 
-                        timeout=self.timeout
-                    ) as response:
-                        if response.status == 200:
-                            result_data = await response.json()
-                            return OCRResponse(**result_data)
-                        else:
-                            error_text = await response.text()
-                            raise Exception(f"OCR 服务错误: {response.status} - {error_text}")
-                            
-            except asyncio.TimeoutError:
-                logger.warning(f"OCR 服务超时，重试 {attempt + 1}/{self.max_retries}")
-                if attempt == self.max_retries - 1:
-                    raise Exception("OCR 服务超时")
-                await asyncio.sleep(2 ** attempt)  # 指数退避
-                
-            except Exception as e:
-                if attempt == self.max_retries - 1:
-                    raise
-                logger.warning(f"OCR 服务调用失败，重试 {attempt + 1}/{self.max_retries}: {str(e)}")
-                await asyncio.sleep(2 ** attempt)
-    
-    async def _call_batch_ocr_service(
-        self,
-        files: List[Dict[str, Any]],
-        language: str,
-        extract_tables: bool,
-        quality_check: bool,
-        output_format: str
-    ) -> Dict[str, Any]:
-        """调用批量 OCR 服务"""
-        for attempt in range(self.max_retries):
-            try:
-                async with aiohttp.ClientSession() as session:
-                    # 准备表单数据
+                    # 准备表单数据，文件流在发送时分块读取
                     data = aiohttp.FormData()
+                    data.add_field('file', body, filename=filename)
+                    params = {
+                        'language': language,
+                        'extract_tables': str(extract_tables).lower(),
+                        'quality_check': str(quality_check).lower(),
+                        'output_format': output_format
+                    }
                     
-                    for file_info in files:
-                        data.add_field(
-                            'files', 
-                            file_info["file_bytes"], 
-                            filename=file_info["filename"]
-                        )
-                    
-                    data.add_field('language', language)
-                    data.add_field('extract_tables', str(extract_tables).lower())
-                    data.add_field('quality_check', str(quality_check).lower())
-                    data.add_field('output_format', output_format)
+                    url = f"{self.ocr_service_url}/ocr/process"
                     
-                    url = f"{self.ocr_service_url}/ocr/batch"
+                    try:
+                        async with self._get_session().post(url, data=data, params=params) as response:
+                            if response.status == 200:
+                                result_data = await response.json()
+                                success = True
+                                return OCRResponse(**result_data)
+                            else:
+                                error_text = await response.text()
+                                raise Exception(f"OCR 服务错误: {response.status} - {error_text}")
+                    finally:
+                        if not isinstance(body, (bytes, bytearray)):
+                            body.close()
+                                
+                except asyncio.TimeoutError:
+                    logger.warning(f"OCR 服务超时，重试 {attempt + 1}/{self.max_retries}")
+                    if attempt == self.max_retries - 1:
+                        raise Exception("OCR 服务超时")
+                    await asyncio.sleep(2 ** attempt)  # 指数退避
                     
-                    async with session.post(
-                        url, 
-                        data=data, 
-                        timeout=self.timeout
-                    ) as response:
-                        if response.status == 200:
-                            return await response.json()
-                        else:
-                            error_text = await response.text()
-                            raise Exception(f"批量 OCR 服务错误: {response.status} - {error_text}")
-                            
-            except asyncio.TimeoutError:
-                logger.warning(f"批量 OCR 服务超时，重试 {attempt + 1}/{self.max_retries}")
-                if attempt == self.max_retries - 1:
-                    raise Exception("批量 OCR 服务超时")
-                await asyncio.sleep(2 ** attempt)
-                
-            except Exception as e:
-                if attempt == self.max_retries - 1:
-                    raise
-                logger.warning(f"批量 OCR 服务调用失败，重试 {attempt + 1}/{self.max_retries}: {str(e)}")
-                await asyncio.sleep(2 ** attempt)
+                except Exception as e:
+                    if attempt == self.max_retries - 1:
+                        raise
+                    logger.warning(f"OCR 服务调用失败，重试 {attempt + 1}/{self.max_retries}: {str(e)}")
+                    await asyncio.sleep(2 ** attempt)
+        finally:
+            self._record_latency("process", started, success)
     
     def validate_image(self, file_data: bytes) -> Dict[str, Any]:
         """
@@ -367,22 +743,21 @@ class OCRService:
             服务健康状态
         """
         try:
-            async with aiohttp.ClientSession() as session:
-                url = f"{self.ocr_service_url}/health"
-                
-                async with session.get(url, timeout=10) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return {
-                            "healthy": True,
-                            "service_info": data
-                        }
-                    else:
-                        return {
-                            "healthy": False,
-                            "error": f"服务返回状态码: {response.status}"
-                        }
-                        
+            url = f"{self.ocr_service_url}/health"
+            
+            async with self._get_session().get(url, timeout=aiohttp.ClientTimeout(total=10)) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    return {
+                        "healthy": True,
+                        "service_info": data
+                    }
+                else:
+                    return {
+                        "healthy": False,
+                        "error": f"服务返回状态码: {response.status}"
+                    }
+                    
         except Exception as e:
             return {
                 "healthy": False,
@@ -394,28 +769,58 @@ class OCRService:
         获取 OCR 服务指标
         
         Returns:
-            服务指标
+            服务指标，client 为客户端侧请求耗时与连接池状态
         """
+        metrics: Dict[str, Any] = {}
         try:
-            async with aiohttp.ClientSession() as session:
-                url = f"{self.ocr_service_url}/metrics"
-                
-                async with session.get(url, timeout=10) as response:
-                    if response.status == 200:
-                        return await response.json()
-                    else:
-                        raise Exception(f"获取指标失败: {response.status}")
-                        
+            url = f"{self.ocr_service_url}/metrics"
+            
+            async with self._get_session().get(url, timeout=aiohttp.ClientTimeout(total=10)) as response:
+                if response.status == 200:
+                    metrics = await response.json()
+                else:
+                    raise Exception(f"获取指标失败: {response.status}")
+                    
         except Exception as e:
             logger.error(f"获取 OCR 服务指标失败: {str(e)}")
-            return {}
+        
+        metrics["client"] = self.get_client_metrics()
+        return metrics
 
 # 全局 OCR 服务实例
 _ocr_service = None
 
+def _get_minio_client():
+    try:
+        from backend.main import get_minio_client
+        return get_minio_client()
+    except Exception:
+        return None
+
+def _create_page_cache() -> Optional[OCRPageCache]:
+    """使用应用的 Redis/MinIO 连接创建页面缓存，连接未初始化时不启用缓存"""
+    try:
+        from backend.main import get_redis_client, get_minio_client
+        return OCRPageCache(
+            redis_client=get_redis_client(),
+            minio_client=get_minio_client(),
+            model_version=getattr(settings, 'ocr_model_version', '1.0.0'),
+            ttl=getattr(settings, 'ocr_cache_ttl', 30 * 24 * 3600)
+        )
+    except Exception as e:
+        logger.warning(f"OCR 页面缓存未启用: {str(e)}")
+        return None
+
 def get_ocr_service() -> OCRService:
     """获取 OCR 服务实例"""
     global _ocr_service
     if _ocr_service is None:
-        _ocr_service = OCRService()
-    return _ocr_service
\ No newline at end of file
+        _ocr_service = OCRService(page_cache=_create_page_cache(), minio_client=_get_minio_client())
+    return _ocr_service
+
+async def close_ocr_service() -> None:
+    """关闭 OCR 服务实例的连接池"""
+    global _ocr_service
+    if _ocr_service is not None:
+        await _ocr_service.close()
+        _ocr_service = None
\ No newline at end of file
@@ -0,0 +1,160 @@
+"""页面分析上下文
+
+同一页面在预处理（DocumentProcessor）、质量评估（QualityAssurance）和表格提取
+（TableExtractor）中共用一个 PageAnalysis：图像只解码一次，灰度、二值化、边缘和
+缩略图等派生平面在首次使用时计算并缓存。噪声、倾斜等整页统计在缩略图上计算。
+"""
+
+import io
+from functools import cached_property
+from typing import Any, Dict, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+from PIL import Image
+
+# 缩略图最长边
+PREVIEW_MAX_SIDE = 1024
+
+# 派生平面，序列化时丢弃
+_DERIVED_PLANES = (
+    "image", "bgr", "gray", "binary", "edges", "preview_gray", "preview_edges",
+    "noise_level", "skew_angle", "laplacian_variance"
+)
+
+
+def estimate_skew(edges: np.ndarray, threshold: int = 100, max_lines: int = 20) -> float:
+    """根据边缘图中最长的直线估计倾斜角度（度）
+
+    HoughLines 返回直线法向的角度，水平线为 90 度、竖直线为 0/180 度；这里换算
+    为直线相对水平/竖直方向的偏转。逆时针倾斜为正值，与 PIL 的 rotate 方向一致，
+    纠正时旋转 -angle。
+    """
+    lines = cv2.HoughLines(edges, 1, np.pi / 180, threshold=threshold)
+    if lines is None:
+        return 0.0
+
+    angles = []
+    for theta in lines[:max_lines, 0, 1]:
+        angle = float(np.degrees(theta))
+        if angle < 45:
+            angles.append(-angle)
+        elif angle > 135:
+            angles.append(180 - angle)
+        else:
+            angles.append(90 - angle)
+    return float(np.median(angles))
+
+
+class PageAnalysis:
+    """页面分析上下文
+
+    Args:
+        image: RGB（或灰度）像素数组，或 PIL 图像
+        info: 图像元信息（如 dpi）
+    """
+
+    def __init__(
+        self,
+        image: Union[np.ndarray, Image.Image],
+        info: Optional[Dict[str, Any]] = None,
+        preview_max_side: int = PREVIEW_MAX_SIDE
+    ):
+        if isinstance(image, Image.Image):
+            info = info if info is not None else dict(image.info)
+            if image.mode != "RGB":
+                image = image.convert("RGB")
+            self.__dict__["image"] = image
+            pixels = np.asarray(image)
+        else:
+            pixels = image
+            if pixels.ndim == 2:
+                pixels = cv2.cvtColor(pixels, cv2.COLOR_GRAY2RGB)
+            elif pixels.shape[2] == 4:
+                pixels = cv2.cvtColor(pixels, cv2.COLOR_RGBA2RGB)
+        self.rgb = pixels
+        self.info = info or {}
+        self.preview_max_side = preview_max_side
+
+    @classmethod
+    def from_bytes(cls, data: bytes, **kwargs) -> "PageAnalysis":
+        """解码图像文件"""
+        image = Image.open(io.BytesIO(data))
+        return cls(image, info=dict(image.info), **kwargs)
+
+    @classmethod
+    def ensure(cls, source: Union["PageAnalysis", bytes, np.ndarray, Image.Image]) -> "PageAnalysis":
+        """已有上下文直接返回，否则从字节、像素数组或 PIL 图像创建"""
+        if isinstance(source, PageAnalysis):
+            return source
+        if isinstance(source, (bytes, bytearray)):
+            return cls.from_bytes(source)
+        return cls(source)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # 跨进程传递时只保留原始像素，派生平面在接收方按需重新计算
+        return {key: value for key, value in self.__dict__.items() if key not in _DERIVED_PLANES}
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        """(宽, 高)"""
+        return self.rgb.shape[1], self.rgb.shape[0]
+
+    @property
+    def dpi(self) -> Any:
+        dpi = self.info.get("dpi", (72, 72))
+        return dpi[0] if isinstance(dpi, tuple) else dpi
+
+    @cached_property
+    def image(self) -> Image.Image:
+        return Image.fromarray(self.rgb)
+
+    @cached_property
+    def bgr(self) -> np.ndarray:
+        return cv2.cvtColor(self.rgb, cv2.COLOR_RGB2BGR)
+
+    @cached_property
+    def gray(self) -> np.ndarray:
+        return cv2.cvtColor(self.rgb, cv2.COLOR_RGB2GRAY)
+
+    @cached_property
+    def binary(self) -> np.ndarray:
+        """Otsu 反相二值图，前景（文字、线条）为 255"""
+        _, binary = cv2.threshold(self.gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+        return binary
+
+    @cached_property
+    def edges(self) -> np.ndarray:
+        return cv2.Canny(self.gray, 50, 150, apertureSize=3)
+
+    @cached_property
+    def preview_gray(self) -> np.ndarray:
+        """最长边不超过 preview_max_side 的灰度缩略图"""
+        height, width = self.gray.shape
+        scale = self.preview_max_side / max(height, width)
+        if scale >= 1:
+            return self.gray
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        return cv2.resize(self.gray, size, interpolation=cv2.INTER_AREA)
+
+    @cached_property
+    def preview_edges(self) -> np.ndarray:
+        if self.preview_gray is self.gray:
+            return self.edges
+        return cv2.Canny(self.preview_gray, 50, 150, apertureSize=3)
+
+    @cached_property
+    def laplacian_variance(self) -> float:
+        """清晰度（拉普拉斯方差），与分辨率相关，在原图上计算"""
+        return float(cv2.Laplacian(self.gray, cv2.CV_64F).var())
+
+    @cached_property
+    def noise_level(self) -> float:
+        """缩略图与其高斯模糊结果的平均差异，归一化到 0-1"""
+        blurred = cv2.GaussianBlur(self.preview_gray, (5, 5), 0)
+        return float(cv2.absdiff(self.preview_gray, blurred).mean() / 255.0)
+
+    @cached_property
+    def skew_angle(self) -> float:
+        """在缩略图边缘上估计的倾斜角度（度）"""
+        return estimate_skew(self.preview_edges)
@@ -0,0 +1,167 @@
+"""OCR 页面结果缓存
+
+按页面内容哈希、OCR 模型版本和识别语言缓存识别结果（文本、文本行坐标、表格）。
+后端与 OCR 服务使用相同的键格式，任一方写入的结果另一方都能命中：
+
+    ocr:page:{model_version}:{language}:{page_hash}
+
+Redis 保存热数据并设置过期时间；配置 MinIO 时同时写入持久层，Redis 未命中时
+读取 MinIO 并回填 Redis。
+"""
+
+import asyncio
+import hashlib
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from backend.config.constants import CacheKeyPrefix
+from backend.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+PAGE_KEY_TEMPLATE = CacheKeyPrefix.OCR.value + "page:{model_version}:{language}:{page_hash}"
+
+DEFAULT_LANGUAGE = "zh-cn"
+
+# 缓存结果中保留的字段
+RESULT_FIELDS = ("text_content", "confidence_score", "lines", "tables")
+
+
+def hash_page_bytes(data: bytes) -> str:
+    """图像页面（或整个上传文件）的内容哈希"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_pdf_page(document, page, dpi: int) -> str:
+    """不渲染页面，根据内容流、引用的图像/表单对象和字体计算页面哈希
+
+    哈希只依赖页面内容本身，同一页面出现在不同版本的文档中（对象编号不同）
+    时得到相同的结果。
+    """
+    digest = hashlib.sha256()
+    digest.update(f"{tuple(page.rect)}|{page.rotation}|{dpi}".encode())
+    digest.update(page.read_contents())
+    for image in page.get_images(full=True):
+        digest.update(document.xref_stream_raw(image[0]) or b"")
+    for xobject in page.get_xobjects():
+        digest.update(document.xref_stream_raw(xobject[0]) or b"")
+    for font in page.get_fonts(full=True):
+        digest.update(f"{font[3]}|{font[4]}".encode())
+    return digest.hexdigest()
+
+
+class OCRPageCache:
+    """OCR 页面结果缓存"""
+
+    def __init__(
+        self,
+        redis_client=None,
+        minio_client=None,
+        model_version: str = "1.0.0",
+        ttl: int = 30 * 24 * 3600,
+        bucket_type: str = "ocr_cache"
+    ):
+        self.redis_client = redis_client
+        self.minio_client = minio_client
+        self.model_version = model_version
+        self.ttl = ttl
+        self.bucket_type = bucket_type
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, page_hash: str, language: str = DEFAULT_LANGUAGE) -> str:
+        return PAGE_KEY_TEMPLATE.format(model_version=self.model_version, language=language, page_hash=page_hash)
+
+    def _object_name(self, page_hash: str, language: str) -> str:
+        return f"{self.model_version}/{language}/{page_hash}.json"
+
+    @property
+    def _redis(self):
+        return getattr(self.redis_client, "client", None)
+
+    async def get(self, page_hash: str, language: str = DEFAULT_LANGUAGE) -> Optional[Dict[str, Any]]:
+        """读取单页缓存结果"""
+        return (await self.get_many([page_hash], language)).get(page_hash)
+
+    async def get_many(
+        self, page_hashes: List[str], language: str = DEFAULT_LANGUAGE
+    ) -> Dict[str, Dict[str, Any]]:
+        """批量读取同一语言的缓存，返回命中的 页面哈希 -> 结果"""
+        unique_hashes = list(dict.fromkeys(page_hashes))
+        found: Dict[str, Dict[str, Any]] = {}
+        if not unique_hashes:
+            return found
+
+        if self._redis is not None:
+            try:
+                values = await self._redis.mget([self.key(page_hash, language) for page_hash in unique_hashes])
+                for page_hash, value in zip(unique_hashes, values):
+                    if value is not None:
+                        found[page_hash] = json.loads(value)
+            except Exception as e:
+                logger.warning(f"读取 OCR 页面缓存失败: {str(e)}")
+
+        missing = [page_hash for page_hash in unique_hashes if page_hash not in found]
+        if missing and self.minio_client is not None:
+            stored = await asyncio.gather(*(self._load_object(page_hash, language) for page_hash in missing))
+            for page_hash, result in zip(missing, stored):
+                if result is not None:
+                    found[page_hash] = result
+                    await self._set_redis(page_hash, language, result)
+
+        for page_hash in page_hashes:
+            if page_hash in found:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return found
+
+    async def set(self, page_hash: str, result: Dict[str, Any], language: str = DEFAULT_LANGUAGE) -> None:
+        """写入单页识别结果"""
+        entry = {field: result.get(field) for field in RESULT_FIELDS}
+        entry["model_version"] = self.model_version
+        entry["language"] = language
+        entry["cached_at"] = datetime.now().isoformat()
+
+        await self._set_redis(page_hash, language, entry)
+        if self.minio_client is not None:
+            try:
+                await self.minio_client.upload_data(
+                    self.minio_client.get_bucket_name(self.bucket_type),
+                    self._object_name(page_hash, language),
+                    json.dumps(entry, ensure_ascii=False).encode("utf-8"),
+                    content_type="application/json"
+                )
+            except Exception as e:
+                logger.warning(f"写入 OCR 页面缓存对象失败: {str(e)}")
+
+    async def _set_redis(self, page_hash: str, language: str, entry: Dict[str, Any]) -> None:
+        if self._redis is None:
+            return
+        try:
+            await self._redis.set(self.key(page_hash, language), json.dumps(entry, ensure_ascii=False), ex=self.ttl)
+        except Exception as e:
+            logger.warning(f"写入 OCR 页面缓存失败: {str(e)}")
+
+    async def _load_object(self, page_hash: str, language: str) -> Optional[Dict[str, Any]]:
+        bucket = self.minio_client.get_bucket_name(self.bucket_type)
+        object_name = self._object_name(page_hash, language)
+        try:
+            if not await self.minio_client.object_exists(bucket, object_name):
+                return None
+            data = await self.minio_client.download_data(bucket, object_name)
+            return json.loads(data) if data else None
+        except Exception as e:
+            logger.warning(f"读取 OCR 页面缓存对象失败: {str(e)}")
+            return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """缓存命中统计"""
+        lookups = self.hits + self.misses
+        return {
+            "model_version": self.model_version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
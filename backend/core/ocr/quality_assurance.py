@@ -1,13 +1,12 @@
 from typing import Dict, List, Optional, Any, Tuple, Union
 import numpy as np
 import cv2
-from PIL import Image, ImageStat
-import io
 import re
 from datetime import datetime
 from dataclasses import dataclass
 from enum import Enum
 
+from backend.core.ocr.page_analysis import PageAnalysis
 from backend.utils.logger import get_logger
 from pydantic import BaseModel, Field
 
@@ -123,7 +122,7 @@ class QualityAssurance:
     
     async def assess_quality(
         self,
-        image_data: bytes,
+        image_data: Union[bytes, PageAnalysis],
         filename: str,
         ocr_results: Dict[str, Any] = None,
         document_id: str = None
@@ -132,7 +131,7 @@ class QualityAssurance:
         评估文档质量
         
         Args:
-            image_data: 图像数据
+            image_data: 图像数据，或与预处理、表格提取共用的页面分析上下文
             filename: 文件名
             ocr_results: OCR结果（可选）
             document_id: 文档ID
@@ -141,9 +140,8 @@ class QualityAssurance:
             质量报告
         """
         try:
-            # 加载图像
-            image = Image.open(io.BytesIO(image_data))
-            cv_image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
+            # 加载图像（已解码的页面直接复用）
+            analysis = PageAnalysis.ensure(image_data)
             
             # 初始化质量指标
             metrics = QualityMetrics(
@@ -166,9 +164,7 @@ class QualityAssurance:
             
             # 图像质量分析
             if self.config.enable_image_analysis:
-                image_metrics, image_issues = await self._analyze_image_quality(
-                    image, cv_image
-                )
+                image_metrics, image_issues = await self._analyze_image_quality(analysis)
                 metrics.resolution_score = image_metrics["resolution_score"]
                 metrics.contrast_score = image_metrics["contrast_score"]
                 metrics.sharpness_score = image_metrics["sharpness_score"]
@@ -179,7 +175,7 @@ class QualityAssurance:
             # 文本质量分析
             if self.config.enable_text_analysis and ocr_results:
                 text_metrics, text_issues = await self._analyze_text_quality(
-                    ocr_results, cv_image
+                    ocr_results, analysis
                 )
                 metrics.text_clarity_score = text_metrics["text_clarity_score"]
                 metrics.text_completeness_score = text_metrics["text_completeness_score"]
@@ -189,7 +185,7 @@ class QualityAssurance:
             # 结构质量分析
             if self.config.enable_structure_analysis:
                 structure_metrics, structure_issues = await self._analyze_structure_quality(
-                    cv_image, ocr_results
+                    analysis, ocr_results
                 )
                 metrics.layout_score = structure_metrics["layout_score"]
                 metrics.table_structure_score = structure_metrics["table_structure_score"]
@@ -238,8 +234,7 @@ class QualityAssurance:
     
     async def _analyze_image_quality(
         self, 
-        image: Image.Image, 
-        cv_image: np.ndarray
+        analysis: PageAnalysis
     ) -> Tuple[Dict[str, float], List[QualityIssue]]:
         """分析图像质量"""
         metrics = {}
@@ -247,10 +242,8 @@ class QualityAssurance:
         
         try:
             # 分辨率分析
-            width, height = image.size
-            dpi = getattr(image, 'info', {}).get('dpi', (72, 72))
-            if isinstance(dpi, tuple):
-                dpi = dpi[0]
+            width, height = analysis.size
+            dpi = analysis.dpi
             
             resolution_score = min(1.0, dpi / 300.0)
             metrics["resolution_score"] = resolution_score
@@ -265,7 +258,7 @@ class QualityAssurance:
                 ))
             
             # 对比度分析
-            gray = cv2.cvtColor(cv_image, cv2.COLOR_BGR2GRAY)
+            gray = analysis.gray
             contrast = gray.std() / 255.0
             contrast_score = min(1.0, contrast / 0.5)
             metrics["contrast_score"] = contrast_score
@@ -280,7 +273,7 @@ class QualityAssurance:
                 ))
             
             # 清晰度分析（拉普拉斯方差）
-            laplacian_var = cv2.Laplacian(gray, cv2.CV_64F).var()
+            laplacian_var = analysis.laplacian_variance
             sharpness_score = min(1.0, laplacian_var / 1000.0)
             metrics["sharpness_score"] = sharpness_score
             
@@ -293,8 +286,8 @@ class QualityAssurance:
                     recommendation="使用更稳定的扫描设备或提高图像质量"
                 ))
             
-            # 噪声分析
-            noise_level = self._calculate_noise_level(gray)
+            # 噪声分析（缩略图）
+            noise_level = analysis.noise_level
             noise_score = max(0.0, 1.0 - noise_level)
             metrics["noise_score"] = noise_score
             
@@ -333,8 +326,8 @@ class QualityAssurance:
                     recommendation="降低亮度或减少过度曝光"
                 ))
             
-            # 倾斜检测
-            skew_angle = self._detect_skew(gray)
+            # 倾斜检测（缩略图）
+            skew_angle = analysis.skew_angle
             if abs(skew_angle) > 2.0:  # 倾斜角度超过2度
                 issues.append(QualityIssue(
                     issue_type=IssueType.SKEW.value,
@@ -357,7 +350,7 @@ class QualityAssurance:
     async def _analyze_text_quality(
         self, 
         ocr_results: Dict[str, Any], 
-        cv_image: np.ndarray
+        analysis: PageAnalysis
     ) -> Tuple[Dict[str, float], List[QualityIssue]]:
         """分析文本质量"""
         metrics = {
@@ -400,7 +393,7 @@ class QualityAssurance:
                 ))
             
             # 文本清晰度分析
-            clarity_score = self._analyze_text_clarity(text_content, cv_image)
+            clarity_score = self._analyze_text_clarity(text_content, analysis)
             metrics["text_clarity_score"] = clarity_score
             
             # 特殊字符检测
@@ -431,7 +424,7 @@ class QualityAssurance:
     
     async def _analyze_structure_quality(
         self, 
-        cv_image: np.ndarray, 
+        analysis: PageAnalysis, 
         ocr_results: Dict[str, Any] = None
     ) -> Tuple[Dict[str, float], List[QualityIssue]]:
         """分析结构质量"""
@@ -443,7 +436,7 @@ class QualityAssurance:
         
         try:
             # 布局分析
-            layout_score = self._analyze_layout_quality(cv_image)
+            layout_score = self._analyze_layout_quality(analysis)
             metrics["layout_score"] = layout_score
             
             # 表格结构分析
@@ -458,45 +451,6 @@ class QualityAssurance:
         
         return metrics, issues
     
-    def _calculate_noise_level(self, gray_image: np.ndarray) -> float:
-        """计算噪声水平"""
-        try:
-            # 使用高斯模糊后的差异来估算噪声
-            blurred = cv2.GaussianBlur(gray_image, (5, 5), 0)
-            noise = cv2.absdiff(gray_image, blurred)
-            noise_level = noise.mean() / 255.0
-            return noise_level
-        except:
-            return 0.1  # 默认噪声水平
-    
-    def _detect_skew(self, gray_image: np.ndarray) -> float:
-        """检测文档倾斜角度"""
-        try:
-            # 边缘检测
-            edges = cv2.Canny(gray_image, 50, 150, apertureSize=3)
-            
-            # 霍夫线变换
-            lines = cv2.HoughLines(edges, 1, np.pi/180, threshold=100)
-            
-            if lines is None:
-                return 0.0
-            
-            # 计算主要角度
-            angles = []
-            for rho, theta in lines[:20]:  # 只考虑前20条线
-                angle = theta * 180 / np.pi
-                if angle > 90:
-                    angle = angle - 180
-                angles.append(angle)
-            
-            if angles:
-                return np.median(angles)
-            
-            return 0.0
-            
-        except:
-            return 0.0
-    
     def _analyze_text_completeness(self, text: str) -> float:
         """分析文本完整性"""
         if not text:
@@ -514,7 +468,7 @@ class QualityAssurance:
         score = sum(features.values()) / len(features)
         return score
     
-    def _analyze_text_clarity(self, text: str, image: np.ndarray) -> float:
+    def _analyze_text_clarity(self, text: str, analysis: PageAnalysis) -> float:
         """分析文本清晰度"""
         if not text:
             return 0.0
@@ -560,13 +514,11 @@ class QualityAssurance:
         
         return False
     
-    def _analyze_layout_quality(self, image: np.ndarray) -> float:
+    def _analyze_layout_quality(self, analysis: PageAnalysis) -> float:
         """分析布局质量"""
         try:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            
             # 检测文本区域的分布
-            _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+            binary = analysis.binary
             
             # 查找连通组件
             num_labels, labels, stats, centroids = cv2.connectedComponentsWithStats(binary)
@@ -587,7 +539,7 @@ class QualityAssurance:
             # 检查区域分布的均匀性
             if len(centroids) > 1:
                 y_coords = centroids[1:, 1]  # 排除背景
-                y_distribution = np.std(y_coords) / image.shape[0]
+                y_distribution = np.std(y_coords) / analysis.size[1]
                 distribution_score = min(1, y_distribution * 2)
             else:
                 distribution_score = 0
@@ -1,12 +1,12 @@
 from typing import Dict, List, Optional, Any, Tuple, Union
 import numpy as np
 import cv2
-from PIL import Image
-import io
 import json
+import time
 from dataclasses import dataclass
 from enum import Enum
 
+from backend.core.ocr.page_analysis import PageAnalysis
 from backend.utils.logger import get_logger
 from pydantic import BaseModel, Field
 
@@ -97,6 +97,7 @@ class TableStructure(BaseModel):
     header_rows: int = 0
     detection_method: str = TableDetectionMethod.HYBRID.value
     quality_score: float = Field(ge=0, le=1, default=0.0)
+    metadata: Dict[str, Any] = Field(default_factory=dict)  # 处理耗时等
 
 class TableExtractionConfig(BaseModel):
     """表格提取配置"""
@@ -120,33 +121,32 @@ class TableExtractor:
         
     async def extract_tables(
         self, 
-        image_data: bytes, 
+        image_data: Union[bytes, PageAnalysis], 
         text_regions: List[Dict[str, Any]] = None
     ) -> List[TableStructure]:
         """
         从图像中提取表格
         
         Args:
-            image_data: 图像数据
+            image_data: 图像数据，或与预处理、质量评估共用的页面分析上下文
             text_regions: 文本区域信息
             
         Returns:
             提取的表格列表
         """
         try:
-            # 加载图像
-            image = Image.open(io.BytesIO(image_data))
-            cv_image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
+            # 加载图像（已解码的页面直接复用）
+            analysis = PageAnalysis.ensure(image_data)
             
             # 根据配置选择检测方法
             if self.config.detection_method == TableDetectionMethod.HOUGH_LINES.value:
-                tables = self._detect_tables_hough_lines(cv_image)
+                tables = self._detect_tables_hough_lines(analysis)
             elif self.config.detection_method == TableDetectionMethod.CONTOUR_DETECTION.value:
-                tables = self._detect_tables_contours(cv_image)
+                tables = self._detect_tables_contours(analysis)
             elif self.config.detection_method == TableDetectionMethod.MORPHOLOGICAL.value:
-                tables = self._detect_tables_morphological(cv_image)
+                tables = self._detect_tables_morphological(analysis)
             else:  # HYBRID
-                tables = self._detect_tables_hybrid(cv_image)
+                tables = self._detect_tables_hybrid(analysis)
             
             # 过滤和验证表格
             valid_tables = self._filter_tables(tables)
@@ -155,7 +155,7 @@ class TableExtractor:
             table_structures = []
             for table_bbox in valid_tables:
                 structure = await self._extract_table_structure(
-                    cv_image, table_bbox, text_regions
+                    analysis, table_bbox, text_regions
                 )
                 if structure:
                     table_structures.append(structure)
@@ -167,17 +167,12 @@ class TableExtractor:
             logger.error(f"表格提取失败: {str(e)}")
             return []
     
-    def _detect_tables_hough_lines(self, image: np.ndarray) -> List[BoundingBox]:
+    def _detect_tables_hough_lines(self, analysis: PageAnalysis) -> List[BoundingBox]:
         """使用霍夫线变换检测表格"""
         try:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            
-            # 边缘检测
-            edges = cv2.Canny(gray, 50, 150, apertureSize=3)
-            
             # 霍夫线变换
             lines = cv2.HoughLinesP(
-                edges, 1, np.pi/180, threshold=100, 
+                analysis.edges, 1, np.pi/180, threshold=100, 
                 minLineLength=50, maxLineGap=10
             )
             
@@ -201,7 +196,7 @@ class TableExtractor:
             
             # 查找表格区域
             tables = self._find_table_regions_from_lines(
-                horizontal_lines, vertical_lines, image.shape
+                horizontal_lines, vertical_lines, analysis.rgb.shape
             )
             
             return tables
@@ -210,17 +205,12 @@ class TableExtractor:
             logger.error(f"霍夫线表格检测失败: {str(e)}")
             return []
     
-    def _detect_tables_contours(self, image: np.ndarray) -> List[BoundingBox]:
+    def _detect_tables_contours(self, analysis: PageAnalysis) -> List[BoundingBox]:
         """使用轮廓检测表格"""
         try:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            
-            # 二值化
-            _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
-            
             # 形态学操作
             kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
-            binary = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel)
+            binary = cv2.morphologyEx(analysis.binary, cv2.MORPH_CLOSE, kernel)
             
             # 查找轮廓
             contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
@@ -246,13 +236,10 @@ class TableExtractor:
             logger.error(f"轮廓表格检测失败: {str(e)}")
             return []
     
-    def _detect_tables_morphological(self, image: np.ndarray) -> List[BoundingBox]:
+    def _detect_tables_morphological(self, analysis: PageAnalysis) -> List[BoundingBox]:
         """使用形态学操作检测表格"""
         try:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            
-            # 二值化
-            _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+            binary = analysis.binary
             
             # 检测水平线
             horizontal_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (40, 1))
@@ -287,13 +274,13 @@ class TableExtractor:
             logger.error(f"形态学表格检测失败: {str(e)}")
             return []
     
-    def _detect_tables_hybrid(self, image: np.ndarray) -> List[BoundingBox]:
-        """混合方法检测表格"""
+    def _detect_tables_hybrid(self, analysis: PageAnalysis) -> List[BoundingBox]:
+        """混合方法检测表格（各方法共用同一份灰度、二值和边缘图）"""
         try:
             # 使用多种方法检测
-            hough_tables = self._detect_tables_hough_lines(image)
-            contour_tables = self._detect_tables_contours(image)
-            morph_tables = self._detect_tables_morphological(image)
+            hough_tables = self._detect_tables_hough_lines(analysis)
+            contour_tables = self._detect_tables_contours(analysis)
+            morph_tables = self._detect_tables_morphological(analysis)
             
             # 合并结果
             all_tables = hough_tables + contour_tables + morph_tables
@@ -422,14 +409,17 @@ class TableExtractor:
     
     async def _extract_table_structure(
         self, 
-        image: np.ndarray, 
+        image: Union[PageAnalysis, np.ndarray], 
         table_bbox: BoundingBox, 
         text_regions: List[Dict[str, Any]] = None
     ) -> Optional[TableStructure]:
         """提取表格结构"""
         try:
-            # 裁剪表格区域
-            table_image = image[
+            start_time = time.perf_counter()
+            analysis = PageAnalysis.ensure(image)
+            
+            # 裁剪表格区域的灰度图
+            table_image = analysis.gray[
                 table_bbox.y:table_bbox.y2,
                 table_bbox.x:table_bbox.x2
             ]
@@ -445,11 +435,14 @@ class TableExtractor:
             
             if rows < self.config.min_rows or columns < self.config.min_columns:
                 return None
+            grid_time = time.perf_counter()
             
             # 提取单元格
+            timings: Dict[str, float] = {}
             cells = self._extract_cells(
-                table_image, table_bbox, grid_lines, rows, columns, text_regions
+                table_image, table_bbox, grid_lines, rows, columns, text_regions, timings
             )
+            cells_time = time.perf_counter()
             
             # 检测表头
             has_header = False
@@ -475,7 +468,16 @@ class TableExtractor:
                 has_header=has_header,
                 header_rows=header_rows,
                 detection_method=self.config.detection_method,
-                quality_score=quality_score
+                quality_score=quality_score,
+                metadata={
+                    "text_regions": len(text_regions or []),
+                    "timing_ms": {
+                        "grid_detection": round((grid_time - start_time) * 1000, 3),
+                        "text_assignment": round(timings.get("text_assignment", 0.0) * 1000, 3),
+                        "cell_extraction": round((cells_time - grid_time) * 1000, 3),
+                        "total": round((time.perf_counter() - start_time) * 1000, 3)
+                    }
+                }
             )
             
             return structure
@@ -487,7 +489,7 @@ class TableExtractor:
     def _detect_grid_lines(self, table_image: np.ndarray) -> Dict[str, List[int]]:
         """检测网格线"""
         try:
-            gray = cv2.cvtColor(table_image, cv2.COLOR_BGR2GRAY)
+            gray = table_image if table_image.ndim == 2 else cv2.cvtColor(table_image, cv2.COLOR_BGR2GRAY)
             
             # 检测水平线
             horizontal_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (25, 1))
@@ -556,13 +558,20 @@ class TableExtractor:
         grid_lines: Dict[str, List[int]],
         rows: int,
         columns: int,
-        text_regions: List[Dict[str, Any]] = None
+        text_regions: List[Dict[str, Any]] = None,
+        timings: Optional[Dict[str, float]] = None
     ) -> List[TableCell]:
         """提取单元格"""
         cells = []
         h_lines = grid_lines["horizontal"]
         v_lines = grid_lines["vertical"]
         
+        # 文本区域一次性分配到单元格
+        assign_start = time.perf_counter()
+        cell_texts = self._assign_text_regions(table_bbox, h_lines, v_lines, text_regions)
+        if timings is not None:
+            timings["text_assignment"] = time.perf_counter() - assign_start
+        
         for row in range(rows):
             for col in range(columns):
                 # 计算单元格边界
@@ -577,10 +586,8 @@ class TableExtractor:
                 width = x2 - x1
                 height = y2 - y1
                 
-                # 提取单元格文本
-                cell_text = self._extract_cell_text(
-                    global_x, global_y, width, height, text_regions
-                )
+                # 单元格文本
+                cell_text = cell_texts.get((row, col), "")
                 
                 # 计算置信度
                 confidence = self._calculate_cell_confidence(
@@ -612,42 +619,60 @@ class TableExtractor:
         
         return cells
     
-    def _extract_cell_text(
+    def _assign_text_regions(
         self,
-        x: int,
-        y: int,
-        width: int,
-        height: int,
+        table_bbox: BoundingBox,
+        h_lines: List[int],
+        v_lines: List[int],
         text_regions: List[Dict[str, Any]] = None
-    ) -> str:
-        """提取单元格文本"""
-        if not text_regions:
-            return ""
-        
-        cell_bbox = BoundingBox(x, y, width, height)
-        cell_text = ""
-        
-        for region in text_regions:
-            region_bbox = BoundingBox(
-                region["bbox"]["x"],
-                region["bbox"]["y"],
-                region["bbox"]["width"],
-                region["bbox"]["height"]
-            )
-            
-            # 检查文本区域是否在单元格内
-            if cell_bbox.intersects(region_bbox):
-                overlap_ratio = (
-                    cell_bbox.intersection_area(region_bbox) / region_bbox.area
-                )
-                
-                # 如果重叠比例足够大，认为文本属于该单元格
-                if overlap_ratio > 0.5:
-                    if cell_text:
-                        cell_text += " "
-                    cell_text += region["text"]
+    ) -> Dict[Tuple[int, int], str]:
+        """把文本区域分配到单元格，返回 (行, 列) -> 单元格文本
         
-        return cell_text.strip()
+        区域与单元格的重叠面积超过区域面积的一半时归属该单元格。单元格由网格线划分、互不重叠，重叠面积是行、列
+        两个方向重叠长度的乘积，且超过一半的重叠段必然包含区域中点，因此只需
+        用二分查找定位中点所在的行和列，再检查这一个单元格。
+        """
+        if not text_regions or len(h_lines) < 2 or len(v_lines) < 2:
+            return {}
+        
+        boxes = np.array(
+            [
+                (region["bbox"]["x"], region["bbox"]["y"], region["bbox"]["width"], region["bbox"]["height"])
+                for region in text_regions
+            ],
+            dtype=np.int64
+        ).reshape(-1, 4)
+        x1 = boxes[:, 0] - table_bbox.x
+        y1 = boxes[:, 1] - table_bbox.y
+        x2 = x1 + boxes[:, 2]
+        y2 = y1 + boxes[:, 3]
+        v_edges = np.asarray(v_lines, dtype=np.int64)
+        h_edges = np.asarray(h_lines, dtype=np.int64)
+        
+        # 中点所在的列和行（中点乘2避免小数）
+        columns = np.searchsorted(v_edges * 2, x1 + x2, side="right") - 1
+        rows = np.searchsorted(h_edges * 2, y1 + y2, side="right") - 1
+        inside = (columns >= 0) & (columns < len(v_edges) - 1) & (rows >= 0) & (rows < len(h_edges) - 1)
+        columns = np.clip(columns, 0, len(v_edges) - 2)
+        rows = np.clip(rows, 0, len(h_edges) - 2)
+        
+        x_overlap = np.minimum(x2, v_edges[columns + 1]) - np.maximum(x1, v_edges[columns])
+        y_overlap = np.minimum(y2, h_edges[rows + 1]) - np.maximum(y1, h_edges[rows])
+        area = boxes[:, 2] * boxes[:, 3]
+        assigned = (
+            inside & (x_overlap > 0) & (y_overlap > 0) & (area > 0)
+            & (2 * x_overlap * y_overlap > area)
+        )
+        
+        # 按文本区域的原始顺序拼接
+        cell_texts: Dict[Tuple[int, int], str] = {}
+        for index in np.flatnonzero(assigned):
+            cell = (int(rows[index]), int(columns[index]))
+            cell_text = cell_texts.get(cell, "")
+            if cell_text:
+                cell_text += " "
+            cell_texts[cell] = cell_text + text_regions[index]["text"]
+        return {cell: cell_text.strip() for cell, cell_text in cell_texts.items()}
     
     def _calculate_cell_confidence(
         self, 
@@ -665,7 +690,7 @@ class TableExtractor:
             
             # 检查单元格图像质量
             if cell_image.size > 0:
-                gray = cv2.cvtColor(cell_image, cv2.COLOR_BGR2GRAY)
+                gray = cell_image if cell_image.ndim == 2 else cv2.cvtColor(cell_image, cv2.COLOR_BGR2GRAY)
                 
                 # 计算对比度
                 contrast = gray.std()
@@ -22,6 +22,8 @@ from backend.connectors.neo4j_client import Neo4jClient
 from backend.connectors.redis_client import RedisClient
 from backend.connectors.minio_client import MinIOClient
 from backend.core.base_service import service_registry
+from backend.core.ocr.ocr_service import close_ocr_service
+from backend.core.knowledge_graph.graph_query import init_graph_query
 from backend.services.knowledge_service import KnowledgeService
 from backend.services.llm_service import LLMService
 from backend.services.vector_service import VectorService
@@ -110,6 +112,9 @@ async def init_services():
         # 初始化所有服务
         await service_registry.initialize_all()
         
+        # 创建或迁移实体全文索引，加载实体名称索引
+        await init_graph_query(connectors["neo4j"])
+        
         logger.info("所有服务初始化完成")
         
     except Exception as e:
@@ -161,6 +166,7 @@ async def lifespan(app: FastAPI):
         app_state["shutdown_time"] = time.time()
         
         await cleanup_services()
+        await close_ocr_service()
         await cleanup_connectors()
         
         logger.info("应用关闭完成")
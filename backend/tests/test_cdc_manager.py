@@ -0,0 +1,507 @@
+"""CDC管理器测试
+
+使用录制的MySQL binlog事件回放，测试binlog读取器的事件转换、位置恢复和背压。
+"""
+
+import json
+import asyncio
+from pathlib import Path
+from types import SimpleNamespace
+from datetime import datetime
+from typing import Dict, List, Any
+from unittest.mock import AsyncMock
+
+import pytest
+
+from backend.core.etl.cdc_manager import (
+    CDCManager, CDCSourceConfig, CDCSourceType, CDCEvent, CDCEventType, CDCPosition, CDCStatus,
+    CDCFilter, CDCFilterType
+)
+from backend.core.etl.binlog_reader import MySQLBinlogReader
+from backend.core.etl.cdc_dedup import DedupWindow
+from backend.core.etl.cdc_sink import CDCUpsertSink, CDCSinkTableConfig
+
+FIXTURE_PATH = Path(__file__).parent / "fixtures" / "mysql_binlog_events.json"
+
+
+class _Packet:
+    def __init__(self, log_pos: int):
+        self.log_pos = log_pos
+
+
+class _RecordedEvent:
+    def __init__(self, record: Dict[str, Any]):
+        for key, value in record.items():
+            if key == "log_pos":
+                self.packet = _Packet(value)
+            elif key != "event":
+                setattr(self, key, value)
+
+
+# 与 pymysqlreplication 事件同名，读取器按类名识别事件
+class RotateEvent(_RecordedEvent):
+    pass
+
+
+class GtidEvent(_RecordedEvent):
+    pass
+
+
+class WriteRowsEvent(_RecordedEvent):
+    pass
+
+
+class UpdateRowsEvent(_RecordedEvent):
+    pass
+
+
+class DeleteRowsEvent(_RecordedEvent):
+    pass
+
+
+class XidEvent(_RecordedEvent):
+    pass
+
+
+EVENT_CLASSES = {
+    cls.__name__: cls
+    for cls in (RotateEvent, GtidEvent, WriteRowsEvent, UpdateRowsEvent, DeleteRowsEvent, XidEvent)
+}
+
+
+def load_recorded_events() -> List[Any]:
+    records = json.loads(FIXTURE_PATH.read_text(encoding="utf-8"))
+    return [EVENT_CLASSES[record["event"]](record) for record in records]
+
+
+class RecordedStreamFactory:
+    """回放录制的binlog事件，并记录读取器传入的流参数"""
+
+    def __init__(self):
+        self.calls: List[Dict[str, Any]] = []
+
+    def __call__(self, **kwargs):
+        self.calls.append(kwargs)
+        return iter(load_recorded_events())
+
+
+class TestMySQLBinlogReader:
+    """MySQL binlog读取器测试类"""
+
+    @pytest.mark.asyncio
+    async def test_replay_converts_row_events(self):
+        """测试行事件转换为CDC事件"""
+        factory = RecordedStreamFactory()
+        reader = MySQLBinlogReader("mysql_source", {}, stream_factory=factory)
+
+        events = [event async for event in reader.events()]
+
+        assert [event.event_type for event in events] == [
+            CDCEventType.INSERT, CDCEventType.INSERT, CDCEventType.UPDATE, CDCEventType.DELETE
+        ]
+        assert all(event.database == "kb" and event.table == "documents" for event in events)
+        assert events[0].after_data["title"] == "设备维护手册"
+        assert events[0].before_data is None
+        assert events[2].before_data["status"] == "draft"
+        assert events[2].after_data["status"] == "published"
+        assert events[3].after_data is None
+        # 行事件携带上一个已提交事务的位置和行在事务中的序号
+        assert events[1].position == {
+            "binlog_file": "mysql-bin.000042", "binlog_position": 4, "row_index": 1
+        }
+        assert events[2].position == {
+            "binlog_file": "mysql-bin.000042", "binlog_position": 1055, "row_index": 0
+        }
+        assert reader.position() == {"binlog_file": "mysql-bin.000042", "binlog_position": 2079}
+        assert factory.calls[0]["resume_stream"] is True
+
+    def test_position_advances_only_at_commit(self):
+        """测试GTID集合和文件位置只在事务提交时推进"""
+        position = CDCPosition(
+            source_id="mysql_source",
+            position_data={"gtid_set": "3e11fa47-71ca-11e1-9e33-c80aa9429562:1-23"}
+        )
+        reader = MySQLBinlogReader("mysql_source", {}, position=position)
+        records = load_recorded_events()
+
+        for record in records[:3]:
+            reader.convert_event(record)
+        # 事务 :24 的行已读取但尚未提交
+        assert reader.position()["gtid_set"] == "3e11fa47-71ca-11e1-9e33-c80aa9429562:1-23"
+        assert reader.position()["binlog_position"] == 4
+
+        reader.convert_event(records[3])
+        assert reader.position()["gtid_set"] == "3e11fa47-71ca-11e1-9e33-c80aa9429562:1-24"
+        assert reader.position()["binlog_position"] == 1055
+
+    def test_resume_mid_transaction_skips_delivered_rows(self):
+        """测试从事务中间保存的位置恢复时重读事务并跳过已产出的行"""
+        records = load_recorded_events()
+        first_reader = MySQLBinlogReader("mysql_source", {})
+        first_event = first_reader.convert_event(records[0]) + first_reader.convert_event(records[1])
+        first_event += first_reader.convert_event(records[2])[:1]
+
+        # 只产出事务 :24 的第一行后重启，服务端从最后提交的位置重新发送整个事务
+        saved = CDCPosition(source_id="mysql_source", position_data=first_event[-1].position)
+        reader = MySQLBinlogReader("mysql_source", {}, position=saved)
+        assert reader._stream_kwargs()["log_pos"] == 4
+        resumed = [event for record in records for event in reader.convert_event(record)]
+
+        assert [event.after_data and event.after_data["id"] for event in resumed] == [2, 1, None]
+        assert resumed[0].position == {
+            "binlog_file": "mysql-bin.000042", "binlog_position": 4, "row_index": 1
+        }
+        assert reader.position()["binlog_position"] == 2079
+
+    def test_resume_from_position(self):
+        """测试从保存的位置恢复"""
+        file_position = CDCPosition(
+            source_id="mysql_source",
+            position_data={"binlog_file": "mysql-bin.000042", "binlog_position": 1536}
+        )
+        kwargs = MySQLBinlogReader(
+            "mysql_source", {}, position=file_position, tables=["kb.documents"]
+        )._stream_kwargs()
+        assert kwargs["log_file"] == "mysql-bin.000042"
+        assert kwargs["log_pos"] == 1536
+        assert kwargs["only_tables"] == ["documents"]
+
+        gtid_position = CDCPosition(
+            source_id="mysql_source",
+            position_data={"gtid_set": "3e11fa47-71ca-11e1-9e33-c80aa9429562:1-23"}
+        )
+        kwargs = MySQLBinlogReader("mysql_source", {}, position=gtid_position)._stream_kwargs()
+        assert kwargs["auto_position"] == "3e11fa47-71ca-11e1-9e33-c80aa9429562:1-23"
+        assert "log_file" not in kwargs
+
+        earliest = CDCPosition(source_id="mysql_source", position_data={"type": "earliest"})
+        kwargs = MySQLBinlogReader("mysql_source", {}, position=earliest)._stream_kwargs()
+        assert kwargs["resume_stream"] is False
+
+        from_timestamp = CDCPosition(
+            source_id="mysql_source",
+            position_data={"type": "timestamp", "timestamp": "2023-11-14T22:13:20"}
+        )
+        kwargs = MySQLBinlogReader("mysql_source", {}, position=from_timestamp)._stream_kwargs()
+        assert kwargs["resume_stream"] is False
+        assert kwargs["skip_to_timestamp"] == datetime(2023, 11, 14, 22, 13, 20).timestamp()
+
+
+class TestCDCManagerBinlog:
+    """CDC管理器binlog推送测试类"""
+
+    @pytest.mark.asyncio
+    async def test_stream_applies_backpressure(self):
+        """测试事件队列满时读取暂停且不丢事件"""
+        manager = CDCManager(binlog_stream_factory=RecordedStreamFactory())
+        config = CDCSourceConfig(
+            source_id="mysql_source",
+            source_type=CDCSourceType.MYSQL,
+            name="MySQL",
+            connection_config={},
+            batch_size=1,
+            max_queue_size=1
+        )
+        manager.add_source(config)
+        await manager._initialize_position("mysql_source")
+        manager.source_status["mysql_source"] = CDCStatus.RUNNING
+
+        stream_task = asyncio.create_task(manager._stream_mysql_events("mysql_source"))
+        event_queue = manager.event_queues["mysql_source"]
+
+        # 不消费时读取阻塞在满队列上，而不是丢弃事件
+        await asyncio.sleep(0.2)
+        assert event_queue.full()
+        assert not stream_task.done()
+
+        received = []
+        while len(received) < 4:
+            received.append(await asyncio.wait_for(event_queue.get(), timeout=5))
+        await asyncio.wait_for(stream_task, timeout=5)
+
+        assert [event.event_type for event in received] == [
+            CDCEventType.INSERT, CDCEventType.INSERT, CDCEventType.UPDATE, CDCEventType.DELETE
+        ]
+        statistics = manager.statistics["mysql_source"]
+        assert statistics["events_captured"] == 4
+        assert statistics["backpressure_waits"] > 0
+        # 保存的位置是最后提交的事务加上已产出的行序号
+        position_data = manager.positions["mysql_source"].position_data
+        assert position_data["binlog_position"] == 1567
+        assert position_data["row_index"] == 0
+
+
+class TestDedupWindow:
+    """CDC事件去重窗口测试类"""
+
+    def test_evicts_oldest_and_bloom_catches_replays(self):
+        """测试窗口按到达顺序淘汰，窗口外的重放由布隆过滤器识别"""
+        now = [0.0]
+        window = DedupWindow(max_size=3, ttl_seconds=60, bloom_capacity=100, clock=lambda: now[0])
+
+        for fingerprint in ["a", "b", "c", "d"]:
+            assert window.check_and_add(fingerprint) is False
+        assert list(window._recent) == ["b", "c", "d"]
+
+        assert window.check_and_add("c") is True
+        assert window.check_and_add("a") is True
+
+        now[0] = 120.0
+        assert window.check_and_add("e") is False
+        assert list(window._recent) == ["e"]
+
+        stats = window.get_statistics()
+        assert stats["window_hits"] == 1
+        assert stats["bloom_hits"] == 1
+        assert stats["evicted"] == 4
+        assert stats["memory_bytes"] > 0
+        assert 0 <= stats["estimated_false_positive_rate"] < 0.0001
+
+    def test_window_only_without_bloom(self):
+        """测试关闭布隆过滤器时仅按窗口去重"""
+        window = DedupWindow(max_size=2, bloom_capacity=0)
+        for fingerprint in ["a", "b", "c"]:
+            window.check_and_add(fingerprint)
+        assert window.check_and_add("a") is False
+        assert window.get_statistics()["bloom_entries"] == 0
+
+    def test_content_fingerprints_skip_bloom(self):
+        """测试无binlog位置的事件只在窗口内去重，窗口过期后合法重复不被丢弃"""
+        now = [0.0]
+        manager = CDCManager()
+        manager.add_source(CDCSourceConfig(
+            source_id="api_source", source_type=CDCSourceType.API, name="API"
+        ))
+        window = manager.dedup_cache["api_source"]
+        window._clock = lambda: now[0]
+        event = CDCEvent(
+            source_id="api_source", event_type=CDCEventType.UPDATE, table="documents",
+            after_data={"id": 1, "status": "published"}
+        )
+
+        assert manager._is_duplicate_event("api_source", event) is False
+        assert manager._is_duplicate_event("api_source", event) is True
+
+        now[0] = window.ttl_seconds + 1
+        assert manager._is_duplicate_event("api_source", event) is False
+        assert window.get_statistics()["bloom_hits"] == 0
+
+        # 偏移量参与内容指纹
+        moved = event.model_copy(update={"position": {"offset": 1024}})
+        assert moved.get_fingerprint() != event.get_fingerprint()
+
+    def test_manager_dedups_by_binlog_position(self):
+        """测试重放同一binlog位置的事件被识别为重复"""
+        manager = CDCManager()
+        manager.add_source(CDCSourceConfig(
+            source_id="mysql_source", source_type=CDCSourceType.MYSQL, name="MySQL"
+        ))
+        reader = MySQLBinlogReader("mysql_source", {})
+        events = [event for record in load_recorded_events() for event in reader.convert_event(record)]
+        # 同一事务中的多行由 row_index 区分
+        assert events[0].get_fingerprint() != events[1].get_fingerprint()
+
+        assert not any(manager._is_duplicate_event("mysql_source", event) for event in events)
+        assert all(manager._is_duplicate_event("mysql_source", event) for event in events)
+
+        statistics = manager.get_statistics()
+        assert statistics["dedup"]["mysql_source"]["duplicates"] == len(events)
+        assert statistics["dedup_memory_bytes"] > 0
+
+
+class TestCompiledFilterPlan:
+    """CDC过滤计划测试类"""
+
+    @pytest.fixture
+    def filters(self):
+        return [
+            CDCFilter(
+                name="只同步kb库", filter_type=CDCFilterType.TABLE_FILTER, priority=10,
+                conditions={"tables": ["kb.documents", "kb.entities"]}
+            ),
+            CDCFilter(
+                name="排除删除", filter_type=CDCFilterType.EVENT_TYPE_FILTER, include=False,
+                conditions={"event_types": ["delete"]}
+            ),
+            CDCFilter(
+                name="已发布", filter_type=CDCFilterType.CONDITION_FILTER, priority=5,
+                conditions={"conditions": {"status": "published", "version": {"gt": 1}}}
+            ),
+        ]
+
+    @pytest.fixture
+    def events(self):
+        events = []
+        for table in ["documents", "entities", "logs"]:
+            for event_type in [CDCEventType.INSERT, CDCEventType.UPDATE, CDCEventType.DELETE]:
+                for status, version in [("published", 2), ("draft", 2), ("published", 1)]:
+                    events.append(CDCEvent(
+                        source_id="mysql_source", event_type=event_type,
+                        database="kb", table=table,
+                        after_data={"id": 1, "status": status, "version": version}
+                    ))
+        return events
+
+    def test_plan_matches_per_event_filters(self, filters, events):
+        """测试编译后的过滤结果与逐个过滤器判定一致"""
+        manager = CDCManager()
+        for filter_config in filters:
+            manager.add_filter(filter_config)
+
+        def reference_rejects(event):
+            return any(f.matches(event) != f.include for f in filters)
+
+        expected = [event for event in events if not reference_rejects(event)]
+        kept, filtered_count = manager._filter_plan.apply(events)
+
+        assert kept == expected
+        assert filtered_count == len(events) - len(expected)
+        assert [manager._should_filter_event(event) for event in events] == [
+            reference_rejects(event) for event in events
+        ]
+
+    def test_hits_follow_priority_and_recompile(self, filters, events):
+        """测试命中计入优先级最高的拒绝过滤器，增删过滤器后重新编译"""
+        manager = CDCManager()
+        for filter_config in filters:
+            manager.add_filter(filter_config)
+        table_filter, delete_filter, condition_filter = filters
+
+        manager._filter_plan.apply(events)
+        # 9个logs表事件全部由优先级最高的表过滤器拒绝
+        assert manager.filter_hits[table_filter.filter_id] == 9
+        assert manager.filter_hits[condition_filter.filter_id] == 12
+        assert manager.filter_hits[delete_filter.filter_id] == 2
+
+        manager.remove_filter(table_filter.filter_id)
+        assert table_filter.filter_id not in manager.get_statistics()["filter_hits"]
+        kept, _ = manager._filter_plan.apply(events)
+        assert {event.table for event in kept} == {"documents", "entities", "logs"}
+
+        delete_filter.enabled = False
+        manager.compile_filters()
+        kept, _ = manager._filter_plan.apply(events)
+        assert CDCEventType.DELETE in {event.event_type for event in kept}
+
+
+def make_row_event(event_type, row_id, before=None, after=None, table="documents"):
+    return CDCEvent(
+        source_id="mysql_source", event_type=event_type, database="kb", table=table,
+        before_data=None if before is None else {"id": row_id, **before},
+        after_data=None if after is None else {"id": row_id, **after}
+    )
+
+
+class TestCDCCoalescing:
+    """CDC变更合并测试类"""
+
+    def test_coalesce_chains_into_net_changes(self):
+        """测试插入/更新/删除链合并为净变更"""
+        manager = CDCManager()
+        events = [
+            make_row_event(CDCEventType.INSERT, 1, after={"v": 0}),
+            *[make_row_event(CDCEventType.UPDATE, 1, before={"v": i}, after={"v": i + 1}) for i in range(200)],
+            make_row_event(CDCEventType.UPDATE, 2, before={"v": 0}, after={"v": 1}),
+            make_row_event(CDCEventType.UPDATE, 2, before={"v": 1}, after={"v": 2}),
+            make_row_event(CDCEventType.INSERT, 3, after={"v": 0}),
+            make_row_event(CDCEventType.DELETE, 3, before={"v": 0}),
+            make_row_event(CDCEventType.UPDATE, 4, before={"v": 0}, after={"v": 1}),
+            make_row_event(CDCEventType.DELETE, 4, before={"v": 1}),
+        ]
+
+        net = manager._coalesce_events(events)
+
+        assert [(event.event_type, event.after_data or event.before_data) for event in net] == [
+            (CDCEventType.INSERT, {"id": 1, "v": 200}),
+            (CDCEventType.UPDATE, {"id": 2, "v": 2}),
+            (CDCEventType.DELETE, {"id": 4, "v": 0}),
+        ]
+        assert net[0].before_data is None
+        assert net[1].before_data == {"id": 2, "v": 0}
+        assert net[0].metadata["coalesced_events"] == 201
+
+    def test_non_row_events_are_boundaries(self):
+        """测试截断等事件保持原有顺序，不跨越其合并"""
+        manager = CDCManager()
+        truncate = CDCEvent(source_id="mysql_source", event_type=CDCEventType.TRUNCATE,
+                            database="kb", table="documents")
+        events = [
+            make_row_event(CDCEventType.INSERT, 1, after={"v": 0}),
+            truncate,
+            make_row_event(CDCEventType.INSERT, 1, after={"v": 1}),
+        ]
+
+        net = manager._coalesce_events(events)
+
+        assert [event.event_type for event in net] == [
+            CDCEventType.INSERT, CDCEventType.TRUNCATE, CDCEventType.INSERT
+        ]
+
+    @pytest.mark.asyncio
+    async def test_batch_feeds_upsert_sink(self):
+        """测试合并后的批次批量写入StarRocks并记录合并比"""
+        starrocks_client = AsyncMock()
+        starrocks_client.upsert_rows.return_value = True
+        starrocks_client.delete_rows.return_value = True
+        sink = CDCUpsertSink(
+            tables={"kb.documents": CDCSinkTableConfig(target_table="documents")},
+            starrocks_client=starrocks_client
+        )
+
+        manager = CDCManager()
+        manager.add_source(CDCSourceConfig(
+            source_id="mysql_source", source_type=CDCSourceType.MYSQL, name="MySQL",
+            coalesce_events=True
+        ))
+        manager.add_processor(sink.as_processor())
+
+        events = [
+            *[make_row_event(CDCEventType.UPDATE, 1, before={"v": i}, after={"v": i + 1}) for i in range(200)],
+            make_row_event(CDCEventType.DELETE, 2, before={"v": 0}),
+            make_row_event(CDCEventType.INSERT, 3, after={"v": 0}, table="logs"),
+        ]
+        await manager._process_event_batch("mysql_source", events)
+
+        starrocks_client.upsert_rows.assert_awaited_once_with("documents", [{"id": 1, "v": 200}])
+        starrocks_client.delete_rows.assert_awaited_once_with("documents", "id", [2])
+        assert manager.statistics["mysql_source"]["coalescing_ratio"] == pytest.approx(202 / 3)
+        assert sink.get_statistics()["rows_upserted"] == 1
+
+    @pytest.mark.asyncio
+    async def test_vector_sink_keeps_old_vectors_on_embedding_failure(self):
+        """测试嵌入部分失败时不删除旧向量，成功时向量与行一一对应"""
+        vector_store = AsyncMock()
+        vector_store.delete.return_value = 0
+        embedder = AsyncMock()
+        sink = CDCUpsertSink(
+            tables={"kb.documents": CDCSinkTableConfig(text_fields=["title"])},
+            vector_store=vector_store,
+            embedder=embedder
+        )
+        events = [
+            make_row_event(CDCEventType.UPDATE, 1, before={"title": "a"}, after={"title": "设备维护手册"}),
+            make_row_event(CDCEventType.UPDATE, 2, before={"title": "b"}, after={"title": "故障处理规范"}),
+            make_row_event(CDCEventType.DELETE, 3, before={"title": "c"}),
+        ]
+
+        # 第一行嵌入失败，结果中只有第二行
+        embedder.embed_texts.return_value = SimpleNamespace(
+            results=[SimpleNamespace(embedding=[0.2])], failed_embeddings=1
+        )
+        await sink.write_events(events)
+
+        vector_store.delete.assert_awaited_once_with(["kb.documents:3"])
+        vector_store.insert.assert_not_awaited()
+        assert sink.get_statistics()["failed_writes"] == 1
+
+        vector_store.reset_mock()
+        embedder.embed_texts.return_value = SimpleNamespace(
+            results=[SimpleNamespace(embedding=[0.1]), SimpleNamespace(embedding=[0.2])], failed_embeddings=0
+        )
+        await sink.write_events(events)
+
+        vector_store.delete.assert_awaited_once_with(["kb.documents:3", "kb.documents:1", "kb.documents:2"])
+        documents = vector_store.insert.await_args.args[0]
+        assert [(document.id, document.vector, document.text) for document in documents] == [
+            ("kb.documents:1", [0.1], "设备维护手册"), ("kb.documents:2", [0.2], "故障处理规范")
+        ]
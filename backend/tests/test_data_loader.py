@@ -0,0 +1,126 @@
+"""数据加载器测试
+
+测试DataLoader的知识图谱批量加载。
+"""
+
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from backend.core.etl.data_structurer import StructuredData, DataType, StructureType
+from backend.core.etl.data_loader import DataLoader, LoadStatus
+from backend.core.knowledge_graph.graph_manager import GraphManager, GraphConfig
+
+
+def make_structured_data(index: int = 0, entity_count: int = 10, shared_count: int = 0) -> StructuredData:
+    """构造带实体和关系的结构化数据，前 shared_count 个实体在各数据间共享"""
+    entities = [
+        {"id": f"shared_{i}" if i < shared_count else f"doc{index}_e{i}", "type": "ORG", "value": f"机构{i}"}
+        for i in range(entity_count)
+    ]
+    relations = [
+        {"id": f"doc{index}_r{i}", "source_id": entities[i]["id"], "target_id": entities[i + 1]["id"], "type": "RELATED_TO"}
+        for i in range(entity_count - 1)
+    ]
+    return StructuredData(
+        source_id=f"doc_{index}",
+        source_type=DataType.TEXT,
+        structure_type=StructureType.DOCUMENT,
+        content={"text": f"第{index}份文档"},
+        entities=entities,
+        relations=relations
+    )
+
+
+class FakeNeo4jClient:
+    """记录批量语句的Neo4j客户端，每次调用对应一次网络往返"""
+
+    def __init__(self, fail_ids=()):
+        self.fail_ids = set(fail_ids)
+        self.statements = []
+
+    async def run(self, cypher, params):
+        self.statements.append((cypher, params))
+        if any(row["id"] in self.fail_ids for row in params["rows"]):
+            raise RuntimeError("写入超时")
+        return [{"id": row["id"]} for row in params["rows"]]
+
+
+def make_loader(neo4j_client: FakeNeo4jClient, batch_size: int = 50) -> DataLoader:
+    manager = GraphManager(config=GraphConfig(enable_caching=False), neo4j_client=neo4j_client)
+    loader = DataLoader(graph_manager=manager)
+    loader.targets["default_knowledge_graph"].batch_size = batch_size
+    return loader
+
+
+class TestKnowledgeGraphLoading:
+    """知识图谱批量加载测试类"""
+
+    @pytest.mark.asyncio
+    async def test_load_writes_entities_then_relations_in_chunks(self):
+        """测试实体和关系分块批量写入，实体先于关系"""
+        client = FakeNeo4jClient()
+        loader = make_loader(client, batch_size=4)
+
+        report = await loader.load(make_structured_data(entity_count=10), target_ids=["default_knowledge_graph"])
+
+        result = report.results[0]
+        assert result.status == LoadStatus.SUCCESS
+        assert (result.records_processed, result.records_successful) == (19, 19)
+        kinds = ["relation" if "RELATION" in cypher else "entity" for cypher, _ in client.statements]
+        assert kinds == ["entity"] * 3 + ["relation"] * 3
+
+    @pytest.mark.asyncio
+    async def test_load_groups_by_strategy_and_reports_chunk_failures(self):
+        """测试按加载策略分组，失败分块计入对应数据"""
+        client = FakeNeo4jClient(fail_ids={"doc0_e5"})
+        loader = make_loader(client, batch_size=2)
+        data = make_structured_data(entity_count=6)
+        data.relations = []
+        data.entities[0]["load_strategy"] = "insert"
+        data.entities[1]["load_strategy"] = "append"
+
+        report = await loader.load(data, target_ids=["default_knowledge_graph"])
+
+        result = report.results[0]
+        assert result.status == LoadStatus.PARTIAL
+        assert (result.records_successful, result.records_failed, result.records_skipped) == (3, 2, 1)
+        assert any(cypher.startswith("UNWIND $rows AS row CREATE") for cypher, _ in client.statements)
+        assert result.error_details["failed_chunks"][0]["error"] == "写入超时"
+
+    @pytest.mark.asyncio
+    async def test_batch_load_merges_graph_writes(self):
+        """测试批量加载合并多条数据的实体，共享实体只写一次"""
+        client = FakeNeo4jClient(fail_ids={"doc2_e4"})
+        loader = make_loader(client, batch_size=100)
+        data_list = [make_structured_data(i, entity_count=5, shared_count=2) for i in range(3)]
+
+        reports = await loader.batch_load(
+            data_list, target_ids=["default_knowledge_graph"], merge_graph_writes=True
+        )
+
+        entity_rows = [row for cypher, params in client.statements if "RELATION" not in cypher for row in params["rows"]]
+        assert len(entity_rows) == 2 + 3 * 3
+        # 实体写入只有一个分块，失败时三条数据都受影响
+        assert [report.results[0].status for report in reports] == [LoadStatus.PARTIAL] * 3
+        assert reports[0].results[0].records_failed == 5
+
+
+class TestKnowledgeGraphLoadingPerformance:
+    """知识图谱加载性能测试类"""
+
+    @pytest.mark.asyncio
+    async def test_bulk_load_round_trips(self):
+        """测试 5000 个实体按分块写入，往返次数等于分块数且不逐条写入"""
+        data = make_structured_data(entity_count=5000)
+        data.relations = []
+        client = FakeNeo4jClient()
+        loader = make_loader(client, batch_size=500)
+        loader.graph_manager.graph_db = Mock()
+        loader.graph_manager.graph_db.create_entity = AsyncMock(side_effect=AssertionError("逐条写入"))
+
+        report = await loader.load(data, target_ids=["default_knowledge_graph"])
+
+        assert report.results[0].records_successful == 5000
+        assert len(client.statements) == 10
+        assert [len(params["rows"]) for _, params in client.statements] == [500] * 10
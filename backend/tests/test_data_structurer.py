@@ -3,6 +3,10 @@
 测试DataStructurer类的各种功能，包括数据结构化、实体提取、关系提取、文本分块等。
 """
 
+import io
+import zipfile
+from datetime import datetime
+
 import pytest
 import asyncio
 from unittest.mock import Mock, patch, AsyncMock
@@ -11,6 +15,45 @@ from typing import Dict, List, Any
 from backend.core.etl.data_structurer import (
     DataStructurer, DataType, StructuredData, StructureType, StructureConfig
 )
+from backend.core.etl.stream_readers import (
+    ColumnarSheetWriter, PYARROW_AVAILABLE, iter_docx_blocks, iter_xlsx_batches
+)
+
+
+def make_xlsx(rows: int, columns: int = 6) -> bytes:
+    """构造包含两张工作表的工作簿"""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("明细")
+    sheet.append([f"列{i}" for i in range(columns - 1)] + [None])
+    for index in range(rows):
+        sheet.append([index, index * 1.5, f"客户{index}", datetime(2024, 1, 1 + index % 28), None, "备注"][:columns])
+    summary = workbook.create_sheet("汇总")
+    summary.append(["项目", "金额"])
+    summary.append(["合计", 100])
+    summary.append([None, None])
+    summary.append(["联系人", "zhang@example.com"])
+    output = io.BytesIO()
+    workbook.save(output)
+    return output.getvalue()
+
+
+def make_docx(paragraphs: List[str], table: List[List[str]]) -> bytes:
+    """构造只包含正文的最小DOCX"""
+    ns = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+    body = "".join(f"<w:p><w:r><w:t>{text}</w:t></w:r></w:p>" for text in paragraphs[:1])
+    body += "<w:tbl>" + "".join(
+        "<w:tr>" + "".join(f"<w:tc><w:p><w:r><w:t>{cell}</w:t></w:r></w:p></w:tc>" for cell in row) + "</w:tr>"
+        for row in table
+    ) + "</w:tbl>"
+    body += "".join(
+        f"<w:p><w:r><w:t>{text}</w:t><w:tab/><w:t>尾</w:t></w:r></w:p>" for text in paragraphs[1:]
+    )
+    output = io.BytesIO()
+    with zipfile.ZipFile(output, "w") as archive:
+        archive.writestr("word/document.xml", f"<w:document {ns}><w:body>{body}</w:body></w:document>")
+    return output.getvalue()
 
 
 class TestDataStructurer:
@@ -232,6 +275,132 @@ class TestDataStructurer:
         assert depth2 == 3
 
 
+class TestStreamingStructuring:
+    """流式结构化测试类"""
+    
+    def test_iter_xlsx_batches(self):
+        """测试逐批读取工作表，表头与空行处理与 pandas 一致"""
+        batches = list(iter_xlsx_batches(make_xlsx(5), batch_size=2))
+        
+        assert [(b.sheet_name, len(b.rows), b.start_row) for b in batches] == [
+            ("明细", 2, 0), ("明细", 2, 2), ("明细", 1, 4), ("汇总", 3, 0)
+        ]
+        assert batches[0].columns == ["列0", "列1", "列2", "列3", "列4"]
+        assert batches[0].rows[1][:3] == (1, 1.5, "客户1")
+        assert batches[-1].rows == [("合计", 100), (None, None), ("联系人", "zhang@example.com")]
+    
+    def test_iter_docx_blocks(self):
+        """测试DOCX增量解析段落和表格"""
+        blocks = list(iter_docx_blocks(make_docx(["标题", "正文"], [["a", "b"], ["c", "d"]])))
+        
+        assert [block.kind for block in blocks] == ["paragraph", "table", "paragraph"]
+        assert blocks[1].rows == [["a", "b"], ["c", "d"]]
+        assert blocks[2].text == "正文\t尾"
+    
+    @pytest.mark.skipif(not PYARROW_AVAILABLE, reason="需要 pyarrow")
+    def test_columnar_writer_widens_incompatible_batches(self):
+        """测试后续批次类型不兼容时新开分段而不丢数据"""
+        import pyarrow.parquet as pq
+        
+        writer = ColumnarSheetWriter(["id", "value"])
+        writer.write([(1, 10), (2, 20)])
+        writer.write([(3, "N/A")])
+        parts = writer.close()
+        
+        tables = [pq.read_table(part["file"]) for part in parts]
+        assert [part["rows"] for part in parts] == [2, 1]
+        assert tables[0].column("value").to_pylist() == [10, 20]
+        assert tables[1].column("value").to_pylist() == ["N/A"]
+    
+    @pytest.mark.asyncio
+    async def test_structure_large_xlsx_streams_to_columnar_store(self):
+        """测试超过阈值的工作簿流式写入对象存储"""
+        object_store = Mock()
+        object_store.get_bucket_name = Mock(return_value="knowledge-documents")
+        uploaded = {}
+        
+        async def upload_data(bucket, object_name, data, content_type=None):
+            uploaded[object_name] = data.read()
+            return True
+        
+        object_store.upload_data = AsyncMock(side_effect=upload_data)
+        structurer = DataStructurer(
+            StructureConfig(streaming_threshold_bytes=0, stream_batch_rows=3), object_store=object_store
+        )
+        
+        result = await structurer.structure_data(make_xlsx(10), DataType.XLSX, "finance")
+        
+        assert result.content["streamed"] is True
+        assert result.content["sheet_names"] == ["明细", "汇总"]
+        assert result.content["total_rows"] == 13
+        assert result.content["sheets"]["明细"]["shape"] == (10, 5)
+        assert "data" not in result.content["sheets"]["明细"]
+        assert any(entity["value"] == "zhang@example.com" for entity in result.entities)
+        assert result.metadata["memory"]["peak_rss_bytes"] >= result.metadata["memory"]["start_rss_bytes"]
+        assert len(uploaded) == 2
+        if PYARROW_AVAILABLE:
+            import pyarrow.parquet as pq
+            table = pq.read_table(io.BytesIO(uploaded["structured/finance/sheet-000-part-00000.parquet"]))
+            assert table.num_rows == 10
+            assert table.column("列2").to_pylist()[3] == "客户3"
+    
+    @pytest.mark.asyncio
+    async def test_stream_structure_yields_row_batches(self, tmp_path):
+        """测试按行批次产出结构化数据"""
+        path = tmp_path / "finance.xlsx"
+        path.write_bytes(make_xlsx(7))
+        structurer = DataStructurer(StructureConfig(stream_batch_rows=3))
+        
+        batches = [batch async for batch in structurer.stream_structure(path, DataType.XLSX, "finance")]
+        
+        assert [len(batch.content["rows"]) for batch in batches] == [3, 3, 1, 3]
+        assert all(batch.structure_type == StructureType.TABLE for batch in batches)
+        assert [batch.metadata["is_last"] for batch in batches] == [False, False, False, True]
+        assert batches[0].content["text"].startswith("0\t0\t客户0")
+        assert batches[0].chunks
+    
+    @pytest.mark.asyncio
+    async def test_structure_docx_streaming_matches_content_shape(self, tmp_path):
+        """测试流式DOCX结果字段与原处理一致"""
+        path = tmp_path / "report.docx"
+        path.write_bytes(make_docx(["标题", "联系 zhang@example.com"], [["a", "b"]]))
+        structurer = DataStructurer()
+        
+        result = await structurer.structure_data(path, DataType.DOCX, "report")
+        
+        assert result.content["paragraphs"] == ["标题", "联系 zhang@example.com\t尾"]
+        assert result.content["tables"] == [[["a", "b"]]]
+        assert result.chunks and result.entities
+
+
+class TestStreamingStructuringPerformance:
+    """流式结构化性能测试类"""
+    
+    @pytest.mark.asyncio
+    async def test_streaming_holds_one_batch(self, tmp_path):
+        """测试流式读取每次只持有一批行，结果与整表读取一致"""
+        data = make_xlsx(5000, columns=6)
+        structurer = DataStructurer(StructureConfig(
+            streaming_threshold_bytes=0, stream_batch_rows=1000, extract_entities=False,
+            columnar_local_dir=str(tmp_path)
+        ))
+        batch_sizes = []
+        
+        def recording_batches(source, batch_size):
+            for batch in iter_xlsx_batches(source, batch_size):
+                batch_sizes.append(len(batch.rows))
+                yield batch
+        
+        with patch("backend.core.etl.data_structurer.iter_xlsx_batches", recording_batches):
+            streamed = await structurer.structure_data(data, DataType.XLSX, "large")
+        
+        structurer.config.streaming_threshold_bytes = len(data) + 1
+        full = await structurer.structure_data(data, DataType.XLSX, "large")
+        
+        assert max(batch_sizes) == 1000
+        assert sum(batch_sizes) == streamed.content["total_rows"] == full.content["total_rows"]
+        assert "peak_rss_delta_bytes" in streamed.metadata["memory"]
+
 if __name__ == "__main__":
     # 运行测试
     pytest.main(["-v", __file__])
\ No newline at end of file
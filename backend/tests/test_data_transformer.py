@@ -0,0 +1,161 @@
+"""数据转换器测试
+
+测试DataTransformer的写时复制转换。
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from backend.core.etl.data_structurer import StructuredData, DataType, StructureType
+from backend.core.etl.data_transformer import (
+    DataTransformer, TransformationRule, TransformationStatus, TransformationType
+)
+from backend.core.etl.expression import ExpressionError, compile_expression, get_expression
+
+
+def make_structured_data(index: int = 0, chunk_count: int = 50) -> StructuredData:
+    """构造待转换的结构化数据"""
+    return StructuredData(
+        source_id=f"doc_{index}",
+        source_type=DataType.TEXT,
+        structure_type=StructureType.DOCUMENT,
+        content={"text": f"  <p>第{index}份\r\n文档</p>  ", "title": f"文档{index}"},
+        metadata={"author": "张三", "tags": ["a"]},
+        entities=[{"type": "PERSON", "value": " 张三 "}, {"type": "ORG", "value": "某公司 "}],
+        chunks=[{"index": i, "text": "分块内容" * 50} for i in range(chunk_count)],
+        quality_score=0.8
+    )
+
+
+class TestDataTransformer:
+    """数据转换器测试类"""
+
+    @pytest.mark.asyncio
+    async def test_transform_does_not_modify_input(self):
+        """测试转换结果正确且输入数据保持不变"""
+        transformer = DataTransformer()
+        data = make_structured_data()
+        original = data.model_dump()
+
+        result, report = await transformer.transform(data, rule_chain="complete")
+
+        assert report.failed_rules == 0
+        assert result.content["text"] == "第0份 文档"
+        assert result.metadata["word_count"] == 2
+        assert result.metadata["author"] == "张三"
+        assert result.entities == [{"type": "person", "value": "张三"}, {"type": "org", "value": "某公司"}]
+        assert data.model_dump() == original
+        # 未被修改的字段与输入共享
+        assert result.chunks is data.chunks
+        assert result.content is not data.content
+
+    @pytest.mark.asyncio
+    async def test_custom_function_receives_copy(self):
+        """测试自定义函数原地修改源值时不影响输入数据"""
+        def append_tag(value, parameters):
+            value.append("b")
+            return value
+
+        transformer = DataTransformer()
+        transformer.add_rule(TransformationRule(
+            id="append_tag", name="追加标签", transformation_type=TransformationType.CUSTOM,
+            source_field="metadata.tags", target_field="metadata.tags", parameters={},
+            custom_function=append_tag
+        ))
+        data = make_structured_data()
+
+        result, _ = await transformer.transform(data, rule_ids=["append_tag"])
+
+        assert result.metadata["tags"] == ["a", "b"]
+        assert data.metadata["tags"] == ["a"]
+
+
+class TestConditionExpressions:
+    """条件表达式测试类"""
+
+    def test_expression_evaluation(self):
+        """测试字段引用、比较、逻辑运算和函数调用"""
+        data = make_structured_data()
+        data.metadata["quality_score_note"] = "high"
+
+        assert compile_expression("source_type == 'text' and quality_score > 0.5")(data) is True
+        assert compile_expression("metadata.author in ['张三', '李四']")(data) is True
+        # 前缀相同的字段名互不影响
+        assert compile_expression("metadata.quality_score_note == 'high' and quality_score < 1")(data) is True
+        assert compile_expression("0.5 < quality_score <= 0.8")(data) is True
+        assert compile_expression("len(entities) == 2 and not confidence")(data) is True
+        assert compile_expression("entities[0]['type'] == 'PERSON'")(data) is True
+        assert compile_expression("metadata.missing is None")(data) is True
+        assert get_expression("quality_score * 2 > 1.5") is get_expression("quality_score * 2 > 1.5")
+
+    @pytest.mark.parametrize("expression", [
+        "__import__('os').system('ls')",
+        "content.__class__",
+        "open('/etc/passwd')",
+        "[x for x in entities]",
+        "lambda: 1",
+        "quality_score >",
+    ])
+    def test_rejects_unsafe_expressions(self, expression):
+        """测试拒绝不在白名单内的表达式"""
+        with pytest.raises(ExpressionError):
+            compile_expression(expression)
+
+    @pytest.mark.asyncio
+    async def test_rule_condition_and_filter(self):
+        """测试规则执行条件与列表过滤条件"""
+        transformer = DataTransformer()
+        transformer.add_rule(TransformationRule(
+            id="filter_person", name="保留人物实体", transformation_type=TransformationType.FILTER,
+            source_field="entities", target_field="entities",
+            parameters={"condition": "type == 'PERSON'"},
+            condition="quality_score >= 0.5"
+        ))
+        transformer.add_rule(TransformationRule(
+            id="unsafe", name="无效条件", transformation_type=TransformationType.FILTER,
+            source_field="entities", target_field="entities",
+            parameters={"condition": "type == 'ORG'"},
+            condition="__import__('os')"
+        ))
+
+        result, report = await transformer.transform(make_structured_data(), rule_ids=["filter_person", "unsafe"])
+        assert result.entities == [{"type": "PERSON", "value": " 张三 "}]
+        assert report.results[1].status == TransformationStatus.SKIPPED
+
+        low_quality = make_structured_data()
+        low_quality.quality_score = 0.1
+        result, report = await transformer.transform(low_quality, rule_ids=["filter_person"])
+        assert report.results[0].status == TransformationStatus.SKIPPED
+        assert len(result.entities) == 2
+
+
+class TestDataTransformerPerformance:
+    """数据转换器性能测试类"""
+
+    @pytest.mark.asyncio
+    async def test_transform_avoids_dumps_and_deep_copies(self):
+        """测试转换链不导出整个模型、不深拷贝数据，未修改的字段与输入共享"""
+        transformer = DataTransformer()
+        data = make_structured_data(chunk_count=200)
+
+        with patch.object(StructuredData, "model_dump", side_effect=AssertionError("model_dump")), \
+                patch.object(StructuredData, "__deepcopy__", side_effect=AssertionError("deepcopy"), create=True):
+            result, report = await transformer.transform(data, rule_chain="complete")
+
+        assert report.failed_rules == 0
+        assert result.content["text"] == "第0份 文档"
+        assert result.chunks is data.chunks
+
+    def test_condition_compiled_once(self):
+        """测试同一条件只编译一次，求值时不调用 eval"""
+        transformer = DataTransformer()
+        data = make_structured_data()
+        condition = "source_type == 'text' and quality_score > 0.5 and confidence < 0.91"
+
+        with patch("backend.core.etl.expression.compile_expression", wraps=compile_expression) as compile_mock, \
+                patch("builtins.eval", side_effect=AssertionError("eval")):
+            outcomes = {transformer._evaluate_condition(data, condition) for _ in range(100)}
+
+        assert outcomes == {True}
+        assert compile_mock.call_count == 1
@@ -0,0 +1,170 @@
+"""数据验证器测试
+
+测试DataValidator的字段访问和规则执行。
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from backend.core.etl.data_structurer import StructuredData, DataType, StructureType
+from backend.core.etl.data_validator import (
+    DataValidator, ValidationRule, ValidationRuleType, ValidationStatus
+)
+from backend.core.etl.field_access import compile_field_getter
+
+
+def make_structured_data(index: int = 0, entity_count: int = 20, chunk_count: int = 50) -> StructuredData:
+    """构造带有较多实体和分块的结构化数据"""
+    return StructuredData(
+        source_id=f"doc_{index}",
+        source_type=DataType.TEXT,
+        structure_type=StructureType.DOCUMENT,
+        content={"text": f"第{index}份文档，联系人 zhang@example.com", "title": f"文档{index}"},
+        metadata={"author": "张三"},
+        entities=[
+            {"type": "email" if i % 2 else "phone", "value": f"user{i}@example.com" if i % 2 else "13800138000"}
+            for i in range(entity_count)
+        ],
+        chunks=[{"index": i, "text": "分块内容" * 50} for i in range(chunk_count)],
+        quality_score=0.8,
+        confidence=0.9
+    )
+
+
+class TestFieldAccess:
+    """字段路径访问测试类"""
+
+    def test_getter_matches_model_dump(self):
+        """测试编译后的访问结果与 model_dump 后按字典读取一致"""
+        data = make_structured_data(entity_count=3)
+        data.entities[1] = {"type": "org"}
+
+        assert compile_field_getter("content.text")(data) == data.content["text"]
+        assert compile_field_getter("quality_score")(data) == 0.8
+        assert compile_field_getter("content.missing.deeper")(data) is None
+        assert compile_field_getter("entities[*].value")(data) == [
+            "13800138000", None, "13800138000"
+        ]
+        assert compile_field_getter("entities[*]")(data) is data.entities
+        assert compile_field_getter("content[*].value")(data) is None
+
+    @pytest.mark.asyncio
+    async def test_validate_complete_rule_set(self):
+        """测试完整规则集验证"""
+        validator = DataValidator()
+        report = await validator.validate(make_structured_data(), rule_set="complete")
+
+        statuses = {result.rule_id: result.status for result in report.results}
+        assert statuses["required_content"] == ValidationStatus.PASSED
+        assert statuses["text_min_length"] == ValidationStatus.PASSED
+        assert statuses["email_format"] == ValidationStatus.PASSED
+
+
+class TestDataValidatorPerformance:
+    """数据验证器性能测试类"""
+
+    @pytest.mark.asyncio
+    async def test_validation_avoids_model_dump(self):
+        """测试按编译的字段路径读取字段，不逐规则导出整个模型"""
+        validator = DataValidator()
+        rule_ids = list(validator.rules)
+        data = make_structured_data()
+        expected = await validator.validate(data, rule_ids=rule_ids)
+
+        with patch.object(StructuredData, "model_dump", side_effect=AssertionError("model_dump")):
+            report = await validator.validate(data, rule_ids=rule_ids)
+
+        assert [(r.rule_id, r.status, r.message) for r in report.results] == [
+            (r.rule_id, r.status, r.message) for r in expected.results
+        ]
+
+
+class TestColumnarValidation:
+    """列式批量验证测试类"""
+
+    def make_records(self):
+        records = [make_structured_data(i, entity_count=4, chunk_count=2) for i in range(6)]
+        records[1].content["text"] = "短"
+        records[2].content["text"] = None
+        records[3].quality_score = 1.5
+        records[4].entities[0] = {"type": "phone", "value": "123"}
+        records[5].entities = [{"type": "org", "value": "某公司"}]
+        return records
+
+    @pytest.mark.asyncio
+    async def test_columnar_matches_row_mode(self):
+        """测试列式验证与逐条验证的状态和消息一致"""
+        validator = DataValidator()
+        rule_ids = list(validator.rules)
+        records = self.make_records()
+
+        row_reports = [await validator.validate(data, rule_ids=rule_ids) for data in records]
+        validator.rule_sets["all"] = rule_ids
+        columnar_reports = await validator.batch_validate(records, rule_set="all", columnar=True)
+
+        assert len(columnar_reports) == len(row_reports)
+        for row_report, columnar_report in zip(row_reports, columnar_reports):
+            assert columnar_report.data_id == row_report.data_id
+            assert columnar_report.overall_status == row_report.overall_status
+            assert (
+                columnar_report.passed_rules, columnar_report.failed_rules,
+                columnar_report.warning_rules, columnar_report.skipped_rules
+            ) == (
+                row_report.passed_rules, row_report.failed_rules,
+                row_report.warning_rules, row_report.skipped_rules
+            )
+            assert [(r.rule_id, r.status, r.message) for r in columnar_report.results] == [
+                (r.rule_id, r.status, r.message) for r in row_report.results
+            ]
+            assert columnar_report.summary["failed_rules"] == row_report.summary["failed_rules"]
+            assert columnar_report.summary["rules_by_severity"] == row_report.summary["rules_by_severity"]
+
+        statuses = {r.rule_id: r.status for r in columnar_reports[3].results}
+        assert statuses["quality_score_range"] == ValidationStatus.FAILED
+        assert columnar_reports[4].overall_status == ValidationStatus.FAILED
+
+    @pytest.mark.asyncio
+    async def test_columnar_fallback_values(self):
+        """测试无法向量化的值回退到逐条验证"""
+        validator = DataValidator()
+        records = self.make_records()
+        records[0].metadata["score"] = "abc"
+        records[1].metadata["score"] = "0.5"
+        records[2].metadata["score"] = True
+        validator.add_rule(ValidationRule(
+            id="metadata_score", name="元数据分数", rule_type=ValidationRuleType.RANGE,
+            field_path="metadata.score", parameters={"min_value": 0, "max_value": 1},
+            error_message="分数超出范围"
+        ))
+
+        validator.rule_sets["score"] = ["metadata_score"]
+        reports = await validator.batch_validate(records, rule_set="score", columnar=True)
+
+        results = [report.results[0] for report in reports]
+        assert [r.status for r in results[:4]] == [
+            ValidationStatus.FAILED, ValidationStatus.PASSED, ValidationStatus.PASSED, ValidationStatus.SKIPPED
+        ]
+        assert results[0].message == "无法转换为数值进行范围验证"
+
+
+class TestColumnarValidationPerformance:
+    """列式批量验证性能测试类"""
+
+    @pytest.mark.asyncio
+    async def test_columnar_evaluates_each_rule_once(self):
+        """测试列式验证每条规则只执行一次整列运算，不逐条应用规则"""
+        validator = DataValidator()
+        validator.rule_sets["rows"] = [
+            "required_content", "text_min_length", "text_max_length", "quality_score_range"
+        ]
+        records = [make_structured_data(i, entity_count=2, chunk_count=1) for i in range(2000)]
+
+        with patch.object(validator, "_evaluate_column", wraps=validator._evaluate_column) as evaluate_column, \
+                patch.object(validator, "_apply_rule", side_effect=AssertionError("_apply_rule")), \
+                patch.object(validator, "_scalar_result", side_effect=AssertionError("_scalar_result")):
+            reports = await validator.batch_validate(records, rule_set="rows", columnar=True)
+
+        assert evaluate_column.call_count == 4
+        assert len(reports) == len(records)
+        assert all(report.passed_rules == 4 for report in reports)
@@ -0,0 +1,311 @@
+"""文档处理器测试
+
+测试DocumentProcessor的PDF分页并行处理与流式产出。
+"""
+
+import io
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import fitz
+import numpy as np
+import pytest
+from PIL import Image
+
+from backend.core.ocr import document_processor as document_processor_module
+from backend.core.ocr.document_processor import (
+    DocumentProcessor, PageType, ProcessingOptions, ProcessingPath, get_document_processor
+)
+from backend.core.ocr.page_cache import OCRPageCache
+
+
+def make_pdf(page_count: int) -> bytes:
+    """构造每页带文字和表格线的PDF"""
+    document = fitz.open()
+    for index in range(page_count):
+        page = document.new_page(width=595, height=842)
+        page.insert_text((72, 72), f"Page {index + 1}", fontsize=24)
+        for line in range(4):
+            page.draw_line((72, 150 + line * 30), (400, 150 + line * 30))
+            page.draw_line((72 + line * 100, 150), (72 + line * 100, 240))
+    data = document.tobytes()
+    document.close()
+    return data
+
+
+def make_mixed_pdf() -> bytes:
+    """依次构造原生数字页、扫描页和带文本层的扫描页"""
+    scan = io.BytesIO()
+    Image.new("RGB", (400, 560), color=(240, 240, 240)).save(scan, format="PNG")
+    paragraph = "This agreement is made between the parties listed below. " * 3
+
+    document = fitz.open()
+    digital = document.new_page(width=595, height=842)
+    for line in range(10):
+        digital.insert_text((72, 72 + line * 20), paragraph[:80], fontsize=10)
+    for with_text in (False, True):
+        page = document.new_page(width=595, height=842)
+        page.insert_image(page.rect, stream=scan.getvalue())
+        if with_text:
+            page.insert_text((72, 72), paragraph, fontsize=6)
+    data = document.tobytes()
+    document.close()
+    return data
+
+
+def fast_options(**kwargs) -> ProcessingOptions:
+    values = dict(dpi=72, auto_rotate=False, enhance_image=False, remove_noise=False)
+    values.update(kwargs)
+    return ProcessingOptions(**values)
+
+
+class TestDocumentProcessor:
+    """文档处理器测试类"""
+    
+    @pytest.fixture
+    def processor(self):
+        processor = DocumentProcessor(max_workers=2)
+        yield processor
+        processor.close()
+    
+    @pytest.mark.asyncio
+    async def test_process_pdf_pages_in_order(self, processor):
+        """测试进程池处理后页面顺序与页面信息正确"""
+        result = await processor.process_document(make_pdf(5), "contract.pdf", fast_options())
+        
+        assert result["status"] == "success"
+        assert [page["page_info"]["page_number"] for page in result["pages"]] == [1, 2, 3, 4, 5]
+        first = result["pages"][0]
+        assert first["page_info"]["text_regions"][0]["text"] == "Page 1"
+        assert first["page_info"]["has_tables"] is True
+        image = Image.open(io.BytesIO(first["processed_image"]["image_data"]))
+        assert image.size == (595, 842)
+        assert first["processed_image"]["quality_metrics"]
+    
+    @pytest.mark.asyncio
+    async def test_pixels_match_png_round_trip(self, processor):
+        """测试直接读取像素缓冲区与 PNG 编码再解码得到的图像一致"""
+        data = make_pdf(1)
+        pages = [page async for page in processor.iter_pages(data, "a.pdf", fast_options(image_format="array"))]
+        
+        with fitz.open(stream=data, filetype="pdf") as document:
+            png = document[0].get_pixmap(matrix=fitz.Matrix(1, 1)).tobytes("png")
+        expected = np.array(Image.open(io.BytesIO(png)).convert("RGB"))
+        
+        assert np.array_equal(pages[0]["processed_image"]["image_data"], expected)
+    
+    @pytest.mark.asyncio
+    async def test_iter_pages_streams_without_process_pool(self):
+        """测试单线程模式下逐页产出，提前结束迭代不报错"""
+        processor = DocumentProcessor(use_processes=False)
+        pages = processor.iter_pages(make_pdf(6), "a.pdf", fast_options())
+        try:
+            first = await pages.__anext__()
+            assert first["page_info"]["page_number"] == 1
+        finally:
+            await pages.aclose()
+            processor.close()
+    
+    @pytest.mark.asyncio
+    async def test_page_limit(self, processor):
+        """测试超过页数限制时抛出异常"""
+        processor.max_pages = 2
+        with pytest.raises(ValueError):
+            async for _ in processor.iter_pages(make_pdf(3), "a.pdf", fast_options()):
+                pass
+
+
+class TestTextLayerFastPath:
+    """原生文本层快速路径测试类"""
+    
+    @pytest.fixture
+    def processor(self):
+        processor = DocumentProcessor(use_processes=False)
+        yield processor
+        processor.close()
+    
+    @pytest.mark.asyncio
+    async def test_routes_pages_by_type(self, processor):
+        """测试数字页读取文本层，扫描页和混合页渲染"""
+        result = await processor.process_document(make_mixed_pdf(), "contract.pdf", fast_options())
+        digital, scanned, mixed = result["pages"]
+        
+        assert digital["page_type"] == PageType.DIGITAL
+        assert digital["processing_path"] == ProcessingPath.TEXT_LAYER
+        assert digital["processed_image"] is None
+        assert digital["text_layer"]["text"].startswith("This agreement")
+        assert digital["text_layer"]["regions"][0]["bbox"]["x"] == 72
+        assert digital["classification"]["image_area_ratio"] == 0
+        
+        assert scanned["page_type"] == PageType.SCANNED
+        assert scanned["classification"]["glyph_count"] == 0
+        assert mixed["page_type"] == PageType.MIXED
+        assert mixed["classification"]["image_area_ratio"] > 0.9
+        assert all(page["processing_path"] == ProcessingPath.RASTER for page in (scanned, mixed))
+        assert all(page["processed_image"]["image_data"] for page in (scanned, mixed))
+        
+        assert result["page_stats"] == {
+            "total_pages": 3,
+            "paths": {ProcessingPath.TEXT_LAYER: 1, ProcessingPath.RASTER: 2, ProcessingPath.CACHE: 0},
+            "page_types": {PageType.DIGITAL: 1, PageType.SCANNED: 1, PageType.MIXED: 1}
+        }
+    
+    @pytest.mark.asyncio
+    async def test_text_layer_can_be_disabled(self, processor):
+        """测试关闭文本层快速路径后所有页面都渲染"""
+        pages = [
+            page async for page in processor.iter_pages(
+                make_mixed_pdf(), "a.pdf", fast_options(use_text_layer=False)
+            )
+        ]
+        
+        assert DocumentProcessor.get_page_stats(pages)["paths"][ProcessingPath.RASTER] == 3
+        assert pages[0]["page_type"] == PageType.DIGITAL
+
+
+class InMemoryRedis:
+    def __init__(self):
+        self.data = {}
+    
+    async def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+    
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+
+class InMemoryRedisClient:
+    def __init__(self):
+        self.client = InMemoryRedis()
+
+
+def make_versioned_pdf(page_count: int, changed: set) -> bytes:
+    """构造扫描页文档，changed 中的页面内容不同"""
+    document = fitz.open()
+    for index in range(page_count):
+        scan = io.BytesIO()
+        shade = 200 if index in changed else 240
+        Image.new("RGB", (300, 420), color=(shade, shade, index)).save(scan, format="PNG")
+        page = document.new_page(width=595, height=842)
+        page.insert_image(page.rect, stream=scan.getvalue())
+    data = document.tobytes()
+    document.close()
+    return data
+
+
+class TestPageCache:
+    """OCR 页面缓存测试类"""
+    
+    @pytest.mark.asyncio
+    async def test_cached_pages_skip_rendering(self):
+        """测试重新导入时未变化的页面命中缓存，不再渲染"""
+        processor = DocumentProcessor(use_processes=False, page_cache=OCRPageCache(InMemoryRedisClient()))
+        try:
+            first = await processor.process_document(make_versioned_pdf(4, set()), "v1.pdf", fast_options())
+            for page in first["pages"]:
+                await processor.store_page_result(page, {"text_content": f"第{page['page_info']['page_number']}页"})
+            
+            second = await processor.process_document(make_versioned_pdf(4, {2}), "v2.pdf", fast_options())
+            english = await processor.process_document(
+                make_versioned_pdf(4, set()), "v1.pdf", fast_options(language="en")
+            )
+        finally:
+            processor.close()
+        
+        assert [page["processing_path"] for page in second["pages"]] == [
+            ProcessingPath.CACHE, ProcessingPath.CACHE, ProcessingPath.RASTER, ProcessingPath.CACHE
+        ]
+        assert second["pages"][1]["ocr_result"]["text_content"] == "第2页"
+        assert second["pages"][1]["page_info"]["width"] == 595
+        assert second["pages"][2]["page_hash"] != first["pages"][2]["page_hash"]
+        assert second["page_stats"]["paths"][ProcessingPath.CACHE] == 3
+        assert second["page_stats"]["cache"]["hits"] == 3
+        assert second["page_stats"]["cache"]["hit_rate"] == 0.375
+        # 其他语言的识别结果不复用
+        assert english["page_stats"]["paths"][ProcessingPath.CACHE] == 0
+    
+    def test_shared_processor_uses_page_cache(self):
+        """测试全局文档处理器使用OCR服务的页面缓存配置"""
+        page_cache = OCRPageCache(InMemoryRedisClient())
+        with patch.object(document_processor_module, "_document_processor", None), \
+                patch("backend.core.ocr.ocr_service._create_page_cache", return_value=page_cache):
+            processor = get_document_processor()
+            assert get_document_processor() is processor
+        
+        assert processor.page_cache is page_cache
+
+
+class TestDocumentProcessorPerformance:
+    """文档处理器性能测试类"""
+    
+    @pytest.mark.asyncio
+    async def test_pdf_pages_stream_within_window(self):
+        """测试页面按页序产出，同时提交的页面不超过工作进程数的两倍"""
+        submitted = []
+        
+        class RecordingExecutor(ThreadPoolExecutor):
+            def submit(self, fn, *args, **kwargs):
+                if fn is document_processor_module._process_pdf_page_worker:
+                    submitted.append(args[1])
+                return super().submit(fn, *args, **kwargs)
+        
+        processor = DocumentProcessor(use_processes=False)
+        processor._executor = RecordingExecutor(max_workers=1)
+        page_numbers = []
+        in_flight = []
+        try:
+            async for page in processor.iter_pages(make_pdf(12), "a.pdf", fast_options()):
+                in_flight.append(len(submitted) - len(page_numbers))
+                page_numbers.append(page["page_info"]["page_number"])
+        finally:
+            processor.close()
+        
+        assert page_numbers == list(range(1, 13))
+        assert submitted == list(range(12))
+        assert max(in_flight) == processor.max_workers * 2
+    
+    @pytest.mark.asyncio
+    async def test_text_layer_skips_rasterization(self):
+        """测试原生数字PDF读取文本层时不渲染页面"""
+        document = fitz.open()
+        for index in range(5):
+            page = document.new_page(width=595, height=842)
+            for line in range(40):
+                page.insert_text((72, 60 + line * 18), f"Clause {index}.{line} " * 6, fontsize=9)
+        data = document.tobytes()
+        document.close()
+        processor = DocumentProcessor(use_processes=False)
+        
+        async def count_renders(use_text_layer: bool) -> int:
+            options = fast_options(use_text_layer=use_text_layer)
+            with patch.object(fitz.Page, "get_pixmap", autospec=True, side_effect=fitz.Page.get_pixmap) as get_pixmap:
+                result = await processor.process_document(data, "a.pdf", options)
+            assert result["page_stats"]["page_types"] == {PageType.DIGITAL: 5}
+            return get_pixmap.call_count
+        
+        try:
+            assert await count_renders(False) == 5
+            assert await count_renders(True) == 0
+        finally:
+            processor.close()
+    
+    @pytest.mark.asyncio
+    async def test_reingest_renders_only_changed_pages(self):
+        """测试大部分页面未变化时重新导入只渲染变化的页面"""
+        processor = DocumentProcessor(use_processes=False, page_cache=OCRPageCache(InMemoryRedisClient()))
+        options = fast_options()
+        try:
+            first = await processor.process_document(make_versioned_pdf(10, set()), "v1.pdf", options)
+            for page in first["pages"]:
+                await processor.store_page_result(page, {"text_content": "缓存文本"})
+            
+            with patch.object(
+                document_processor_module, "_process_pdf_page_worker",
+                wraps=document_processor_module._process_pdf_page_worker
+            ) as render_page:
+                second = await processor.process_document(make_versioned_pdf(10, {5}), "v2.pdf", options)
+        finally:
+            processor.close()
+        
+        assert [call.args[1] for call in render_page.call_args_list] == [5]
+        assert second["page_stats"]["paths"][ProcessingPath.CACHE] == 9
@@ -1,5 +1,6 @@
 import pytest
 import asyncio
+import re
 from unittest.mock import Mock, AsyncMock, patch
 from datetime import datetime
 import uuid
@@ -8,14 +9,14 @@ import pytest_asyncio
 
 from backend.core.knowledge_graph.entity_extractor import (
     EntityExtractor, EntityExtractionConfig, ExtractionMethod, EntityExtractionResult,
-    ExtractedEntity, EntityCategory
+    ExtractedEntity, EntityCategory, PatternMatcher
 )
 from backend.core.knowledge_graph.relation_extractor import (
     RelationExtractor, RelationExtractionConfig, RelationExtractionResult,
     ExtractedRelation, RelationCategory, RelationExtractionMethod
 )
 from backend.core.knowledge_graph.graph_manager import (
-    GraphManager, GraphConfig, GraphOperationResult, GraphMetrics, GraphSearchResult
+    GraphManager, GraphConfig, GraphOperationResult, GraphMetrics, GraphSearchResult, GraphOperationType
 )
 from backend.core.knowledge_graph.graph_analytics import (
     GraphAnalytics, AnalysisConfig, AnalysisType, AnalysisResult
@@ -23,8 +24,11 @@ from backend.core.knowledge_graph.graph_analytics import (
 from backend.core.knowledge_graph.graph_database import (
     GraphDatabase, DatabaseConfig, QueryResult
 )
+from backend.core.knowledge_graph import graph_query as graph_query_module
+from backend.core.knowledge_graph.graph_query import EntityNameIndex, GraphQuery, init_graph_query
 from backend.models.knowledge import Entity, Relation, KnowledgeGraph
 from backend.api.deps import CacheManager
+from backend.connectors.neo4j_client import Neo4jClient
 
 
 class TestEntityExtractor:
@@ -196,6 +200,81 @@ class TestEntityExtractor:
         
         # 验证合并结果
         assert len(merged) <= len(entities)
+    
+    @pytest.mark.asyncio
+    async def test_extract_from_documents_uses_batched_ner(self):
+        """测试多文档提取时整批执行NER并统计吞吐量"""
+        extractor = EntityExtractor(EntityExtractionConfig(
+            methods=[ExtractionMethod.NER], min_confidence=0.5
+        ))
+        extractor.nlp = Mock()
+        documents = [
+            Mock(id=f"doc_{i}", content=f"Apple {i}", title="", metadata={})
+            for i in range(3)
+        ]
+        batch_entities = [
+            [ExtractedEntity(
+                text="Apple", category=EntityCategory.ORGANIZATION, start_pos=0, end_pos=5,
+                confidence=0.8, context=doc.content, attributes={},
+                source_method=ExtractionMethod.NER
+            )]
+            for doc in documents
+        ]
+        
+        with patch.object(extractor, '_extract_with_ner_batch', AsyncMock(return_value=batch_entities)) as mock_batch, \
+             patch.object(extractor, '_extract_with_ner', AsyncMock()) as mock_single:
+            results = await extractor.extract_entities_from_documents(documents)
+        
+        mock_batch.assert_awaited_once_with(["Apple 0", "Apple 1", "Apple 2"])
+        mock_single.assert_not_called()
+        assert all(len(result.entities) == 1 for result in results.values())
+        
+        statistics = extractor.get_extraction_statistics(list(results.values()))
+        assert statistics["method_throughput"]["ner"]["documents"] == 3
+    
+    @pytest.mark.asyncio
+    async def test_pattern_matcher_combines_builtin_and_custom_patterns(self):
+        """测试内置和自定义模式编译为一次扫描且不随调用累积"""
+        extractor = EntityExtractor(EntityExtractionConfig(
+            methods=[ExtractionMethod.PATTERN],
+            custom_patterns={"product": [r"iPhone\s*\d+"]}
+        ))
+        text = "2023-01-05 发布 iPhone 15，售价 $999.00"
+        pattern_count = len(extractor._pattern_matcher)
+        
+        first = await extractor._extract_with_patterns(text)
+        second = await extractor._extract_with_patterns(text)
+        
+        assert [(e.text, e.category) for e in first] == [
+            ("2023-01-05", EntityCategory.DATE),
+            ("iPhone 15", EntityCategory.PRODUCT),
+            ("$999.00", EntityCategory.MONEY)
+        ]
+        assert len(second) == len(first)
+        assert len(extractor._pattern_matcher) == pattern_count
+    
+    def test_pattern_matcher_keeps_per_pattern_matches(self):
+        """测试组合扫描与逐个模式匹配结果一致，重叠匹配和命名分组均保留"""
+        patterns = [
+            (EntityCategory.LOCATION, "北京"),
+            (EntityCategory.ORGANIZATION, "北京大学"),
+            (EntityCategory.PRODUCT, r"(?P<model>iPhone)\s*\d+"),
+            (EntityCategory.PRODUCT, r"(?P<model>Pixel)\s*\d+"),
+            (EntityCategory.QUANTITY, r"\d+"),
+        ]
+        matcher = PatternMatcher(patterns)
+        text = "我在北京大学用 iPhone 15 和 Pixel 8，北京 123"
+        
+        expected = {
+            (category, pattern, match.start(), match.end())
+            for category, pattern in patterns
+            for match in re.finditer(pattern, text, re.IGNORECASE)
+        }
+        matches = list(matcher.finditer(text))
+        
+        assert len(matches) == len(expected) and set(matches) == expected
+        assert (EntityCategory.LOCATION, "北京", 2, 4) in matches
+        assert (EntityCategory.ORGANIZATION, "北京大学", 2, 6) in matches
 
 
 class TestRelationExtractor:
@@ -326,6 +405,35 @@ class TestRelationExtractor:
         assert len(pairs) >= 1
         assert (sample_entities[0], sample_entities[1]) in pairs or (sample_entities[1], sample_entities[0]) in pairs
     
+    def test_generate_entity_pairs_window_and_scope(self, extractor):
+        """测试滑动窗口实体对生成和句子范围限制"""
+        text = "Tim works for Apple. Google competes with Apple."
+        
+        def make_entity(name, start, category):
+            return ExtractedEntity(
+                text=name, category=category, start_pos=start, end_pos=start + len(name),
+                confidence=0.9, context="", attributes={}, source_method=ExtractionMethod.NER
+            )
+        
+        entities = [
+            make_entity("Google", 21, EntityCategory.ORGANIZATION),
+            make_entity("Tim", 0, EntityCategory.PERSON),
+            make_entity("Apple", 42, EntityCategory.ORGANIZATION),
+            make_entity("Apple", 14, EntityCategory.ORGANIZATION)
+        ]
+        extractor.config.max_entity_distance = 25
+        
+        pairs = extractor._generate_entity_pairs(entities, text)
+        names = {(a.text, a.start_pos, b.text, b.start_pos) for a, b in pairs}
+        
+        assert len(pairs) == 8
+        assert ("Tim", 0, "Apple", 14) in names and ("Apple", 14, "Tim", 0) in names
+        assert ("Tim", 0, "Apple", 42) not in names
+        
+        extractor.config.pair_scope = "sentence"
+        scoped = extractor._generate_entity_pairs(entities, text)
+        assert {(a.start_pos, b.start_pos) for a, b in scoped} == {(0, 14), (14, 0), (21, 42), (42, 21)}
+    
     def test_deduplicate_relations(self, extractor):
         """测试关系去重"""
         relations = [
@@ -843,6 +951,241 @@ class TestGraphDatabase:
         assert "num_relations" in stats_result.data
 
 
+class TestEntityNameIndex:
+    """进程内实体名称索引测试"""
+    
+    @pytest.fixture
+    def name_index(self):
+        """创建名称索引"""
+        index = EntityNameIndex()
+        index.add("1", "苹果公司", "ORG", 0.9)
+        index.add("2", "苹果", "PRODUCT", 0.5)
+        index.add("3", "Apple Inc", "ORG", 0.8)
+        index.add("4", "华为公司", "ORG", 0.7)
+        return index
+    
+    def test_search_ranks_exact_and_prefix_first(self, name_index):
+        """测试完全匹配和前缀匹配优先"""
+        results = name_index.search("苹果")
+        
+        assert [item["id"] for item in results] == ["2", "1"]
+        assert results[0]["relevance_score"] > results[1]["relevance_score"]
+    
+    def test_search_substring_and_type_filter(self, name_index):
+        """测试子串匹配和类型过滤"""
+        results = name_index.search("公司", entity_types=["ORG"])
+        
+        assert {item["id"] for item in results} == {"1", "4"}
+        assert name_index.search("app")[0]["name"] == "Apple Inc"
+    
+    def test_incremental_update_and_remove(self, name_index):
+        """测试增量更新和删除"""
+        name_index.add("1", "香蕉公司", "ORG", 0.9)
+        name_index.remove("4")
+        
+        assert [item["id"] for item in name_index.search("苹果")] == ["2"]
+        assert [item["id"] for item in name_index.search("公司")] == ["1"]
+        assert len(name_index) == 3
+    
+    def test_build_fulltext_query_escapes_lucene_syntax(self):
+        """测试全文查询转义"""
+        assert GraphQuery._build_fulltext_query("foo:bar app") == "foo\\:bar AND app*"
+        assert GraphQuery._build_fulltext_query("苹果 公司") == "苹果 AND 公司"
+        assert GraphQuery._build_fulltext_query("a&&b c||d") == "a\\&\\&b AND c\\|\\|d"
+    
+    @pytest.mark.asyncio
+    async def test_init_graph_query_creates_index_and_loads_names(self, monkeypatch):
+        """测试启动时创建全文索引、加载名称索引并注册全局查询器"""
+        executed = []
+        
+        async def run(cypher, parameters=None):
+            executed.append(" ".join(cypher.split()))
+            if "MATCH (n:Entity)" in cypher:
+                return [{"id": "1", "name": "苹果公司", "type": "ORG", "confidence": 0.9, "description": None}]
+            return []
+        
+        monkeypatch.setattr(graph_query_module, "_graph_query", None)
+        neo4j_client = Mock(spec=Neo4jClient)
+        neo4j_client.run = AsyncMock(side_effect=run)
+        
+        query = await init_graph_query(neo4j_client)
+        
+        assert graph_query_module.get_graph_query() is query
+        assert any(cypher.startswith("CREATE FULLTEXT INDEX") for cypher in executed)
+        assert query._fulltext_index_ready
+        assert query.name_index.search("苹果")[0]["id"] == "1"
+    
+    @pytest.mark.asyncio
+    async def test_entity_writes_update_name_index(self):
+        """测试实体增删和批量写入同步进程内名称索引"""
+        query = GraphQuery(Mock(), Mock())
+        neo4j_client = Mock()
+        neo4j_client.run = AsyncMock(return_value=[{"id": "2"}])
+        manager = GraphManager(
+            config=GraphConfig(enable_caching=False), neo4j_client=neo4j_client, graph_query=query
+        )
+        manager._record_operation = AsyncMock()
+        manager.get_entity_by_name = AsyncMock(return_value=None)
+        manager.graph_db = Mock()
+        manager.graph_db.create_entity = AsyncMock(return_value=True)
+        manager.graph_db.update_entity = AsyncMock(return_value=True)
+        manager.graph_db.get_entity_relations = AsyncMock(return_value=[])
+        manager.graph_db.delete_entity = AsyncMock(return_value=True)
+        
+        await manager.add_entity(Entity(id="1", name="苹果公司", entity_type="ORG"))
+        await manager.bulk_upsert_entities([Entity(id="2", name="苹果", entity_type="PRODUCT")])
+        assert {item["id"] for item in query.name_index.search("苹果")} == {"1", "2"}
+        
+        await manager.update_entity(Entity(id="1", name="香蕉公司", entity_type="ORG"))
+        await manager.delete_entity("2")
+        assert query.name_index.search("苹果") == []
+        assert query.name_index.search("香蕉")[0]["id"] == "1"
+    
+    @pytest.mark.asyncio
+    async def test_search_falls_back_to_name_index(self):
+        """测试全文索引不可用时使用进程内索引"""
+        neo4j_client = Mock(spec=Neo4jClient)
+        neo4j_client.run = AsyncMock(side_effect=[
+            [{"id": "1", "name": "苹果公司", "type": "ORG", "confidence": 0.9, "description": None}],
+        ])
+        query = GraphQuery(neo4j_client, Mock())
+        
+        await query.load_name_index()
+        result = await query.search_entities_by_text("苹果")
+        
+        assert result.query_type == "text_search_local"
+        assert result.data[0]["id"] == "1"
+    
+    @pytest.mark.asyncio
+    async def test_search_uses_fulltext_index_and_scan(self):
+        """测试全文索引查询和扫描回退按列名读取结果"""
+        row = {
+            "id": "1", "name": "苹果公司", "type": "ORG", "description": None,
+            "confidence": 0.9, "relevance_score": 2.5
+        }
+        neo4j_client = Mock(spec=Neo4jClient)
+        neo4j_client.run = AsyncMock(return_value=[row])
+        query = GraphQuery(neo4j_client, Mock())
+        
+        query._fulltext_index_ready = True
+        result = await query.search_entities_by_text("苹果")
+        assert result.query_type == "text_search"
+        assert result.data == [row]
+        assert "db.index.fulltext.queryNodes" in neo4j_client.run.call_args.args[0]
+        
+        query._fulltext_index_ready = False
+        result = await query.search_entities_by_text("苹果")
+        assert result.query_type == "text_search_scan"
+        assert result.data == [row]
+        assert "CONTAINS" in neo4j_client.run.call_args.args[0]
+
+
+class TestGraphManagerBulkWrite:
+    """图管理器批量写入测试"""
+    
+    @pytest.fixture
+    def entities(self):
+        return [Entity(id=f"e{i}", name=f"实体{i}", entity_type="ORG") for i in range(25)]
+    
+    @pytest.mark.asyncio
+    async def test_bulk_write_one_statement_per_chunk(self, entities):
+        """测试每个分块一条 UNWIND 语句，失败分块整体报告"""
+        statements = []
+        
+        async def run(cypher, params):
+            statements.append((cypher, params))
+            if any(row["id"] == "e12" for row in params["rows"]):
+                raise RuntimeError("约束冲突")
+            return [{"id": row["id"]} for row in params["rows"]]
+        
+        neo4j_client = Mock()
+        neo4j_client.run = AsyncMock(side_effect=run)
+        manager = GraphManager(config=GraphConfig(enable_caching=False), neo4j_client=neo4j_client)
+        
+        result = await manager.bulk_upsert_entities(entities, chunk_size=10)
+        
+        assert len(statements) == 3
+        assert statements[0][0].startswith("UNWIND $rows AS row MERGE (e:Entity")
+        assert [len(params["rows"]) for _, params in statements] == [10, 10, 5]
+        assert (result.total, result.successful, result.failed) == (25, 15, 10)
+        assert result.chunks[1]["error"] == "约束冲突"
+        assert result.failed_ids == [f"e{i}" for i in range(10, 20)]
+        assert manager.nx_graph.has_node("e0") and not manager.nx_graph.has_node("e12")
+    
+    @pytest.mark.asyncio
+    async def test_bulk_written_entities_read_back_through_graph_query(self):
+        """测试批量写入的实体属性与图查询读取的属性一致"""
+        nodes = {}
+        
+        async def run(cypher, params=None):
+            if cypher.startswith("UNWIND"):
+                assignments = re.findall(r"e\.(\w+) = row\.(\w+)", cypher)
+                for row in params["rows"]:
+                    node = nodes.setdefault(row["id"], {"id": row["id"]})
+                    node.update({prop: row[field] for prop, field in assignments})
+                return [{"id": row["id"]} for row in params["rows"]]
+            columns = re.findall(r"n\.(\w+) as (\w+)", cypher)
+            rows = list(nodes.values())[params["offset"]:params["offset"] + params["limit"]]
+            return [{alias: node.get(prop) for prop, alias in columns} for node in rows]
+        
+        neo4j_client = Mock(spec=Neo4jClient)
+        neo4j_client.run = AsyncMock(side_effect=run)
+        query = GraphQuery(neo4j_client, Mock())
+        manager = GraphManager(
+            config=GraphConfig(enable_caching=False), neo4j_client=neo4j_client, graph_query=query
+        )
+        
+        await manager.bulk_upsert_entities([
+            Entity(id="e1", name="苹果公司", entity_type="ORG", confidence_score=0.9, description="科技公司")
+        ])
+        await query.load_name_index()
+        
+        entity = query.name_index.search("苹果")[0]
+        assert (entity["id"], entity["type"], entity["confidence"], entity["description"]) == (
+            "e1", "ORG", 0.9, "科技公司"
+        )
+    
+    @pytest.mark.asyncio
+    async def test_bulk_write_reports_skipped_rows(self, entities):
+        """测试关系端点不存在时被 MATCH 跳过的行按失败报告"""
+        existing = {"e0", "e1", "e2"}
+        
+        async def run(cypher, params):
+            return [
+                {"id": row["id"]} for row in params["rows"]
+                if row["source_id"] in existing and row["target_id"] in existing
+            ]
+        
+        neo4j_client = Mock()
+        neo4j_client.run = AsyncMock(side_effect=run)
+        manager = GraphManager(config=GraphConfig(enable_caching=False), neo4j_client=neo4j_client)
+        relations = [
+            Relation(id=f"r{i}", source_entity_id=f"e{i}", target_entity_id=f"e{i + 1}", relation_type="RELATED_TO")
+            for i in range(4)
+        ]
+        
+        result = await manager.bulk_upsert_relations(relations, chunk_size=10)
+        
+        assert neo4j_client.run.await_args.args[0].endswith("RETURN row.id AS id")
+        assert (result.successful, result.failed) == (2, 2)
+        assert result.failed_ids == ["r2", "r3"]
+        assert "关系端点" in result.chunks[0]["error"]
+    
+    @pytest.mark.asyncio
+    async def test_bulk_write_falls_back_to_single_writes(self, entities):
+        """测试未配置Neo4j时逐条写入并按记录报告失败"""
+        manager = GraphManager(config=GraphConfig(enable_caching=False))
+        manager.update_entity = AsyncMock(side_effect=lambda entity, user_id=None: entity.id != "e3")
+        
+        result = await manager.bulk_upsert_entities(
+            entities[:5], operation_type=GraphOperationType.UPDATE, chunk_size=2
+        )
+        
+        assert manager.update_entity.await_count == 5
+        assert [chunk["failed_ids"] for chunk in result.chunks] == [[], ["e3"], []]
+        assert result.successful == 4
+
+
 class TestKnowledgeGraphIntegration:
     """知识图谱集成测试"""
     
@@ -1,6 +1,8 @@
 """Tests for LLM Orchestrator."""
 
 import asyncio
+import tracemalloc
+from collections import deque
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 from datetime import datetime
@@ -14,11 +16,13 @@ from backend.core.llm.llm_orchestrator import (
     Message,
     LLMResponse,
     LLMRequest,
+    LLMMetrics,
     BaseLLMProvider,
     OpenAIProvider,
     AnthropicProvider,
     HuggingFaceProvider
 )
+from backend.utils.performance import DEFAULT_LATENCY_BUCKETS
 
 
 class MockLLMProvider(BaseLLMProvider):
@@ -470,5 +474,96 @@ class TestLLMDataModels:
         assert request.context["session_id"] == "test"
 
 
+class TestLLMMetrics:
+    """Tests for streaming request metrics."""
+    
+    @pytest.mark.asyncio
+    async def test_rolling_metrics_by_model(self, sample_config, sample_messages):
+        """Test counters, latency percentiles and per-provider/model grouping."""
+        orchestrator = LLMOrchestrator(history_size=5)
+        orchestrator.register_provider("primary", sample_config)
+        orchestrator.register_provider("backup", sample_config)
+        
+        responses = [
+            LLMResponse(
+                content="ok",
+                model="gpt-3.5-turbo",
+                provider=ModelProvider.OPENAI,
+                usage={"total_tokens": 10},
+                response_time=(index + 1) / 100
+            )
+            for index in range(20)
+        ]
+        orchestrator.get_provider("primary").generate = AsyncMock(side_effect=responses)
+        orchestrator.get_provider("backup").generate = AsyncMock(return_value=LLMResponse(
+            content="",
+            model="gpt-3.5-turbo",
+            provider=ModelProvider.OPENAI,
+            usage={"total_tokens": 10},
+            response_time=2.0,
+            error="rate limited"
+        ))
+        
+        for _ in range(20):
+            await orchestrator.generate(sample_messages, provider_name="primary")
+        await orchestrator.generate(sample_messages, provider_name="backup")
+        
+        metrics = orchestrator.get_metrics()
+        assert metrics["total_requests"] == 21
+        assert metrics["successful_requests"] == 20
+        assert metrics["failed_requests"] == 1
+        assert metrics["total_tokens"] == 200
+        assert metrics["latency"]["count"] == 21
+        assert metrics["latency"]["max_ms"] == 2000
+        
+        primary = metrics["by_model"]["primary/gpt-3.5-turbo"]
+        assert primary["total_requests"] == 20
+        assert 75 <= primary["latency"]["p50_ms"] <= 125
+        assert 150 <= primary["latency"]["p95_ms"] <= 200
+        assert metrics["by_model"]["backup/gpt-3.5-turbo"]["failed_requests"] == 1
+        # 指数衰减平均偏向最近的响应
+        assert primary["average_response_time"] > primary["latency"]["mean_ms"] / 1000
+        
+        assert len(orchestrator.request_history) == 5
+        assert len(orchestrator.response_history) == 5
+        
+        orchestrator.clear_history()
+        assert orchestrator.get_metrics()["total_requests"] == 0
+        assert orchestrator.get_metrics()["by_model"] == {}
+    
+    def test_memory_is_flat(self):
+        """Test that metrics memory does not grow with the number of requests."""
+        metrics = LLMMetrics()
+        tracemalloc.start()
+        try:
+            for index in range(10000):
+                metrics.record_response((index % 500) / 100, success=index % 7 != 0, tokens=20)
+            baseline, _ = tracemalloc.get_traced_memory()
+            for index in range(200000):
+                metrics.record_response((index % 500) / 100, success=index % 7 != 0, tokens=20)
+            current, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        
+        assert metrics.latency.count == 210000
+        assert current - baseline < 4096
+    
+    def test_updates_keep_no_history(self):
+        """Test that responses land in fixed histogram buckets instead of a stored history."""
+        metrics = LLMMetrics()
+        
+        # 首个分桶上界 5ms（含边界），最后一个分桶之外记入溢出桶
+        for _ in range(1250):
+            for response_time in (0.001, 0.005, 0.006, 1000.0):
+                metrics.record_response(response_time, success=True)
+        
+        counts = metrics.latency.counts
+        assert len(counts) == len(DEFAULT_LATENCY_BUCKETS) + 1
+        assert (counts[0], counts[1], counts[-1], sum(counts)) == (2500, 1250, 1250, 5000)
+        assert metrics.successful_requests == 5000
+        # 除固定长度的分桶计数外不保存任何响应序列
+        assert not [value for value in vars(metrics).values() if isinstance(value, (list, tuple, deque))]
+        assert vars(metrics.latency).keys() == {"buckets", "counts", "count", "total", "max"}
+
 if __name__ == "__main__":
     pytest.main([__file__])
\ No newline at end of file
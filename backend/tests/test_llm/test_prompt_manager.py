@@ -538,6 +538,122 @@ Your items:
             renderer.render(template, variables)
 
 
+def make_rag_template(version: str = "1.0.0") -> PromptTemplate:
+    """Create a typical RAG answer prompt."""
+    return PromptTemplate(
+        id="rag_answer",
+        name="RAG Answer",
+        description="Answer a question from retrieved chunks",
+        content="""你是企业知识库助手。请仅根据以下检索到的资料回答问题。
+{% for chunk in chunks %}
+[{{loop.index}}] {{chunk.title}}（{{chunk.source}}，相关度 {{"%.2f"|format(chunk.score)}}）
+{{chunk.text|truncate(300)}}
+{% endfor %}
+{% if history %}
+对话历史：
+{% for turn in history %}
+{{turn.role}}: {{turn.content}}
+{% endfor %}
+{% endif %}
+问题：{{question}}
+请用{{language}}回答，并以 [编号] 标注引用的资料。""",
+        type=PromptType.USER,
+        category=PromptCategory.QUESTION_ANSWERING,
+        format=PromptFormat.JINJA2,
+        version=version,
+        variables=[
+            PromptVariable(name="chunks", type="list", description="检索结果", required=True),
+            PromptVariable(name="history", type="list", description="对话历史", required=False, default_value=[]),
+            PromptVariable(name="question", type="str", description="用户问题", required=True),
+            PromptVariable(name="language", type="str", description="回答语言", required=False, default_value="中文")
+        ]
+    )
+
+
+def make_rag_variables() -> Dict[str, Any]:
+    return {
+        "chunks": [
+            {"title": f"制度文件 {index}", "source": f"doc-{index}.pdf", "score": 0.9 - index / 20,
+             "text": "报销申请需在费用发生后三十天内提交，并附上发票原件和审批记录。" * 3}
+            for index in range(5)
+        ],
+        "history": [{"role": "user", "content": "差旅报销流程是什么？"}],
+        "question": "报销的截止时间是多久？"
+    }
+
+
+class TestPromptRenderCache:
+    """Test compiled template caching."""
+    
+    def test_compiled_template_reused(self):
+        """Test that repeated renders compile the template once."""
+        renderer = PromptRenderer()
+        template = make_rag_template()
+        
+        with patch.object(renderer.jinja_env, "from_string", wraps=renderer.jinja_env.from_string) as from_string:
+            first = renderer.render(template, make_rag_variables())
+            for _ in range(10):
+                assert renderer.render(template, make_rag_variables()) == first
+        
+        assert from_string.call_count == 1
+        assert "[5] 制度文件 4" in first
+        assert renderer.get_cache_stats()["hits"] == 10
+    
+    def test_version_and_content_changes(self):
+        """Test that new versions and in-place content edits are recompiled."""
+        renderer = PromptRenderer(cache_size=2)
+        template = make_rag_template()
+        renderer.render(template, make_rag_variables())
+        
+        template.content = template.content.replace("企业知识库助手", "客服助手")
+        assert renderer.render(template, make_rag_variables()).startswith("你是客服助手")
+        
+        renderer.render(make_rag_template(version="1.1.0"), make_rag_variables())
+        renderer.render(make_rag_template(version="1.2.0"), make_rag_variables())
+        assert renderer.get_cache_stats()["size"] == 2
+        assert renderer.get_cache_stats()["misses"] == 4
+    
+    def test_manager_update_invalidates(self):
+        """Test that PromptManager updates and deletes drop cached compilations."""
+        manager = PromptManager()
+        assert manager.add_template(make_rag_template())
+        manager.render_template("rag_answer", make_rag_variables())
+        assert manager.renderer.get_cache_stats()["size"] == 1
+        
+        content = make_rag_template().content.replace("请仅根据", "请严格根据")
+        assert manager.update_template("rag_answer", {"content": content})
+        assert manager.renderer.get_cache_stats()["size"] == 0
+        assert "请严格根据" in manager.render_template("rag_answer", make_rag_variables())
+        
+        assert manager.delete_template("rag_answer")
+        assert manager.renderer.get_cache_stats()["size"] == 0
+        assert manager.get_statistics()["render_cache"]["misses"] == 2
+
+
+class TestPromptRenderPerformance:
+    """Compiled template cache behaviour for prompt rendering."""
+    
+    def test_rag_render_matches_compile_per_render(self):
+        """Test that cached renders match compiling on every render, compiling once."""
+        renderer = PromptRenderer()
+        template = make_rag_template()
+        variables = make_rag_variables()
+        for var in template.variables:
+            if var.default_value is not None:
+                variables.setdefault(var.name, var.default_value)
+        
+        # 原实现：每次渲染都重新解析、编译模板
+        expected = renderer.jinja_env.from_string(template.content).render(**variables)
+        
+        with patch.object(renderer.jinja_env, "from_string", wraps=renderer.jinja_env.from_string) as from_string:
+            for _ in range(20):
+                assert renderer.render(template, dict(variables)) == expected
+        
+        assert from_string.call_count == 1
+        assert renderer.get_cache_stats()["misses"] == 1
+        assert renderer.get_cache_stats()["hits"] == 19
+
+
 class TestPromptDataModels:
     """Test prompt data models."""
     
@@ -0,0 +1,138 @@
+"""Neo4j 客户端测试
+
+使用模拟的异步驱动测试流式查询和单事务批量执行。
+"""
+
+from types import SimpleNamespace
+
+import pytest
+from neo4j.exceptions import TransientError
+
+from backend.connectors.neo4j_client import Neo4jClient, Neo4jQueryError
+
+
+class FakeResult:
+    """异步迭代的查询结果"""
+
+    def __init__(self, records, fail_after=None, counters=None):
+        self.records = records
+        self.fail_after = fail_after
+        self.counters = counters or {}
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for index, record in enumerate(self.records):
+            if self.fail_after is not None and index >= self.fail_after:
+                raise TransientError("连接中断")
+            yield record
+
+    async def consume(self):
+        return SimpleNamespace(counters=SimpleNamespace(**self.counters))
+
+
+class FakeTransaction:
+    def __init__(self, driver):
+        self.driver = driver
+
+    async def run(self, cypher, parameters):
+        self.driver.statements.append((cypher, parameters))
+        return FakeResult([], counters={"nodes_created": len(parameters.get("rows", [])), "contains_updates": True})
+
+
+class FakeSession:
+    def __init__(self, driver, kwargs):
+        self.driver = driver
+        self.kwargs = kwargs
+
+    async def run(self, cypher, parameters):
+        self.driver.statements.append((cypher, parameters))
+        return FakeResult(self.driver.records, fail_after=self.driver.fail_after)
+
+    async def execute_write(self, work, *args, **kwargs):
+        self.driver.transactions += 1
+        return await work(FakeTransaction(self.driver), *args, **kwargs)
+
+    async def close(self):
+        self.driver.closed_sessions += 1
+
+
+class FakeDriver:
+    """记录会话参数、语句和事务次数的驱动"""
+
+    def __init__(self, records=None, fail_after=None):
+        self.records = records or []
+        self.fail_after = fail_after
+        self.sessions = []
+        self.statements = []
+        self.transactions = 0
+        self.closed_sessions = 0
+
+    def session(self, **kwargs):
+        self.sessions.append(kwargs)
+        return FakeSession(self, kwargs)
+
+
+def make_client(driver: FakeDriver) -> Neo4jClient:
+    client = Neo4jClient("bolt://localhost:7687", "neo4j", "password", fetch_size=500)
+    client._driver = driver
+    client._connected = True
+    return client
+
+
+class TestNeo4jClient:
+    """Neo4j 客户端测试类"""
+
+    @pytest.mark.asyncio
+    async def test_stream_yields_records(self):
+        """测试流式查询逐条产出记录并按 fetch_size 拉取"""
+        driver = FakeDriver(records=[{"id": index} for index in range(5)])
+        client = make_client(driver)
+
+        records = [record async for record in client.stream("MATCH (n) RETURN n.id AS id", fetch_size=2)]
+
+        assert records == [{"id": index} for index in range(5)]
+        assert driver.sessions == [{"database": "neo4j", "fetch_size": 2}]
+        assert driver.closed_sessions == 1
+        assert client._query_count == 1
+
+        [record async for record in client.stream("MATCH (n) RETURN n.id AS id")]
+        assert driver.sessions[-1]["fetch_size"] == 500
+
+    @pytest.mark.asyncio
+    async def test_stream_error_is_not_retried(self):
+        """测试已产出部分记录后出错时抛出查询错误而不重试"""
+        driver = FakeDriver(records=[{"id": index} for index in range(5)], fail_after=3)
+        client = make_client(driver)
+        received = []
+
+        with pytest.raises(Neo4jQueryError):
+            async for record in client.stream("MATCH (n) RETURN n.id AS id"):
+                received.append(record)
+
+        assert len(received) == 3
+        assert len(driver.statements) == 1
+        assert client._error_count >= 1
+
+    @pytest.mark.asyncio
+    async def test_run_many_single_transaction(self):
+        """测试批量语句在同一个写事务中执行并汇总更新计数"""
+        driver = FakeDriver()
+        client = make_client(driver)
+        statements = [
+            ("UNWIND $rows AS row CREATE (:Entity {id: row.id})", {"rows": [{"id": 1}, {"id": 2}]}),
+            ("UNWIND $rows AS row CREATE (:Entity {id: row.id})", {"rows": [{"id": 3}]}),
+            ("MATCH (n:Entity) SET n.checked = true", None),
+        ]
+
+        totals = await client.run_many(statements)
+
+        assert driver.transactions == 1
+        assert [parameters for _, parameters in driver.statements] == [
+            {"rows": [{"id": 1}, {"id": 2}]}, {"rows": [{"id": 3}]}, {}
+        ]
+        assert totals == {"statements": 3, "nodes_created": 3}
+        assert client._query_count == 3
+        assert await client.run_many([]) == {"statements": 0}
+        assert driver.transactions == 1
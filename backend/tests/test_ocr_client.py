@@ -0,0 +1,238 @@
+"""OCR 服务客户端测试
+
+使用本地 aiohttp 服务端测试连接复用、流式上传、批量提交并发上限与客户端延迟统计。
+"""
+
+import asyncio
+import hashlib
+import io
+from pathlib import Path
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+
+from backend.core.ocr.ocr_service import OCRService
+from backend.core.ocr.page_cache import OCRPageCache
+from backend.utils.performance import LatencyHistogram
+
+
+class FakeOCRServer:
+    """记录上传内容、客户端连接和并发数的 OCR 服务"""
+
+    def __init__(self, delay: float = 0.0, failures: int = 0):
+        self.delay = delay
+        self.failures = failures
+        self.uploads = []
+        self.params = []
+        self.peers = set()
+        self.running = 0
+        self.peak = 0
+
+    async def process(self, request: web.Request) -> web.Response:
+        self.peers.add(request.transport.get_extra_info("peername"))
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            form = await request.post()
+            content = form["file"].file.read()
+            self.uploads.append((form["file"].filename, content))
+            self.params.append(dict(request.query))
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            if self.failures:
+                self.failures -= 1
+                return web.Response(status=500, text="busy")
+            return web.json_response({
+                "task_id": f"t{len(self.uploads)}", "status": "completed",
+                "text_content": f"{len(content)}", "confidence_score": 0.9, "tables": []
+            })
+        finally:
+            self.running -= 1
+
+    async def metrics(self, request: web.Request) -> web.Response:
+        return web.json_response({"total_tasks": len(self.uploads)})
+
+
+@pytest_asyncio.fixture
+async def ocr_server():
+    servers = []
+
+    async def start(**kwargs):
+        server = FakeOCRServer(**kwargs)
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_post("/ocr/process", server.process)
+        app.router.add_get("/metrics", server.metrics)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        servers.append(runner)
+        return server, f"http://127.0.0.1:{port}"
+
+    yield start
+    for runner in servers:
+        await runner.cleanup()
+
+
+def make_service(url: str, **kwargs) -> OCRService:
+    service = OCRService(**kwargs)
+    service.ocr_service_url = url
+    return service
+
+
+class FakeObjectResponse(io.BytesIO):
+    """minio get_object 返回的响应"""
+
+    released = 0
+
+    def release_conn(self):
+        FakeObjectResponse.released += 1
+
+
+class FakeMinio:
+    def __init__(self, objects):
+        self.client = self
+        self.objects = objects
+
+    def get_object(self, bucket_name, object_name):
+        return FakeObjectResponse(self.objects[(bucket_name, object_name)])
+
+
+class FakeRedisClient:
+    def __init__(self):
+        self.client = self
+        self.data = {}
+
+    async def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+
+class TestOCRClient:
+    """OCR 服务客户端测试类"""
+
+    @pytest.mark.asyncio
+    async def test_pooled_session_reuses_connection(self, ocr_server):
+        """测试顺序请求复用同一个连接，查询参数按接口要求发送"""
+        server, url = await ocr_server()
+        service = make_service(url)
+        try:
+            for index in range(5):
+                await service.process_document(b"page-%d" % index, f"{index}.png", extract_tables=False)
+        finally:
+            await service.close()
+
+        assert len(server.peers) == 1
+        assert server.params[0]["extract_tables"] == "false"
+        assert server.params[0]["language"] == "zh-cn"
+        assert service.get_client_metrics()["latency"]["process"]["count"] == 5
+
+    @pytest.mark.asyncio
+    async def test_streams_path_and_file_object_with_retry(self, ocr_server, tmp_path):
+        """测试文件路径和文件对象流式上传，重试时重新发送完整内容"""
+        server, url = await ocr_server(failures=1)
+        content = bytes(range(256)) * 12 * 1024
+        path = tmp_path / "scan.png"
+        path.write_bytes(content)
+        service = make_service(url, page_cache=OCRPageCache(FakeRedisClient()))
+        service.max_retries = 2
+        try:
+            from_path = await service.process_document(Path(path), "scan.png")
+            stream = io.BytesIO(b"header" + content)
+            stream.seek(6)
+            from_stream = await service.process_document(stream, "scan-copy.png")
+        finally:
+            await service.close()
+
+        # 第一次上传失败重试，第二个文件内容相同命中缓存
+        assert [upload[1] for upload in server.uploads] == [content, content]
+        assert from_path.status == "completed"
+        assert from_stream.metadata["cache_hit"] is True
+        assert from_stream.metadata["page_hash"] == hashlib.sha256(content).hexdigest()
+        assert not stream.closed
+        assert service.get_client_metrics()["errors"] == {}
+
+    @pytest.mark.asyncio
+    async def test_streams_minio_object(self, ocr_server):
+        """测试 MinIO 对象直接转发，上传时计算的哈希用于写入缓存"""
+        server, url = await ocr_server()
+        content = b"\x89PNG" + b"1" * 300000
+        cache = OCRPageCache(FakeRedisClient())
+        minio = FakeMinio({("knowledge-documents", "2024/invoice.png"): content})
+        service = make_service(url, page_cache=cache, minio_client=minio)
+        FakeObjectResponse.released = 0
+        try:
+            result = await service.process_object("knowledge-documents", "2024/invoice.png")
+        finally:
+            await service.close()
+
+        assert server.uploads == [("invoice.png", content)]
+        assert FakeObjectResponse.released == 1
+        assert result.text_content == str(len(content))
+        assert (await cache.get(hashlib.sha256(content).hexdigest()))["text_content"] == str(len(content))
+
+    @pytest.mark.asyncio
+    async def test_batch_concurrency_is_bounded(self, ocr_server):
+        """测试批量提交的并发数不超过上限，结果与文件一一对应"""
+        server, url = await ocr_server(delay=0.05)
+        service = make_service(url, batch_concurrency=3)
+        files = [{"file_data": b"x" * (index + 1), "filename": f"{index}.png"} for index in range(10)]
+        files.append({"file_data": b"text", "filename": "notes.txt"})
+        try:
+            result = await service.process_batch(files)
+            metrics = await service.get_service_metrics()
+        finally:
+            await service.close()
+
+        assert server.peak == 3
+        assert result["total_files"] == 11
+        assert result["skipped_files"] == 1
+        assert sorted(int(item["text_content"]) for item in result["results"]) == list(range(1, 11))
+        assert len(server.peers) <= 3
+        assert metrics["total_tasks"] == 10
+        assert metrics["client"]["latency"]["process"]["count"] == 10
+        assert metrics["client"]["latency"]["process"]["p50_ms"] >= 40
+
+
+class TestLatencyHistogram:
+    """延迟直方图测试类"""
+
+    def test_percentiles(self):
+        """测试分位数估计误差在分桶宽度内"""
+        histogram = LatencyHistogram()
+        for index in range(1, 1001):
+            histogram.observe(index / 1000)
+
+        summary = histogram.to_dict()
+        assert summary["count"] == 1000
+        assert summary["mean_ms"] == pytest.approx(500.5)
+        assert summary["max_ms"] == 1000
+        assert 400 <= summary["p50_ms"] <= 600
+        assert 900 <= summary["p95_ms"] <= 1000
+        assert 950 <= summary["p99_ms"] <= 1000
+        assert sum(summary["buckets"].values()) == 1000
+
+
+class TestOCRClientPerformance:
+    """OCR 服务客户端性能测试类"""
+
+    @pytest.mark.asyncio
+    async def test_pooled_session_reuses_connections(self, ocr_server):
+        """测试批量提交复用连接池，连接数和并发数不超过 batch_concurrency"""
+        server, url = await ocr_server(delay=0.002)
+        files = [{"file_data": b"p" * 2000, "filename": f"{index}.png"} for index in range(20)]
+
+        pooled = make_service(url, batch_concurrency=4)
+        try:
+            result = await pooled.process_batch(files)
+        finally:
+            await pooled.close()
+
+        assert len(result["results"]) == 20
+        assert len(server.peers) <= 4
+        assert server.peak <= 4
+        assert pooled.get_client_metrics()["latency"]["process"]["count"] == 20
@@ -0,0 +1,277 @@
+"""OCR 页面缓存测试
+
+测试按内容哈希缓存OCR结果、MinIO回填、OCR服务调用前的缓存查询以及逐页识别结果的写回。
+"""
+
+import asyncio
+import hashlib
+import io
+import json
+import time
+from unittest.mock import AsyncMock, patch
+
+import fitz
+import pytest
+from PIL import Image, ImageDraw
+
+from backend.core.ocr.document_processor import DocumentProcessor, ProcessingPath
+from backend.core.ocr.ocr_service import OCRResponse, OCRService
+from backend.core.ocr.page_cache import OCRPageCache, hash_page_bytes, hash_pdf_page
+
+
+class FakeRedis:
+    """只实现缓存用到的命令"""
+
+    def __init__(self):
+        self.data = {}
+        self.expires = {}
+
+    async def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+        self.expires[key] = ex
+        return True
+
+
+class FakeRedisClient:
+    def __init__(self):
+        self.client = FakeRedis()
+
+
+class FakeMinio:
+    def __init__(self):
+        self.objects = {}
+
+    def get_bucket_name(self, bucket_type):
+        return f"knowledge-{bucket_type}"
+
+    async def upload_data(self, bucket, object_name, data, content_type=None):
+        self.objects[(bucket, object_name)] = data
+        return True
+
+    async def object_exists(self, bucket, object_name):
+        return (bucket, object_name) in self.objects
+
+    async def download_data(self, bucket, object_name):
+        return self.objects.get((bucket, object_name))
+
+
+class StatusResponse:
+    status = 200
+
+    def __init__(self, payload):
+        self.payload = payload
+
+    async def json(self):
+        return self.payload
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+
+class StatusSession:
+    """返回固定任务状态的会话"""
+
+    def __init__(self, payload):
+        self.payload = payload
+
+    def get(self, url, timeout=None):
+        return StatusResponse(self.payload)
+
+
+def make_png(text: str) -> bytes:
+    image = Image.new("RGB", (300, 420), color=(240, 240, 240))
+    ImageDraw.Draw(image).text((20, 20), text, fill=(0, 0, 0))
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def make_page(document, text):
+    page = document.new_page(width=595, height=842)
+    page.insert_text((72, 72), text, fontsize=12)
+
+
+OCR_RESULT = {
+    "text_content": "合同编号 001",
+    "confidence_score": 0.93,
+    "lines": [{"text": "合同编号 001", "confidence": 0.93, "bbox": [[0, 0], [10, 0], [10, 5], [0, 5]]}],
+    "tables": [],
+    "image_size": (800, 600)
+}
+
+
+class TestOCRPageCache:
+    """OCR 页面缓存测试类"""
+
+    def test_pdf_page_hash_stable_across_document_versions(self):
+        """测试同一页面在新版本文档中哈希不变"""
+        first = fitz.open()
+        for text in ("条款一", "条款二"):
+            make_page(first, text)
+        second = fitz.open()
+        for text in ("封面", "条款一", "条款二 修订"):
+            make_page(second, text)
+
+        first_hashes = [hash_pdf_page(first, page, 300) for page in first]
+        second_hashes = [hash_pdf_page(second, page, 300) for page in second]
+
+        assert second_hashes[1] == first_hashes[0]
+        assert second_hashes[2] != first_hashes[1]
+        assert hash_pdf_page(first, first[0], 150) != first_hashes[0]
+
+    @pytest.mark.asyncio
+    async def test_redis_and_minio_tiers(self):
+        """测试写入两层缓存，Redis 未命中时从 MinIO 回填"""
+        minio = FakeMinio()
+        cache = OCRPageCache(FakeRedisClient(), minio, model_version="2.1.0", ttl=60)
+        page_hash = hash_page_bytes(b"page")
+
+        await cache.set(page_hash, OCR_RESULT)
+
+        key = f"ocr:page:2.1.0:zh-cn:{page_hash}"
+        stored = json.loads(cache.redis_client.client.data[key])
+        assert stored["text_content"] == "合同编号 001"
+        assert "image_size" not in stored
+        assert cache.redis_client.client.expires[key] == 60
+        assert ("knowledge-ocr_cache", f"2.1.0/zh-cn/{page_hash}.json") in minio.objects
+
+        cold = OCRPageCache(FakeRedisClient(), minio, model_version="2.1.0")
+        found = await cold.get_many([page_hash, "missing", page_hash])
+        assert found[page_hash]["lines"] == OCR_RESULT["lines"]
+        assert key in cold.redis_client.client.data
+        assert cold.get_stats() == {"model_version": "2.1.0", "hits": 2, "misses": 1, "hit_rate": 0.6667}
+
+        other_version = OCRPageCache(cache.redis_client, model_version="2.2.0")
+        assert await other_version.get(page_hash) is None
+        assert await cache.get(page_hash, "en") is None
+
+    @pytest.mark.asyncio
+    async def test_ocr_service_checks_cache_before_upload(self):
+        """测试重复上传的文件命中缓存，不再调用 OCR 服务"""
+        cache = OCRPageCache(FakeRedisClient())
+        service = OCRService(page_cache=cache)
+        response = OCRResponse(
+            task_id="t1", status="completed", text_content="合同编号 001", tables=[],
+            confidence_score=0.93, metadata={"text_lines": OCR_RESULT["lines"]}
+        )
+        file_bytes = b"\x89PNG" + b"0" * 200
+
+        with patch.object(service, "_call_ocr_service", AsyncMock(return_value=response)) as mock_call:
+            first = await service.process_document(file_bytes, "scan.png")
+            second = await service.process_document(file_bytes, "scan-copy.png")
+
+        assert mock_call.await_count == 1
+        assert first.task_id == "t1"
+        assert second.status == "completed"
+        assert second.text_content == "合同编号 001"
+        assert second.metadata["cache_hit"] is True
+        assert second.metadata["page_hash"] == hashlib.sha256(file_bytes).hexdigest()
+        assert service.get_cache_stats()["hit_rate"] == 0.5
+
+    @pytest.mark.asyncio
+    async def test_ocr_service_caches_completed_async_task(self):
+        """测试异步任务完成后写入缓存"""
+        cache = OCRPageCache(FakeRedisClient())
+        service = OCRService(page_cache=cache)
+        processing = OCRResponse(task_id="t2", status="processing")
+
+        with patch.object(service, "_call_ocr_service", AsyncMock(return_value=processing)):
+            await service.process_document(b"0" * 200, "scan.png", extract_tables=False)
+
+        assert list(service._pending_results) == ["t2"]
+        assert service._pending_results["t2"][:3] == (cache, hash_page_bytes(b"0" * 200), "zh-cn")
+        completed = {"task_id": "t2", "status": "completed", "text_content": "文本", "confidence_score": 0.9}
+
+        with patch.object(service, "_get_session", lambda: StatusSession(completed)):
+            await service.get_task_status("t2")
+
+        assert not service._pending_results
+        assert (await cache.get(hash_page_bytes(b"0" * 200)))["text_content"] == "文本"
+
+    @pytest.mark.asyncio
+    async def test_process_pages_writes_page_results(self):
+        """测试逐页识别的结果写回页面缓存，再次识别时不再渲染和上传"""
+        cache = OCRPageCache(FakeRedisClient())
+        processor = DocumentProcessor(use_processes=False, page_cache=cache)
+        service = OCRService()
+        document = fitz.open()
+        for text in ("Clause 1", "Clause 2"):
+            page = document.new_page(width=100, height=140)
+            page.insert_image(page.rect, stream=make_png(text))
+        pdf = document.tobytes()
+        responses = [
+            OCRResponse(task_id="p1", status="completed", text_content="条款一", confidence_score=0.9),
+            OCRResponse(task_id="p2", status="processing"),
+        ]
+
+        try:
+            with patch.object(service, "_call_ocr_service", AsyncMock(side_effect=responses)) as mock_call:
+                first = await service.process_pages(pdf, "contract.pdf", processor=processor)
+                assert mock_call.await_args.kwargs["filename"] == "contract_page2.png"
+            assert [page["status"] for page in first] == ["completed", "processing"]
+            assert set(service._pending_results) == {"p2"}
+
+            # 第二页的异步任务完成时写回
+            completed = {"task_id": "p2", "status": "completed", "text_content": "条款二"}
+            with patch.object(service, "_get_session", lambda: StatusSession(completed)):
+                await service.get_task_status("p2")
+            assert not service._pending_results
+
+            with patch.object(service, "_call_ocr_service", AsyncMock()) as mock_call:
+                second = await service.process_pages(pdf, "contract-copy.pdf", processor=processor)
+            assert mock_call.await_count == 0
+        finally:
+            processor.close()
+
+        assert [page["processing_path"] for page in second] == [ProcessingPath.CACHE] * 2
+        assert [page["text_content"] for page in second] == ["条款一", "条款二"]
+
+    def test_pending_results_are_bounded(self):
+        """测试等待完成的任务超过数量上限或保留时长时淘汰最旧的任务"""
+        cache = OCRPageCache(FakeRedisClient())
+        service = OCRService(page_cache=cache)
+
+        with patch("backend.core.ocr.ocr_service.PENDING_RESULTS_MAX", 2):
+            for task_id in ("t1", "t2", "t3"):
+                service._add_pending_result(task_id, cache, task_id, "zh-cn")
+        assert list(service._pending_results) == ["t2", "t3"]
+
+        with patch("backend.core.ocr.ocr_service.time.monotonic", return_value=time.monotonic() + 7200):
+            service._add_pending_result("t4", cache, "t4", "zh-cn")
+        assert list(service._pending_results) == ["t4"]
+
+    @pytest.mark.asyncio
+    async def test_process_pages_bounds_rendered_pages(self):
+        """测试同时持有的已渲染页面不超过 batch_concurrency 个"""
+        service = OCRService(batch_concurrency=2)
+        held = {"current": 0, "max": 0}
+
+        class FakeProcessor:
+            page_cache = None
+
+            async def iter_pages(self, file_data, filename, options):
+                for page_number in range(1, 9):
+                    held["current"] += 1
+                    held["max"] = max(held["max"], held["current"])
+                    yield {
+                        "page_info": {"page_number": page_number},
+                        "processing_path": ProcessingPath.RASTER,
+                        "processed_image": {"image_data": b"png"},
+                    }
+
+        async def call_ocr_service(**kwargs):
+            await asyncio.sleep(0)
+            held["current"] -= 1
+            return OCRResponse(task_id=kwargs["filename"], status="completed", text_content="文本")
+
+        with patch.object(service, "_call_ocr_service", AsyncMock(side_effect=call_ocr_service)):
+            results = await service.process_pages(b"%PDF", "report.pdf", processor=FakeProcessor())
+
+        assert [page["page_number"] for page in results] == list(range(1, 9))
+        assert held["max"] == 2
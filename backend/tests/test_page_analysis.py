@@ -0,0 +1,149 @@
+"""页面分析上下文测试
+
+测试派生平面的延迟计算与缓存、倾斜角度估计、跨进程序列化，以及预处理、质量评估
+和表格提取共用同一次解码。
+"""
+
+import asyncio
+import io
+import pickle
+from unittest.mock import patch
+
+import cv2
+import numpy as np
+import pytest
+from PIL import Image
+
+from backend.core.ocr.document_processor import DocumentProcessor, ProcessingOptions
+from backend.core.ocr.page_analysis import PageAnalysis
+from backend.core.ocr.quality_assurance import QualityAssurance
+from backend.core.ocr.table_extractor import TableExtractor
+
+
+def make_page(width: int = 1240, height: int = 1754, angle: float = 0.0) -> Image.Image:
+    """生成带文本行和表格线的页面，可按角度旋转"""
+    pixels = np.full((height, width, 3), 255, dtype=np.uint8)
+    for y in range(120, height // 2, 36):
+        cv2.putText(pixels, "Invoice line item 2024", (100, y), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 0, 0), 2)
+    top = height // 2 + 60
+    for row in range(6):
+        cv2.line(pixels, (100, top + row * 60), (width - 100, top + row * 60), (0, 0, 0), 2)
+    for col in range(5):
+        x = 100 + col * (width - 200) // 4
+        cv2.line(pixels, (x, top), (x, top + 300), (0, 0, 0), 2)
+    image = Image.fromarray(pixels)
+    if angle:
+        image = image.rotate(angle, expand=True, fillcolor="white")
+    return image
+
+
+def to_png(image: Image.Image) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class TestPageAnalysis:
+    """页面分析上下文测试类"""
+
+    def test_planes_computed_once(self):
+        """测试派生平面首次访问时计算，之后复用"""
+        analysis = PageAnalysis(np.asarray(make_page(400, 300)))
+        assert "gray" not in analysis.__dict__
+
+        with patch("backend.core.ocr.page_analysis.cv2.cvtColor", wraps=cv2.cvtColor) as cvt:
+            gray = analysis.gray
+            assert analysis.binary is analysis.binary
+            assert analysis.gray is gray
+            assert analysis.edges is analysis.preview_edges
+
+        assert cvt.call_count == 1
+
+    def test_preview_statistics(self):
+        """测试大页面的噪声和倾斜在缩略图上计算"""
+        analysis = PageAnalysis(make_page(2480, 3508))
+
+        assert max(analysis.preview_gray.shape) == 1024
+        assert 0 <= analysis.noise_level < 0.1
+        assert "edges" not in analysis.__dict__
+
+    @pytest.mark.parametrize("angle", [4.0, -3.0, 0.0])
+    def test_skew_angle(self, angle):
+        """测试倾斜角度与 PIL 旋转方向一致"""
+        analysis = PageAnalysis(make_page(angle=angle))
+
+        assert analysis.skew_angle == pytest.approx(angle, abs=0.6)
+
+    def test_pickle_drops_derived_planes(self):
+        """测试序列化时只保留原始像素"""
+        analysis = PageAnalysis.from_bytes(to_png(make_page(400, 300)))
+        analysis.binary, analysis.skew_angle
+
+        restored = pickle.loads(pickle.dumps(analysis))
+
+        assert set(restored.__dict__) == {"rgb", "info", "preview_max_side"}
+        np.testing.assert_array_equal(restored.binary, analysis.binary)
+
+
+class TestSharedPipeline:
+    """共用页面分析的处理流程测试类"""
+
+    @pytest.mark.asyncio
+    async def test_single_decode(self):
+        """测试预处理、质量评估和表格提取只解码一次图像"""
+        data = to_png(make_page(800, 1100, angle=3.0))
+        processor = DocumentProcessor()
+        options = ProcessingOptions(image_format="array", remove_noise=False)
+        extractor = TableExtractor()
+        grid_lines = {"horizontal": [0, 60, 120], "vertical": [0, 100, 200]}
+
+        with patch("backend.core.ocr.page_analysis.Image.open", wraps=Image.open) as image_open, \
+                patch.object(extractor, "_detect_grid_lines", return_value=grid_lines):
+            result = await processor.process_document(data, "scan.png", options)
+            page = result["pages"][0]
+            analysis = processor.get_page_analysis(page)
+            report = await QualityAssurance().assess_quality(analysis, "scan.png")
+            await extractor.extract_tables(analysis)
+
+        assert image_open.call_count == 1
+        assert analysis is page["processed_image"]["analysis"]
+        assert analysis.rgb is page["processed_image"]["image_data"]
+        # 预处理不改变页面尺寸，区域坐标与原图一致
+        assert analysis.size == Image.open(io.BytesIO(data)).size
+        assert report.estimated_accuracy is not None
+        assert 0 <= report.estimated_accuracy <= 1
+
+    def test_page_analysis_from_png(self):
+        """测试 PNG 输出的页面按需解码并缓存分析上下文"""
+        page = {"processed_image": {"image_data": to_png(make_page(400, 300))}}
+
+        analysis = DocumentProcessor.get_page_analysis(page)
+
+        assert DocumentProcessor.get_page_analysis(page) is analysis
+        assert analysis.size == (400, 300)
+        assert DocumentProcessor.get_page_analysis({"processed_image": None}) is None
+
+
+class TestPageAnalysisPerformance:
+    """页面分析性能测试类"""
+
+    @pytest.mark.asyncio
+    async def test_shared_analysis_decodes_once(self):
+        """测试共用页面分析时质量评估和表格检测只解码一次页面"""
+        data = to_png(make_page(600, 800))
+        quality = QualityAssurance()
+        extractor = TableExtractor()
+        # 只统计表格检测阶段，网格结构提取与解码方式无关
+        extractor._extract_table_structure = lambda *args: asyncio.sleep(0)
+
+        with patch("backend.core.ocr.page_analysis.Image.open", wraps=Image.open) as image_open:
+            await quality.assess_quality(data, "page.png")
+            await extractor.extract_tables(data)
+        separate_decodes = image_open.call_count
+
+        with patch("backend.core.ocr.page_analysis.Image.open", wraps=Image.open) as image_open:
+            analysis = PageAnalysis.from_bytes(data)
+            await quality.assess_quality(analysis, "page.png")
+            await extractor.extract_tables(analysis)
+
+        assert (separate_decodes, image_open.call_count) == (2, 1)
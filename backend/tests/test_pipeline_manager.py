@@ -0,0 +1,119 @@
+"""ETL管道管理器测试
+
+测试PipelineManager的流式执行模式。
+"""
+
+import asyncio
+from datetime import datetime
+from typing import List, Any
+
+import pytest
+
+from backend.core.etl.pipeline_manager import (
+    PipelineManager, PipelineConfig, PipelineMode, PipelineStage, PipelineStatus, StageResult
+)
+
+
+def make_stage(stage: PipelineStage, delay: float, calls: List[Any], fail_ids=()):
+    """构造模拟阶段：每批等待 delay 秒，fail_ids 中的数据处理失败"""
+    async def run(data, stage_config, execution=None):
+        calls.append((stage, len(data)))
+        await asyncio.sleep(delay)
+        output = [item for item in data if item["id"] not in fail_ids]
+        result = StageResult(
+            stage=stage,
+            status=PipelineStatus.SUCCESS if len(output) == len(data) else PipelineStatus.PARTIAL,
+            message="",
+            start_time=datetime.now(),
+            data_count=len(data),
+            success_count=len(output),
+            error_count=len(data) - len(output)
+        )
+        if stage == PipelineStage.LOAD:
+            execution.processed_data_count += len(data)
+            execution.successful_data_count += len(output)
+            execution.failed_data_count += len(data) - len(output)
+            return result
+        return output, result
+    return run
+
+
+class TestStreamingPipeline:
+    """流式管道测试类"""
+
+    @pytest.fixture
+    def manager(self):
+        return PipelineManager()
+
+    @pytest.fixture
+    def calls(self):
+        return []
+
+    @pytest.fixture
+    def stub_stages(self, manager, calls):
+        manager._execute_structure_stage = make_stage(PipelineStage.STRUCTURE, 0.001, calls)
+        manager._execute_validation_stage = make_stage(PipelineStage.VALIDATE, 0.002, calls, fail_ids={3})
+        manager._execute_transformation_stage = make_stage(PipelineStage.TRANSFORM, 0.001, calls)
+        manager._execute_load_stage = make_stage(PipelineStage.LOAD, 0.004, calls)
+        return manager
+
+    @pytest.mark.asyncio
+    async def test_streaming_overlaps_stages_with_bounded_queues(self, stub_stages, calls):
+        """测试各阶段重叠执行、队列有界并记录阶段指标"""
+        manager = stub_stages
+        manager.add_pipeline(PipelineConfig(
+            id="streaming",
+            name="流式管道",
+            mode=PipelineMode.STREAMING,
+            stage_workers={PipelineStage.LOAD: 2},
+            stream_queue_size=4,
+            stream_batch_size=2,
+            error_threshold=0.5
+        ))
+
+        input_data = [{"id": i, "content": f"文档{i}"} for i in range(40)]
+        execution = await manager.execute_pipeline("streaming", input_data)
+
+        assert execution.status == PipelineStatus.SUCCESS
+        assert execution.successful_data_count == 39
+        assert execution.processed_data_count == 39
+
+        metrics = execution.stage_metrics
+        assert set(metrics) == {stage.value for stage in PipelineStage}
+        assert metrics["validate"]["items_in"] == 40
+        assert metrics["validate"]["error_count"] == 1
+        assert metrics["load"]["workers"] == 2
+        assert all(m["max_queue_depth"] <= 4 for m in metrics.values())
+        assert all(m["throughput_per_second"] > 0 for m in metrics.values())
+
+        results = {result.stage: result for result in execution.stage_results}
+        # 加载阶段在验证阶段结束之前已经开始
+        assert results[PipelineStage.LOAD].start_time < results[PipelineStage.VALIDATE].end_time
+        assert max(size for _, size in calls) <= 2
+
+    @pytest.mark.asyncio
+    async def test_streaming_stop_on_error(self, manager):
+        """测试 stop_on_error 时阶段失败终止整个流"""
+        async def failing_validation(data, stage_config, execution):
+            return [], StageResult(
+                stage=PipelineStage.VALIDATE, status=PipelineStatus.FAILED,
+                message="验证服务不可用", start_time=datetime.now()
+            )
+
+        manager._execute_structure_stage = make_stage(PipelineStage.STRUCTURE, 0, [])
+        manager._execute_validation_stage = failing_validation
+        manager.add_pipeline(PipelineConfig(
+            id="streaming_strict",
+            name="严格流式管道",
+            mode=PipelineMode.STREAMING,
+            enabled_stages=[PipelineStage.STRUCTURE, PipelineStage.VALIDATE],
+            stream_queue_size=2,
+            stop_on_error=True
+        ))
+
+        with pytest.raises(Exception, match="验证服务不可用"):
+            await manager.execute_pipeline("streaming_strict", [{"id": i} for i in range(20)])
+
+        execution = manager.get_executions(pipeline_id="streaming_strict")[0]
+        assert execution.status == PipelineStatus.FAILED
+        assert execution.stage_metrics["validate"]["error_count"] > 0
@@ -0,0 +1,141 @@
+"""表格提取器测试
+
+测试文本区域到单元格的分配与逐单元格扫描结果一致，以及表格元数据中的耗时统计。
+"""
+
+import random
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from backend.core.ocr.table_extractor import BoundingBox, TableExtractor
+
+
+def make_grid(rows: int, columns: int, cell_width: int = 60, cell_height: int = 30, seed: int = 0):
+    """生成行高、列宽不等的网格线（表格内坐标）"""
+    rng = random.Random(seed)
+    h_lines, v_lines = [0], [0]
+    for _ in range(rows):
+        h_lines.append(h_lines[-1] + rng.randint(cell_height // 2, cell_height * 2))
+    for _ in range(columns):
+        v_lines.append(v_lines[-1] + rng.randint(cell_width // 2, cell_width * 2))
+    return h_lines, v_lines
+
+
+def make_regions(table_bbox: BoundingBox, count: int, seed: int = 0):
+    """在表格范围内外随机生成文本区域，包含跨越网格线的区域"""
+    rng = random.Random(seed)
+    regions = []
+    for index in range(count):
+        width = rng.randint(0, 120)
+        height = rng.randint(0, 40)
+        regions.append({
+            "text": f"t{index}" if index % 17 else "",
+            "bbox": {
+                "x": table_bbox.x + rng.randint(-50, table_bbox.width + 20),
+                "y": table_bbox.y + rng.randint(-20, table_bbox.height + 10),
+                "width": width,
+                "height": height
+            }
+        })
+    return [region for region in regions if region["bbox"]["width"] and region["bbox"]["height"]]
+
+
+def scan_cells(table_bbox: BoundingBox, h_lines, v_lines, regions):
+    """逐单元格扫描全部文本区域，作为分配结果的参照实现"""
+    texts = {}
+    for row in range(len(h_lines) - 1):
+        for col in range(len(v_lines) - 1):
+            cell_bbox = BoundingBox(
+                table_bbox.x + v_lines[col], table_bbox.y + h_lines[row],
+                v_lines[col + 1] - v_lines[col], h_lines[row + 1] - h_lines[row]
+            )
+            cell_text = ""
+            for region in regions:
+                region_bbox = BoundingBox(
+                    region["bbox"]["x"], region["bbox"]["y"], region["bbox"]["width"], region["bbox"]["height"]
+                )
+                # 重叠面积超过区域面积一半时归属该单元格
+                if cell_bbox.intersects(region_bbox) and \
+                        cell_bbox.intersection_area(region_bbox) / region_bbox.area > 0.5:
+                    cell_text = f"{cell_text} {region['text']}" if cell_text else region["text"]
+            if cell_text.strip():
+                texts[(row, col)] = cell_text.strip()
+    return texts
+
+
+class TestCellTextAssignment:
+    """单元格文本分配测试类"""
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_matches_cell_scan(self, seed):
+        """测试分配结果与逐单元格扫描一致"""
+        extractor = TableExtractor()
+        h_lines, v_lines = make_grid(8, 6, seed=seed)
+        table_bbox = BoundingBox(35, 80, v_lines[-1], h_lines[-1])
+        regions = make_regions(table_bbox, 400, seed=seed)
+
+        assigned = extractor._assign_text_regions(table_bbox, h_lines, v_lines, regions)
+        expected = scan_cells(table_bbox, h_lines, v_lines, regions)
+
+        assert {cell: text for cell, text in assigned.items() if text} == expected
+
+    def test_boundary_regions(self):
+        """测试恰好一半重叠的区域不归属任何单元格，零面积区域被忽略"""
+        extractor = TableExtractor()
+        table_bbox = BoundingBox(0, 0, 100, 100)
+        regions = [
+            {"text": "一半", "bbox": {"x": 40, "y": 10, "width": 20, "height": 10}},
+            {"text": "多半", "bbox": {"x": 39, "y": 10, "width": 20, "height": 10}},
+            {"text": "空", "bbox": {"x": 10, "y": 10, "width": 0, "height": 10}},
+            {"text": "表外", "bbox": {"x": 120, "y": 10, "width": 20, "height": 10}},
+        ]
+
+        assert extractor._assign_text_regions(table_bbox, [0, 50, 100], [0, 50, 100], regions) == {(0, 0): "多半"}
+
+
+class TestTableStructureMetadata:
+    """表格结构元数据测试类"""
+
+    @pytest.mark.asyncio
+    async def test_table_timing_metadata(self):
+        """测试表格结构包含单元格文本与分阶段耗时"""
+        extractor = TableExtractor()
+        image = np.full((400, 600, 3), 255, dtype=np.uint8)
+        table_bbox = BoundingBox(50, 50, 500, 300)
+        regions = [
+            {"text": "名称", "bbox": {"x": 70, "y": 70, "width": 60, "height": 20}},
+            {"text": "数量", "bbox": {"x": 190, "y": 70, "width": 60, "height": 20}},
+            {"text": "10", "bbox": {"x": 190, "y": 140, "width": 30, "height": 20}},
+        ]
+        grid_lines = {"horizontal": [0, 75, 150, 225, 300], "vertical": [0, 125, 250, 375, 500]}
+
+        with patch.object(extractor, "_detect_grid_lines", return_value=grid_lines):
+            table = await extractor._extract_table_structure(image, table_bbox, regions)
+
+        assert (table.rows, table.columns) == (4, 4)
+        texts = {(cell.row, cell.column): cell.text for cell in table.cells if cell.text}
+        assert texts == {(0, 0): "名称", (0, 1): "数量", (1, 1): "10"}
+        assert table.metadata["text_regions"] == 3
+        timing = table.metadata["timing_ms"]
+        assert set(timing) == {"grid_detection", "text_assignment", "cell_extraction", "total"}
+        assert timing["total"] >= timing["cell_extraction"] >= timing["text_assignment"] > 0
+
+
+class TestTableExtractorPerformance:
+    """表格提取器性能测试类"""
+
+    def test_dense_table_assignment_skips_cell_scan(self):
+        """测试密集文本的 40×12 表格按中点定位单元格，不逐单元格求交"""
+        extractor = TableExtractor()
+        h_lines, v_lines = make_grid(40, 12, seed=1)
+        table_bbox = BoundingBox(20, 40, v_lines[-1], h_lines[-1])
+        regions = make_regions(table_bbox, 2000, seed=1)
+
+        with patch.object(BoundingBox, "intersects", side_effect=AssertionError("逐单元格求交")):
+            assigned = extractor._assign_text_regions(table_bbox, h_lines, v_lines, regions)
+
+        assert {cell: text for cell, text in assigned.items() if text} == scan_cells(
+            table_bbox, h_lines, v_lines, regions
+        )
@@ -4,6 +4,7 @@
 """
 
 import asyncio
+import bisect
 import time
 import functools
 import weakref
@@ -99,6 +100,70 @@ class PerformanceMonitor:
 performance_monitor = PerformanceMonitor()
 
 
+# 默认延迟分桶上界（秒），按约 1.6 倍递增覆盖 5 毫秒到 5 分钟
+DEFAULT_LATENCY_BUCKETS = tuple(round(0.005 * 1.6 ** i, 4) for i in range(24))
+
+
+class LatencyHistogram:
+    """固定分桶的延迟直方图
+    
+    记录和查询的开销与样本数量无关，分位数在所在分桶内线性插值估计。
+    """
+    
+    def __init__(self, buckets: tuple = DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+    
+    def observe(self, value: float) -> None:
+        """记录一次耗时（秒）"""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+    
+    def percentile(self, q: float) -> float:
+        """估计分位数，q 取值 0-100"""
+        if self.count == 0:
+            return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / bucket_count, self.max)
+            seen += bucket_count
+        return self.max
+    
+    def reset(self) -> None:
+        """清空统计"""
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """统计摘要，耗时单位为毫秒"""
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count * 1000, 2) if self.count else 0.0,
+            "p50_ms": round(self.percentile(50) * 1000, 2),
+            "p95_ms": round(self.percentile(95) * 1000, 2),
+            "p99_ms": round(self.percentile(99) * 1000, 2),
+            "max_ms": round(self.max * 1000, 2),
+            # 只输出非空分桶
+            "buckets": {
+                (f"le_{bound * 1000:g}ms" if index < len(self.buckets) else "inf"): count
+                for index, (bound, count) in enumerate(zip(self.buckets + (None,), self.counts))
+                if count
+            }
+        }
+
+
 def monitor_performance(func_name: Optional[str] = None):
     """性能监控装饰器"""
     def decorator(func: Callable) -> Callable:
@@ -1,12 +1,21 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException, BackgroundTasks
+from fastapi import FastAPI, File, UploadFile, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple, BinaryIO, Awaitable, Callable
 import asyncio
 import aiofiles
 import os
+import hashlib
+import math
+import queue
+import tempfile
+import threading
+import time
 import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime
 import json
 from loguru import logger
@@ -15,6 +24,18 @@ import numpy as np
 from PIL import Image
 import io
 
+try:
+    import onnxruntime as ort
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ONNXRUNTIME_AVAILABLE = False
+
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
 # 配置日志
 logger.add("logs/ocr_service.log", rotation="500 MB", level="INFO")
 
@@ -61,37 +82,623 @@ class BatchOCRRequest(BaseModel):
     quality_check: bool = True
     output_format: str = "json"
 
+class OCREngineConfig(BaseModel):
+    """OCR 引擎配置"""
+    model_dir: str = "onnx_models/"
+    det_model: str = "det.onnx"
+    rec_model: str = "rec.onnx"
+    char_dict: str = "ppocr_keys.txt"
+    model_version: str = "1.0.0"
+    sessions: int = 1  # 每个工作进程的会话数
+    intra_op_threads: int = 0  # 0 表示按 CPU 核数 / 工作进程数 / 会话数 自动分配
+    inter_op_threads: int = 1
+    rec_batch_size: int = 16
+    rec_image_height: int = 48
+    det_limit_side: int = 960
+    det_threshold: float = 0.3
+    det_box_threshold: float = 0.5
+    det_unclip_ratio: float = 1.5
+    min_box_size: int = 3
+    drop_score: float = 0.5
+    
+    @classmethod
+    def from_env(cls) -> "OCREngineConfig":
+        """从环境变量读取配置"""
+        return cls(
+            model_dir=os.getenv("OCR_MODEL_DIR", "onnx_models/"),
+            model_version=os.getenv("OCR_MODEL_VERSION", "1.0.0"),
+            sessions=int(os.getenv("OCR_SESSIONS_PER_WORKER", "1")),
+            intra_op_threads=int(os.getenv("OCR_INTRA_OP_THREADS", "0")),
+            inter_op_threads=int(os.getenv("OCR_INTER_OP_THREADS", "1")),
+            rec_batch_size=int(os.getenv("OCR_REC_BATCH_SIZE", "16"))
+        )
+
+# 工作进程数；多进程时任务状态需要共享存储
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", "1"))
+
+# 检测模型输入归一化参数
+_DET_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+_DET_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+
+def _order_points(box: np.ndarray) -> np.ndarray:
+    """四个顶点按 左上、右上、右下、左下 排序"""
+    sums = box.sum(axis=1)
+    diffs = np.diff(box, axis=1).ravel()
+    return np.array([
+        box[np.argmin(sums)], box[np.argmin(diffs)], box[np.argmax(sums)], box[np.argmax(diffs)]
+    ], dtype=np.float32)
+
+class OnnxOCREngine:
+    """ONNX Runtime 文本检测 + 识别引擎
+    
+    使用 PaddleOCR 导出格式的模型：DB 检测模型输出文本概率图，CRNN 识别模型
+    输出逐列字符概率，按 CTC 贪心解码。
+    """
+    
+    def __init__(self, config: OCREngineConfig, intra_op_threads: int = 1):
+        if not ONNXRUNTIME_AVAILABLE:
+            raise RuntimeError("onnxruntime 未安装")
+        self.config = config
+        
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = config.inter_op_threads
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        providers = ["CPUExecutionProvider"]
+        
+        self.det_session = ort.InferenceSession(
+            os.path.join(config.model_dir, config.det_model), options, providers=providers
+        )
+        self.rec_session = ort.InferenceSession(
+            os.path.join(config.model_dir, config.rec_model), options, providers=providers
+        )
+        self.det_input = self.det_session.get_inputs()[0].name
+        self.rec_input = self.rec_session.get_inputs()[0].name
+        
+        with open(os.path.join(config.model_dir, config.char_dict), encoding="utf-8") as f:
+            characters = [line.rstrip("\r\n") for line in f]
+        # 0 为 CTC 空白，末尾为空格
+        self.characters = ["blank"] + characters + [" "]
+        self.rec_calls = 0
+    
+    def detect(self, image: np.ndarray) -> List[np.ndarray]:
+        """检测文本行，返回按阅读顺序排列的四边形框"""
+        height, width = image.shape[:2]
+        scale = min(1.0, self.config.det_limit_side / max(height, width))
+        resized_h = max(32, int(round(height * scale / 32)) * 32)
+        resized_w = max(32, int(round(width * scale / 32)) * 32)
+        resized = cv2.resize(image, (resized_w, resized_h))
+        tensor = ((resized.astype(np.float32) / 255.0 - _DET_MEAN) / _DET_STD).transpose(2, 0, 1)[None]
+        
+        prob = self.det_session.run(None, {self.det_input: tensor})[0][0, 0]
+        mask = (prob > self.config.det_threshold).astype(np.uint8)
+        contours, _ = cv2.findContours(mask, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)
+        
+        ratio_w, ratio_h = width / resized_w, height / resized_h
+        boxes = []
+        for contour in contours:
+            (center_x, center_y), (box_w, box_h), angle = cv2.minAreaRect(contour)
+            if min(box_w, box_h) < self.config.min_box_size:
+                continue
+            if self._box_score(prob, contour) < self.config.det_box_threshold:
+                continue
+            # 按 DB 的 unclip 规则向外扩展收缩后的文本区域
+            distance = box_w * box_h * self.config.det_unclip_ratio / (2 * (box_w + box_h))
+            box = cv2.boxPoints(((center_x, center_y), (box_w + 2 * distance, box_h + 2 * distance), angle))
+            box[:, 0] = np.clip(box[:, 0] * ratio_w, 0, width - 1)
+            box[:, 1] = np.clip(box[:, 1] * ratio_h, 0, height - 1)
+            boxes.append(_order_points(box))
+        
+        boxes.sort(key=lambda box: (round(float(box[0, 1]) / 10), float(box[0, 0])))
+        return boxes
+    
+    @staticmethod
+    def _box_score(prob: np.ndarray, contour: np.ndarray) -> float:
+        x, y, w, h = cv2.boundingRect(contour)
+        mask = np.zeros((h, w), dtype=np.uint8)
+        cv2.fillPoly(mask, [contour.reshape(-1, 2) - [x, y]], 1)
+        return cv2.mean(prob[y:y + h, x:x + w], mask)[0]
+    
+    @staticmethod
+    def crop(image: np.ndarray, box: np.ndarray) -> np.ndarray:
+        """透视变换裁剪文本行，竖排文本旋转为横排"""
+        width = max(1, int(max(np.linalg.norm(box[0] - box[1]), np.linalg.norm(box[2] - box[3]))))
+        height = max(1, int(max(np.linalg.norm(box[0] - box[3]), np.linalg.norm(box[1] - box[2]))))
+        target = np.float32([[0, 0], [width, 0], [width, height], [0, height]])
+        crop = cv2.warpPerspective(
+            image, cv2.getPerspectiveTransform(box, target), (width, height),
+            borderMode=cv2.BORDER_REPLICATE, flags=cv2.INTER_CUBIC
+        )
+        if height >= width * 1.5:
+            crop = np.rot90(crop)
+        return crop
+    
+    def recognize(self, crops: List[np.ndarray]) -> List[Tuple[str, float]]:
+        """批量识别文本行
+        
+        按宽高比排序后分批，同一批内的宽度相近，补齐的空白最少；每批只调用
+        一次识别模型。结果按输入顺序返回。
+        """
+        results: List[Tuple[str, float]] = [("", 0.0)] * len(crops)
+        if not crops:
+            return results
+        
+        height = self.config.rec_image_height
+        ratios = [crop.shape[1] / max(crop.shape[0], 1) for crop in crops]
+        order = np.argsort(ratios, kind="stable")
+        
+        for start in range(0, len(order), self.config.rec_batch_size):
+            indices = order[start:start + self.config.rec_batch_size]
+            batch_width = max(1, int(math.ceil(height * ratios[indices[-1]])))
+            tensor = np.zeros((len(indices), 3, height, batch_width), dtype=np.float32)
+            for row, index in enumerate(indices):
+                width = min(batch_width, max(1, int(math.ceil(height * ratios[index]))))
+                resized = cv2.resize(crops[index], (width, height)).astype(np.float32)
+                tensor[row, :, :, :width] = ((resized / 255.0 - 0.5) / 0.5).transpose(2, 0, 1)
+            
+            probs = self.rec_session.run(None, {self.rec_input: tensor})[0]
+            self.rec_calls += 1
+            for row, index in enumerate(indices):
+                results[index] = self._ctc_decode(probs[row])
+        
+        return results
+    
+    def _ctc_decode(self, probs: np.ndarray) -> Tuple[str, float]:
+        indices = probs.argmax(axis=1)
+        scores = probs.max(axis=1)
+        keep = indices != 0
+        keep[1:] &= indices[1:] != indices[:-1]
+        if not keep.any():
+            return "", 0.0
+        text = "".join(self.characters[i] for i in indices[keep] if i < len(self.characters))
+        return text, float(scores[keep].mean())
+    
+    def ocr(self, image: np.ndarray) -> Dict[str, Any]:
+        """识别整页图像（BGR）"""
+        boxes = self.detect(image)
+        recognized = self.recognize([self.crop(image, box) for box in boxes])
+        
+        lines = []
+        for box, (text, score) in zip(boxes, recognized):
+            if not text or score < self.config.drop_score:
+                continue
+            lines.append({
+                "text": text,
+                "confidence": round(score, 4),
+                "bbox": box.round().astype(int).tolist()
+            })
+        
+        return {
+            "text_content": "\n".join(line["text"] for line in lines),
+            "confidence_score": float(np.mean([line["confidence"] for line in lines])) if lines else 0.0,
+            "lines": lines
+        }
+
+class OCREnginePool:
+    """工作进程内的 OCR 会话池
+    
+    模型在每个工作进程中只加载一次；各会话的线程数按 CPU 核数在工作进程和
+    会话之间平分，推理在专用线程中执行，不阻塞事件循环。
+    """
+    
+    def __init__(self, config: OCREngineConfig, workers: int = 1):
+        self.config = config
+        cores = os.cpu_count() or 1
+        self.intra_op_threads = config.intra_op_threads or max(1, cores // max(1, workers) // config.sessions)
+        self._engines: "queue.Queue[OnnxOCREngine]" = queue.Queue()
+        for _ in range(config.sessions):
+            self._engines.put(OnnxOCREngine(config, self.intra_op_threads))
+        self._executor = ThreadPoolExecutor(max_workers=config.sessions, thread_name_prefix="ocr-session")
+        self._lock = threading.Lock()
+        self.pages = 0
+        self.busy_seconds = 0.0
+    
+    def run(self, image: np.ndarray) -> Dict[str, Any]:
+        engine = self._engines.get()
+        start_time = time.perf_counter()
+        try:
+            return engine.ocr(image)
+        finally:
+            elapsed = time.perf_counter() - start_time
+            self._engines.put(engine)
+            with self._lock:
+                self.pages += 1
+                self.busy_seconds += elapsed
+    
+    async def run_async(self, image: np.ndarray) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.run, image)
+    
+    def get_metrics(self) -> Dict[str, Any]:
+        """本工作进程的推理吞吐量"""
+        with self._lock:
+            pages, busy_seconds = self.pages, self.busy_seconds
+        return {
+            "worker_pid": os.getpid(),
+            "model_version": self.config.model_version,
+            "sessions": self.config.sessions,
+            "intra_op_threads": self.intra_op_threads,
+            "pages": pages,
+            "busy_seconds": round(busy_seconds, 3),
+            "seconds_per_page": round(busy_seconds / pages, 4) if pages else 0.0,
+            # 每个会话串行处理页面，忙碌时间按会话累计，再除以会话占用的核数
+            "pages_per_second_per_core": round(pages / busy_seconds / self.intra_op_threads, 3)
+            if busy_seconds else 0.0
+        }
+
+class OCRResultCache:
+    """按内容哈希和识别语言缓存识别结果
+    
+    键格式与后端 OCRPageCache 一致（ocr:page:{模型版本}:{语言}:{sha256}），后端上传前
+    查询同一缓存。进程内 LRU 作为一级缓存，配置 Redis 时作为共享的二级缓存。
+    """
+    
+    KEY_TEMPLATE = "ocr:page:{model_version}:{language}:{page_hash}"
+    RESULT_FIELDS = ("text_content", "confidence_score", "lines", "tables")
+    
+    def __init__(
+        self,
+        model_version: str,
+        redis_url: Optional[str] = None,
+        ttl: int = 30 * 24 * 3600,
+        max_local_entries: int = 1024
+    ):
+        self.model_version = model_version
+        self.ttl = ttl
+        self.max_local_entries = max_local_entries
+        self._local: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._redis = None
+        if redis_url and REDIS_AVAILABLE:
+            self._redis = aioredis.from_url(redis_url, decode_responses=True)
+        self.hits = 0
+        self.misses = 0
+    
+    def key(self, page_hash: str, language: str = "zh-cn") -> str:
+        return self.KEY_TEMPLATE.format(model_version=self.model_version, language=language, page_hash=page_hash)
+    
+    async def get(self, page_hash: str, language: str = "zh-cn") -> Optional[Dict[str, Any]]:
+        key = self.key(page_hash, language)
+        entry = self._local.get(key)
+        if entry is not None:
+            self._local.move_to_end(key)
+        elif self._redis is not None:
+            try:
+                value = await self._redis.get(key)
+                if value is not None:
+                    entry = json.loads(value)
+                    self._remember(key, entry)
+            except Exception as e:
+                logger.warning(f"读取识别结果缓存失败: {str(e)}")
+        
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+    
+    async def set(self, page_hash: str, result: Dict[str, Any], language: str = "zh-cn") -> None:
+        key = self.key(page_hash, language)
+        entry = {field: result.get(field) for field in self.RESULT_FIELDS}
+        entry["model_version"] = self.model_version
+        entry["language"] = language
+        entry["cached_at"] = datetime.now().isoformat()
+        self._remember(key, entry)
+        if self._redis is not None:
+            try:
+                await self._redis.set(key, json.dumps(entry, ensure_ascii=False), ex=self.ttl)
+            except Exception as e:
+                logger.warning(f"写入识别结果缓存失败: {str(e)}")
+    
+    def _remember(self, key: str, entry: Dict[str, Any]) -> None:
+        self._local[key] = entry
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_local_entries:
+            self._local.popitem(last=False)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "model_version": self.model_version,
+            "shared": self._redis is not None,
+            "local_entries": len(self._local),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+class InMemoryTaskStore:
+    """进程内任务存储
+    
+    任务和批量任务按 TTL 过期，数量超过上限时淘汰最早写入的记录；用于单工作
+    进程部署和测试。
+    """
+    
+    def __init__(self, max_entries: int = 10000, ttl: int = 24 * 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._tasks: "OrderedDict[str, Tuple[float, OCRResult]]" = OrderedDict()
+        self._batches: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._stats = {"total": 0, "completed": 0, "failed": 0}
+    
+    def _put(self, records: OrderedDict, key: str, value: Any) -> None:
+        records[key] = (time.monotonic() + self.ttl, value)
+        records.move_to_end(key)
+        # 写入时刷新过期时间，记录按过期时间有序，只需检查头部
+        now = time.monotonic()
+        while records and (next(iter(records.values()))[0] <= now or len(records) > self.max_entries):
+            records.popitem(last=False)
+    
+    @staticmethod
+    def _get(records: OrderedDict, key: str) -> Any:
+        record = records.get(key)
+        if record is None:
+            return None
+        if record[0] <= time.monotonic():
+            del records[key]
+            return None
+        return record[1]
+    
+    def _count(self, result: OCRResult, created: bool) -> None:
+        if created:
+            self._stats["total"] += 1
+        if result.status in ("completed", "failed"):
+            self._stats[result.status] += 1
+    
+    async def create(self, result: OCRResult) -> None:
+        self._put(self._tasks, result.task_id, result)
+        self._count(result, created=True)
+    
+    async def update(self, result: OCRResult) -> None:
+        self._put(self._tasks, result.task_id, result)
+        self._count(result, created=False)
+    
+    async def get(self, task_id: str) -> Optional[OCRResult]:
+        return self._get(self._tasks, task_id)
+    
+    async def get_many(self, task_ids: List[str]) -> List[Optional[OCRResult]]:
+        return [self._get(self._tasks, task_id) for task_id in task_ids]
+    
+    async def delete(self, task_id: str) -> bool:
+        return self._tasks.pop(task_id, None) is not None
+    
+    async def set_batch(self, batch_id: str, batch_info: Dict[str, Any]) -> None:
+        self._put(self._batches, batch_id, batch_info)
+    
+    async def get_batch(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        return self._get(self._batches, batch_id)
+    
+    async def get_stats(self) -> Dict[str, int]:
+        return {**self._stats, "stored_tasks": len(self._tasks)}
+
+class RedisTaskStore:
+    """Redis 任务存储，多个工作进程共享任务状态，记录由 Redis 按 TTL 过期"""
+    
+    TASK_KEY = "ocr:task:{}"
+    BATCH_KEY = "ocr:batch:{}"
+    STATS_KEY = "ocr:task_stats"
+    
+    def __init__(self, redis_url: str, ttl: int = 24 * 3600):
+        self.ttl = ttl
+        self._redis = aioredis.from_url(redis_url, decode_responses=True)
+    
+    async def _count(self, result: OCRResult, created: bool) -> None:
+        pipeline = self._redis.pipeline()
+        if created:
+            pipeline.hincrby(self.STATS_KEY, "total", 1)
+        if result.status in ("completed", "failed"):
+            pipeline.hincrby(self.STATS_KEY, result.status, 1)
+        await pipeline.execute()
+    
+    async def create(self, result: OCRResult) -> None:
+        await self._redis.set(self.TASK_KEY.format(result.task_id), result.model_dump_json(), ex=self.ttl)
+        await self._count(result, created=True)
+    
+    async def update(self, result: OCRResult) -> None:
+        await self._redis.set(self.TASK_KEY.format(result.task_id), result.model_dump_json(), ex=self.ttl)
+        await self._count(result, created=False)
+    
+    async def get(self, task_id: str) -> Optional[OCRResult]:
+        return (await self.get_many([task_id]))[0]
+    
+    async def get_many(self, task_ids: List[str]) -> List[Optional[OCRResult]]:
+        if not task_ids:
+            return []
+        values = await self._redis.mget([self.TASK_KEY.format(task_id) for task_id in task_ids])
+        return [OCRResult.model_validate_json(value) if value else None for value in values]
+    
+    async def delete(self, task_id: str) -> bool:
+        return await self._redis.delete(self.TASK_KEY.format(task_id)) > 0
+    
+    async def set_batch(self, batch_id: str, batch_info: Dict[str, Any]) -> None:
+        await self._redis.set(self.BATCH_KEY.format(batch_id), json.dumps(batch_info), ex=self.ttl)
+    
+    async def get_batch(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        value = await self._redis.get(self.BATCH_KEY.format(batch_id))
+        return json.loads(value) if value else None
+    
+    async def get_stats(self) -> Dict[str, int]:
+        stats = await self._redis.hgetall(self.STATS_KEY)
+        return {key: int(stats.get(key, 0)) for key in ("total", "completed", "failed")}
+
+def create_task_store():
+    """配置 OCR_TASK_STORE_REDIS_URL 时使用 Redis，否则使用进程内存储"""
+    ttl = int(os.getenv("OCR_TASK_TTL", str(24 * 3600)))
+    redis_url = os.getenv("OCR_TASK_STORE_REDIS_URL")
+    if redis_url and REDIS_AVAILABLE:
+        return RedisTaskStore(redis_url, ttl=ttl)
+    if OCR_WORKERS > 1:
+        logger.warning("多个工作进程使用进程内任务存储，任务状态查询可能落到其他进程")
+    return InMemoryTaskStore(max_entries=int(os.getenv("OCR_TASK_STORE_MAX_ENTRIES", "10000")), ttl=ttl)
+
+@dataclass
+class SpooledUpload:
+    """已落盘的上传文件"""
+    filename: str
+    file: BinaryIO
+    size: int
+    sha256: str
+    
+    def read(self) -> bytes:
+        self.file.seek(0)
+        return self.file.read()
+    
+    def close(self) -> None:
+        self.file.close()
+
+# 上传文件分块读取；超过内存阈值的部分写入磁盘
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+UPLOAD_SPOOL_MEMORY = int(os.getenv("OCR_UPLOAD_SPOOL_MEMORY", str(8 * 1024 * 1024)))
+UPLOAD_SPOOL_DIR = os.getenv("OCR_UPLOAD_SPOOL_DIR") or None
+MAX_UPLOAD_SIZE = int(os.getenv("OCR_MAX_UPLOAD_SIZE", str(500 * 1024 * 1024)))
+
+async def spool_upload(file: UploadFile) -> SpooledUpload:
+    """分块读取上传文件并计算内容哈希，不在内存中保留整个文件"""
+    spooled = tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_MEMORY, dir=UPLOAD_SPOOL_DIR)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > MAX_UPLOAD_SIZE:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"文件大小超过限制 ({MAX_UPLOAD_SIZE // 1024 // 1024}MB)"
+                )
+            digest.update(chunk)
+            # 超过内存阈值后写入磁盘，不阻塞事件循环
+            await asyncio.to_thread(spooled.write, chunk)
+    except BaseException:
+        spooled.close()
+        raise
+    return SpooledUpload(filename=file.filename, file=spooled, size=size, sha256=digest.hexdigest())
+
+class OCRJobQueue:
+    """有界任务队列
+    
+    固定数量的工作协程依次处理任务，队列满时拒绝新任务，避免批量请求启动
+    无限多的后台任务。
+    """
+    
+    def __init__(self, workers: int = 2, max_pending: int = 100):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_tasks: List[asyncio.Task] = []
+        self.running = 0
+        self.processed = 0
+    
+    def _ensure_started(self) -> None:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_pending)
+        if not self._worker_tasks:
+            self._worker_tasks = [
+                asyncio.create_task(self._worker(), name=f"ocr-job-worker-{index}")
+                for index in range(self.workers)
+            ]
+    
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+    
+    def free_slots(self) -> int:
+        return self.max_pending - self.pending
+    
+    def submit(self, job: Callable[[], Awaitable[Any]]) -> None:
+        """提交任务，队列已满时抛出 asyncio.QueueFull"""
+        self._ensure_started()
+        self._queue.put_nowait(job)
+    
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            self.running += 1
+            try:
+                await job()
+            except Exception as e:
+                logger.error(f"OCR 任务执行失败: {str(e)}")
+            finally:
+                self.running -= 1
+                self.processed += 1
+                self._queue.task_done()
+    
+    async def join(self) -> None:
+        """等待已提交的任务全部完成"""
+        if self._queue is not None:
+            await self._queue.join()
+    
+    async def stop(self) -> None:
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        self._queue = None
+    
+    def get_metrics(self) -> Dict[str, int]:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "running": self.running,
+            "processed": self.processed
+        }
+
 # 全局变量
-task_results: Dict[str, OCRResult] = {}
-batch_results: Dict[str, Dict[str, Any]] = {}
+task_store = create_task_store()
+job_queue = OCRJobQueue(
+    workers=int(os.getenv("OCR_JOB_WORKERS", "2")),
+    max_pending=int(os.getenv("OCR_JOB_QUEUE_SIZE", "100"))
+)
 
 # OCR 处理类
 class OCRProcessor:
     """OCR 处理器"""
     
-    def __init__(self):
-        self.model_path = "onnx_models/"
+    def __init__(self, engine_config: Optional[OCREngineConfig] = None, workers: int = OCR_WORKERS):
+        self.engine_config = engine_config or OCREngineConfig.from_env()
+        self.model_path = self.engine_config.model_dir
+        self.workers = workers
         self.supported_formats = [".pdf", ".png", ".jpg", ".jpeg", ".tiff", ".bmp"]
+        self._engine_pool: Optional[OCREnginePool] = None
+        self._engine_lock = threading.Lock()
+    
+    def get_engine_pool(self) -> OCREnginePool:
+        """首次使用时加载模型"""
+        if self._engine_pool is None:
+            with self._engine_lock:
+                if self._engine_pool is None:
+                    self._engine_pool = OCREnginePool(self.engine_config, self.workers)
+                    logger.info(
+                        f"OCR 模型已加载: {self.model_path}，会话数 {self.engine_config.sessions}，"
+                        f"每会话线程数 {self._engine_pool.intra_op_threads}"
+                    )
+        return self._engine_pool
+    
+    def get_engine_metrics(self) -> Dict[str, Any]:
+        if self._engine_pool is None:
+            return {"loaded": False}
+        return {"loaded": True, **self._engine_pool.get_metrics()}
         
     async def process_image(self, image_data: bytes, language: str = "zh-cn") -> Dict[str, Any]:
         """处理单个图像"""
         try:
-            # 将字节数据转换为图像
-            image = Image.open(io.BytesIO(image_data))
-            
-            # 转换为 OpenCV 格式
-            opencv_image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
+            # 直接解码为 OpenCV 格式
+            opencv_image = cv2.imdecode(np.frombuffer(image_data, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if opencv_image is None:
+                raise ValueError("无法解码图像")
             
-            # 模拟 OCR 处理（实际应该使用 OnnxOCR）
-            # TODO：调用OnnxOCR模型进行文本识别
-            # 这里返回模拟结果
-            text_content = "这是模拟的OCR文本识别结果。在实际实现中，这里会调用OnnxOCR模型进行文本识别。"
+            result = await self.get_engine_pool().run_async(opencv_image)
             
-            confidence_score = 0.95
+            # 只读取文件头获取尺寸和格式
+            image = Image.open(io.BytesIO(image_data))
             
             return {
-                "text_content": text_content,
-                "confidence_score": confidence_score,
+                "text_content": result["text_content"],
+                "confidence_score": result["confidence_score"],
+                "lines": result["lines"],
                 "image_size": image.size,
                 "format": image.format
             }
@@ -140,15 +747,44 @@ class OCRProcessor:
 # 初始化 OCR 处理器
 ocr_processor = OCRProcessor()
 
+# 识别结果缓存
+result_cache = OCRResultCache(
+    model_version=ocr_processor.engine_config.model_version,
+    redis_url=os.getenv("OCR_CACHE_REDIS_URL"),
+    ttl=int(os.getenv("OCR_CACHE_TTL", str(30 * 24 * 3600))),
+    max_local_entries=int(os.getenv("OCR_CACHE_LOCAL_ENTRIES", "1024"))
+)
+
 # API 端点
 @app.get("/health")
 async def health_check():
     """健康检查"""
     return {"status": "healthy", "timestamp": datetime.now().isoformat()}
 
+@app.on_event("shutdown")
+async def shutdown():
+    """停止任务队列工作协程"""
+    await job_queue.stop()
+
+def _validate_extension(filename: str) -> Optional[str]:
+    """返回不支持的扩展名，支持时返回 None"""
+    file_extension = os.path.splitext(filename)[1].lower()
+    return None if file_extension in ocr_processor.supported_formats else file_extension
+
+def _enqueue(
+    task_id: str,
+    upload: SpooledUpload,
+    language: str,
+    extract_tables: bool,
+    quality_check: bool,
+    output_format: str
+) -> None:
+    job_queue.submit(lambda: process_document_background(
+        task_id, upload, language, extract_tables, quality_check, output_format
+    ))
+
 @app.post("/ocr/process", response_model=OCRResult)
 async def process_document(
-    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     language: str = "zh-cn",
     extract_tables: bool = True,
@@ -159,54 +795,70 @@ async def process_document(
     task_id = str(uuid.uuid4())
     
     # 验证文件格式
-    file_extension = os.path.splitext(file.filename)[1].lower()
-    if file_extension not in ocr_processor.supported_formats:
+    file_extension = _validate_extension(file.filename)
+    if file_extension is not None:
         raise HTTPException(
             status_code=400, 
             detail=f"不支持的文件格式: {file_extension}"
         )
+    if job_queue.free_slots() <= 0:
+        raise HTTPException(status_code=503, detail="OCR 任务队列已满，请稍后重试")
+    
+    upload = await spool_upload(file)
     
     # 创建初始任务结果
-    task_results[task_id] = OCRResult(
-        task_id=task_id,
-        status="processing"
-    )
-    
-    # 后台处理
-    background_tasks.add_task(
-        process_document_background,
-        task_id,
-        file,
-        language,
-        extract_tables,
-        quality_check,
-        output_format
-    )
-    
-    return task_results[task_id]
+    result = OCRResult(task_id=task_id, status="processing")
+    await task_store.create(result)
+    
+    try:
+        _enqueue(task_id, upload, language, extract_tables, quality_check, output_format)
+    except asyncio.QueueFull:
+        upload.close()
+        await task_store.delete(task_id)
+        raise HTTPException(status_code=503, detail="OCR 任务队列已满，请稍后重试")
+    
+    return result
 
 async def process_document_background(
     task_id: str,
-    file: UploadFile,
+    upload: SpooledUpload,
     language: str,
     extract_tables: bool,
     quality_check: bool,
     output_format: str
 ):
-    """后台处理文档"""
+    """处理已落盘的上传文件"""
     start_time = datetime.now()
     
     try:
-        # 读取文件内容
-        file_content = await file.read()
+        # 按内容哈希查询识别结果缓存
+        page_hash = upload.sha256
+        cached = await result_cache.get(page_hash, language)
+        file_content = None
         
-        # OCR 处理
-        ocr_result = await ocr_processor.process_image(file_content, language)
-        
-        # 表格提取
-        tables = []
-        if extract_tables:
-            tables = await ocr_processor.extract_tables(file_content)
+        if cached is not None:
+            ocr_result = dict(cached)
+            tables = cached.get("tables")
+            if tables is None and extract_tables:
+                file_content = await asyncio.to_thread(upload.read)
+                tables = await ocr_processor.extract_tables(file_content)
+                await result_cache.set(page_hash, {**cached, "tables": tables}, language)
+            tables = tables or []
+        else:
+            # 只有工作协程数量的文件同时读入内存
+            file_content = await asyncio.to_thread(upload.read)
+            
+            # OCR 处理
+            ocr_result = await ocr_processor.process_image(file_content, language)
+            
+            # 表格提取
+            tables = []
+            if extract_tables:
+                tables = await ocr_processor.extract_tables(file_content)
+            
+            await result_cache.set(
+                page_hash, {**ocr_result, "tables": tables if extract_tables else None}, language
+            )
         
         # 质量评估
         quality_metrics = {}
@@ -220,7 +872,7 @@ async def process_document_background(
         processing_time = (datetime.now() - start_time).total_seconds()
         
         # 更新任务结果
-        task_results[task_id] = OCRResult(
+        await task_store.update(OCRResult(
             task_id=task_id,
             status="completed",
             text_content=ocr_result["text_content"],
@@ -228,32 +880,37 @@ async def process_document_background(
             confidence_score=ocr_result["confidence_score"],
             processing_time=processing_time,
             metadata={
-                "filename": file.filename,
-                "file_size": len(file_content),
+                "filename": upload.filename,
+                "file_size": upload.size,
                 "image_info": {
                     "size": ocr_result.get("image_size"),
                     "format": ocr_result.get("format")
                 },
                 "quality_metrics": quality_metrics,
+                "text_lines": ocr_result.get("lines", []),
+                "model_version": ocr_processor.engine_config.model_version,
+                "page_hash": page_hash,
+                "cache_hit": cached is not None,
                 "language": language,
                 "output_format": output_format
             }
-        )
+        ))
         
         logger.info(f"任务 {task_id} 处理完成，耗时 {processing_time:.2f} 秒")
         
     except Exception as e:
         logger.error(f"任务 {task_id} 处理失败: {str(e)}")
-        task_results[task_id] = OCRResult(
+        await task_store.update(OCRResult(
             task_id=task_id,
             status="failed",
             error_message=str(e),
             processing_time=(datetime.now() - start_time).total_seconds()
-        )
+        ))
+    finally:
+        upload.close()
 
 @app.post("/ocr/batch")
 async def process_batch(
-    background_tasks: BackgroundTasks,
     files: List[UploadFile] = File(...),
     language: str = "zh-cn",
     extract_tables: bool = True,
@@ -267,47 +924,59 @@ async def process_batch(
     if len(files) > 50:  # 限制批量处理文件数量
         raise HTTPException(status_code=400, detail="批量处理文件数量不能超过50个")
     
+    valid_count = sum(1 for file in files if _validate_extension(file.filename) is None)
+    if valid_count > job_queue.free_slots():
+        raise HTTPException(status_code=503, detail="OCR 任务队列容量不足，请稍后重试")
+    
+    # 先落盘并检查所有文件的大小，任一文件超限时整个请求被拒绝，不留下已入队的任务
+    uploads: Dict[int, SpooledUpload] = {}
+    try:
+        for index, file in enumerate(files):
+            if _validate_extension(file.filename) is None:
+                uploads[index] = await spool_upload(file)
+    except BaseException:
+        for upload in uploads.values():
+            upload.close()
+        raise
+    
     # 创建批量任务
     task_ids = []
-    for file in files:
+    for index, file in enumerate(files):
         task_id = str(uuid.uuid4())
         task_ids.append(task_id)
         
         # 验证文件格式
-        file_extension = os.path.splitext(file.filename)[1].lower()
-        if file_extension not in ocr_processor.supported_formats:
-            task_results[task_id] = OCRResult(
+        upload = uploads.get(index)
+        if upload is None:
+            await task_store.create(OCRResult(
                 task_id=task_id,
                 status="failed",
-                error_message=f"不支持的文件格式: {file_extension}"
-            )
+                error_message=f"不支持的文件格式: {_validate_extension(file.filename)}"
+            ))
             continue
         
         # 创建初始任务结果
-        task_results[task_id] = OCRResult(
-            task_id=task_id,
-            status="processing"
-        )
+        await task_store.create(OCRResult(task_id=task_id, status="processing"))
         
-        # 后台处理
-        background_tasks.add_task(
-            process_document_background,
-            task_id,
-            file,
-            language,
-            extract_tables,
-            quality_check,
-            output_format
-        )
+        try:
+            _enqueue(task_id, upload, language, extract_tables, quality_check, output_format)
+        except asyncio.QueueFull:
+            # 并发请求占满了队列
+            upload.close()
+            await task_store.update(OCRResult(
+                task_id=task_id,
+                status="failed",
+                error_message="OCR 任务队列已满"
+            ))
     
     # 保存批量任务信息
-    batch_results[batch_id] = {
+    await task_store.set_batch(batch_id, {
         "batch_id": batch_id,
         "task_ids": task_ids,
         "total_files": len(files),
         "created_at": datetime.now().isoformat(),
         "status": "processing"
-    }
+    })
     
     return {
         "batch_id": batch_id,
@@ -319,28 +988,31 @@ async def process_batch(
 @app.get("/ocr/status/{task_id}", response_model=OCRResult)
 async def get_task_status(task_id: str):
     """获取任务状态"""
-    if task_id not in task_results:
+    result = await task_store.get(task_id)
+    if result is None:
         raise HTTPException(status_code=404, detail="任务不存在")
     
-    return task_results[task_id]
+    return result
 
 @app.get("/ocr/batch/{batch_id}")
 async def get_batch_status(batch_id: str):
     """获取批量任务状态"""
-    if batch_id not in batch_results:
+    batch_info = await task_store.get_batch(batch_id)
+    if batch_info is None:
         raise HTTPException(status_code=404, detail="批量任务不存在")
     
-    batch_info = batch_results[batch_id]
     task_ids = batch_info["task_ids"]
+    results = await task_store.get_many(task_ids)
     
-    # 统计任务状态
-    completed = sum(1 for tid in task_ids if task_results.get(tid, {}).status == "completed")
-    failed = sum(1 for tid in task_ids if task_results.get(tid, {}).status == "failed")
+    # 统计任务状态（已过期的任务按失败计）
+    completed = sum(1 for result in results if result is not None and result.status == "completed")
+    failed = sum(1 for result in results if result is None or result.status == "failed")
     processing = len(task_ids) - completed - failed
     
     # 更新批量任务状态
-    if processing == 0:
-        batch_results[batch_id]["status"] = "completed" if failed == 0 else "partial_completed"
+    if processing == 0 and batch_info["status"] == "processing":
+        batch_info["status"] = "completed" if failed == 0 else "partial_completed"
+        await task_store.set_batch(batch_id, batch_info)
     
     return {
         "batch_id": batch_id,
@@ -348,8 +1020,8 @@ async def get_batch_status(batch_id: str):
         "completed": completed,
         "failed": failed,
         "processing": processing,
-        "status": batch_results[batch_id]["status"],
-        "task_results": [task_results.get(tid) for tid in task_ids]
+        "status": batch_info["status"],
+        "task_results": results
     }
 
 @app.get("/ocr/models")
@@ -375,18 +1047,18 @@ async def list_models():
 @app.delete("/ocr/tasks/{task_id}")
 async def delete_task(task_id: str):
     """删除任务结果"""
-    if task_id not in task_results:
+    if not await task_store.delete(task_id):
         raise HTTPException(status_code=404, detail="任务不存在")
     
-    del task_results[task_id]
     return {"message": "任务已删除"}
 
 @app.get("/metrics")
 async def get_metrics():
     """获取服务指标"""
-    total_tasks = len(task_results)
-    completed_tasks = sum(1 for result in task_results.values() if result.status == "completed")
-    failed_tasks = sum(1 for result in task_results.values() if result.status == "failed")
+    stats = await task_store.get_stats()
+    total_tasks = stats["total"]
+    completed_tasks = stats["completed"]
+    failed_tasks = stats["failed"]
     processing_tasks = total_tasks - completed_tasks - failed_tasks
     
     return {
@@ -394,9 +1066,12 @@ async def get_metrics():
         "completed_tasks": completed_tasks,
         "failed_tasks": failed_tasks,
         "processing_tasks": processing_tasks,
-        "success_rate": completed_tasks / total_tasks if total_tasks > 0 else 0
+        "success_rate": completed_tasks / total_tasks if total_tasks > 0 else 0,
+        "job_queue": job_queue.get_metrics(),
+        "ocr_engine": ocr_processor.get_engine_metrics(),
+        "result_cache": result_cache.get_stats()
     }
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8002)
\ No newline at end of file
+    uvicorn.run("main:app", host="0.0.0.0", port=8002, workers=OCR_WORKERS)
\ No newline at end of file
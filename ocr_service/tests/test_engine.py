@@ -0,0 +1,148 @@
+"""OCR 引擎测试
+
+使用测试内生成的小模型：检测模型把深色像素映射为文本概率，识别模型把每列
+最深像素映射为字符 "1" 的概率，因此每条黑色竖线识别为一个 "1"。
+"""
+
+import cv2
+import numpy as np
+import pytest
+
+onnx = pytest.importorskip("onnx")
+pytest.importorskip("onnxruntime")
+from onnx import TensorProto, helper
+
+from ocr_service.main import OCREngineConfig, OCREnginePool, OCRProcessor, OnnxOCREngine
+
+
+def save_models(model_dir) -> None:
+    """生成检测、识别模型和字典"""
+    det = helper.make_graph(
+        [
+            helper.make_node("ReduceMean", ["x"], ["mean"], axes=[1], keepdims=1),
+            helper.make_node("Mul", ["mean", "scale"], ["logit"]),
+            helper.make_node("Sigmoid", ["logit"], ["prob"]),
+        ],
+        "det",
+        [helper.make_tensor_value_info("x", TensorProto.FLOAT, [1, 3, None, None])],
+        [helper.make_tensor_value_info("prob", TensorProto.FLOAT, [1, 1, None, None])],
+        [helper.make_tensor("scale", TensorProto.FLOAT, [], [-4.0])]
+    )
+    rec = helper.make_graph(
+        [
+            helper.make_node("ReduceMin", ["x"], ["darkest"], axes=[1, 2], keepdims=0),
+            helper.make_node("Mul", ["darkest", "scale"], ["char"]),
+            helper.make_node("Neg", ["char"], ["blank"]),
+            helper.make_node("Unsqueeze", ["blank", "axis"], ["blank_3d"]),
+            helper.make_node("Unsqueeze", ["char", "axis"], ["char_3d"]),
+            helper.make_node("Concat", ["blank_3d", "char_3d"], ["logits"], axis=2),
+            helper.make_node("Softmax", ["logits"], ["probs"], axis=2),
+        ],
+        "rec",
+        [helper.make_tensor_value_info("x", TensorProto.FLOAT, [None, 3, 48, None])],
+        [helper.make_tensor_value_info("probs", TensorProto.FLOAT, [None, None, 2])],
+        [
+            helper.make_tensor("scale", TensorProto.FLOAT, [], [-4.0]),
+            helper.make_tensor("axis", TensorProto.INT64, [1], [2]),
+        ]
+    )
+    for name, graph in (("det.onnx", det), ("rec.onnx", rec)):
+        model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+        model.ir_version = 8
+        onnx.save(model, str(model_dir / name))
+    (model_dir / "ppocr_keys.txt").write_text("1\n", encoding="utf-8")
+
+
+def make_line(bars: int, width: int = 0) -> np.ndarray:
+    """白底上画若干黑色竖线的文本行"""
+    width = width or bars * 24 + 24
+    image = np.full((48, width, 3), 255, dtype=np.uint8)
+    for index in range(bars):
+        x = 12 + index * 24
+        image[8:40, x:x + 8] = 0
+    return image
+
+
+@pytest.fixture
+def engine_config(tmp_path):
+    save_models(tmp_path)
+    return OCREngineConfig(model_dir=str(tmp_path), rec_batch_size=4, drop_score=0.0)
+
+
+class TestOnnxOCREngine:
+    """ONNX OCR 引擎测试类"""
+    
+    def test_recognize_batches_sorted_by_width(self, engine_config):
+        """测试按宽度排序分批识别，结果顺序与输入一致"""
+        engine = OnnxOCREngine(engine_config)
+        crops = [make_line(bars) for bars in (5, 1, 3, 2, 4, 1, 2)]
+        
+        results = engine.recognize(crops)
+        
+        assert [text for text, _ in results] == ["11111", "1", "111", "11", "1111", "1", "11"]
+        assert all(score > 0.9 for _, score in results)
+        assert engine.rec_calls == 2
+    
+    def test_ocr_detects_and_reads_lines(self, engine_config):
+        """测试整页检测出文本行并按阅读顺序识别"""
+        engine = OnnxOCREngine(engine_config)
+        page = np.full((400, 600, 3), 255, dtype=np.uint8)
+        page[60:100, 50:250] = 0
+        page[200:240, 50:450] = 0
+        
+        result = engine.ocr(page)
+        
+        assert len(result["lines"]) == 2
+        first, second = result["lines"]
+        assert first["bbox"][0][1] < second["bbox"][0][1]
+        assert all(line["text"] == "1" for line in result["lines"])
+        assert result["text_content"] == "1\n1"
+    
+    @pytest.mark.asyncio
+    async def test_processor_uses_pool_and_reports_metrics(self, engine_config):
+        """测试处理器首次使用时加载模型并统计吞吐量"""
+        processor = OCRProcessor(engine_config, workers=1)
+        assert processor.get_engine_metrics() == {"loaded": False}
+        
+        page = np.full((200, 300, 3), 255, dtype=np.uint8)
+        page[50:90, 40:200] = 0
+        _, encoded = cv2.imencode(".png", page)
+        result = await processor.process_image(encoded.tobytes())
+        
+        assert result["text_content"] == "1"
+        assert result["image_size"] == (300, 200)
+        metrics = processor.get_engine_metrics()
+        assert metrics["loaded"] is True
+        assert metrics["pages"] == 1
+        assert metrics["pages_per_second_per_core"] > 0
+
+
+class TestOnnxOCREnginePerformance:
+    """ONNX OCR 引擎性能测试类"""
+    
+    def test_batched_recognition_calls(self, engine_config):
+        """测试按宽度排序批量识别时每批只调用一次识别模型，结果与逐行识别一致"""
+        rng = np.random.default_rng(0)
+        crops = [make_line(int(bars)) for bars in rng.integers(1, 30, size=100)]
+        
+        single = OnnxOCREngine(engine_config.model_copy(update={"rec_batch_size": 1}))
+        batched = OnnxOCREngine(engine_config.model_copy(update={"rec_batch_size": 16}))
+        single_results = single.recognize(crops)
+        batched_results = batched.recognize(crops)
+        
+        assert [text for text, _ in batched_results] == [text for text, _ in single_results]
+        assert (single.rec_calls, batched.rec_calls) == (100, 7)
+    
+    def test_pages_per_second_per_core(self, engine_config):
+        """测试整页识别按会话占用的核数统计吞吐量"""
+        pool = OCREnginePool(engine_config.model_copy(update={"intra_op_threads": 1}))
+        page = np.full((400, 500, 3), 255, dtype=np.uint8)
+        for line in range(8):
+            page[30 + line * 45:55 + line * 45, 60:60 + 20 * (line + 5)] = 0
+        
+        for _ in range(2):
+            pool.run(page)
+        
+        metrics = pool.get_metrics()
+        assert (metrics["pages"], metrics["intra_op_threads"]) == (2, 1)
+        assert metrics["pages_per_second_per_core"] > 0
@@ -0,0 +1,76 @@
+"""识别结果缓存测试"""
+
+import hashlib
+import io
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from ocr_service import main
+from ocr_service.main import InMemoryTaskStore, OCRResultCache, SpooledUpload, process_document_background
+
+
+def make_upload(filename: str, content: bytes) -> SpooledUpload:
+    return SpooledUpload(
+        filename=filename, file=io.BytesIO(content), size=len(content),
+        sha256=hashlib.sha256(content).hexdigest()
+    )
+
+
+class TestOCRResultCache:
+    """识别结果缓存测试类"""
+
+    @pytest.mark.asyncio
+    async def test_local_lru_eviction(self):
+        """测试键格式与后端一致，超过容量时淘汰最久未使用的结果"""
+        cache = OCRResultCache(model_version="1.0.0", max_local_entries=2)
+        for name in ("a", "b"):
+            await cache.set(name, {"text_content": name, "image_size": (1, 1)})
+        await cache.get("a")
+        await cache.set("c", {"text_content": "c"})
+
+        assert cache.key("a") == "ocr:page:1.0.0:zh-cn:a"
+        assert await cache.get("b") is None
+        assert (await cache.get("a"))["text_content"] == "a"
+        assert "image_size" not in await cache.get("c")
+        assert cache.get_stats()["hit_rate"] == 0.75
+
+    @pytest.mark.asyncio
+    async def test_background_task_reuses_cached_result(self):
+        """测试相同内容的文件只识别一次"""
+        cache = OCRResultCache(model_version="1.0.0")
+        store = InMemoryTaskStore()
+        ocr_result = {
+            "text_content": "合同", "confidence_score": 0.9, "lines": [],
+            "image_size": (10, 10), "format": "PNG"
+        }
+        process_image = AsyncMock(return_value=ocr_result)
+        extract_tables = AsyncMock(return_value=[{"table_id": 1}])
+
+        with patch.object(main, "result_cache", cache), patch.object(main, "task_store", store), \
+                patch.object(main.ocr_processor, "process_image", process_image), \
+                patch.object(main.ocr_processor, "extract_tables", extract_tables):
+            for task_id in ("t1", "t2"):
+                await process_document_background(
+                    task_id, make_upload("scan.png", b"same page"), "zh-cn", True, False, "json"
+                )
+
+        assert process_image.await_count == 1
+        assert extract_tables.await_count == 1
+        first, second = await store.get("t1"), await store.get("t2")
+        assert second.status == "completed"
+        assert second.text_content == first.text_content == "合同"
+        assert second.tables == [{"table_id": 1}]
+        assert second.metadata["cache_hit"] is True
+        assert second.metadata["page_hash"] == hashlib.sha256(b"same page").hexdigest()
+
+        # 识别语言不同时不复用结果
+        with patch.object(main, "result_cache", cache), patch.object(main, "task_store", store), \
+                patch.object(main.ocr_processor, "process_image", process_image), \
+                patch.object(main.ocr_processor, "extract_tables", extract_tables):
+            await process_document_background(
+                "t3", make_upload("scan.png", b"same page"), "en", True, False, "json"
+            )
+
+        assert process_image.await_count == 2
+        assert (await store.get("t3")).metadata["cache_hit"] is False
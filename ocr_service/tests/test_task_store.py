@@ -0,0 +1,176 @@
+"""任务存储、上传落盘与任务队列测试"""
+
+import asyncio
+import hashlib
+import io
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi import HTTPException, UploadFile
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from ocr_service import main
+from ocr_service.main import InMemoryTaskStore, OCRJobQueue, OCRResult, spool_upload
+
+
+def make_png() -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (200, 100), "white").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class TestInMemoryTaskStore:
+    """进程内任务存储测试类"""
+
+    @pytest.mark.asyncio
+    async def test_evicts_oldest_over_capacity(self):
+        """测试超过容量时淘汰最早写入的任务，统计不受淘汰影响"""
+        store = InMemoryTaskStore(max_entries=2)
+        for task_id in ("a", "b", "c"):
+            await store.create(OCRResult(task_id=task_id, status="processing"))
+        await store.update(OCRResult(task_id="c", status="completed"))
+
+        assert await store.get("a") is None
+        assert [result.task_id for result in await store.get_many(["b", "c"])] == ["b", "c"]
+        assert await store.get_stats() == {"total": 3, "completed": 1, "failed": 0, "stored_tasks": 2}
+
+    @pytest.mark.asyncio
+    async def test_expires_after_ttl(self):
+        """测试任务与批量任务按 TTL 过期"""
+        store = InMemoryTaskStore(ttl=1)
+        await store.create(OCRResult(task_id="a", status="processing"))
+        await store.set_batch("batch", {"task_ids": ["a"]})
+
+        with patch.object(main.time, "monotonic", return_value=time.monotonic() + 2):
+            assert await store.get("a") is None
+            assert await store.get_batch("batch") is None
+
+
+class TestSpoolUpload:
+    """上传落盘测试类"""
+
+    @pytest.mark.asyncio
+    async def test_spools_and_hashes(self):
+        """测试分块读取的内容与哈希完整"""
+        content = b"x" * (3 * main.UPLOAD_CHUNK_SIZE + 17)
+        with patch.object(main, "UPLOAD_SPOOL_MEMORY", 1024):
+            upload = await spool_upload(UploadFile(io.BytesIO(content), filename="a.png"))
+
+        assert upload.size == len(content)
+        assert upload.sha256 == hashlib.sha256(content).hexdigest()
+        assert upload.file._rolled
+        assert upload.read() == content
+        upload.close()
+
+    @pytest.mark.asyncio
+    async def test_rejects_oversized_upload(self):
+        """测试超过大小限制时返回413"""
+        with patch.object(main, "MAX_UPLOAD_SIZE", 10):
+            with pytest.raises(HTTPException) as error:
+                await spool_upload(UploadFile(io.BytesIO(b"x" * 11), filename="a.png"))
+        assert error.value.status_code == 413
+
+
+class TestOCRJobQueue:
+    """任务队列测试类"""
+
+    @pytest.mark.asyncio
+    async def test_bounded_concurrency(self):
+        """测试同时执行的任务数不超过工作协程数，队列满时拒绝提交"""
+        job_queue = OCRJobQueue(workers=2, max_pending=3)
+        running = peak = 0
+
+        async def job():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+        for _ in range(3):
+            job_queue.submit(job)
+        with pytest.raises(asyncio.QueueFull):
+            job_queue.submit(job)
+        await asyncio.sleep(0)
+        job_queue.submit(job)
+
+        await job_queue.join()
+        assert peak == 2
+        assert job_queue.get_metrics()["processed"] == 4
+        await job_queue.stop()
+
+
+class TestOCREndpoints:
+    """任务接口测试类"""
+
+    @pytest.fixture
+    def client(self):
+        ocr_result = {
+            "text_content": "发票", "confidence_score": 0.9, "lines": [],
+            "image_size": (200, 100), "format": "PNG"
+        }
+        with patch.object(main, "task_store", InMemoryTaskStore()), \
+                patch.object(main, "job_queue", OCRJobQueue(workers=1, max_pending=2)), \
+                patch.object(main, "result_cache", main.OCRResultCache(model_version="test")), \
+                patch.object(main.ocr_processor, "process_image", AsyncMock(return_value=ocr_result)), \
+                patch.object(main.ocr_processor, "extract_tables", AsyncMock(return_value=[])):
+            with TestClient(main.app) as client:
+                yield client
+
+    def wait_for(self, client, task_id: str) -> dict:
+        for _ in range(100):
+            result = client.get(f"/ocr/status/{task_id}").json()
+            if result["status"] != "processing":
+                return result
+            time.sleep(0.01)
+        raise AssertionError("任务未完成")
+
+    def test_process_and_batch(self, client):
+        """测试单文件与批量任务经队列处理完成，删除后不可查询"""
+        png = make_png()
+        task_id = client.post(
+            "/ocr/process", files={"file": ("a.png", png, "image/png")}, params={"quality_check": False}
+        ).json()["task_id"]
+        result = self.wait_for(client, task_id)
+        assert result["status"] == "completed"
+        assert result["metadata"]["file_size"] == len(png)
+
+        batch = client.post(
+            "/ocr/batch",
+            files=[("files", ("b.png", png, "image/png")), ("files", ("c.txt", b"text", "text/plain"))],
+            params={"quality_check": False}
+        ).json()
+        for batch_task_id in batch["task_ids"]:
+            self.wait_for(client, batch_task_id)
+        status = client.get(f"/ocr/batch/{batch['batch_id']}").json()
+        assert (status["completed"], status["failed"], status["status"]) == (1, 1, "partial_completed")
+
+        assert client.delete(f"/ocr/tasks/{task_id}").status_code == 200
+        assert client.get(f"/ocr/status/{task_id}").status_code == 404
+        metrics = client.get("/metrics").json()
+        assert (metrics["total_tasks"], metrics["failed_tasks"]) == (3, 1)
+        assert metrics["job_queue"]["processed"] == 2
+
+    def test_rejects_batch_when_queue_full(self, client):
+        """测试队列容量不足时批量请求整体返回503"""
+        files = [("files", (f"{index}.png", make_png(), "image/png")) for index in range(3)]
+        response = client.post("/ocr/batch", files=files)
+        assert response.status_code == 503
+
+    def test_rejects_batch_with_oversized_file(self, client):
+        """测试批量中任一文件超过大小限制时整体返回413，不入队任何文件"""
+        files = [
+            ("files", ("a.png", make_png(), "image/png")),
+            ("files", ("b.png", b"x" * 2048, "image/png")),
+        ]
+        with patch.object(main, "MAX_UPLOAD_SIZE", 1024), \
+                patch.object(main.SpooledUpload, "close", autospec=True, side_effect=main.SpooledUpload.close) as close:
+            response = client.post("/ocr/batch", files=files)
+
+        assert response.status_code == 413
+        assert close.call_count == 1
+        metrics = client.get("/metrics").json()
+        assert metrics["total_tasks"] == 0
+        assert metrics["job_queue"]["processed"] == 0